@@ -10,11 +10,15 @@ import ipaddress
 from urllib.parse import urlparse
 import re
 from typing import Dict, Any, Optional
-import dns.resolver
-import asyncio
+
+from app.utils.dns_resolver import get_dns_resolver
+from app.utils.ip_trie import IPPrefixTrie
+from app.utils.metrics import DNS_VALIDATION
+from app.utils.tracing import traced
 
 # Blocked IP ranges for SSRF protection
 BLOCKED_IP_RANGES = [
+    ipaddress.ip_network("0.0.0.0/8"),
     ipaddress.ip_network("10.0.0.0/8"),
     ipaddress.ip_network("172.16.0.0/12"),
     ipaddress.ip_network("192.168.0.0/16"),
@@ -22,34 +26,39 @@ BLOCKED_IP_RANGES = [
     ipaddress.ip_network("127.0.0.0/8"),
     ipaddress.ip_network("224.0.0.0/4"),
     ipaddress.ip_network("240.0.0.0/4"),
+    ipaddress.ip_network("::/128"),
+    ipaddress.ip_network("::1/128"),
+    ipaddress.ip_network("fc00::/7"),
+    ipaddress.ip_network("fe80::/10"),
+    ipaddress.ip_network("ff00::/8"),
 ]
 
+# Lookup structure for BLOCKED_IP_RANGES; is_blocked_ip runs for every
+# browser connection, not just submitted URLs
+_BLOCKED_TRIE = IPPrefixTrie(BLOCKED_IP_RANGES)
+
 def is_blocked_ip(ip: str) -> bool:
     """Check if IP is in blocked range"""
     try:
         ip_addr = ipaddress.ip_address(ip)
-        for blocked_range in BLOCKED_IP_RANGES:
-            if ip_addr in blocked_range:
-                return True
-        return False
+        if ip_addr.version == 6 and ip_addr.ipv4_mapped:
+            # ::ffff:127.0.0.1 reaches 127.0.0.1
+            ip_addr = ip_addr.ipv4_mapped
+        return ip_addr in _BLOCKED_TRIE
     except ValueError:
         return True  # Invalid IP is considered blocked
 
 async def resolve_hostname(hostname: str) -> list:
-    """Resolve hostname to IP addresses"""
+    """
+    Resolve hostname to its IPv4 and IPv6 addresses without blocking the
+    event loop (A and AAAA in parallel, cached per record TTL).
+    """
     try:
-        # Try IPv4 first
-        result = dns.resolver.resolve(hostname, "A")
-        return [str(rdata) for rdata in result]
+        return await get_dns_resolver().resolve(hostname)
     except Exception:
-        try:
-            # Try IPv6
-            result = dns.resolver.resolve(hostname, "AAAA")
-            # For now, we'll be conservative with IPv6
-            return []
-        except Exception:
-            return []
+        return []
 
+@traced("validate_url")
 async def validate_url(url_string: str) -> Dict[str, Any]:
     """
     Validate URL and check for SSRF vulnerabilities.
@@ -113,7 +122,8 @@ async def validate_url(url_string: str) -> Dict[str, Any]:
     
     # Resolve hostname and check IP addresses
     try:
-        addresses = await resolve_hostname(hostname)
+        with DNS_VALIDATION.time():
+            addresses = await resolve_hostname(hostname)
         for ip in addresses:
             if is_blocked_ip(ip):
                 return {"valid": False, "error": "Resolved to private/internal IP address"}
@@ -4,17 +4,27 @@ Compliance Check Routes
 Handles API endpoints for web compliance checking.
 """
 
-from fastapi import APIRouter, HTTPException, Request, Depends
+from fastapi import APIRouter, HTTPException, Request, Response, Depends
+from fastapi.responses import StreamingResponse
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from pydantic import BaseModel, HttpUrl
-from typing import Optional
+from typing import AsyncIterator, List, Optional
 import os
+import json
 import asyncio
 
-from app.services.compliance_checks import run_compliance_checks
-from app.services.ai_recommender import generate_recommendations
-from app.middleware.security import validate_url, sanitize_url
+from app.services.check_pipeline import analyze_url, run_check, stream_check, parse_cache_control
+from app.services.compliance_checks import CheckFunction, describe_checks, get_default_engine, select_engine_checks
+from app.services.result_cache import get_result_cache
+from app.services.recommendation_cache import get_recommendation_cache
+from app.services.page_state import get_page_state_store
+from app.services.batch_checker import HostLimiter, batch_settings, parse_url_list, run_batch
+from app.middleware.security import validate_url
+from app.utils.browser_pool import PoolTimeoutError
+from app.utils.static_analyzer import StaticAnalysisError
+from app.utils.dns_resolver import get_dns_resolver
+from app.utils.sse import SSE_HEADERS, format_sse
 
 router = APIRouter()
 
@@ -24,113 +34,157 @@ limiter = Limiter(key_func=get_remote_address)
 # Request model
 class ComplianceCheckRequest(BaseModel):
     url: str
+    checks: Optional[List[str]] = None
+    engine: Optional[str] = None
+    incremental: bool = False
+
+class HtmlCheckRequest(BaseModel):
+    html: str
+    url: Optional[str] = None
+    checks: Optional[List[str]] = None
+
+class BatchCheckRequest(BaseModel):
+    urls: List[str]
+    recommendations: bool = False
+    incremental: bool = False
 
 # Stricter rate limit for check endpoint
 CHECK_RATE_LIMIT = os.getenv("CHECK_RATE_LIMIT_MAX", "20")
 
+# Largest uploaded document for /api/check/html
+STATIC_MAX_BYTES = int(os.getenv("STATIC_MAX_BYTES", 5 * 1024 * 1024))
+
+# A batch counts once against its own limit
+BATCH_RATE_LIMIT = os.getenv("BATCH_RATE_LIMIT_MAX", "5")
+
+async def resolve_check_url(url: str) -> str:
+    """
+    Validate a submitted URL (format and SSRF rules) and return the URL
+    string to analyze.
+    
+    Args:
+        url: URL as submitted by the client
+        
+    Returns:
+        URL string safe to hand to the browser
+        
+    Raises:
+        HTTPException: 400 if the URL is missing, malformed or blocked
+    """
+    url = url.strip()
+    
+    # Validate input
+    if not url or not isinstance(url, str):
+        raise HTTPException(
+            status_code=400,
+            detail="URL is required and must be a string"
+        )
+    
+    # Validate URL and check for SSRF vulnerabilities
+    validation = await validate_url(url)
+    if not validation["valid"]:
+        raise HTTPException(
+            status_code=400,
+            detail=validation["error"]
+        )
+    
+    valid_url = validation["url"]
+    # Use geturl() to properly reconstruct URL, or use original if it's a string
+    if hasattr(valid_url, 'geturl'):
+        url_string = valid_url.geturl()
+    else:
+        # valid_url is already a string or ParseResult - reconstruct properly
+        from urllib.parse import urlunparse
+        url_string = urlunparse(valid_url) if hasattr(valid_url, 'scheme') else str(valid_url)
+    
+    # If URL string is empty or invalid, use the original validated URL
+    if not url_string or url_string == "":
+        url_string = url.strip()
+    
+    # Log the request (sanitized) - use ASCII safe encoding
+    try:
+        hostname = valid_url.hostname if hasattr(valid_url, 'hostname') else 'unknown'
+        print(f"Analyzing URL: {hostname} (sanitized)")
+    except UnicodeEncodeError:
+        print(f"Analyzing URL: (hostname contains special characters)")
+    
+    return url_string
+
+def resolve_checks(check_ids: Optional[List[str]], engine: Optional[str] = None) -> Optional[List[CheckFunction]]:
+    """
+    Resolve requested check ids for an engine (None runs every check the
+    engine supports).
+    
+    Raises:
+        HTTPException: 400 if an id or the engine is unknown, the list is
+            empty, or a browser-only check is requested from the static engine
+    """
+    try:
+        return select_engine_checks(check_ids, engine or get_default_engine())
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+@router.get("/checks")
+async def list_checks():
+    """
+    Registered checks: id, name, WCAG criterion, page data fields read,
+    cost class, version and whether the static engine can run it. Pass ids
+    as "checks" to run a subset.
+    """
+    return {"checks": describe_checks()}
+
 @router.post("/check")
 @limiter.limit(f"{CHECK_RATE_LIMIT}/hour")
 async def check_compliance(
     request: Request,
+    response: Response,
     body: ComplianceCheckRequest
 ):
     """
     Check website compliance with WCAG standards.
     
+    Runs every registered check unless the body lists check ids in
+    "checks". "engine" picks the analysis engine: "browser" (Chromium),
+    "static" (fetched markup only; runs the checks markup can answer) or
+    "auto" (static when the selected checks allow it and the page isn't
+    rendered on the client). Results are cached per normalized URL, check
+    selection and engine; send "Cache-Control: no-cache" to force a fresh
+    analysis. Concurrent checks of the same URL share one analysis. The
+    X-Cache header reports HIT, MISS or COALESCED.
+    
+    With "incremental": true, a fresh analysis first sends a conditional
+    request with the validators stored from the last check of this URL;
+    an unchanged page is answered from the stored results without loading
+    it, and a changed one re-evaluates only the checks whose inputs
+    changed. The report's "analysis" says which happened.
+    
     Args:
         request: FastAPI request object (for rate limiting)
-        body: Request body containing URL to check
+        response: FastAPI response object (for cache headers)
+        body: Request body containing URL (and optionally check ids) to check
         
     Returns:
         JSON response with compliance check results
     """
     try:
-        url = body.url.strip()
-        
-        # Validate input
-        if not url or not isinstance(url, str):
-            raise HTTPException(
-                status_code=400,
-                detail="URL is required and must be a string"
-            )
-        
-        # Validate URL and check for SSRF vulnerabilities
-        validation = await validate_url(url)
-        if not validation["valid"]:
-            raise HTTPException(
-                status_code=400,
-                detail=validation["error"]
-            )
+        checks = resolve_checks(body.checks, body.engine)
+        url_string = await resolve_check_url(body.url)
         
-        valid_url = validation["url"]
-        # Use geturl() to properly reconstruct URL, or use original if it's a string
-        if hasattr(valid_url, 'geturl'):
-            url_string = valid_url.geturl()
-        else:
-            # valid_url is already a string or ParseResult - reconstruct properly
-            from urllib.parse import urlunparse
-            url_string = urlunparse(valid_url) if hasattr(valid_url, 'scheme') else str(valid_url)
-        
-        # If URL string is empty or invalid, use the original validated URL
-        if not url_string or url_string == "":
-            url_string = url.strip()
-        
-        # Log the request (sanitized) - use ASCII safe encoding
-        try:
-            hostname = valid_url.hostname if hasattr(valid_url, 'hostname') else 'unknown'
-            print(f"Analyzing URL: {hostname} (sanitized)")
-        except UnicodeEncodeError:
-            print(f"Analyzing URL: (hostname contains special characters)")
+        # Cache-Control: no-cache forces a fresh analysis
+        read_cache, write_cache = parse_cache_control(request.headers.get("cache-control"))
         
         # Set timeout for the entire operation
         try:
-            # Run compliance checks with timeout
-            results = await asyncio.wait_for(
-                run_compliance_checks(url_string),
-                timeout=60.0  # 60 second timeout
+            report, cache_status = await run_check(
+                url_string,
+                read_cache=read_cache,
+                write_cache=write_cache,
+                checks=checks,
+                engine=body.engine,
+                incremental=body.incremental,
             )
-            
-            # Get failed checks
-            failed_checks = [check for check in results["checks"] if not check["passed"]]
-            
-            # Generate AI recommendations for failed checks (with timeout)
-            recommendations = []
-            try:
-                recommendations = await asyncio.wait_for(
-                    generate_recommendations(failed_checks, url_string),
-                    timeout=45.0  # 45 second timeout
-                )
-            except asyncio.TimeoutError:
-                recommendations = []
-            except Exception as recommendation_error:
-                recommendations = []
-            
-            # Map recommendations to checks and sanitize output
-            checks_with_recommendations = []
-            for check in results["checks"]:
-                recommendation = next(
-                    (rec for rec in recommendations if rec["checkName"] == check["name"]),
-                    None
-                )
-                checks_with_recommendations.append({
-                    "name": check["name"],
-                    "passed": check["passed"],
-                    "details": (check["details"] or "")[:1000],  # Limit details length
-                    "recommendation": (recommendation["recommendation"][:500] 
-                                     if recommendation and recommendation.get("recommendation") 
-                                     else None),  # Limit recommendation length
-                })
-            
-            # Sanitize URL in response
-            from datetime import datetime
-            return {
-                "url": sanitize_url(url_string),
-                "checks": checks_with_recommendations,
-                "score": results["score"],
-                "passedCount": results["passedCount"],
-                "totalCount": results["totalCount"],
-                "timestamp": datetime.utcnow().isoformat(),
-            }
+            response.headers["X-Cache"] = cache_status
+            return report
             
         except asyncio.TimeoutError:
             raise HTTPException(
@@ -141,6 +195,16 @@ async def check_compliance(
     except HTTPException:
         # Re-raise HTTP exceptions
         raise
+    except PoolTimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail="All browsers are busy - please retry shortly"
+        )
+    except StaticAnalysisError as error:
+        raise HTTPException(
+            status_code=502,
+            detail=f"Static analysis failed: {error}"
+        )
     except Exception as error:
         # Log error with sanitized information (handle Windows encoding)
         try:
@@ -157,6 +221,189 @@ async def check_compliance(
             detail="Failed to analyze webpage" + (f": {error_msg}" if is_development else "")
         )
 
+async def check_event_stream(
+    url_string: str,
+    read_cache: bool = True,
+    write_cache: bool = True,
+    checks: Optional[List[CheckFunction]] = None,
+    engine: Optional[str] = None,
+    incremental: bool = False
+) -> AsyncIterator[str]:
+    """
+    SSE body for a streamed check: checks, one recommendation event per
+    failed check, then done; or an error event if the analysis fails.
+    """
+    event_id = 0
+    try:
+        async for event, data in stream_check(
+            url_string, read_cache=read_cache, write_cache=write_cache, checks=checks, engine=engine,
+            incremental=incremental
+        ):
+            event_id += 1
+            yield format_sse({"id": event_id, "event": event, "data": data})
+    except asyncio.TimeoutError:
+        detail = "Request timeout - analysis took too long"
+    except PoolTimeoutError:
+        detail = "All browsers are busy - please retry shortly"
+    except StaticAnalysisError as error:
+        detail = f"Static analysis failed: {error}"
+    except Exception as error:
+        error_str = str(error).encode('ascii', 'replace').decode('ascii')
+        print(f"Error in streamed compliance check: {error.__class__.__name__}: {error_str}")
+        is_development = os.getenv("NODE_ENV", "development") == "development"
+        detail = "Failed to analyze webpage" + (f": {error_str}" if is_development else "")
+    else:
+        return
+    yield format_sse({"id": event_id + 1, "event": "error", "data": {"error": detail}})
+
+@router.post("/check/stream")
+@limiter.limit(f"{CHECK_RATE_LIMIT}/hour")
+async def check_compliance_stream(request: Request, body: ComplianceCheckRequest):
+    """
+    Check website compliance, streaming the report as Server-Sent Events.
+    
+    A "checks" event carries the score and check results as soon as the
+    browser analysis finishes; a "recommendation" event follows for each
+    failed check as its model call completes; "done" carries the full
+    report (the same body /api/check returns). Failures after the stream
+    has started arrive as an "error" event. Honors the same Cache-Control
+    directives, check selection, engine choice and incremental mode as
+    /api/check.
+    
+    Args:
+        request: FastAPI request object (for rate limiting)
+        body: Request body containing URL (and optionally check ids) to check
+        
+    Returns:
+        text/event-stream response
+    """
+    checks = resolve_checks(body.checks, body.engine)
+    url_string = await resolve_check_url(body.url)
+    read_cache, write_cache = parse_cache_control(request.headers.get("cache-control"))
+    
+    return StreamingResponse(
+        check_event_stream(
+            url_string, read_cache=read_cache, write_cache=write_cache, checks=checks, engine=body.engine,
+            incremental=body.incremental
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+@router.post("/check/html")
+@limiter.limit(f"{CHECK_RATE_LIMIT}/hour")
+async def check_html(request: Request, body: HtmlCheckRequest):
+    """
+    Check uploaded HTML with the static engine (no fetch, no browser).
+    
+    Runs the checks markup can answer (or the subset listed in "checks").
+    "url", if given, is the base relative links resolve against and is
+    echoed in the report. Reports are not cached.
+    
+    Args:
+        request: FastAPI request object (for rate limiting)
+        body: Markup, optional base URL and check ids
+        
+    Returns:
+        JSON response with compliance check results
+    """
+    if len(body.html.encode("utf-8")) > STATIC_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"HTML is too large (max {STATIC_MAX_BYTES} bytes)")
+    checks = resolve_checks(body.checks, "static")
+    
+    try:
+        return await analyze_url((body.url or "").strip(), checks=checks, engine="static", html=body.html)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Request timeout - analysis took too long")
+    except StaticAnalysisError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+async def _read_batch_request(request: Request) -> BatchCheckRequest:
+    """Parse a batch from a JSON body or a multipart file upload"""
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith("multipart/form-data"):
+            form = await request.form()
+            upload = form.get("file")
+            if upload is None or isinstance(upload, str):
+                raise HTTPException(status_code=400, detail="Upload a file field with one URL per line")
+            text = (await upload.read()).decode("utf-8-sig", errors="replace")
+            recommendations = str(form.get("recommendations", "")).lower() in ("1", "true", "yes")
+            incremental = str(form.get("incremental", "")).lower() in ("1", "true", "yes")
+            return BatchCheckRequest(urls=parse_url_list(text), recommendations=recommendations, incremental=incremental)
+        return BatchCheckRequest(**(await request.json()))
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(
+            status_code=400,
+            detail='Send JSON {"urls": [...]} or a multipart file upload'
+        )
+
+@router.post("/check/batch")
+@limiter.limit(f"{BATCH_RATE_LIMIT}/hour")
+async def check_batch(request: Request):
+    """
+    Check many URLs in one call, streaming results as NDJSON.
+    
+    Accepts JSON {"urls": [...], "recommendations": false} or a multipart
+    upload with a "file" field (one URL per line, or a CSV whose first
+    column is the URL). Each URL is validated like /api/check; failures
+    are reported per line instead of failing the batch. The last line is
+    a summary with aggregate throughput.
+    
+    Args:
+        request: FastAPI request object (for rate limiting and the body)
+        
+    Returns:
+        application/x-ndjson stream, one JSON object per completed URL
+    """
+    batch = await _read_batch_request(request)
+    settings = batch_settings()
+    
+    if not batch.urls:
+        raise HTTPException(status_code=400, detail="At least one URL is required")
+    if len(batch.urls) > settings["maxUrls"]:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many URLs (max {settings['maxUrls']} per batch)"
+        )
+    
+    print(f"Batch check: {len(batch.urls)} URLs")
+    lines = run_batch(
+        batch.urls,
+        concurrency=settings["concurrency"],
+        host_limiter=HostLimiter(settings["perHost"], settings["hostIntervalMs"] / 1000),
+        recommendations=batch.recommendations,
+        incremental=batch.incremental,
+    )
+    
+    async def ndjson():
+        async for line in lines:
+            yield json.dumps(line) + "\n"
+    
+    return StreamingResponse(
+        ndjson(),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"},
+    )
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """
+    Result cache hit/miss counters, with the recommendation cache's under
+    "recommendations", incremental re-check outcomes under "pageState"
+    and the DNS cache's under "dns".
+    """
+    recommendation_stats = await asyncio.to_thread(get_recommendation_cache().stats)
+    page_state_stats = await asyncio.to_thread(get_page_state_store().stats)
+    return {
+        **get_result_cache().stats(),
+        "recommendations": recommendation_stats,
+        "pageState": page_state_stats,
+        "dns": get_dns_resolver().stats(),
+    }
+
 @router.post("/cleanup")
 async def cleanup_browser(request: Request):
     """
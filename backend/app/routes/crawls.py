@@ -0,0 +1,142 @@
+"""
+Crawl Routes
+
+Site crawls: start a crawl from a seed URL, follow its site-level report,
+page through per-URL results, and pause or resume it.
+"""
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+from pydantic import BaseModel
+from typing import Any, Dict
+import os
+import asyncio
+
+from app.routes.compliance import resolve_check_url
+from app.services.crawler import get_crawl_manager
+
+router = APIRouter()
+
+# Rate limiter
+limiter = Limiter(key_func=get_remote_address)
+
+CRAWL_RATE_LIMIT = os.getenv("CRAWL_RATE_LIMIT_MAX", "5")
+
+# Upper bounds on what a client may ask for
+CRAWL_MAX_DEPTH_LIMIT = int(os.getenv("CRAWL_MAX_DEPTH_LIMIT", 5))
+CRAWL_MAX_PAGES_LIMIT = int(os.getenv("CRAWL_MAX_PAGES_LIMIT", 10000))
+
+
+class CrawlRequest(BaseModel):
+    url: str
+    maxDepth: int = 2
+    maxPages: int = 100
+
+
+async def _get_crawl(crawl_id: str) -> Dict[str, Any]:
+    crawl = await asyncio.to_thread(get_crawl_manager().frontier.get_crawl, crawl_id)
+    if crawl is None:
+        raise HTTPException(status_code=404, detail="Crawl not found")
+    return crawl
+
+
+@router.post("/crawls", status_code=202)
+@limiter.limit(f"{CRAWL_RATE_LIMIT}/hour")
+async def start_crawl(request: Request, body: CrawlRequest):
+    """
+    Start crawling a site from a seed URL.
+
+    Same-origin links are followed up to maxDepth levels and maxPages
+    pages, honoring robots.txt. Each page gets the full set of checks.
+
+    Args:
+        request: FastAPI request object (for rate limiting)
+        body: Seed URL and limits
+
+    Returns:
+        Crawl id and the URLs to follow it
+    """
+    if not 0 <= body.maxDepth <= CRAWL_MAX_DEPTH_LIMIT:
+        raise HTTPException(status_code=400, detail=f"maxDepth must be between 0 and {CRAWL_MAX_DEPTH_LIMIT}")
+    if not 1 <= body.maxPages <= CRAWL_MAX_PAGES_LIMIT:
+        raise HTTPException(status_code=400, detail=f"maxPages must be between 1 and {CRAWL_MAX_PAGES_LIMIT}")
+
+    url_string = await resolve_check_url(body.url)
+
+    manager = get_crawl_manager()
+    if manager.running_count() >= manager.max_running:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many crawls running - please retry later",
+            headers={"Retry-After": "60"},
+        )
+
+    crawl_id = await manager.start(url_string, body.maxDepth, body.maxPages)
+    status_url = f"/api/crawls/{crawl_id}"
+    return JSONResponse(
+        status_code=202,
+        content={
+            "crawlId": crawl_id,
+            "status": "running",
+            "statusUrl": status_url,
+            "pagesUrl": f"{status_url}/pages",
+        },
+        headers={"Location": status_url},
+    )
+
+
+@router.get("/crawls/{crawl_id}")
+async def get_crawl(crawl_id: str):
+    """
+    Crawl status with its site-level report so far.
+    """
+    crawl = await _get_crawl(crawl_id)
+    summary = await asyncio.to_thread(get_crawl_manager().frontier.summary, crawl_id)
+    return {
+        "crawlId": crawl["id"],
+        "seed": crawl["seed"],
+        "status": crawl["status"],
+        "error": crawl["error"],
+        "maxDepth": crawl["max_depth"],
+        "maxPages": crawl["max_pages"],
+        "createdAt": crawl["created_at"],
+        "updatedAt": crawl["updated_at"],
+        **summary,
+    }
+
+
+@router.get("/crawls/{crawl_id}/pages")
+async def get_crawl_pages(crawl_id: str, offset: int = 0, limit: int = 100):
+    """
+    Per-page results, in discovery order.
+    """
+    await _get_crawl(crawl_id)
+    limit = max(1, min(limit, 1000))
+    pages = await asyncio.to_thread(get_crawl_manager().frontier.pages, crawl_id, max(0, offset), limit)
+    return {"crawlId": crawl_id, "offset": offset, "limit": limit, "pages": pages}
+
+
+@router.post("/crawls/{crawl_id}/pause")
+async def pause_crawl(crawl_id: str):
+    """
+    Stop a running crawl; it can be resumed later.
+    """
+    await _get_crawl(crawl_id)
+    if not await get_crawl_manager().pause(crawl_id):
+        raise HTTPException(status_code=409, detail="Crawl is not running")
+    return {"crawlId": crawl_id, "status": "paused"}
+
+
+@router.post("/crawls/{crawl_id}/resume")
+async def resume_crawl(crawl_id: str):
+    """
+    Continue a paused or interrupted crawl where it left off.
+    """
+    crawl = await _get_crawl(crawl_id)
+    if crawl["status"] == "done":
+        raise HTTPException(status_code=409, detail="Crawl is already complete")
+    if not get_crawl_manager().resume(crawl_id):
+        raise HTTPException(status_code=409, detail="Crawl is already running")
+    return {"crawlId": crawl_id, "status": "running"}
@@ -0,0 +1,133 @@
+"""
+Job Routes
+
+Asynchronous compliance checks: submit a job, then poll it or follow its
+progress as Server-Sent Events.
+"""
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+from typing import AsyncIterator, Optional
+import os
+
+from app.routes.compliance import ComplianceCheckRequest, CHECK_RATE_LIMIT, resolve_check_url, resolve_checks
+from app.services.check_pipeline import parse_cache_control
+from app.services.job_queue import Job, JobQueueFullError, get_job_manager
+from app.utils.sse import SSE_HEADERS, format_sse
+
+router = APIRouter()
+
+# Rate limiter
+limiter = Limiter(key_func=get_remote_address)
+
+# Seconds between SSE keep-alive comments, kept well under proxy read timeouts
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", 15))
+
+# Suggested client back-off when the queue is full
+QUEUE_FULL_RETRY_AFTER = os.getenv("JOB_RETRY_AFTER_SECONDS", "30")
+
+
+def _get_job(job_id: str) -> Job:
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+async def job_event_stream(job: Job, last_event_id: int = 0, heartbeat: Optional[float] = None) -> AsyncIterator[str]:
+    """
+    SSE body for a job: past events after last_event_id, then live ones
+    until the job finishes.
+    """
+    async for record in job.follow(after=last_event_id, heartbeat=heartbeat):
+        if record is None:
+            yield ": keep-alive\n\n"
+        else:
+            yield format_sse(record)
+
+
+@router.post("/jobs", status_code=202)
+@limiter.limit(f"{CHECK_RATE_LIMIT}/hour")
+async def submit_job(request: Request, body: ComplianceCheckRequest):
+    """
+    Queue a compliance check and return its job id immediately.
+
+    Honors the same Cache-Control directives, check selection, engine and
+    incremental options as /api/check. Responds 503
+    with Retry-After when the queue is full.
+
+    Args:
+        request: FastAPI request object (for rate limiting)
+        body: Request body containing URL to check
+
+    Returns:
+        Job id and the URLs to poll or stream it
+    """
+    checks = resolve_checks(body.checks, body.engine)
+    url_string = await resolve_check_url(body.url)
+    read_cache, write_cache = parse_cache_control(request.headers.get("cache-control"))
+
+    try:
+        job = await get_job_manager().submit(
+            url_string, read_cache=read_cache, write_cache=write_cache, checks=checks,
+            engine=body.engine, incremental=body.incremental,
+        )
+    except JobQueueFullError:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many queued checks - please retry shortly",
+            headers={"Retry-After": QUEUE_FULL_RETRY_AFTER},
+        )
+
+    status_url = f"/api/jobs/{job.id}"
+    return JSONResponse(
+        status_code=202,
+        content={
+            "jobId": job.id,
+            "status": job.status,
+            "statusUrl": status_url,
+            "eventsUrl": f"{status_url}/events",
+        },
+        headers={"Location": status_url},
+    )
+
+
+@router.get("/jobs/stats")
+async def job_stats():
+    """
+    Queue depth and job counts.
+    """
+    return get_job_manager().stats()
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Current status of a job, with the report once it is done.
+    """
+    return _get_job(job_id).to_dict()
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request):
+    """
+    Stream a job's progress as Server-Sent Events.
+
+    Events: status (queued, running), phase (navigating, extracting,
+    checking, recommending), then done or failed. Reconnecting clients
+    send Last-Event-ID to resume where they left off.
+    """
+    job = _get_job(job_id)
+
+    try:
+        last_event_id = int(request.headers.get("last-event-id", 0))
+    except ValueError:
+        last_event_id = 0
+
+    return StreamingResponse(
+        job_event_stream(job, last_event_id, heartbeat=SSE_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
@@ -0,0 +1,85 @@
+"""
+Metrics Routes
+
+Prometheus scrape endpoint. Latency histograms are recorded as work
+happens; the gauges below are read from live state on each scrape.
+"""
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
+import asyncio
+import os
+
+from app.services.job_queue import get_job_manager
+from app.services.page_state import get_page_state_store
+from app.services.recommendation_cache import get_recommendation_cache
+from app.services.result_cache import get_result_cache
+from app.utils import playwright_helper
+from app.utils.dns_resolver import get_dns_resolver
+from app.utils.metrics import (
+    BROWSER_SLOTS,
+    CACHE_ENTRIES,
+    CACHE_HIT_RATIO,
+    CHROMIUM_RSS,
+    CONTENT_TYPE,
+    JOB_QUEUE_DEPTH,
+    JOBS,
+    REGISTRY,
+)
+
+router = APIRouter()
+
+
+def metrics_enabled() -> bool:
+    """Whether /metrics is served (METRICS_ENABLED)"""
+    return os.getenv("METRICS_ENABLED", "true").strip().lower() not in ("false", "0", "no", "off")
+
+
+def _ratio(hits: int, misses: int) -> float:
+    lookups = hits + misses
+    return hits / lookups if lookups else 0.0
+
+
+async def collect_gauges():
+    """Refresh every gauge from the pool, job queue and caches"""
+    pool = playwright_helper._pool
+    BROWSER_SLOTS.clear()
+    CHROMIUM_RSS.clear()
+    if pool is not None:
+        stats = pool.stats()
+        BROWSER_SLOTS.set(stats["idle"], state="idle")
+        BROWSER_SLOTS.set(stats["inUse"], state="in_use")
+        BROWSER_SLOTS.set(stats["waiting"], state="waiting")
+        BROWSER_SLOTS.set(stats["maxSize"], state="max")
+        # /proc reads, off the event loop
+        for slot_id, rss in (await asyncio.to_thread(pool.rss_by_slot)).items():
+            CHROMIUM_RSS.set(rss, slot=str(slot_id))
+
+    jobs = get_job_manager().stats()
+    JOB_QUEUE_DEPTH.set(jobs["queued"])
+    for status, count in jobs["jobs"].items():
+        JOBS.set(count, status=status)
+
+    # Counters only: the recommendation cache's stats() would query SQLite
+    result_cache = get_result_cache()
+    recommendations = get_recommendation_cache()
+    dns = get_dns_resolver()
+    outcomes = get_page_state_store().outcomes
+    CACHE_HIT_RATIO.set(_ratio(result_cache.hits, result_cache.misses), cache="result")
+    CACHE_HIT_RATIO.set(_ratio(recommendations.hits, recommendations.misses), cache="recommendations")
+    CACHE_HIT_RATIO.set(_ratio(dns.hits, dns.misses), cache="dns")
+    # Incremental re-checks that reused at least some stored results
+    CACHE_HIT_RATIO.set(
+        _ratio(outcomes["incremental"] + outcomes["unchanged"], outcomes["full"]), cache="page_state"
+    )
+    CACHE_ENTRIES.set(result_cache.stats()["size"], cache="result")
+    CACHE_ENTRIES.set(dns.stats()["size"], cache="dns")
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of latency histograms and live gauges"""
+    if not metrics_enabled():
+        raise HTTPException(status_code=404, detail="Not Found")
+    await collect_gauges()
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -2,122 +2,313 @@
 AI Recommender Service
 
 Generates AI-powered recommendations for failed compliance checks
-using OpenAI GPT-5 via Replicate API.
+using the configured LLM provider (OpenAI GPT-5 via Replicate by default).
 """
 
 import os
+import json
 import asyncio
-from typing import List, Dict, Any
-from replicate import Client
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 
-# Initialize Replicate client (only if token is provided)
-replicate_token = os.getenv("REPLICATE_API_TOKEN")
-replicate = None
+from app.services.llm_providers import get_llm_provider
+from app.services.recommendation_cache import get_recommendation_cache
+from app.utils.tracing import get_tracer
 
-if replicate_token and replicate_token != "your_replicate_api_token_here":
-    replicate = Client(api_token=replicate_token)
+# "parallel": one model call per failed check, RECOMMENDATION_CONCURRENCY at
+# a time; "batched": one call covering every failed check
+RECOMMENDATION_MODE = os.getenv("RECOMMENDATION_MODE", "parallel").strip().lower()
+RECOMMENDATION_CONCURRENCY = int(os.getenv("RECOMMENDATION_CONCURRENCY", 4))
 
-async def generate_recommendations(
-    failed_checks: List[Dict[str, Any]],
-    page_url: str
-) -> List[Dict[str, str]]:
+# Bump whenever the prompts or model change, so cached answers to the old
+# prompts are not served
+PROMPT_VERSION = "1"
+
+# Timeout for a single model call, in seconds
+MODEL_CALL_TIMEOUT = 30.0
+
+# Limit to prevent DoS
+MAX_CHECKS = 10
+
+SYSTEM_PROMPT = "You are an expert web accessibility consultant who provides clear, actionable recommendations for fixing WCAG compliance issues."
+
+def _sanitize(value: Any, limit: int) -> str:
+    """Truncate and strip angle brackets to prevent prompt injection"""
+    return str(value or "")[:limit].replace("<", "").replace(">", "")
+
+def _clean_recommendation(text: str) -> str:
+    """Sanitize model output"""
+    return text.strip().replace("<", "").replace(">", "")[:500]
+
+def build_prompt(check: Dict[str, Any], page_url: str) -> str:
     """
-    Generate AI recommendations for failed compliance checks.
+    Build the single-check prompt.
     
     Args:
-        failed_checks: List of failed check objects
+        check: Failed check object
         page_url: URL of the webpage being checked
         
     Returns:
-        List of recommendation dictionaries with checkName and recommendation
+        Full prompt text
     """
-    if not failed_checks:
-        return []
-    
-    recommendations = []
+    prompt = f"""You are an expert web accessibility consultant. A webpage compliance check found an issue:
+
+Check Name: {_sanitize(check.get("name"), 200)}
+Issue: {_sanitize(check.get("details"), 500)}
+URL: {_sanitize(page_url, 200)}
+
+Provide a specific, actionable recommendation on how to fix this issue. Be concise (2-3 sentences) and focus on practical steps. Format your response as plain text without markdown."""
+
+    return f"""{SYSTEM_PROMPT}
+
+{prompt}"""
+
+def build_batch_prompt(checks: List[Dict[str, Any]], page_url: str) -> str:
+    """
+    Build one prompt covering several failed checks, asking for a JSON
+    object keyed by the checks' numbers.
     
-    # If no API client or token is set, return template-based recommendations
-    if not replicate or not replicate_token or replicate_token == "your_replicate_api_token_here":
-        return generate_template_recommendations(failed_checks)
+    Args:
+        checks: Failed check objects
+        page_url: URL of the webpage being checked
+        
+    Returns:
+        Full prompt text
+    """
+    issues = "\n\n".join(
+        f"{number}. Check Name: {_sanitize(check.get('name'), 200)}\n   Issue: {_sanitize(check.get('details'), 500)}"
+        for number, check in enumerate(checks, start=1)
+    )
+    return f"""{SYSTEM_PROMPT}
+
+Webpage compliance checks found these issues on {_sanitize(page_url, 200)}:
+
+{issues}
+
+For each numbered issue, provide a specific, actionable recommendation on how to fix it. Be concise (2-3 sentences each) and focus on practical steps. Respond with only a JSON object mapping each issue number to its recommendation as plain text, for example {{"1": "...", "2": "..."}}."""
+
+def parse_batch_response(text: str, checks: List[Dict[str, Any]]) -> List[Optional[str]]:
+    """
+    Extract per-check recommendations from a batched response.
     
-    # Limit to prevent DoS
-    max_checks = 10
-    checks_to_process = failed_checks[:max_checks]
+    Args:
+        text: Raw model output
+        checks: The checks the prompt listed, in order
+        
+    Returns:
+        One cleaned recommendation per check, or None where the response
+        has no usable answer for it
+    """
+    start, end = text.find("{"), text.rfind("}")
+    answers: Dict[str, Any] = {}
+    if start != -1 and end > start:
+        try:
+            parsed = json.loads(text[start:end + 1])
+            if isinstance(parsed, dict):
+                answers = parsed
+        except ValueError:
+            pass
+
+    results: List[Optional[str]] = []
+    for number, check in enumerate(checks, start=1):
+        answer = answers.get(str(number), answers.get(check.get("name")))
+        if isinstance(answer, str):
+            answer = _clean_recommendation(answer)
+            results.append(answer if len(answer) > 20 else None)
+        else:
+            results.append(None)
+    return results
+
+async def _call_model(prompt: str, max_tokens: int = 200, timeout: float = MODEL_CALL_TIMEOUT) -> str:
+    """
+    Run the configured provider on a prompt and return its text output.
     
-    for check in checks_to_process:
+    Raises:
+        Exception: On API errors, an open circuit, or after timeout seconds
+    """
+    provider = get_llm_provider()
+    with get_tracer().span("llm.call", provider=provider.name, max_tokens=max_tokens):
         try:
-            # Sanitize input to prevent prompt injection
-            sanitized_name = str(check.get("name", ""))[:200].replace("<", "").replace(">", "")
-            sanitized_details = str(check.get("details", ""))[:500].replace("<", "").replace(">", "")
-            sanitized_url = str(page_url)[:200].replace("<", "").replace(">", "")
-            
-            prompt = f"""You are an expert web accessibility consultant. A webpage compliance check found an issue:
+            return await provider.complete(prompt, max_tokens=max_tokens, timeout=timeout)
+        except asyncio.TimeoutError:
+            raise Exception("API request timeout")
 
-Check Name: {sanitized_name}
-Issue: {sanitized_details}
-URL: {sanitized_url}
+async def _recommend_one(
+    check: Dict[str, Any],
+    page_url: str,
+    semaphore: asyncio.Semaphore
+) -> Optional[str]:
+    """Get one check's AI recommendation, or None if there is no usable answer"""
+    try:
+        async with semaphore:
+            output = await _call_model(build_prompt(check, page_url)[:2000])  # Limit prompt length
+        recommendation = _clean_recommendation(output)
+        
+        # If recommendation is empty or too short, the caller uses the template
+        return recommendation if len(recommendation) > 20 else None
+    except Exception as error:
+        print(f"Failed to generate AI recommendation for {check.get('name')}: {error}")
+        return None
 
-Provide a specific, actionable recommendation on how to fix this issue. Be concise (2-3 sentences) and focus on practical steps. Format your response as plain text without markdown."""
+async def _iter_parallel(
+    checks: List[Dict[str, Any]],
+    page_url: str,
+    timeout: Optional[float]
+) -> AsyncIterator[Tuple[int, Optional[str]]]:
+    """
+    One model call per check, RECOMMENDATION_CONCURRENCY at a time.
+    
+    Yields (index, answer) as each call completes; checks still pending
+    when the budget runs out are yielded last with None.
+    """
+    semaphore = asyncio.Semaphore(max(1, RECOMMENDATION_CONCURRENCY))
+    tasks = {
+        asyncio.create_task(_recommend_one(check, page_url, semaphore)): index
+        for index, check in enumerate(checks)
+    }
+    deadline = None if timeout is None else asyncio.get_running_loop().time() + timeout
+    pending = set(tasks)
+    
+    try:
+        while pending:
+            remaining = None if deadline is None else max(0.0, deadline - asyncio.get_running_loop().time())
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                break
+            for task in sorted(done, key=tasks.get):
+                yield tasks[task], task.result()
+        
+        if pending:
+            print(f"Recommendation budget exhausted: {len(pending)} check(s) use templates")
+        for task in sorted(pending, key=tasks.get):
+            yield tasks[task], None
+    finally:
+        # Also reached when the consumer stops early (e.g. a client disconnect)
+        for task in pending:
+            task.cancel()
 
-            full_prompt = f"""You are an expert web accessibility consultant who provides clear, actionable recommendations for fixing WCAG compliance issues.
+async def _iter_batched(
+    checks: List[Dict[str, Any]],
+    page_url: str,
+    timeout: Optional[float]
+) -> AsyncIterator[Tuple[int, Optional[str]]]:
+    """One model call covering every check; every answer arrives at once"""
+    answers: List[Optional[str]] = [None] * len(checks)
+    try:
+        # The one call may use the whole budget
+        output = await _call_model(
+            build_batch_prompt(checks, page_url)[:8000],
+            max_tokens=200 * len(checks),
+            timeout=timeout or MODEL_CALL_TIMEOUT
+        )
+        answers = parse_batch_response(output, checks)
+    except Exception as error:
+        print(f"Failed to generate batched AI recommendations: {error.__class__.__name__}: {error}")
+    
+    missing = sum(1 for answer in answers if answer is None)
+    if missing:
+        print(f"Batched response missing {missing} recommendation(s); using templates")
+    
+    for index, answer in enumerate(answers):
+        yield index, answer
 
-{prompt}"""
-            
-            # Set timeout for API calls
-            # Replicate client is synchronous, so we run it in a thread
-            try:
-                def run_replicate():
-                    return replicate.run(
-                        "openai/gpt-5",
-                        input={
-                            "prompt": full_prompt[:2000],  # Limit prompt length
-                            "max_tokens": 200,
-                            "temperature": 0.7,
-                            "reasoning_effort": "medium",
-                        }
-                    )
-                
-                output = await asyncio.wait_for(
-                    asyncio.to_thread(run_replicate),
-                    timeout=30.0
-                )
-            except asyncio.TimeoutError:
-                raise Exception("API request timeout")
-            
-            # Replicate returns an array of strings, join them
-            if isinstance(output, list):
-                recommendation = "".join(str(item) for item in output).strip()
-            else:
-                recommendation = str(output or "").strip()
-            
-            # Sanitize recommendation output
-            recommendation = (
-                recommendation
-                .replace("<", "")
-                .replace(">", "")
-                [:500]  # Limit length
-            )
-            
-            # If recommendation is empty or too short, use template
-            final_recommendation = (
-                recommendation
-                if len(recommendation) > 20
-                else generate_template_recommendation(check)
-            )
-            
-            recommendations.append({
-                "checkName": check["name"],
-                "recommendation": final_recommendation,
-            })
-        except Exception as error:
-            print(f"Failed to generate AI recommendation for {check.get('name')}: {error}")
-            # Fall back to template recommendation
-            recommendations.append({
+async def iter_recommendations(
+    failed_checks: List[Dict[str, Any]],
+    page_url: str,
+    timeout: Optional[float] = None
+) -> AsyncIterator[Dict[str, str]]:
+    """
+    Yield recommendations for failed checks as they become available.
+    
+    Cached answers come first, then model answers in completion order
+    (all at once with RECOMMENDATION_MODE=batched). Any check without an
+    AI answer, because its call failed or the time budget ran out, gets
+    its template recommendation, so a few slow calls never cost every
+    recommendation. Closing the iterator early cancels outstanding calls.
+    
+    Args:
+        failed_checks: List of failed check objects
+        page_url: URL of the webpage being checked
+        timeout: Overall time budget in seconds (None for no budget)
+        
+    Yields:
+        Recommendation dictionaries with checkName and recommendation,
+        one per check (at most MAX_CHECKS)
+    """
+    if not failed_checks:
+        return
+    
+    # If no provider is configured, return template-based recommendations
+    provider = get_llm_provider()
+    if provider is None:
+        for recommendation in generate_template_recommendations(failed_checks):
+            yield recommendation
+        return
+    
+    checks_to_process = failed_checks[:MAX_CHECKS]
+    
+    # Answers from another provider or model are not reused
+    cache = get_recommendation_cache()
+    version = f"{PROMPT_VERSION}:{provider.name}:{getattr(provider, 'model', '')}"
+    keys = [cache.make_key(check, page_url, version) for check in checks_to_process]
+    cached = await asyncio.to_thread(cache.get_many, keys) if cache.enabled else {}
+    
+    uncached = []
+    for check, key in zip(checks_to_process, keys):
+        if key in cached:
+            yield {"checkName": check["name"], "recommendation": cached[key]}
+        else:
+            uncached.append((check, key))
+    if not uncached:
+        return
+    
+    uncached_checks = [check for check, _ in uncached]
+    if RECOMMENDATION_MODE == "batched":
+        answers = _iter_batched(uncached_checks, page_url, timeout)
+    else:
+        answers = _iter_parallel(uncached_checks, page_url, timeout)
+    
+    new_entries = {}
+    try:
+        async for index, answer in answers:
+            check, key = uncached[index]
+            if answer is not None:
+                new_entries[key] = {"checkName": check["name"], "recommendation": answer}
+            yield {
                 "checkName": check["name"],
-                "recommendation": generate_template_recommendation(check),
-            })
+                "recommendation": answer or generate_template_recommendation(check),
+            }
+    finally:
+        await answers.aclose()
+    
+    if new_entries and cache.enabled:
+        await asyncio.to_thread(cache.set_many, new_entries)
+
+async def generate_recommendations(
+    failed_checks: List[Dict[str, Any]],
+    page_url: str,
+    timeout: Optional[float] = None
+) -> List[Dict[str, str]]:
+    """
+    Generate AI recommendations for failed compliance checks.
+    
+    Collects iter_recommendations back into check order: answers are
+    looked up in the recommendation cache first, only the remaining checks
+    go to the model, and checks without an AI answer get their template.
+    
+    Args:
+        failed_checks: List of failed check objects
+        page_url: URL of the webpage being checked
+        timeout: Overall time budget in seconds (None for no budget)
+        
+    Returns:
+        List of recommendation dictionaries with checkName and recommendation
+    """
+    by_name = {}
+    with get_tracer().span("generate_recommendations", failed_checks=len(failed_checks)):
+        async for recommendation in iter_recommendations(failed_checks, page_url, timeout):
+            by_name.setdefault(recommendation["checkName"], recommendation)
     
-    return recommendations
+    return [by_name[check["name"]] for check in failed_checks if check["name"] in by_name]
 
 def generate_template_recommendations(
     failed_checks: List[Dict[str, Any]]
@@ -0,0 +1,234 @@
+"""
+Batch Checker Service
+
+Checks many URLs in one call. URLs fan out across the browser pool under a
+global concurrency limit and a per-host limit (with a minimum interval
+between requests to the same host), and results are yielded as each URL
+completes so callers can stream them.
+"""
+
+import os
+import time
+import asyncio
+from functools import partial
+from urllib.parse import urlsplit
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from app.services.check_pipeline import CHECK_TIMEOUT, build_report, run_check
+from app.services.compliance_checks import run_compliance_checks
+from app.middleware.security import validate_url, sanitize_url
+from app.utils.browser_pool import PoolTimeoutError
+from app.utils.urls import normalize_url
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def batch_settings() -> Dict[str, Any]:
+    """Batch limits from BATCH_* environment variables"""
+    return {
+        "maxUrls": _env_int("BATCH_MAX_URLS", 1000),
+        "concurrency": _env_int("BATCH_CONCURRENCY", _env_int("BROWSER_POOL_MAX_SIZE", os.cpu_count() or 2)),
+        "perHost": _env_int("BATCH_PER_HOST", 2),
+        "hostIntervalMs": _env_int("BATCH_HOST_INTERVAL_MS", 250),
+    }
+
+
+def parse_url_list(text: str) -> List[str]:
+    """
+    Read URLs from an uploaded file: one per line, or the first column of
+    a CSV. Blank lines, "#" comments and a header row are skipped.
+    """
+    urls = []
+    for line in text.splitlines():
+        value = line.split(",", 1)[0].strip().strip('"').strip()
+        if not value or value.startswith("#"):
+            continue
+        if "://" not in value and value.lower() in ("url", "urls"):
+            continue  # CSV header
+        urls.append(value)
+    return urls
+
+
+class HostLimiter:
+    """
+    Per-host politeness: at most per_host concurrent requests to a host,
+    and request starts spaced at least interval seconds apart.
+
+    Args:
+        per_host: Concurrent requests allowed per host
+        interval: Minimum seconds between request starts to one host
+        clock: Monotonic time source (for tests)
+    """
+
+    def __init__(self, per_host: int = 2, interval: float = 0.25, clock=time.monotonic):
+        self.per_host = max(1, per_host)
+        self.interval = max(0.0, interval)
+        self._clock = clock
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._next_start: Dict[str, float] = {}
+
+    def _semaphore(self, host: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(self.per_host)
+        return semaphore
+
+    async def acquire(self, host: str):
+        """Take a permit for host, then wait for its next start time"""
+        await self.acquire_permit(host)
+        try:
+            await self.wait_turn(host)
+        except BaseException:
+            self.release(host)
+            raise
+
+    async def acquire_permit(self, host: str):
+        """Take one of host's concurrent-request permits"""
+        await self._semaphore(host).acquire()
+
+    async def wait_turn(self, host: str):
+        """
+        Reserve host's next start time and sleep until it. Call this just
+        before the request starts (after any other queueing), or the
+        reserved slots pass by while the caller is still waiting.
+        """
+        # Reserve before sleeping so concurrent waiters for the same host
+        # queue up behind each other
+        now = self._clock()
+        start = max(now, self._next_start.get(host, now))
+        self._next_start[host] = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def release(self, host: str):
+        self._semaphore(host).release()
+
+
+async def _check_url(url: str, recommendations: bool, incremental: bool = False) -> Dict[str, Any]:
+    """Validate and check one URL; errors become result fields, not exceptions"""
+    validation = await validate_url(url)
+    if not validation["valid"]:
+        return {"ok": False, "error": validation["error"]}
+    url_string = validation["url"].geturl() or url
+
+    try:
+        if recommendations:
+            report, cache_status = await run_check(url_string, incremental=incremental)
+        else:
+            results = await asyncio.wait_for(
+                run_compliance_checks(url_string, incremental=incremental),
+                timeout=CHECK_TIMEOUT
+            )
+            report, cache_status = build_report(url_string, results, []), None
+    except asyncio.TimeoutError:
+        return {"ok": False, "error": "Request timeout - analysis took too long"}
+    except PoolTimeoutError:
+        return {"ok": False, "error": "All browsers are busy"}
+    except Exception as error:
+        error_str = str(error).encode('ascii', 'replace').decode('ascii')
+        print(f"Error in batch check: {error.__class__.__name__}: {error_str}")
+        is_development = os.getenv("NODE_ENV", "development") == "development"
+        return {"ok": False, "error": "Failed to analyze webpage" + (f": {error_str}" if is_development else "")}
+
+    result = {"ok": True, "report": report}
+    if cache_status is not None:
+        result["cache"] = cache_status
+    return result
+
+
+async def run_batch(
+    urls: List[str],
+    concurrency: int = 4,
+    host_limiter: Optional[HostLimiter] = None,
+    recommendations: bool = False,
+    incremental: bool = False,
+    check: Optional[Callable[[str, bool], Awaitable[Dict[str, Any]]]] = None,
+    clock=time.perf_counter,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Check URLs concurrently, yielding each result as it completes and a
+    summary at the end.
+
+    Duplicate URLs (after normalization) are checked once.
+
+    Args:
+        urls: URLs to check, as submitted
+        concurrency: URLs checked at once across all hosts
+        host_limiter: Per-host politeness limits
+        recommendations: Also generate AI recommendations (slower)
+        incremental: Reuse stored results for pages that haven't changed
+            since they were last checked
+        check: Per-URL check function (for tests)
+        clock: Time source for throughput reporting
+
+    Yields:
+        {"type": "result", "index", "url", "ok", "report" | "error"} lines,
+        then one {"type": "summary", ...}
+    """
+    check = check or partial(_check_url, incremental=incremental)
+    host_limiter = host_limiter or HostLimiter()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    results: asyncio.Queue = asyncio.Queue()
+    started = clock()
+
+    unique = []
+    seen = set()
+    for index, url in enumerate(urls):
+        url = (url or "").strip()
+        try:
+            key = normalize_url(url)
+        except ValueError:
+            key = url
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append((index, url))
+
+    async def worker(index: int, url: str):
+        try:
+            host = (urlsplit(url).hostname or "").lower()
+            await host_limiter.acquire_permit(host)
+            try:
+                async with semaphore:
+                    # Spacing starts once a global slot is held
+                    await host_limiter.wait_turn(host)
+                    outcome = await check(url, recommendations)
+            finally:
+                host_limiter.release(host)
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            outcome = {"ok": False, "error": str(error)}
+        await results.put({"type": "result", "index": index, "url": sanitize_url(url), **outcome})
+
+    tasks = [asyncio.create_task(worker(index, url)) for index, url in unique]
+    succeeded = failed = 0
+    try:
+        for _ in range(len(tasks)):
+            line = await results.get()
+            if line["ok"]:
+                succeeded += 1
+            else:
+                failed += 1
+            yield line
+    finally:
+        # The consumer went away (client disconnected): stop the rest
+        for task in tasks:
+            task.cancel()
+
+    elapsed = clock() - started
+    yield {
+        "type": "summary",
+        "submitted": len(urls),
+        "checked": len(unique),
+        "duplicates": len(urls) - len(unique),
+        "succeeded": succeeded,
+        "failed": failed,
+        "elapsedSeconds": round(elapsed, 3),
+        "urlsPerSecond": round(len(unique) / elapsed, 3) if elapsed > 0 else None,
+    }
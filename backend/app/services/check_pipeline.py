@@ -0,0 +1,345 @@
+"""
+Check Pipeline Service
+
+Runs a complete compliance check for an already-validated URL: browser
+analysis, AI recommendations and response shaping, with result caching.
+Every API entry point goes through here so they all return the same shape.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from app.services.compliance_checks import CheckFunction, run_compliance_checks, ruleset_version
+from app.utils.playwright_helper import ProgressCallback
+from app.services.ai_recommender import generate_recommendations, iter_recommendations
+from app.services.result_cache import ResultCache, get_result_cache
+from app.middleware.security import sanitize_url
+from app.utils.single_flight import SingleFlight
+
+# Time budgets for the two phases of a check
+CHECK_TIMEOUT = 60.0
+RECOMMENDATION_TIMEOUT = 45.0
+
+# Slow model calls give up this long before RECOMMENDATION_TIMEOUT, so the
+# finished ones (and templates for the rest) are still returned
+RECOMMENDATION_MARGIN = 5.0
+
+# Concurrent checks of the same URL share one analysis
+_in_flight = SingleFlight()
+
+
+class _ProgressFanout:
+    """Passes one analysis's phases to every caller coalesced onto it"""
+
+    def __init__(self):
+        self.phase: Optional[str] = None
+        self.listeners: List[ProgressCallback] = []
+
+    def subscribe(self, listener: ProgressCallback):
+        self.listeners.append(listener)
+        if self.phase is not None:
+            _notify(listener, self.phase)  # Joined mid-analysis: catch up
+
+    def unsubscribe(self, listener: ProgressCallback):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def __call__(self, phase: str):
+        # May be called from a browser slot's thread
+        self.phase = phase
+        for listener in tuple(self.listeners):
+            _notify(listener, phase)
+
+
+def _notify(listener: ProgressCallback, phase: str):
+    try:
+        listener(phase)
+    except Exception:
+        pass  # Progress reporting must never break an analysis
+
+
+# Phase fan-out per in-flight analysis, keyed like _in_flight
+_progress: Dict[str, _ProgressFanout] = {}
+
+
+def parse_cache_control(header: Optional[str]) -> Tuple[bool, bool]:
+    """
+    Interpret a request Cache-Control header.
+
+    "no-cache" or "max-age=0" forces a fresh analysis (the result is still
+    stored); "no-store" bypasses the cache entirely.
+
+    Returns:
+        (read_cache, write_cache)
+    """
+    directives = {d.strip().lower() for d in (header or "").split(",") if d.strip()}
+    if "no-store" in directives:
+        return False, False
+    if "no-cache" in directives or "max-age=0" in directives:
+        return False, True
+    return True, True
+
+
+def _cache_version(checks: Optional[List[CheckFunction]], engine: Optional[str]) -> str:
+    """Result cache version for a check selection and engine choice"""
+    version = ruleset_version(checks)
+    if engine in ("browser", "static"):
+        version += f"-{engine}"
+    return version
+
+
+def build_report(
+    url_string: str,
+    results: Dict[str, Any],
+    recommendations: List[Dict[str, str]]
+) -> Dict[str, Any]:
+    """
+    Merge check results with their recommendations into the API response.
+
+    Args:
+        url_string: URL that was checked
+        results: Output of run_compliance_checks
+        recommendations: Output of generate_recommendations
+
+    Returns:
+        Sanitized response dictionary
+    """
+    # Map recommendations to checks and sanitize output
+    checks_with_recommendations = []
+    for check in results["checks"]:
+        recommendation = next(
+            (rec for rec in recommendations if rec["checkName"] == check["name"]),
+            None
+        )
+        checks_with_recommendations.append({
+            "id": check.get("id"),
+            "wcag": check.get("wcag"),
+            "name": check["name"],
+            "passed": check["passed"],
+            "details": (check["details"] or "")[:1000],  # Limit details length
+            "recommendation": (recommendation["recommendation"][:500]
+                               if recommendation and recommendation.get("recommendation")
+                               else None),  # Limit recommendation length
+            "durationMs": check.get("durationMs"),
+            "reused": check.get("reused", False),
+        })
+
+    # Sanitize URL in response
+    return {
+        "url": sanitize_url(url_string),
+        "checks": checks_with_recommendations,
+        "score": results["score"],
+        "passedCount": results["passedCount"],
+        "totalCount": results["totalCount"],
+        "engine": results.get("engine"),
+        "analysis": results.get("analysis", "full"),
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+
+async def analyze_url(
+    url_string: str,
+    on_progress: Optional[ProgressCallback] = None,
+    checks: Optional[List[CheckFunction]] = None,
+    engine: Optional[str] = None,
+    html: Optional[str] = None,
+    incremental: bool = False
+) -> Dict[str, Any]:
+    """
+    Run the checks and recommendations for a URL, without caching.
+
+    Args:
+        url_string: Validated URL to check
+        on_progress: Optional callback receiving "navigating", "extracting",
+            "checking" and "recommending"
+        checks: Checks to run (defaults to every registered check)
+        engine: Analysis engine ("auto", "browser" or "static")
+        html: Markup to analyze statically instead of loading the URL
+        incremental: Reuse stored results for unchanged parts of the page
+
+    Raises:
+        asyncio.TimeoutError: If the browser analysis exceeds CHECK_TIMEOUT
+    """
+    # Run compliance checks with timeout
+    results = await asyncio.wait_for(
+        run_compliance_checks(url_string, checks=checks, on_progress=on_progress, engine=engine, html=html,
+                              incremental=incremental),
+        timeout=CHECK_TIMEOUT
+    )
+
+    # Get failed checks
+    failed_checks = [check for check in results["checks"] if not check["passed"]]
+
+    if on_progress is not None:
+        on_progress("recommending")
+
+    # Generate AI recommendations for failed checks (with timeout)
+    recommendations = []
+    try:
+        recommendations = await asyncio.wait_for(
+            generate_recommendations(
+                failed_checks,
+                url_string,
+                timeout=RECOMMENDATION_TIMEOUT - RECOMMENDATION_MARGIN
+            ),
+            timeout=RECOMMENDATION_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        recommendations = []
+    except Exception as recommendation_error:
+        recommendations = []
+
+    return build_report(url_string, results, recommendations)
+
+
+async def run_check(
+    url_string: str,
+    read_cache: bool = True,
+    write_cache: bool = True,
+    cache: Optional[ResultCache] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    checks: Optional[List[CheckFunction]] = None,
+    engine: Optional[str] = None,
+    incremental: bool = False,
+) -> Tuple[Dict[str, Any], str]:
+    """
+    Check a URL, serving a cached report when a fresh one exists.
+    
+    Concurrent checks of the same URL with the same cache and incremental
+    options are coalesced: one analysis runs and every caller gets its
+    report and its progress phases.
+
+    Args:
+        url_string: Validated URL to check
+        read_cache: Serve a cached report if available
+        write_cache: Store the new report
+        cache: Cache to use (defaults to the shared result cache)
+        on_progress: Optional phase callback (a coalesced call sees the
+            phases of the analysis it joined)
+        checks: Checks to run (defaults to every registered check); each
+            selection is cached separately
+        engine: Analysis engine; an explicit "browser" or "static" choice
+            is cached separately from "auto"
+        incremental: On a cache miss, reuse stored results for unchanged
+            parts of the page
+
+    Returns:
+        (report, cache_status) where cache_status is "HIT" (served from the
+        cache), "MISS" (analyzed for this call) or "COALESCED" (shared with
+        a concurrent call)
+    """
+    if cache is None:
+        cache = get_result_cache()
+    key = ResultCache.make_key(url_string, _cache_version(checks, engine))
+
+    if read_cache:
+        cached = await cache.get(key)
+        if cached is not None:
+            # Report the URL as this caller spelled it
+            return dict(cached, url=sanitize_url(url_string)), "HIT"
+
+    # Only join an analysis whose report is handled the way this call
+    # asked: stored (or not) and full (or incremental)
+    flight_key = f"{key}|store={int(write_cache)}|incremental={int(incremental)}"
+    progress = _progress.setdefault(flight_key, _ProgressFanout())
+
+    async def analyze_and_store():
+        try:
+            report = await analyze_url(url_string, on_progress=progress, checks=checks, engine=engine,
+                                       incremental=incremental)
+            if write_cache:
+                await cache.set(key, report)
+            return report
+        finally:
+            if _progress.get(flight_key) is progress:
+                del _progress[flight_key]
+
+    if on_progress is not None:
+        progress.subscribe(on_progress)
+    try:
+        report, shared = await _in_flight.do(flight_key, analyze_and_store)
+    finally:
+        if on_progress is not None:
+            progress.unsubscribe(on_progress)
+    if shared:
+        return dict(report, url=sanitize_url(url_string)), "COALESCED"
+    return report, "MISS"
+
+
+
+async def stream_check(
+    url_string: str,
+    read_cache: bool = True,
+    write_cache: bool = True,
+    cache: Optional[ResultCache] = None,
+    checks: Optional[List[CheckFunction]] = None,
+    engine: Optional[str] = None,
+    incremental: bool = False,
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Check a URL, yielding the report in stages instead of all at once.
+
+    The check results are sent as soon as the browser analysis finishes,
+    then each recommendation as its model call completes, so clients can
+    render the score without waiting for the slowest call. Streams are
+    per-caller and not coalesced; the finished report is cached as usual.
+
+    Args:
+        url_string: Validated URL to check
+        read_cache: Serve a cached report if available
+        write_cache: Store the finished report
+        cache: Cache to use (defaults to the shared result cache)
+        checks: Checks to run (defaults to every registered check)
+        engine: Analysis engine ("auto", "browser" or "static")
+        incremental: Reuse stored results for unchanged parts of the page
+
+    Yields:
+        ("checks", report) with no recommendations yet (complete on a
+        cache hit), ("recommendation", {"checkName", "recommendation"})
+        per failed check, then ("done", report) with every recommendation
+
+    Raises:
+        asyncio.TimeoutError: If the browser analysis exceeds CHECK_TIMEOUT
+    """
+    if cache is None:
+        cache = get_result_cache()
+    key = ResultCache.make_key(url_string, _cache_version(checks, engine))
+
+    if read_cache:
+        cached = await cache.get(key)
+        if cached is not None:
+            report = dict(cached, url=sanitize_url(url_string))
+            yield "checks", report
+            yield "done", report
+            return
+
+    results = await asyncio.wait_for(
+        run_compliance_checks(url_string, checks=checks, engine=engine, incremental=incremental),
+        timeout=CHECK_TIMEOUT
+    )
+    yield "checks", build_report(url_string, results, [])
+
+    failed_checks = [check for check in results["checks"] if not check["passed"]]
+
+    # The recommender enforces the time budget itself, answering late
+    # checks with templates
+    recommendations = []
+    try:
+        async for recommendation in iter_recommendations(
+            failed_checks,
+            url_string,
+            timeout=RECOMMENDATION_TIMEOUT - RECOMMENDATION_MARGIN
+        ):
+            recommendations.append(recommendation)
+            yield "recommendation", {
+                "checkName": recommendation["checkName"],
+                "recommendation": (recommendation.get("recommendation") or "")[:500] or None,
+            }
+    except Exception as recommendation_error:
+        print(f"Recommendation stream failed: {recommendation_error.__class__.__name__}")
+
+    report = build_report(url_string, results, recommendations)
+    if write_cache:
+        await cache.set(key, report)
+    yield "done", report
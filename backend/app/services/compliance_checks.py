@@ -1,77 +1,447 @@
 """
 Compliance Checks Service
 
-Implements 10 WCAG compliance checks for web accessibility.
-Uses Playwright to analyze webpage content and structure.
+Implements WCAG compliance checks for web accessibility, collected in a
+registry. Uses Playwright to analyze webpage content and structure.
 """
 
-from app.utils.playwright_helper import analyze_webpage
-from typing import Dict, List, Any
+import os
+import time
+import asyncio
+import hashlib
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from app.utils.playwright_helper import analyze_webpage, ProgressCallback
+from app.utils.contrast import analyze_contrast
+from app.utils.flash_detector import MAX_FLASHES_PER_SECOND
+from app.utils.static_analyzer import STATIC_FIELDS, StaticAnalysisError, analyze_static, fetch_validators
+from app.utils.metrics import CHECK_DURATION
+from app.utils.tracing import get_tracer
+from app.services.page_state import PageStateStore, fingerprint_fields, get_page_state_store, validator_tag
+from typing import Callable, Dict, Iterable, List, Any, Optional, Set
 
-async def run_compliance_checks(url: str) -> Dict[str, Any]:
+CheckFunction = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+# Bump whenever the result shape changes; per-check logic changes bump the
+# check's own version instead (see ruleset_version)
+RULESET_VERSION = "2"
+
+# Cost classes: cheap checks run inline on the event loop, CPU-heavy ones
+# on the check thread pool so they don't stall other requests
+COST_CHEAP = "cheap"
+COST_CPU = "cpu"
+
+# Analysis engines: "browser" (Playwright), "static" (markup only, see
+# static_analyzer) or "auto" (static when every selected check can run on
+# markup and the page isn't rendered on the client, else the browser)
+ENGINES = ("auto", "browser", "static")
+
+# Threads for CPU-heavy checks
+CHECK_WORKERS = int(os.getenv("CHECK_WORKERS", min(4, os.cpu_count() or 1)))
+
+# Registered checks by id, in report order
+CHECK_REGISTRY: Dict[str, CheckFunction] = {}
+
+_check_executor: Optional[ThreadPoolExecutor] = None
+
+def register_check(
+    check_id: str,
+    name: str,
+    wcag: str,
+    fields: Iterable[str] = (),
+    cost: str = COST_CHEAP,
+    version: str = "1"
+) -> Callable[[CheckFunction], CheckFunction]:
     """
-    Runs all 10 compliance checks on a webpage.
+    Register a check and declare what it needs.
     
     Args:
-        url: The URL of the webpage to analyze
+        check_id: Stable identifier clients use to select the check
+        name: Display name, as reported in results
+        wcag: WCAG success criterion (e.g. "2.4.1")
+        fields: page_data fields the check reads, so the extractor can
+            skip everything no enabled check needs
+        cost: COST_CHEAP or COST_CPU
+        version: Bump when the check's logic or wording changes, so cached
+            results from the old version are not served
+    """
+    if cost not in (COST_CHEAP, COST_CPU):
+        raise ValueError(f"Unknown cost class: {cost}")
+    
+    def decorator(check: CheckFunction) -> CheckFunction:
+        if check_id in CHECK_REGISTRY:
+            raise ValueError(f"Duplicate check id: {check_id}")
+        check.check_id = check_id
+        check.check_name = name
+        check.wcag = wcag
+        check.page_data_fields = frozenset(fields)
+        check.cost = cost
+        check.version = version
+        CHECK_REGISTRY[check_id] = check
+        return check
+    return decorator
+
+def select_checks(check_ids: Optional[Iterable[str]] = None) -> List[CheckFunction]:
+    """
+    Resolve check ids to registered checks, in report order.
+    
+    Args:
+        check_ids: Ids to run (None for every registered check)
         
+    Raises:
+        ValueError: If an id is not registered or none are given
+    """
+    if check_ids is None:
+        return list(CHECK_REGISTRY.values())
+    
+    wanted = set(check_ids)
+    unknown = sorted(wanted - CHECK_REGISTRY.keys())
+    if unknown:
+        raise ValueError(f"Unknown check id(s): {', '.join(unknown)}")
+    if not wanted:
+        raise ValueError("Select at least one check")
+    return [check for check_id, check in CHECK_REGISTRY.items() if check_id in wanted]
+
+def ruleset_version(checks: Optional[List[CheckFunction]] = None) -> str:
+    """
+    Version tag for results of a set of checks.
+    
+    Covers RULESET_VERSION, which checks ran and each check's version, so
+    cached results are only reused for the same selection and logic.
+    """
+    checks = select_checks() if checks is None else checks
+    material = ",".join(f"{check.check_id}@{check.version}" for check in checks)
+    return f"{RULESET_VERSION}-{hashlib.sha256(material.encode('utf-8')).hexdigest()[:12]}"
+
+def is_static_check(check: CheckFunction) -> bool:
+    """Whether a check can run on static markup alone"""
+    return getattr(check, "page_data_fields", frozenset()) <= STATIC_FIELDS
+
+def select_engine_checks(
+    check_ids: Optional[Iterable[str]],
+    engine: str
+) -> Optional[List[CheckFunction]]:
+    """
+    Resolve check ids for an engine.
+    
+    The static engine runs only the checks markup can answer: every such
+    check by default, and explicitly selected browser-only checks are an
+    error.
+    
     Returns:
-        Dictionary containing checks array, score, and counts
+        Checks to run (None for every registered check)
+        
+    Raises:
+        ValueError: For an unknown engine or check id, or a browser-only
+            check with the static engine
     """
-    analysis = await analyze_webpage(url)
-    page_data = analysis["pageData"]
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine} (use {', '.join(ENGINES)})")
+    checks = None if check_ids is None else select_checks(check_ids)
+    if engine != "static":
+        return checks
+    if checks is None:
+        return [check for check in select_checks() if is_static_check(check)]
+    browser_only = [check.check_id for check in checks if not is_static_check(check)]
+    if browser_only:
+        raise ValueError(f"Check(s) need the browser engine: {', '.join(browser_only)}")
+    return checks
+
+def get_default_engine() -> str:
+    """Engine for requests that don't pick one (ANALYSIS_ENGINE, default auto)"""
+    engine = os.getenv("ANALYSIS_ENGINE", "auto").strip().lower()
+    return engine if engine in ENGINES else "auto"
+
+def describe_checks() -> List[Dict[str, Any]]:
+    """Registry metadata for every check, in report order"""
+    return [
+        {
+            "id": check.check_id,
+            "name": check.check_name,
+            "wcag": check.wcag,
+            "fields": sorted(check.page_data_fields),
+            "cost": check.cost,
+            "version": check.version,
+            "static": is_static_check(check),
+        }
+        for check in CHECK_REGISTRY.values()
+    ]
+
+def required_fields(checks: Iterable[CheckFunction]) -> Set[str]:
+    """Union of the page_data fields the given checks depend on"""
+    fields: Set[str] = set()
+    for check in checks:
+        fields |= getattr(check, "page_data_fields", frozenset())
+    return fields
+
+def get_check_executor() -> ThreadPoolExecutor:
+    """Get or create the thread pool for CPU-heavy checks"""
+    global _check_executor
     
-    checks = []
+    if _check_executor is None:
+        _check_executor = ThreadPoolExecutor(max_workers=max(1, CHECK_WORKERS), thread_name_prefix="check")
     
-    # 1. Meaningful reading sequence
-    reading_sequence_check = check_reading_sequence(page_data)
-    checks.append(reading_sequence_check)
+    return _check_executor
+
+def close_check_executor():
+    """Shut down the check thread pool"""
+    global _check_executor
     
-    # 2. No sensory-only cues
-    sensory_cues_check = check_sensory_only_cues(page_data)
-    checks.append(sensory_cues_check)
+    if _check_executor is not None:
+        _check_executor.shutdown(wait=False, cancel_futures=True)
+        _check_executor = None
+
+async def analyze_page(
+    url: str,
+    fields: Set[str],
+    on_progress: Optional[ProgressCallback] = None,
+    engine: Optional[str] = None,
+    html: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Extract page data with the chosen engine.
     
-    # 3. Color usage
-    color_usage_check = check_color_usage(page_data)
-    checks.append(color_usage_check)
+    Args:
+        url: The URL of the webpage to analyze
+        fields: page_data fields to extract
+        on_progress: Optional phase callback (browser engine)
+        engine: "auto", "browser" or "static" (defaults to ANALYSIS_ENGINE)
+        html: Markup to analyze statically instead of loading url
+        
+    Returns:
+        Analysis dict (see analyze_webpage) with the engine that ran
+        
+    Raises:
+        StaticAnalysisError: If the static engine was required and the
+            page couldn't be fetched or parsed
+    """
+    engine = engine or get_default_engine()
+    analysis = None
+    if html is not None or engine == "static":
+        analysis = await analyze_static(url, fields, html=html)
+    elif engine == "auto" and fields <= STATIC_FIELDS:
+        try:
+            analysis = await analyze_static(url, fields, auto=True)
+        except StaticAnalysisError as error:
+            print(f"Static analysis failed ({error}); using the browser")
+    if analysis is None:
+        analysis = await analyze_webpage(url, fields=fields, on_progress=on_progress)
+    analysis.setdefault("engine", "browser")
+    return analysis
+
+async def run_compliance_checks(
+    url: str,
+    checks: Optional[List[CheckFunction]] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    engine: Optional[str] = None,
+    html: Optional[str] = None,
+    incremental: bool = False
+) -> Dict[str, Any]:
+    """
+    Runs compliance checks on a webpage (every registered check by default).
+    
+    Args:
+        url: The URL of the webpage to analyze
+        checks: Check functions to run (defaults to every registered check)
+        on_progress: Optional callback receiving "navigating", "extracting"
+            and "checking"
+        engine: "auto", "browser" or "static" (defaults to ANALYSIS_ENGINE)
+        html: Markup to analyze statically instead of loading url
+        incremental: Reuse results stored for this URL where the page
+            hasn't changed (see run_incremental_checks)
+        
+    Returns:
+        Dictionary containing checks array, score, counts, the engine
+        that produced the page data and how it was analyzed ("full",
+        "incremental" or "unchanged")
+        
+    Raises:
+        StaticAnalysisError: If the static engine was required and the
+            page couldn't be fetched or parsed
+    """
+    enabled_checks = select_checks() if checks is None else checks
+    
+    if incremental and html is None:
+        return await run_incremental_checks(url, enabled_checks, on_progress, engine)
     
-    # 4. Keyboard accessibility
-    keyboard_access_check = check_keyboard_accessibility(page_data)
-    checks.append(keyboard_access_check)
+    # Only extract what the enabled checks read
+    analysis = await analyze_page(url, required_fields(enabled_checks), on_progress, engine, html)
+    page_data = analysis["pageData"]
     
-    # 5. No keyboard trap
-    keyboard_trap_check = check_keyboard_traps(page_data)
-    checks.append(keyboard_trap_check)
+    if on_progress is not None:
+        on_progress("checking")
     
-    # 6. Pointer cancellation
-    pointer_cancellation_check = check_pointer_cancellation(page_data)
-    checks.append(pointer_cancellation_check)
+    results = await evaluate_checks(page_data, enabled_checks)
+    results["engine"] = analysis["engine"]
+    results["analysis"] = "full"
+    return results
+
+def _check_id(check: CheckFunction) -> str:
+    return getattr(check, "check_id", check.__name__)
+
+def _reusable(entry: Optional[Dict[str, Any]], check: CheckFunction, engine: Optional[str]) -> bool:
+    """Whether a stored entry holds a current-version result from a compatible engine"""
+    if entry is None or entry.get("version") != getattr(check, "version", None):
+        return False
+    return engine not in ("browser", "static") or entry.get("engine") == engine
+
+async def run_incremental_checks(
+    url: str,
+    checks: List[CheckFunction],
+    on_progress: Optional[ProgressCallback] = None,
+    engine: Optional[str] = None,
+    store: Optional[PageStateStore] = None,
+    client=None
+) -> Dict[str, Any]:
+    """
+    Re-check a URL, reusing stored results for whatever didn't change.
     
-    # 7. Label-accessible name match
-    label_match_check = check_label_accessible_name_match(page_data)
-    checks.append(label_match_check)
+    A conditional GET comes first: if the server answers 304 and every
+    selected check has a result confirmed against those validators, the
+    stored results are returned without loading the page at all. Otherwise
+    the page is analyzed as usual and only checks whose input fields'
+    fingerprints changed (or that have no stored result) are evaluated.
     
-    # 8. Time limit adjustability
-    time_limit_check = check_time_limits(page_data)
-    checks.append(time_limit_check)
+    Each check result carries "reused"; the summary's "analysis" is
+    "unchanged" (nothing loaded), "incremental" (some results reused) or
+    "full".
     
-    # 9. No seizure-triggering content
-    seizure_check = check_seizure_triggering_content(page_data)
-    checks.append(seizure_check)
+    Args:
+        url: The URL of the webpage to analyze
+        checks: Check functions to run
+        on_progress: Optional phase callback (browser engine)
+        engine: "auto", "browser" or "static" (defaults to ANALYSIS_ENGINE)
+        store: Page state store (defaults to the shared store)
+        client: HTTP client for the conditional GET (for tests)
+        
+    Returns:
+        Same shape as run_compliance_checks
+    """
+    store = store or get_page_state_store()
+    state = await asyncio.to_thread(store.get, url)
+    stored = state["checks"] if state else {}
+    
+    validators = {"notModified": False, "etag": None, "lastModified": None}
+    if store.enabled:
+        try:
+            validators = await fetch_validators(
+                url,
+                etag=state["etag"] if state else None,
+                last_modified=state["lastModified"] if state else None,
+                client=client,
+            )
+        except StaticAnalysisError as error:
+            print(f"Conditional fetch failed ({error}); checking in full")
+    tag = validator_tag(validators["etag"], validators["lastModified"])
+    
+    if validators["notModified"] and tag is not None:
+        entries = [stored.get(_check_id(check)) for check in checks]
+        if all(_reusable(entry, check, engine) and entry.get("validator") == tag
+               for entry, check in zip(entries, checks)):
+            results = summarize_results([dict(entry["result"], reused=True) for entry in entries])
+            results["engine"] = entries[0]["engine"] if entries else None
+            results["analysis"] = "unchanged"
+            store.record("unchanged")
+            return results
+    
+    analysis = await analyze_page(url, required_fields(checks), on_progress, engine)
+    page_data = analysis["pageData"]
+    fingerprints = fingerprint_fields(page_data, required_fields(checks))
+    
+    if on_progress is not None:
+        on_progress("checking")
+    
+    # A stored result stands if every field its check reads is unchanged
+    stale = []
+    reused: Dict[str, Dict[str, Any]] = {}
+    for check in checks:
+        entry = stored.get(_check_id(check))
+        fields = {field: fingerprints.get(field) for field in getattr(check, "page_data_fields", ())}
+        if _reusable(entry, check, analysis["engine"]) and entry.get("fields") == fields:
+            reused[_check_id(check)] = dict(entry["result"], reused=True)
+        else:
+            stale.append(check)
+    
+    evaluated = {result["id"]: dict(result, reused=False)
+                 for result in (await evaluate_checks(page_data, stale))["checks"]}
+    results = summarize_results([reused.get(_check_id(check)) or evaluated[_check_id(check)] for check in checks])
+    results["engine"] = analysis["engine"]
+    results["analysis"] = "incremental" if reused else "full"
+    store.record(results["analysis"])
+    
+    entries = {}
+    for check, result in zip(checks, results["checks"]):
+        entries[_check_id(check)] = {
+            "version": getattr(check, "version", None),
+            "engine": analysis["engine"],
+            "fields": {field: fingerprints.get(field) for field in getattr(check, "page_data_fields", ())},
+            "validator": tag,
+            "result": {key: value for key, value in result.items() if key != "reused"},
+        }
+    await asyncio.to_thread(store.put, url, validators["etag"], validators["lastModified"], entries)
+    return results
+
+def _timed(check: CheckFunction, page_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one check, tagging its result with registry metadata and timing"""
+    check_id = _check_id(check)
+    started = time.perf_counter()
+    with get_tracer().span(f"check {check_id}", check_id=check_id):
+        result = check(page_data)
+    elapsed = time.perf_counter() - started
+    CHECK_DURATION.observe(elapsed, check=check_id)
+    return {
+        **result,
+        "id": check_id,
+        "wcag": getattr(check, "wcag", None),
+        "durationMs": round(elapsed * 1000, 3),
+    }
+
+async def evaluate_checks(page_data: Dict[str, Any], checks: List[CheckFunction]) -> Dict[str, Any]:
+    """
+    Run checks against already-extracted page data.
     
-    # 10. Skip links
-    skip_links_check = check_skip_links(page_data)
-    checks.append(skip_links_check)
+    CPU-heavy checks run concurrently on the check thread pool while the
+    cheap ones run inline; results keep the order of checks.
     
-    passed_count = sum(1 for check in checks if check["passed"])
+    Args:
+        page_data: pageData from analyze_webpage, with every field the checks need
+        checks: Check functions to run, in report order
+        
+    Returns:
+        Dictionary containing checks array (each with id, wcag and
+        durationMs), score, and counts
+    """
+    loop = asyncio.get_running_loop()
+    results: List[Any] = [None] * len(checks)
+    
+    heavy = {}
+    for index, check in enumerate(checks):
+        if getattr(check, "cost", COST_CHEAP) == COST_CPU:
+            # Copy the context so the check's span joins the request's trace
+            heavy[index] = loop.run_in_executor(
+                get_check_executor(), contextvars.copy_context().run, _timed, check, page_data
+            )
+    for index, check in enumerate(checks):
+        if index not in heavy:
+            results[index] = _timed(check, page_data)
+    if heavy:
+        for index, result in zip(heavy, await asyncio.gather(*heavy.values())):
+            results[index] = result
+    
+    return summarize_results(results)
+
+def summarize_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Checks array with its score and counts"""
+    passed_count = sum(1 for check in results if check["passed"])
     
     return {
-        "checks": checks,
-        "score": f"{passed_count}/10",
+        "checks": results,
+        "score": f"{passed_count}/{len(results)}",
         "passedCount": passed_count,
-        "totalCount": 10,
+        "totalCount": len(results),
     }
 
+@register_check("reading-sequence", "Meaningful Reading Sequence", "1.3.2", fields=["headings"])
 def check_reading_sequence(page_data: Dict[str, Any]) -> Dict[str, Any]:
     """Check 1: Meaningful Reading Sequence"""
     headings = page_data.get("headings", [])
@@ -116,6 +486,7 @@ def check_reading_sequence(page_data: Dict[str, Any]) -> Dict[str, Any]:
         "details": "Document has a logical heading hierarchy with proper h1-h6 structure.",
     }
 
+@register_check("sensory-characteristics", "Not Relying Only on Sensory Cues", "1.3.3", fields=["interactiveElements", "images"])
 def check_sensory_only_cues(page_data: Dict[str, Any]) -> Dict[str, Any]:
     """Check 2: Not Relying Only on Sensory Cues"""
     interactive_elements = page_data.get("interactiveElements", [])
@@ -150,24 +521,42 @@ def check_sensory_only_cues(page_data: Dict[str, Any]) -> Dict[str, Any]:
         "details": "Interactive elements and images have appropriate text alternatives.",
     }
 
+@register_check("use-of-color", "Color Usage", "1.4.3", fields=["textContrast"], cost=COST_CPU, version="2")
 def check_color_usage(page_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Check 3: Color Usage"""
-    interactive_elements = page_data.get("interactiveElements", [])
+    """Check 3: Color Usage (text contrast against WCAG AA)"""
+    contrast = analyze_contrast(page_data.get("textContrast") or {})
     
-    # Simplified check - in production, would analyze actual CSS for color contrast
-    has_low_contrast = False
-    has_color_only_info = False
+    if contrast["failingAA"]:
+        worst = contrast["worst"][0]
+        return {
+            "name": "Color Usage",
+            "passed": False,
+            "details": (
+                f"Found {contrast['failingAA']} of {contrast['checked']} text element(s) below the WCAG AA contrast ratio "
+                f"(4.5:1 for normal text, 3:1 for large text). Lowest: \"{worst['text']}\" at {worst['ratio']}:1 "
+                f"(needs {worst['required']}:1)."
+            ),
+        }
     
+    if not contrast["checked"]:
+        return {
+            "name": "Color Usage",
+            "passed": True,
+            "details": "No text with a measurable background was found. Ensure text over images has sufficient contrast.",
+        }
+    
+    details = f"All {contrast['checked']} text element(s) meet the WCAG AA contrast ratio."
+    if contrast["failingAAA"]:
+        details += f" {contrast['failingAAA']} fall short of the enhanced AAA ratio (7:1, or 4.5:1 for large text)."
+    if contrast["skipped"]:
+        details += f" {contrast['skipped']} over background images need manual review."
     return {
         "name": "Color Usage",
-        "passed": not has_color_only_info and not has_low_contrast,
-        "details": (
-            "Information may be conveyed only through color, or color contrast may be insufficient. Ensure information is also conveyed through text or icons."
-            if (has_color_only_info or has_low_contrast)
-            else "Color is used appropriately with sufficient contrast and alternative indicators."
-        ),
+        "passed": True,
+        "details": details,
     }
 
+@register_check("keyboard", "Keyboard Accessibility", "2.1.1", fields=["interactiveElements"])
 def check_keyboard_accessibility(page_data: Dict[str, Any]) -> Dict[str, Any]:
     """Check 4: Keyboard Accessibility"""
     interactive_elements = page_data.get("interactiveElements", [])
@@ -196,24 +585,68 @@ def check_keyboard_accessibility(page_data: Dict[str, Any]) -> Dict[str, Any]:
         "details": "All interactive elements are keyboard accessible.",
     }
 
+@register_check("no-keyboard-trap", "No Keyboard Trap", "2.1.2", fields=["keyboardTraversal"], version="2")
 def check_keyboard_traps(page_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Check 5: No Keyboard Trap"""
-    # This is a simplified check - in practice, would need to test actual keyboard navigation
+    """Check 5: No Keyboard Trap (scripted Tab traversal)"""
+    traversal = page_data.get("keyboardTraversal") or {}
+    trap = traversal.get("trap")
+    
+    if trap:
+        exits = "Tab, Shift+Tab and Escape" if trap.get("inDialog") else "Tab and Shift+Tab"
+        return {
+            "name": "No Keyboard Trap",
+            "passed": False,
+            "details": (
+                f"Keyboard focus cycles between {len(trap['cycle'])} element(s) ({', '.join(trap['cycle'][:3])}) "
+                f"and {exits} do not move it out. Ensure users can leave every component using only the keyboard."
+            ),
+        }
+    
+    if traversal.get("reachedEnd"):
+        details = f"Tabbed through the page's focus order in {traversal['steps']} key press(es) without getting trapped."
+    elif traversal.get("budgetExhausted"):
+        details = f"No keyboard trap found in the first {traversal['steps']} Tab stops; the rest of the page was not traversed."
+    else:
+        details = "Keyboard navigation could not be tested automatically. Ensure all interactive areas can be navigated into and out of using keyboard."
+    
     return {
         "name": "No Keyboard Trap",
         "passed": True,
-        "details": "No obvious keyboard traps detected. Ensure all interactive areas can be navigated into and out of using keyboard.",
+        "details": details,
     }
 
+@register_check("pointer-cancellation", "Pointer Cancellation", "2.5.2", fields=["pointerListeners"], version="2")
 def check_pointer_cancellation(page_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Check 6: Pointer Cancellation"""
-    # This is simplified - would need to analyze actual event listeners
+    """Check 6: Pointer Cancellation (event listeners via CDP)"""
+    listeners = page_data.get("pointerListeners") or {}
+    
+    if listeners.get("downOnly"):
+        examples = ", ".join(listeners.get("examples") or [])
+        return {
+            "name": "Pointer Cancellation",
+            "passed": False,
+            "details": (
+                f"{listeners['downOnly']} element(s) ({examples}) handle mousedown, pointerdown or touchstart "
+                "without any mouseup, pointerup, touchend or click handler, so actions likely run on the down event. "
+                "Complete actions on the up event so users can cancel by moving the pointer away."
+            ),
+        }
+    
+    if "elements" in listeners:
+        details = (
+            f"Every down-event handler on the {listeners['elements']} element(s) with pointer listeners "
+            "has a matching up or click handler."
+        )
+    else:
+        details = "Event listeners could not be inspected. Ensure actions complete on the up event, not on press."
+    
     return {
         "name": "Pointer Cancellation",
         "passed": True,
-        "details": "Pointer interactions appear properly implemented. Ensure hover-only actions also work with click/tap.",
+        "details": details,
     }
 
+@register_check("label-in-name", "Label Correctly Matches Accessible Name", "2.5.3", fields=["formInputs"])
 def check_label_accessible_name_match(page_data: Dict[str, Any]) -> Dict[str, Any]:
     """Check 7: Label Correctly Matches Accessible Name"""
     form_inputs = page_data.get("formInputs", [])
@@ -238,6 +671,7 @@ def check_label_accessible_name_match(page_data: Dict[str, Any]) -> Dict[str, An
         "details": "All form inputs have properly associated labels that match their accessible names.",
     }
 
+@register_check("timing-adjustable", "Time Limit Adjustability", "2.2.1", fields=["hasTimers", "hasAutoAdvance"])
 def check_time_limits(page_data: Dict[str, Any]) -> Dict[str, Any]:
     """Check 8: Time Limit Adjustability"""
     has_timers = page_data.get("hasTimers", False)
@@ -256,18 +690,55 @@ def check_time_limits(page_data: Dict[str, Any]) -> Dict[str, Any]:
         "details": "No time limits detected, or time limits are adjustable.",
     }
 
+@register_check(
+    "three-flashes", "No Seizure-Triggering Flashing Content", "2.3.1",
+    fields=["animations", "flashAnalysis"], version="2",
+)
 def check_seizure_triggering_content(page_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Check 9: No Seizure-Triggering Flashing Content"""
+    """Check 9: No Seizure-Triggering Flashing Content (screenshot burst)"""
     animations = page_data.get("animations", 0)
+    flashes = page_data.get("flashAnalysis") or {}
+    general = flashes.get("generalFlashRegions") or []
+    red = flashes.get("redFlashRegions") or []
+    
+    if general or red:
+        kinds = " and ".join(
+            kind for kind, regions in (("general", general), ("red", red)) if regions
+        )
+        return {
+            "name": "No Seizure-Triggering Flashing Content",
+            "passed": False,
+            "details": (
+                f"Content flashes up to {flashes['maxFlashesPerSecond']} times per second above the WCAG {kinds} "
+                f"flash threshold in {len({(r['row'], r['col']) for r in general + red})} region(s) of the viewport. "
+                "Ensure nothing flashes more than 3 times in any one-second period."
+            ),
+        }
+    
+    if flashes.get("frames"):
+        details = (
+            f"No flashing above the WCAG general or red flash thresholds in {flashes['frames']} frames "
+            f"captured over {flashes['durationMs'] / 1000:.1f}s."
+        )
+        if flashes.get("fps", 0) < 2 * (MAX_FLASHES_PER_SECOND + 1):
+            details += f" Frames were captured at {flashes.get('fps', 0)} per second, so faster flashing may be missed."
+    elif flashes.get("skipped"):
+        details = "No running animations, video, canvas or animated images found on the page."
+    elif animations:
+        details = (
+            f"{animations} animated element(s) found but flashing could not be measured. "
+            "Ensure no content flashes more than 3 times per second."
+        )
+    else:
+        details = "No seizure-triggering content detected. Ensure no content flashes more than 3 times per second."
     
-    # This is a simplified check - would need to analyze actual animation frequency
-    # For now, we assume animations are fine
     return {
         "name": "No Seizure-Triggering Flashing Content",
         "passed": True,
-        "details": "No seizure-triggering content detected. Ensure no content flashes more than 3 times per second.",
+        "details": details,
     }
 
+@register_check("bypass-blocks", "Ability to Bypass Repeated Blocks", "2.4.1", fields=["links", "hasLandmarks"])
 def check_skip_links(page_data: Dict[str, Any]) -> Dict[str, Any]:
     """Check 10: Ability to Bypass Repeated Blocks"""
     links = page_data.get("links", [])
@@ -288,3 +759,6 @@ def check_skip_links(page_data: Dict[str, Any]) -> Dict[str, Any]:
         "details": "Skip links or ARIA landmarks are present, allowing users to bypass repeated content.",
     }
 
+
+# All registered checks, in report order
+COMPLIANCE_CHECKS: List[CheckFunction] = select_checks()
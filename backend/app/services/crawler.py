@@ -0,0 +1,530 @@
+"""
+Site Crawler Service
+
+Crawls a site from a seed URL, checking every same-origin page it finds.
+The frontier and per-page results live in SQLite, so a crawl holds only a
+bounded visited set in memory and can resume after a restart.
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import asyncio
+import threading
+from urllib.parse import urljoin, urlsplit, urldefrag
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.services.check_pipeline import CHECK_TIMEOUT
+from app.services.compliance_checks import (
+    COMPLIANCE_CHECKS,
+    evaluate_checks,
+    required_fields,
+)
+from app.services.batch_checker import HostLimiter
+from app.utils.bloom_filter import VisitedSet
+from app.utils.playwright_helper import analyze_webpage
+from app.utils.robots import RobotsRules, fetch_robots
+from app.utils.urls import normalize_url
+
+# Crawl states; "paused" crawls can be resumed
+RUNNING = "running"
+PAUSED = "paused"
+DONE = "done"
+FAILED = "failed"
+
+# Links to files rather than pages
+_SKIPPED_EXTENSIONS = (
+    ".pdf", ".zip", ".gz", ".tar", ".rar", ".7z", ".exe", ".dmg", ".iso",
+    ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico", ".bmp",
+    ".mp3", ".mp4", ".mov", ".avi", ".webm", ".wav",
+    ".css", ".js", ".json", ".xml", ".rss", ".txt", ".csv",
+    ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx",
+)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def origin_of(url: str) -> str:
+    """Scheme, host and (non-default) port of a URL, normalized"""
+    parts = urlsplit(normalize_url(url))
+    return f"{parts.scheme}://{parts.netloc.rsplit('@', 1)[-1]}"
+
+
+def same_origin_links(links: Iterable[Dict[str, Any]], base_url: str, origin: str) -> List[str]:
+    """
+    Normalized, de-duplicated same-origin page URLs from pageData.links.
+
+    Args:
+        links: pageData["links"] entries ({"href": ...})
+        base_url: URL of the page the links came from
+        origin: Origin the crawl is restricted to
+    """
+    found = []
+    seen = set()
+    for link in links or []:
+        href = (link.get("href") or "").strip()
+        if not href or href == "#":
+            continue
+        absolute, _ = urldefrag(urljoin(base_url, href))
+        if urlsplit(absolute).scheme not in ("http", "https"):
+            continue
+        try:
+            normalized = normalize_url(absolute)
+        except ValueError:
+            continue
+        if origin_of(normalized) != origin:
+            continue
+        if urlsplit(normalized).path.lower().endswith(_SKIPPED_EXTENSIONS):
+            continue
+        if normalized not in seen:
+            seen.add(normalized)
+            found.append(normalized)
+    return found
+
+
+class CrawlFrontier:
+    """
+    SQLite-backed crawl state: crawls, their page queue and page results.
+
+    Every method is synchronous and serialized by a lock; call them from a
+    worker thread (asyncio.to_thread) to keep the event loop free.
+
+    Args:
+        path: Database file (":memory:" for a throwaway frontier)
+    """
+
+    def __init__(self, path: str = "crawls.db"):
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS crawls (
+                    id TEXT PRIMARY KEY,
+                    seed TEXT NOT NULL,
+                    origin TEXT NOT NULL,
+                    max_depth INTEGER NOT NULL,
+                    max_pages INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS pages (
+                    crawl_id TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    depth INTEGER NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    passed INTEGER,
+                    total INTEGER,
+                    failed_checks TEXT,
+                    error TEXT,
+                    checked_at REAL,
+                    PRIMARY KEY (crawl_id, url)
+                );
+                CREATE INDEX IF NOT EXISTS pages_by_status
+                    ON pages (crawl_id, status, depth);
+            """)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def create_crawl(self, seed: str, max_depth: int, max_pages: int) -> str:
+        """Register a crawl and queue its seed; returns the crawl id"""
+        crawl_id = uuid.uuid4().hex
+        now = time.time()
+        seed = normalize_url(seed)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO crawls (id, seed, origin, max_depth, max_pages, status, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (crawl_id, seed, origin_of(seed), max_depth, max_pages, RUNNING, now, now),
+            )
+            self._db.execute(
+                "INSERT INTO pages (crawl_id, url, depth) VALUES (?, ?, 0)",
+                (crawl_id, seed),
+            )
+        return crawl_id
+
+    def get_crawl(self, crawl_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM crawls WHERE id = ?", (crawl_id,)).fetchone()
+        return dict(row) if row else None
+
+    def set_status(self, crawl_id: str, status: str, error: Optional[str] = None):
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE crawls SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, error, time.time(), crawl_id),
+            )
+
+    def iter_urls(self, crawl_id: str) -> Iterable[str]:
+        """Every discovered URL, streamed in chunks (to rebuild the visited set)"""
+        last = ""
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT url FROM pages WHERE crawl_id = ? AND url > ? ORDER BY url LIMIT 1000",
+                    (crawl_id, last),
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield row["url"]
+            last = rows[-1]["url"]
+
+    def requeue_interrupted(self, crawl_id: str) -> int:
+        """Put pages left running by an interrupted crawl back in the queue"""
+        with self._lock, self._db:
+            return self._db.execute(
+                "UPDATE pages SET status = 'queued' WHERE crawl_id = ? AND status = 'running'",
+                (crawl_id,),
+            ).rowcount
+
+    def add_pages(self, crawl_id: str, urls: List[str], depth: int, max_pages: int) -> int:
+        """Queue newly discovered URLs, up to max_pages in total; returns how many were added"""
+        with self._lock, self._db:
+            discovered = self._db.execute(
+                "SELECT COUNT(*) FROM pages WHERE crawl_id = ?", (crawl_id,)
+            ).fetchone()[0]
+            room = max(0, max_pages - discovered)
+            added = 0
+            for url in urls:
+                if added >= room:
+                    break
+                added += self._db.execute(
+                    "INSERT OR IGNORE INTO pages (crawl_id, url, depth) VALUES (?, ?, ?)",
+                    (crawl_id, url, depth),
+                ).rowcount
+            return added
+
+    def claim(self, crawl_id: str, limit: int) -> List[Tuple[str, int]]:
+        """Take up to limit queued pages (shallowest first) and mark them running"""
+        with self._lock, self._db:
+            rows = self._db.execute(
+                "SELECT url, depth FROM pages WHERE crawl_id = ? AND status = 'queued'"
+                " ORDER BY depth, rowid LIMIT ?",
+                (crawl_id, limit),
+            ).fetchall()
+            self._db.executemany(
+                "UPDATE pages SET status = 'running' WHERE crawl_id = ? AND url = ?",
+                [(crawl_id, row["url"]) for row in rows],
+            )
+        return [(row["url"], row["depth"]) for row in rows]
+
+    def finish_page(
+        self,
+        crawl_id: str,
+        url: str,
+        status: str,
+        results: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ):
+        """Record a page outcome: done (with results), failed or skipped"""
+        passed = total = failed_checks = None
+        if results is not None:
+            passed = results["passedCount"]
+            total = results["totalCount"]
+            failed_checks = json.dumps([c["name"] for c in results["checks"] if not c["passed"]])
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE pages SET status = ?, passed = ?, total = ?, failed_checks = ?, error = ?, checked_at = ?"
+                " WHERE crawl_id = ? AND url = ?",
+                (status, passed, total, failed_checks, error, time.time(), crawl_id, url),
+            )
+            self._db.execute("UPDATE crawls SET updated_at = ? WHERE id = ?", (time.time(), crawl_id))
+
+    def pages(self, crawl_id: str, offset: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """A page of per-URL results, in discovery order"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT url, depth, status, passed, total, failed_checks, error FROM pages"
+                " WHERE crawl_id = ? ORDER BY rowid LIMIT ? OFFSET ?",
+                (crawl_id, limit, offset),
+            ).fetchall()
+        return [
+            {
+                "url": row["url"],
+                "depth": row["depth"],
+                "status": row["status"],
+                "score": f"{row['passed']}/{row['total']}" if row["total"] is not None else None,
+                "failedChecks": json.loads(row["failed_checks"]) if row["failed_checks"] else [],
+                "error": row["error"],
+            }
+            for row in rows
+        ]
+
+    def summary(self, crawl_id: str, worst: int = 10) -> Dict[str, Any]:
+        """Site-level report: page counts, average score, failures per check, worst pages"""
+        with self._lock:
+            counts = dict(self._db.execute(
+                "SELECT status, COUNT(*) FROM pages WHERE crawl_id = ? GROUP BY status",
+                (crawl_id,),
+            ).fetchall())
+            passed, total = self._db.execute(
+                "SELECT COALESCE(SUM(passed), 0), COALESCE(SUM(total), 0) FROM pages"
+                " WHERE crawl_id = ? AND status = 'done'",
+                (crawl_id,),
+            ).fetchone()
+            failures = self._db.execute(
+                "SELECT value, COUNT(*) FROM pages, json_each(pages.failed_checks)"
+                " WHERE crawl_id = ? AND status = 'done' GROUP BY value ORDER BY COUNT(*) DESC",
+                (crawl_id,),
+            ).fetchall()
+            worst_rows = self._db.execute(
+                "SELECT url, passed, total FROM pages WHERE crawl_id = ? AND status = 'done' AND total > 0"
+                " ORDER BY CAST(passed AS REAL) / total, rowid LIMIT ?",
+                (crawl_id, worst),
+            ).fetchall()
+
+        return {
+            "pages": {
+                "discovered": sum(counts.values()),
+                "queued": counts.get("queued", 0) + counts.get("running", 0),
+                "checked": counts.get("done", 0),
+                "failed": counts.get("failed", 0),
+                "skipped": counts.get("skipped", 0),
+            },
+            "averagePassRate": round(passed / total, 4) if total else None,
+            "checkFailures": [{"name": name, "pages": count} for name, count in failures],
+            "worstPages": [
+                {"url": row["url"], "score": f"{row['passed']}/{row['total']}"}
+                for row in worst_rows
+            ],
+        }
+
+
+PageAnalyzer = Callable[[str], Awaitable[Dict[str, Any]]]
+
+
+async def _analyze_page(url: str) -> Dict[str, Any]:
+    """Extract what the checks need plus the page's links"""
+    fields = required_fields(COMPLIANCE_CHECKS) | {"links"}
+    analysis = await asyncio.wait_for(analyze_webpage(url, fields=fields), timeout=CHECK_TIMEOUT)
+    return analysis["pageData"]
+
+
+class Crawler:
+    """
+    Runs one crawl to completion from its frontier.
+
+    Pages are checked concurrently (on the browser pool, via
+    analyze_webpage), newly found same-origin links are queued one level
+    deeper, and each result is written to the frontier as it completes.
+
+    Args:
+        frontier: Crawl state store
+        crawl_id: Crawl to run
+        concurrency: Pages checked at once
+        interval: Minimum seconds between page loads (raised to the site's
+            Crawl-delay if larger)
+        analyze: Page analyzer returning pageData (for tests)
+        robots: Pre-fetched robots rules (fetched from the site by default)
+    """
+
+    def __init__(
+        self,
+        frontier: CrawlFrontier,
+        crawl_id: str,
+        concurrency: int = 2,
+        interval: float = 0.5,
+        analyze: Optional[PageAnalyzer] = None,
+        robots: Optional[RobotsRules] = None,
+    ):
+        self.frontier = frontier
+        self.crawl_id = crawl_id
+        self.concurrency = max(1, concurrency)
+        self.interval = interval
+        self._analyze = analyze or _analyze_page
+        self._robots = robots
+        self._visited = VisitedSet(
+            exact_limit=_env_int("CRAWL_EXACT_VISITED_MAX", 50000),
+            capacity=_env_int("CRAWL_BLOOM_CAPACITY", 1000000),
+        )
+
+    async def run(self) -> Dict[str, Any]:
+        """Crawl until the frontier is empty; returns the site summary"""
+        frontier = self.frontier
+        crawl = await asyncio.to_thread(frontier.get_crawl, self.crawl_id)
+        await asyncio.to_thread(frontier.set_status, self.crawl_id, RUNNING)
+
+        active = set()
+        try:
+            if self._robots is None:
+                self._robots = await fetch_robots(crawl["origin"])
+            interval = max(self.interval, self._robots.crawl_delay or 0)
+            limiter = HostLimiter(per_host=self.concurrency, interval=interval)
+            host = urlsplit(crawl["origin"]).hostname or ""
+
+            # Resuming: rebuild the visited set and retry unfinished pages
+            await asyncio.to_thread(frontier.requeue_interrupted, self.crawl_id)
+            await asyncio.to_thread(self._visited.update, frontier.iter_urls(self.crawl_id))
+
+            while True:
+                if len(active) < self.concurrency:
+                    claimed = await asyncio.to_thread(frontier.claim, self.crawl_id, self.concurrency - len(active))
+                    for url, depth in claimed:
+                        active.add(asyncio.create_task(self._crawl_page(crawl, url, depth, limiter, host)))
+                if not active:
+                    break
+                done, active = await asyncio.wait(active, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    task.result()  # Surface frontier errors
+        except asyncio.CancelledError:
+            # Unfinished pages stay "running" and are requeued on resume
+            for task in active:
+                task.cancel()
+            await asyncio.to_thread(frontier.set_status, self.crawl_id, PAUSED)
+            raise
+        except Exception as error:
+            await asyncio.to_thread(frontier.set_status, self.crawl_id, FAILED, str(error))
+            raise
+
+        await asyncio.to_thread(frontier.set_status, self.crawl_id, DONE)
+        return await asyncio.to_thread(frontier.summary, self.crawl_id)
+
+    async def _crawl_page(self, crawl: Dict[str, Any], url: str, depth: int, limiter: HostLimiter, host: str):
+        frontier = self.frontier
+
+        if not self._robots.allowed(url):
+            await asyncio.to_thread(frontier.finish_page, self.crawl_id, url, "skipped", None, "Disallowed by robots.txt")
+            return
+
+        await limiter.acquire(host)
+        try:
+            page_data = await self._analyze(url)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            await asyncio.to_thread(frontier.finish_page, self.crawl_id, url, "failed", None, "Analysis took too long")
+            return
+        except Exception as error:
+            error_str = str(error).encode('ascii', 'replace').decode('ascii')[:500]
+            await asyncio.to_thread(frontier.finish_page, self.crawl_id, url, "failed", None, error_str)
+            return
+        finally:
+            limiter.release(host)
+
+        results = await evaluate_checks(page_data, COMPLIANCE_CHECKS)
+
+        if depth < crawl["max_depth"]:
+            links = same_origin_links(page_data.get("links", []), url, crawl["origin"])
+            new_urls = [link for link in links if self._visited.add(link)]
+            if new_urls:
+                await asyncio.to_thread(frontier.add_pages, self.crawl_id, new_urls, depth + 1, crawl["max_pages"])
+
+        await asyncio.to_thread(frontier.finish_page, self.crawl_id, url, "done", results)
+
+
+class CrawlManager:
+    """
+    Starts, tracks and resumes crawls as background tasks.
+
+    Args:
+        frontier: Shared crawl state store
+        concurrency: Pages checked at once per crawl
+        interval: Minimum seconds between page loads per crawl
+        max_running: Crawls allowed to run at once
+    """
+
+    def __init__(self, frontier: CrawlFrontier, concurrency: int = 2, interval: float = 0.5, max_running: int = 2):
+        self.frontier = frontier
+        self.concurrency = concurrency
+        self.interval = interval
+        self.max_running = max_running
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    @classmethod
+    def from_env(cls) -> "CrawlManager":
+        """Build the manager from CRAWL_* environment variables"""
+        return cls(
+            CrawlFrontier(os.getenv("CRAWL_DB_PATH", "crawls.db")),
+            concurrency=_env_int("CRAWL_CONCURRENCY", 2),
+            interval=_env_int("CRAWL_INTERVAL_MS", 500) / 1000,
+            max_running=_env_int("CRAWL_MAX_RUNNING", 2),
+        )
+
+    def is_running(self, crawl_id: str) -> bool:
+        task = self._tasks.get(crawl_id)
+        return task is not None and not task.done()
+
+    def running_count(self) -> int:
+        return sum(1 for task in self._tasks.values() if not task.done())
+
+    async def start(self, seed: str, max_depth: int, max_pages: int) -> str:
+        """Create a crawl and start it; returns the crawl id"""
+        crawl_id = await asyncio.to_thread(self.frontier.create_crawl, seed, max_depth, max_pages)
+        self._launch(crawl_id)
+        return crawl_id
+
+    def resume(self, crawl_id: str) -> bool:
+        """Restart a paused or interrupted crawl; False if it is already running"""
+        if self.is_running(crawl_id):
+            return False
+        self._launch(crawl_id)
+        return True
+
+    def _launch(self, crawl_id: str):
+        crawler = Crawler(self.frontier, crawl_id, concurrency=self.concurrency, interval=self.interval)
+        task = asyncio.get_running_loop().create_task(crawler.run())
+        task.add_done_callback(self._log_outcome)
+        self._tasks[crawl_id] = task
+
+    @staticmethod
+    def _log_outcome(task: asyncio.Task):
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            print(f"Crawl failed: {error.__class__.__name__}: {error}")
+
+    async def pause(self, crawl_id: str) -> bool:
+        """Stop a running crawl, leaving it resumable"""
+        task = self._tasks.get(crawl_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return True
+
+    async def close(self):
+        """Pause every running crawl (they can be resumed after a restart)"""
+        for crawl_id in list(self._tasks):
+            await self.pause(crawl_id)
+
+
+_crawl_manager: Optional[CrawlManager] = None
+
+
+def get_crawl_manager() -> CrawlManager:
+    """Get or create the shared crawl manager"""
+    global _crawl_manager
+
+    if _crawl_manager is None:
+        _crawl_manager = CrawlManager.from_env()
+
+    return _crawl_manager
+
+
+async def close_crawl_manager():
+    """Pause running crawls and close the frontier, if the manager was used"""
+    global _crawl_manager
+
+    manager, _crawl_manager = _crawl_manager, None
+    if manager is not None:
+        await manager.close()
+        manager.frontier.close()
@@ -0,0 +1,344 @@
+"""
+Job Queue Service
+
+Runs compliance checks as background jobs so the HTTP request that submits
+one returns immediately. Jobs wait in a bounded queue and a fixed number of
+workers drain it: when the queue is full, submissions are refused instead
+of piling up behind the browser pool.
+"""
+
+import os
+import time
+import uuid
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from app.services.check_pipeline import run_check
+from app.services.compliance_checks import CheckFunction
+from app.utils.browser_pool import PoolTimeoutError
+
+# Status values; the last two are terminal
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Phases reported while a job runs, in order
+PHASES = ("navigating", "extracting", "checking", "recommending")
+
+
+class JobQueueFullError(Exception):
+    """Raised when the job queue has no room for another submission"""
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class Job:
+    """
+    A submitted check and its event log.
+
+    Every state change is appended to events as {"id", "event", "data"};
+    subscribers get the log replayed and then follow new events live.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        read_cache: bool = True,
+        write_cache: bool = True,
+        checks: Optional[List[CheckFunction]] = None,
+        engine: Optional[str] = None,
+        incremental: bool = False,
+        clock=time.time,
+    ):
+        self.id = uuid.uuid4().hex
+        self.url = url
+        self.read_cache = read_cache
+        self.write_cache = write_cache
+        self.checks = checks
+        self.engine = engine
+        self.incremental = incremental
+        self.status = QUEUED
+        self.phase: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.cache_status: Optional[str] = None
+        self.created_at = clock()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.events: List[Dict[str, Any]] = []
+        self._clock = clock
+        self._subscribers: List[asyncio.Queue] = []
+        self._emit("status", {"status": QUEUED})
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def _emit(self, event: str, data: Dict[str, Any]):
+        record = {"id": len(self.events) + 1, "event": event, "data": data}
+        self.events.append(record)
+        for queue in self._subscribers:
+            queue.put_nowait(record)
+
+    def mark_running(self):
+        self.status = RUNNING
+        self.started_at = self._clock()
+        self._emit("status", {"status": RUNNING})
+
+    def set_phase(self, phase: str):
+        if self.finished or phase == self.phase:
+            return
+        self.phase = phase
+        self._emit("phase", {"phase": phase})
+
+    def mark_done(self, result: Dict[str, Any], cache_status: str):
+        self.status = DONE
+        self.result = result
+        self.cache_status = cache_status
+        self.finished_at = self._clock()
+        self._emit("done", {"status": DONE, "cache": cache_status})
+
+    def mark_failed(self, error: str):
+        self.status = FAILED
+        self.error = error
+        self.finished_at = self._clock()
+        self._emit("failed", {"status": FAILED, "error": error})
+
+    async def follow(self, after: int = 0, heartbeat: Optional[float] = None) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield events with an id greater than after, until the job finishes.
+
+        Args:
+            after: Last event id the caller has already seen
+            heartbeat: Yield None after this many idle seconds so callers
+                can keep the connection alive
+
+        Yields:
+            Event records, or None as a heartbeat
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.append(queue)
+        try:
+            # Events emitted from here on land in the queue, not the snapshot
+            for record in list(self.events):
+                if record["id"] > after:
+                    yield record
+                if record["event"] in (DONE, FAILED):
+                    return
+            while True:
+                try:
+                    record = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if record["id"] > after:
+                    yield record
+                if record["event"] in (DONE, FAILED):
+                    return
+        finally:
+            self._subscribers.remove(queue)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Public view of the job"""
+        return {
+            "jobId": self.id,
+            "url": self.url,
+            "status": self.status,
+            "phase": self.phase,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+            "cache": self.cache_status,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """
+    Bounded job queue drained by a fixed pool of worker tasks.
+
+    Args:
+        max_queue: Jobs that may wait before submissions are refused
+        workers: Jobs analyzed concurrently
+        retention: Seconds a finished job stays retrievable
+        runner: Coroutine function run for each job, called like run_check
+        clock: Time source (for tests)
+    """
+
+    def __init__(
+        self,
+        max_queue: int = 100,
+        workers: int = 2,
+        retention: float = 3600,
+        runner: Callable[..., Awaitable[Any]] = run_check,
+        clock=time.time,
+    ):
+        self.max_queue = max(1, max_queue)
+        self.worker_count = max(1, workers)
+        self.retention = retention
+        self._runner = runner
+        self._clock = clock
+        self._jobs: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def from_env(cls) -> "JobManager":
+        """Build the manager from JOB_* environment variables"""
+        return cls(
+            max_queue=_env_int("JOB_QUEUE_SIZE", 100),
+            workers=_env_int("JOB_WORKERS", os.cpu_count() or 2),
+            retention=float(os.getenv("JOB_RETENTION_SECONDS", 3600)),
+        )
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._workers:
+            return
+        # First use, or the previous loop went away (tests, reloads)
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._workers = [loop.create_task(self._worker()) for _ in range(self.worker_count)]
+        for job in self._jobs.values():
+            if not job.finished:
+                job.mark_failed("Job was interrupted")
+
+    async def submit(
+        self,
+        url: str,
+        read_cache: bool = True,
+        write_cache: bool = True,
+        checks: Optional[List[CheckFunction]] = None,
+        engine: Optional[str] = None,
+        incremental: bool = False,
+    ) -> Job:
+        """
+        Queue a check of an already-validated URL.
+
+        Args:
+            url: Validated URL to check
+            read_cache: Serve a cached report if available
+            write_cache: Store the new report
+            checks: Checks to run (defaults to every registered check)
+            engine: Analysis engine ("auto", "browser" or "static")
+            incremental: Reuse stored results for unchanged parts of the page
+
+        Raises:
+            JobQueueFullError: If max_queue jobs are already waiting
+        """
+        self._ensure_started()
+        self._prune()
+
+        job = Job(url, read_cache=read_cache, write_cache=write_cache, checks=checks, engine=engine,
+                  incremental=incremental, clock=self._clock)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFullError("Job queue is full")
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job by id"""
+        self._prune()
+        return self._jobs.get(job_id)
+
+    def _prune(self):
+        cutoff = self._clock() - self.retention
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job):
+        loop = asyncio.get_running_loop()
+
+        def on_progress(phase: str):
+            # Browser slots report from their own threads
+            loop.call_soon_threadsafe(job.set_phase, phase)
+
+        job.mark_running()
+        try:
+            report, cache_status = await self._runner(
+                job.url,
+                read_cache=job.read_cache,
+                write_cache=job.write_cache,
+                on_progress=on_progress,
+                checks=job.checks,
+                engine=job.engine,
+                incremental=job.incremental,
+            )
+        except asyncio.CancelledError:
+            job.mark_failed("Job was cancelled")
+            raise
+        except asyncio.TimeoutError:
+            job.mark_failed("Analysis took too long")
+        except PoolTimeoutError:
+            job.mark_failed("All browsers are busy - please retry shortly")
+        except Exception as error:
+            error_str = str(error).encode('ascii', 'replace').decode('ascii')
+            try:
+                print(f"Error in job {job.id}: {error.__class__.__name__}: {error_str}")
+            except Exception:
+                print(f"Error in job {job.id} (could not print details)")
+            is_development = os.getenv("NODE_ENV", "development") == "development"
+            job.mark_failed("Failed to analyze webpage" + (f": {error_str}" if is_development else ""))
+        else:
+            # Let queued phase callbacks land before the terminal event
+            await asyncio.sleep(0)
+            job.mark_done(report, cache_status)
+
+    async def close(self):
+        """Stop the workers; unfinished jobs are marked failed"""
+        workers, self._workers = self._workers, []
+        for task in workers:
+            task.cancel()
+        for task in workers:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        for job in self._jobs.values():
+            if not job.finished:
+                job.mark_failed("Server is shutting down")
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and job counts by status"""
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "maxQueue": self.max_queue,
+            "workers": self.worker_count,
+            "jobs": counts,
+        }
+
+
+_job_manager: Optional[JobManager] = None
+
+
+def get_job_manager() -> JobManager:
+    """Get or create the shared job manager"""
+    global _job_manager
+
+    if _job_manager is None:
+        _job_manager = JobManager.from_env()
+
+    return _job_manager
@@ -0,0 +1,517 @@
+"""
+LLM Provider Service
+
+Async clients for the models that write recommendations. Every provider
+shares one pooled httpx.AsyncClient (keep-alive, HTTP/2 when the h2
+package is installed) and gets its own concurrency limit, retries with
+jittered exponential backoff, and a circuit breaker, so a slow or failing
+provider degrades to template recommendations instead of stalling checks.
+
+Providers:
+    replicate: Replicate predictions API (REPLICATE_API_TOKEN)
+    openai: Any OpenAI-compatible /chat/completions endpoint
+    stub: Deterministic in-process stub (see app.utils.llm_stub_server)
+"""
+
+import os
+import time
+import random
+import asyncio
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.utils.metrics import LLM_CALL
+
+
+class LLMError(Exception):
+    """Raised when a provider call fails for good"""
+
+
+class CircuitOpenError(LLMError):
+    """Raised without calling the provider while its circuit is open"""
+
+
+class _RetryableError(LLMError):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After failure_threshold failed calls in a row the circuit opens and
+    calls fail fast for reset_timeout seconds; then one trial call is let
+    through (half-open) and its outcome closes or re-opens the circuit.
+    A call's retries are part of the call: it is one failure however many
+    attempts it made.
+
+    Args:
+        failure_threshold: Consecutive failed calls that open the circuit
+        reset_timeout: Seconds to stay open before a trial call
+        clock: Monotonic time source (for tests)
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock=time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._clock() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go to the provider now"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial_in_flight or self.failures >= self.failure_threshold:
+            self.opened_at = self._clock()
+        self._trial_in_flight = False
+
+    def release_trial(self):
+        """Give up a trial call that ended without a verdict (cancelled)"""
+        self._trial_in_flight = False
+
+
+class _CallState:
+    """What one complete() call was doing, for judging how it ended"""
+
+    __slots__ = ("in_flight", "trial", "failed")
+
+    def __init__(self):
+        self.in_flight = False
+        self.trial = False
+        self.failed = False
+
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get or create the shared, pooled HTTP client for provider calls"""
+    global _http_client
+
+    if _http_client is None or _http_client.is_closed:
+        http2 = os.getenv("LLM_HTTP2", "false").strip().lower() in ("true", "1", "yes")
+        if http2 and not _http2_available():
+            print("LLM_HTTP2 requested but the 'h2' package is not installed; using HTTP/1.1")
+            http2 = False
+        _http_client = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=_env_int("LLM_MAX_CONNECTIONS", 20),
+                max_keepalive_connections=_env_int("LLM_MAX_KEEPALIVE", 10),
+                keepalive_expiry=30.0,
+            ),
+            timeout=httpx.Timeout(30.0, connect=5.0),
+        )
+
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared HTTP client and its pooled connections"""
+    global _http_client
+
+    client, _http_client = _http_client, None
+    if client is not None:
+        await client.aclose()
+
+
+class LLMProvider:
+    """
+    Base class: concurrency limit, retries and circuit breaking around a
+    single-attempt _complete().
+
+    Args:
+        concurrency: Calls in flight at once for this provider
+        max_retries: Extra attempts after a retryable failure
+        backoff: Base delay in seconds for exponential backoff
+        breaker: Circuit breaker (one per provider by default)
+        client: HTTP client (the shared pooled client by default)
+    """
+
+    name = "base"
+
+    def __init__(
+        self,
+        concurrency: int = 4,
+        max_retries: int = 2,
+        backoff: float = 0.5,
+        breaker: Optional[CircuitBreaker] = None,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max(0, max_retries)
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self._client = client
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.rejected = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client if self._client is not None else get_http_client()
+
+    def _limit(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    async def complete(self, prompt: str, max_tokens: int = 200, timeout: float = 30.0) -> str:
+        """
+        Generate text for a prompt.
+
+        Args:
+            prompt: Full prompt text
+            max_tokens: Output token limit
+            timeout: Overall budget in seconds, including retries and
+                time spent waiting for a concurrency slot
+
+        Returns:
+            Model output text
+
+        Raises:
+            CircuitOpenError: If the provider's circuit is open
+            LLMError: If every attempt failed
+            asyncio.TimeoutError: If the budget ran out
+        """
+        call = _CallState()
+        try:
+            return await asyncio.wait_for(self._complete_with_retries(prompt, max_tokens, call), timeout=timeout)
+        except asyncio.TimeoutError:
+            # Budget ran out mid-call or while retrying: a slow or failing
+            # provider. Running out while only queued for a slot is not
+            if call.in_flight or call.failed:
+                self.breaker.record_failure()
+            raise
+        except asyncio.CancelledError:
+            # The caller went away (recommendation budget, client
+            # disconnect): no verdict on the provider
+            if call.trial:
+                self.breaker.release_trial()
+            raise
+
+    async def _complete_with_retries(self, prompt: str, max_tokens: int, call: _CallState) -> str:
+        attempt = 0
+        while True:
+            async with self._limit():
+                # Retries of the half-open trial call keep the trial
+                if not call.trial:
+                    trial = self.breaker.state == "half-open"
+                    if not self.breaker.allow():
+                        self.rejected += 1
+                        raise CircuitOpenError(f"{self.name} circuit is open")
+                    call.trial = trial
+
+                self.calls += 1
+                outcome = "ok"
+                started = time.perf_counter()
+                call.in_flight = True
+                try:
+                    output = await self._complete(prompt, max_tokens)
+                except asyncio.CancelledError:
+                    # complete() decides whether this counts against the provider
+                    outcome = "cancelled"
+                    raise
+                except _RetryableError as error:
+                    outcome = "retryable"
+                    self.failures += 1
+                    call.failed = True
+                    if attempt >= self.max_retries:
+                        self.breaker.record_failure()
+                        raise LLMError(str(error))
+                    retry_after = error.retry_after
+                except LLMError:
+                    outcome = "error"
+                    self.failures += 1
+                    self.breaker.record_failure()
+                    raise
+                else:
+                    self.breaker.record_success()
+                    return output
+                finally:
+                    if outcome != "cancelled":
+                        call.in_flight = False
+                    LLM_CALL.observe(time.perf_counter() - started, provider=self.name, outcome=outcome)
+
+            # Back off outside the concurrency slot. Full jitter, but never
+            # sooner than the server asked for
+            attempt += 1
+            self.retries += 1
+            delay = random.uniform(0, self.backoff * (2 ** attempt))
+            if retry_after is not None:
+                delay = max(delay, min(retry_after, 30.0))
+            await asyncio.sleep(delay)
+
+    async def _post(self, url: str, json_body: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]:
+        """POST JSON, mapping transport errors, 429 and 5xx to retryable errors"""
+        try:
+            response = await self.client.post(url, json=json_body, headers=headers)
+        except httpx.TimeoutException as error:
+            raise _RetryableError(f"{self.name} request timed out: {error.__class__.__name__}")
+        except httpx.TransportError as error:
+            raise _RetryableError(f"{self.name} connection failed: {error.__class__.__name__}")
+
+        if response.status_code == 429 or response.status_code >= 500:
+            retry_after = response.headers.get("retry-after")
+            try:
+                retry_after_seconds = float(retry_after) if retry_after else None
+            except ValueError:
+                retry_after_seconds = None
+            raise _RetryableError(f"{self.name} returned HTTP {response.status_code}", retry_after_seconds)
+        if response.status_code >= 400:
+            raise LLMError(f"{self.name} returned HTTP {response.status_code}")
+
+        try:
+            return response.json()
+        except ValueError:
+            raise LLMError(f"{self.name} returned invalid JSON")
+
+    async def _complete(self, prompt: str, max_tokens: int) -> str:
+        raise NotImplementedError
+
+    async def aclose(self):
+        """Release anything the provider opened itself (not the shared client)"""
+
+    def stats(self) -> Dict[str, Any]:
+        """Call counters and circuit state"""
+        return {
+            "provider": self.name,
+            "calls": self.calls,
+            "failures": self.failures,
+            "retries": self.retries,
+            "rejected": self.rejected,
+            "circuit": self.breaker.state,
+            "concurrency": self.concurrency,
+        }
+
+
+class ReplicateProvider(LLMProvider):
+    """
+    Replicate predictions API, waiting synchronously for the output.
+
+    Args:
+        token: Replicate API token
+        model: "owner/name" of the model
+        base_url: API root (for tests)
+    """
+
+    name = "replicate"
+
+    def __init__(self, token: str, model: str = "openai/gpt-5", base_url: str = "https://api.replicate.com/v1", **kwargs):
+        super().__init__(**kwargs)
+        self.token = token
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+
+    async def _complete(self, prompt: str, max_tokens: int) -> str:
+        prediction = await self._post(
+            f"{self.base_url}/models/{self.model}/predictions",
+            {
+                "input": {
+                    "prompt": prompt,
+                    "max_tokens": max_tokens,
+                    "temperature": 0.7,
+                    "reasoning_effort": "medium",
+                }
+            },
+            {"Authorization": f"Bearer {self.token}", "Prefer": "wait"},
+        )
+
+        # "Prefer: wait" returns finished predictions; poll the rest
+        while prediction.get("status") in ("starting", "processing"):
+            await asyncio.sleep(0.5)
+            try:
+                response = await self.client.get(
+                    prediction["urls"]["get"],
+                    headers={"Authorization": f"Bearer {self.token}"},
+                )
+                response.raise_for_status()
+                prediction = response.json()
+            except (httpx.HTTPError, KeyError, ValueError) as error:
+                raise _RetryableError(f"{self.name} polling failed: {error.__class__.__name__}")
+
+        if prediction.get("status") != "succeeded":
+            raise LLMError(f"{self.name} prediction {prediction.get('status')}: {prediction.get('error')}")
+
+        # Replicate returns an array of strings, join them
+        output = prediction.get("output")
+        if isinstance(output, list):
+            return "".join(str(item) for item in output)
+        return str(output or "")
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """
+    Any endpoint speaking the OpenAI chat completions API.
+
+    Args:
+        base_url: API root, e.g. https://api.openai.com/v1
+        api_key: Bearer token (optional for local servers)
+        model: Model name
+    """
+
+    name = "openai"
+
+    def __init__(self, base_url: str, api_key: Optional[str] = None, model: str = "gpt-4o-mini", **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.model = model
+
+    async def _complete(self, prompt: str, max_tokens: int) -> str:
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        body = await self._post(
+            f"{self.base_url}/chat/completions",
+            {
+                "model": self.model,
+                "messages": [{"role": "user", "content": prompt}],
+                "max_tokens": max_tokens,
+                "temperature": 0.7,
+            },
+            headers,
+        )
+        try:
+            return body["choices"][0]["message"]["content"] or ""
+        except (KeyError, IndexError, TypeError):
+            raise LLMError(f"{self.name} response has no choices")
+
+
+class StubProvider(OpenAICompatibleProvider):
+    """
+    OpenAI-compatible provider wired to the in-process stub server, for
+    tests and benchmarks that must not call a real model.
+    """
+
+    name = "stub"
+
+    def __init__(self, **kwargs):
+        from app.utils.llm_stub_server import app as stub_app
+
+        self._own_client: Optional[httpx.AsyncClient] = None
+        if kwargs.get("client") is None:
+            kwargs["client"] = self._own_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=stub_app))
+        super().__init__(base_url="http://llm-stub/v1", model="stub", **kwargs)
+
+    async def aclose(self):
+        client, self._own_client = self._own_client, None
+        if client is not None:
+            await client.aclose()
+
+
+def _shared_options() -> Dict[str, Any]:
+    return {
+        "concurrency": _env_int("LLM_CONCURRENCY", 4),
+        "max_retries": _env_int("LLM_MAX_RETRIES", 2),
+        "backoff": _env_float("LLM_BACKOFF_SECONDS", 0.5),
+        "breaker": CircuitBreaker(
+            failure_threshold=_env_int("LLM_BREAKER_THRESHOLD", 5),
+            reset_timeout=_env_float("LLM_BREAKER_RESET_SECONDS", 30.0),
+        ),
+    }
+
+
+def provider_from_env() -> Optional[LLMProvider]:
+    """
+    Build the provider chosen by LLM_PROVIDER (replicate, openai or stub).
+
+    Defaults to Replicate when REPLICATE_API_TOKEN is set. Returns None
+    when no provider is configured (template recommendations only).
+    """
+    replicate_token = os.getenv("REPLICATE_API_TOKEN")
+    has_replicate_token = bool(replicate_token) and replicate_token not in (
+        "your_replicate_api_token_here",
+        "r8_your_replicate_api_token_here",
+    )
+    choice = os.getenv("LLM_PROVIDER", "replicate" if has_replicate_token else "none").strip().lower()
+
+    if choice == "replicate" and has_replicate_token:
+        return ReplicateProvider(
+            replicate_token,
+            model=os.getenv("LLM_MODEL", "openai/gpt-5"),
+            **_shared_options(),
+        )
+    if choice == "openai":
+        base_url = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+        return OpenAICompatibleProvider(
+            base_url,
+            api_key=os.getenv("OPENAI_API_KEY"),
+            model=os.getenv("LLM_MODEL", "gpt-4o-mini"),
+            **_shared_options(),
+        )
+    if choice == "stub":
+        return StubProvider(**_shared_options())
+    return None
+
+
+_provider: Optional[LLMProvider] = None
+_provider_loaded = False
+
+
+def get_llm_provider() -> Optional[LLMProvider]:
+    """Get or create the configured provider (None when unconfigured)"""
+    global _provider, _provider_loaded
+
+    if not _provider_loaded:
+        _provider = provider_from_env()
+        _provider_loaded = True
+
+    return _provider
+
+
+async def close_llm_provider():
+    """Close the configured provider; the next call rebuilds it from the environment"""
+    global _provider, _provider_loaded
+
+    provider, _provider, _provider_loaded = _provider, None, False
+    if provider is not None:
+        await provider.aclose()
@@ -0,0 +1,261 @@
+"""
+Page State Store
+
+Remembers, per URL, what the last check saw: the response validators
+(ETag / Last-Modified) and, for every check result, a fingerprint of the
+pageData fields it read. Incremental re-checks use it to skip the browser
+when the server says nothing changed, and to re-evaluate only the checks
+whose inputs changed when something did.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+from app.utils.urls import normalize_url
+
+# Measurement bookkeeping that differs run to run on an unchanged page
+VOLATILE_KEYS = frozenset({"elapsedMs", "capturedMs", "durationMs", "fps", "roundTrips"})
+
+
+def _stable(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _stable(item) for key, item in value.items() if key not in VOLATILE_KEYS}
+    if isinstance(value, (list, tuple)):
+        return [_stable(item) for item in value]
+    return value
+
+
+def fingerprint_fields(page_data: Dict[str, Any], fields: Optional[Iterable[str]] = None) -> Dict[str, str]:
+    """
+    Structural fingerprint of extracted page data, one hash per field.
+
+    Args:
+        page_data: pageData from an analysis
+        fields: Fields to fingerprint (defaults to every field present)
+
+    Returns:
+        field -> short sha256 of the field's canonical JSON
+    """
+    names = page_data.keys() if fields is None else fields
+    fingerprints = {}
+    for field in names:
+        material = json.dumps(_stable(page_data.get(field)), sort_keys=True, default=str)
+        fingerprints[field] = hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
+    return fingerprints
+
+
+def validator_tag(etag: Optional[str], last_modified: Optional[str]) -> Optional[str]:
+    """Combined validator string, or None when the server sent neither"""
+    if not etag and not last_modified:
+        return None
+    return f"{etag or ''}|{last_modified or ''}"
+
+
+class PageStateStore:
+    """
+    SQLite-backed per-URL page state with a TTL and LRU eviction.
+
+    Each entry holds the URL's latest validators and a map of check id to
+    {"version", "engine", "fields", "validator", "result"}: the check's
+    last result, the fingerprints of the fields it read, and the
+    validators of the response it was confirmed against.
+
+    Args:
+        path: Database file (":memory:" for a throwaway store)
+        ttl: Seconds an entry is trusted; older ones force a full check
+            (0 disables incremental checks)
+        max_entries: URLs kept; least recently updated ones are evicted
+        clock: Time source (for tests)
+    """
+
+    def __init__(
+        self,
+        path: str = "page_state.db",
+        ttl: float = 30 * 24 * 3600,
+        max_entries: int = 100000,
+        clock=time.time,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.errors = 0
+        self.evictions = 0
+        self.outcomes = {"full": 0, "incremental": 0, "unchanged": 0}
+
+    @classmethod
+    def from_env(cls) -> "PageStateStore":
+        """Build the store from PAGE_STATE_* environment variables"""
+        return cls(
+            path=os.getenv("PAGE_STATE_PATH", "page_state.db"),
+            ttl=float(os.getenv("PAGE_STATE_TTL", 30 * 24 * 3600)),
+            max_entries=int(os.getenv("PAGE_STATE_MAX_ENTRIES", 100000)),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # Opened on first use so an unused store never touches disk
+        if self._db is None:
+            if self.path != ":memory:" and os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            with self._db:
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("""
+                    CREATE TABLE IF NOT EXISTS page_state (
+                        url TEXT PRIMARY KEY,
+                        etag TEXT,
+                        last_modified TEXT,
+                        checks TEXT NOT NULL,
+                        updated_at REAL NOT NULL
+                    )
+                """)
+                self._db.execute(
+                    "CREATE INDEX IF NOT EXISTS page_state_lru ON page_state (updated_at)"
+                )
+        return self._db
+
+    @staticmethod
+    def make_key(url: str) -> str:
+        try:
+            return normalize_url(url)
+        except ValueError:
+            return url
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a URL's state.
+
+        Synchronous (SQLite); call from a worker thread.
+
+        Returns:
+            {"etag", "lastModified", "checks"}, or None if unknown or
+            older than the TTL
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            try:
+                row = self._connect().execute(
+                    "SELECT etag, last_modified, checks FROM page_state WHERE url = ? AND updated_at > ?",
+                    (self.make_key(url), self._clock() - self.ttl),
+                ).fetchone()
+            except sqlite3.Error as error:
+                self.errors += 1
+                print(f"Page state read failed: {error}")
+                return None
+        if row is None:
+            return None
+        return {"etag": row[0], "lastModified": row[1], "checks": json.loads(row[2])}
+
+    def put(
+        self,
+        url: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        checks: Dict[str, Dict[str, Any]],
+    ):
+        """
+        Record a URL's validators and merge in fresh check entries.
+
+        Entries for checks that weren't run are kept: their field
+        fingerprints still say whether they can be reused later.
+
+        Args:
+            url: Checked URL
+            etag: ETag of the latest response, if any
+            last_modified: Last-Modified of the latest response, if any
+            checks: check id -> entry for the checks just run
+        """
+        if not self.enabled:
+            return
+
+        key = self.make_key(url)
+        now = self._clock()
+        with self._lock:
+            try:
+                db = self._connect()
+                with db:
+                    row = db.execute(
+                        "SELECT checks FROM page_state WHERE url = ? AND updated_at > ?",
+                        (key, now - self.ttl),
+                    ).fetchone()
+                    merged = {**(json.loads(row[0]) if row else {}), **checks}
+                    db.execute(
+                        "INSERT OR REPLACE INTO page_state (url, etag, last_modified, checks, updated_at)"
+                        " VALUES (?, ?, ?, ?, ?)",
+                        (key, etag, last_modified, json.dumps(merged), now),
+                    )
+                    excess = db.execute("SELECT COUNT(*) FROM page_state").fetchone()[0] - self.max_entries
+                    if excess > 0:
+                        db.execute(
+                            "DELETE FROM page_state WHERE url IN"
+                            " (SELECT url FROM page_state ORDER BY updated_at LIMIT ?)",
+                            (excess,),
+                        )
+                        self.evictions += excess
+            except sqlite3.Error as error:
+                self.errors += 1
+                print(f"Page state write failed: {error}")
+
+    def record(self, analysis: str):
+        """Count a check outcome ("full", "incremental" or "unchanged")"""
+        self.outcomes[analysis] = self.outcomes.get(analysis, 0) + 1
+
+    def size(self) -> int:
+        if not self.enabled or (self._db is None and not os.path.exists(self.path)):
+            return 0
+        with self._lock:
+            try:
+                return self._connect().execute("SELECT COUNT(*) FROM page_state").fetchone()[0]
+            except sqlite3.Error:
+                return 0
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.execute("DELETE FROM page_state")
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Outcome counters and sizing"""
+        return {
+            "enabled": self.enabled,
+            **self.outcomes,
+            "evictions": self.evictions,
+            "errors": self.errors,
+            "size": self.size(),
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl,
+        }
+
+
+_page_state_store: Optional[PageStateStore] = None
+
+
+def get_page_state_store() -> PageStateStore:
+    """Get or create the shared page state store"""
+    global _page_state_store
+
+    if _page_state_store is None:
+        _page_state_store = PageStateStore.from_env()
+
+    return _page_state_store
@@ -0,0 +1,239 @@
+"""
+Recommendation Cache Service
+
+Persistent, content-addressed cache of AI recommendations. Failed checks
+come from a small set of templated messages, so the same prompt is sent
+over and over; caching the answer by a fingerprint of the check (and,
+optionally, the page URL) turns repeat failures into a local lookup.
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional
+
+from app.utils.urls import normalize_url
+
+_NUMBER = re.compile(r"\d+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def check_fingerprint(check: Dict[str, Any]) -> str:
+    """
+    Canonical form of a failed check for cache keys.
+
+    Counts in the details ("Found 3 image(s)...") are collapsed, so pages
+    failing a check the same way share one recommendation.
+    """
+    details = _NUMBER.sub("#", str(check.get("details") or ""))
+    details = _WHITESPACE.sub(" ", details).strip()
+    return f"{check.get('name', '')}\n{details}"
+
+
+class RecommendationCache:
+    """
+    SQLite-backed recommendation cache with a TTL and LRU eviction.
+
+    Args:
+        path: Database file (":memory:" for a throwaway cache)
+        ttl: Seconds an entry stays valid (0 disables the cache)
+        max_entries: Entries kept; least recently used ones are evicted
+        include_url: Key entries by page URL too (off by default: the
+            advice for a given failure rarely depends on the page)
+        clock: Time source (for tests)
+    """
+
+    def __init__(
+        self,
+        path: str = "recommendations.db",
+        ttl: float = 7 * 24 * 3600,
+        max_entries: int = 10000,
+        include_url: bool = False,
+        clock=time.time,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.include_url = include_url
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+
+    @classmethod
+    def from_env(cls) -> "RecommendationCache":
+        """Build the cache from RECOMMENDATION_CACHE_* environment variables"""
+        return cls(
+            path=os.getenv("RECOMMENDATION_CACHE_PATH", "recommendations.db"),
+            ttl=float(os.getenv("RECOMMENDATION_CACHE_TTL", 7 * 24 * 3600)),
+            max_entries=int(os.getenv("RECOMMENDATION_CACHE_MAX_ENTRIES", 10000)),
+            include_url=os.getenv("RECOMMENDATION_CACHE_INCLUDE_URL", "false").strip().lower() in ("true", "1", "yes"),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # Opened on first use so a disabled or unused cache never touches disk
+        if self._db is None:
+            if self.path != ":memory:" and os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            with self._db:
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("""
+                    CREATE TABLE IF NOT EXISTS recommendations (
+                        key TEXT PRIMARY KEY,
+                        check_name TEXT NOT NULL,
+                        recommendation TEXT NOT NULL,
+                        expires_at REAL NOT NULL,
+                        last_used REAL NOT NULL
+                    )
+                """)
+                self._db.execute(
+                    "CREATE INDEX IF NOT EXISTS recommendations_lru ON recommendations (last_used)"
+                )
+        return self._db
+
+    def make_key(self, check: Dict[str, Any], page_url: str, prompt_version: str) -> str:
+        """Cache key for a check's recommendation under a prompt version"""
+        url = ""
+        if self.include_url:
+            try:
+                url = normalize_url(page_url)
+            except ValueError:
+                url = page_url
+        material = json.dumps([prompt_version, check_fingerprint(check), url])
+        return "rec:" + hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """
+        Look up fresh entries, counting hits and misses.
+
+        Synchronous (SQLite); call from a worker thread.
+
+        Returns:
+            Mapping of found keys to recommendations
+        """
+        if not self.enabled or not keys:
+            return {}
+
+        now = self._clock()
+        found: Dict[str, str] = {}
+        with self._lock:
+            try:
+                db = self._connect()
+                placeholders = ",".join("?" * len(keys))
+                rows = db.execute(
+                    f"SELECT key, recommendation FROM recommendations"
+                    f" WHERE key IN ({placeholders}) AND expires_at > ?",
+                    (*keys, now),
+                ).fetchall()
+                found = dict(rows)
+                if found:
+                    with db:
+                        db.executemany(
+                            "UPDATE recommendations SET last_used = ? WHERE key = ?",
+                            [(now, key) for key in found],
+                        )
+            except sqlite3.Error as error:
+                self.errors += 1
+                print(f"Recommendation cache read failed: {error}")
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+        return found
+
+    def set_many(self, entries: Dict[str, Dict[str, str]]):
+        """
+        Store recommendations and evict past max_entries.
+
+        Args:
+            entries: key -> {"checkName", "recommendation"}
+        """
+        if not self.enabled or not entries:
+            return
+
+        now = self._clock()
+        with self._lock:
+            try:
+                db = self._connect()
+                with db:
+                    db.executemany(
+                        "INSERT OR REPLACE INTO recommendations"
+                        " (key, check_name, recommendation, expires_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                        [
+                            (key, entry["checkName"], entry["recommendation"], now + self.ttl, now)
+                            for key, entry in entries.items()
+                        ],
+                    )
+                    db.execute("DELETE FROM recommendations WHERE expires_at <= ?", (now,))
+                    excess = db.execute("SELECT COUNT(*) FROM recommendations").fetchone()[0] - self.max_entries
+                    if excess > 0:
+                        db.execute(
+                            "DELETE FROM recommendations WHERE key IN"
+                            " (SELECT key FROM recommendations ORDER BY last_used LIMIT ?)",
+                            (excess,),
+                        )
+                        self.evictions += excess
+            except sqlite3.Error as error:
+                self.errors += 1
+                print(f"Recommendation cache write failed: {error}")
+
+    def size(self) -> int:
+        if not self.enabled or (self._db is None and not os.path.exists(self.path)):
+            return 0
+        with self._lock:
+            try:
+                return self._connect().execute("SELECT COUNT(*) FROM recommendations").fetchone()[0]
+            except sqlite3.Error:
+                return 0
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.execute("DELETE FROM recommendations")
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and sizing"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "errors": self.errors,
+            "size": self.size(),
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl,
+            "includeUrl": self.include_url,
+        }
+
+
+_recommendation_cache: Optional[RecommendationCache] = None
+
+
+def get_recommendation_cache() -> RecommendationCache:
+    """Get or create the shared recommendation cache"""
+    global _recommendation_cache
+
+    if _recommendation_cache is None:
+        _recommendation_cache = RecommendationCache.from_env()
+
+    return _recommendation_cache
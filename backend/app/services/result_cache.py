@@ -0,0 +1,194 @@
+"""
+Result Cache Service
+
+Caches /api/check responses keyed by normalized URL and ruleset version.
+A bounded in-memory LRU tier sits in front of an optional shared backend
+(anything speaking the Redis protocol), so several workers can share
+results while hot entries stay local.
+"""
+
+import os
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.utils.urls import normalize_url
+
+
+class RedisCacheBackend:
+    """
+    Shared cache tier on a Redis-protocol server.
+
+    Args:
+        url: Connection URL (e.g. redis://cache:6379/0)
+        client: Pre-built client exposing async get(key) and
+            set(key, value, ex=seconds); used instead of url
+    """
+
+    name = "redis"
+
+    def __init__(self, url: Optional[str] = None, client: Any = None):
+        if client is None:
+            try:
+                import redis.asyncio as redis_asyncio
+            except ImportError as error:
+                raise RuntimeError(
+                    "RESULT_CACHE_REDIS_URL is set but the 'redis' package is not installed"
+                ) from error
+            client = redis_asyncio.from_url(url)
+        self._client = client
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self._client.get(key)
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        return value
+
+    async def set(self, key: str, value: str, ttl: int):
+        await self._client.set(key, value, ex=max(1, int(ttl)))
+
+
+class ResultCache:
+    """
+    TTL cache with an in-memory LRU tier and an optional shared backend.
+
+    Backend failures are counted and otherwise ignored: a cache outage
+    must never fail a compliance check.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 900,
+        max_entries: int = 256,
+        backend: Optional[Any] = None,
+        clock=time.time,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.backend = backend
+        self._clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.backend_hits = 0
+        self.backend_errors = 0
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        """Build the cache from RESULT_CACHE_* environment variables"""
+        redis_url = os.getenv("RESULT_CACHE_REDIS_URL")
+        return cls(
+            ttl=float(os.getenv("RESULT_CACHE_TTL", 900)),
+            max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", 256)),
+            backend=RedisCacheBackend(redis_url) if redis_url else None,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and (self.max_entries > 0 or self.backend is not None)
+
+    @staticmethod
+    def make_key(url: str, ruleset_version: str) -> str:
+        """Cache key for a URL under a given ruleset version"""
+        digest = hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+        return f"wcc:result:{ruleset_version}:{digest}"
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a fresh entry, counting a hit or a miss"""
+        if not self.enabled:
+            return None
+
+        now = self._clock()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+
+        if self.backend is not None:
+            try:
+                raw = await self.backend.get(key)
+            except Exception as error:
+                self.backend_errors += 1
+                print(f"Result cache backend read failed: {error}")
+                raw = None
+            if raw:
+                # A corrupt or old-format entry is a miss, not a failed check
+                try:
+                    stored = json.loads(raw)
+                    expires_at, value = stored["expiresAt"], stored["value"]
+                    fresh = expires_at > now
+                except (ValueError, KeyError, TypeError) as error:
+                    self.backend_errors += 1
+                    print(f"Result cache backend entry unreadable: {error!r}")
+                    fresh = False
+                if fresh:
+                    self._remember(key, expires_at, value)
+                    self.hits += 1
+                    self.backend_hits += 1
+                    return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Dict[str, Any]):
+        """Store an entry in both tiers"""
+        if not self.enabled:
+            return
+
+        expires_at = self._clock() + self.ttl
+        self._remember(key, expires_at, value)
+
+        if self.backend is not None:
+            try:
+                payload = json.dumps({"expiresAt": expires_at, "value": value})
+                await self.backend.set(key, payload, self.ttl)
+            except Exception as error:
+                self.backend_errors += 1
+                print(f"Result cache backend write failed: {error}")
+
+    def _remember(self, key: str, expires_at: float, value: Dict[str, Any]):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop the in-memory tier (the shared backend expires on its own)"""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and sizing"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "backendHits": self.backend_hits,
+            "backendErrors": self.backend_errors,
+            "size": len(self._entries),
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl,
+            "backend": getattr(self.backend, "name", type(self.backend).__name__) if self.backend is not None else None,
+        }
+
+
+_result_cache: Optional[ResultCache] = None
+
+
+def get_result_cache() -> ResultCache:
+    """Get or create the shared result cache"""
+    global _result_cache
+
+    if _result_cache is None:
+        _result_cache = ResultCache.from_env()
+
+    return _result_cache
@@ -0,0 +1,100 @@
+"""
+Bloom Filter
+
+Fixed-memory set membership for crawl deduplication. A Bloom filter never
+reports a URL it has seen as new; at the configured error rate it may
+report a new URL as seen, which only means that page is not crawled.
+"""
+
+import math
+import hashlib
+from typing import Iterable, Set
+
+
+class BloomFilter:
+    """
+    Bit-array Bloom filter sized for a capacity and false-positive rate.
+
+    Args:
+        capacity: Expected number of items
+        error_rate: Acceptable false-positive probability once full
+    """
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.sha256(item.encode("utf-8")).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> bool:
+        """Add an item; returns True if it was (probably) new"""
+        added = False
+        for position in self._positions(item):
+            byte, bit = divmod(position, 8)
+            if not self._bits[byte] & (1 << bit):
+                self._bits[byte] |= 1 << bit
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position // 8] & (1 << (position % 8))
+            for position in self._positions(item)
+        )
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class VisitedSet:
+    """
+    Exact set for small crawls that spills into a Bloom filter for large
+    ones, so memory stays bounded however many URLs are discovered.
+
+    Args:
+        exact_limit: URLs held exactly before new ones go to the filter
+        capacity: Bloom filter capacity
+        error_rate: Bloom filter false-positive rate
+    """
+
+    def __init__(self, exact_limit: int = 50000, capacity: int = 1000000, error_rate: float = 0.001):
+        self.exact_limit = exact_limit
+        self._exact: Set[str] = set()
+        self._capacity = capacity
+        self._error_rate = error_rate
+        self._bloom = None
+
+    def add(self, url: str) -> bool:
+        """Record a URL; returns True if it had not been seen"""
+        if url in self:
+            return False
+        if len(self._exact) < self.exact_limit:
+            self._exact.add(url)
+        else:
+            if self._bloom is None:
+                self._bloom = BloomFilter(self._capacity, self._error_rate)
+            self._bloom.add(url)
+        return True
+
+    def update(self, urls: Iterable[str]):
+        for url in urls:
+            self.add(url)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._exact or (self._bloom is not None and url in self._bloom)
+
+    def __len__(self) -> int:
+        return len(self._exact) + (len(self._bloom) if self._bloom is not None else 0)
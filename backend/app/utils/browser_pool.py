@@ -0,0 +1,623 @@
+"""
+Browser Pool
+
+Keeps a set of pre-launched Chromium browsers, each with a warm, recycled
+BrowserContext, so concurrent analyses don't queue behind one shared browser.
+
+Sync slots own their own sync_playwright instance on a dedicated thread,
+because sync Playwright objects may only be used from the thread that
+created them. Async slots share one async_playwright driver and run on
+the event loop.
+"""
+
+import os
+import sys
+import asyncio
+import threading
+import itertools
+import contextvars
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from playwright.sync_api import sync_playwright
+from playwright.async_api import async_playwright
+
+from app.utils.metrics import BROWSER_CHECKOUT
+from app.utils.tracing import get_tracer
+
+# Chromium flags shared by every pooled browser
+BROWSER_LAUNCH_ARGS = [
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-accelerated-2d-canvas',
+    '--disable-gpu',
+    '--disable-web-security',
+    '--disable-features=IsolateOrigins,site-per-process',
+    '--no-first-run',
+    '--no-zygote',
+    '--disable-blink-features=AutomationControlled',
+]
+
+VIEWPORT = {"width": 1280, "height": 720}
+
+# Unknown switch Chromium ignores; lets us find a slot's process tree in /proc
+_SLOT_MARKER_ARG = "--wcc-browser-slot"
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment"""
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment"""
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def slot_settings() -> Dict[str, Any]:
+    """Recycling limits for new slots, from the environment"""
+    return {
+        "max_uses": _env_int("BROWSER_CONTEXT_MAX_USES", 50),
+        "max_rss_mb": _env_float("BROWSER_MAX_RSS_MB", 1024),
+    }
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no browser slot becomes free within the checkout timeout"""
+
+
+def _read_process_table() -> Dict[int, Dict[str, Any]]:
+    """Map pid -> ppid, RSS and cmdline for every process (Linux only)"""
+    table = {}
+    if not sys.platform.startswith("linux"):
+        return table
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                stat = f.read().decode("ascii", "replace")
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                cmdline = f.read().decode("utf-8", "replace")
+        except OSError:
+            continue
+        # The command name may contain spaces, so split after its closing paren
+        fields = stat[stat.rfind(")") + 2:].split()
+        table[int(entry)] = {
+            "ppid": int(fields[1]),
+            "rss": int(fields[21]) * page_size,
+            "cmdline": cmdline,
+        }
+    return table
+
+
+def process_tree_rss(marker: str, table: Optional[Dict[int, Dict[str, Any]]] = None) -> Optional[int]:
+    """
+    Sum the resident memory of the process whose cmdline contains marker
+    and all of its descendants.
+
+    Returns:
+        RSS in bytes, or None when the process can't be found
+    """
+    table = _read_process_table() if table is None else table
+    roots = [pid for pid, info in table.items() if marker in info["cmdline"]]
+    if not roots:
+        return None
+
+    children: Dict[int, List[int]] = {}
+    for pid, info in table.items():
+        children.setdefault(info["ppid"], []).append(pid)
+
+    total = 0
+    stack = list(roots)
+    seen = set()
+    while stack:
+        pid = stack.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        total += table[pid]["rss"]
+        stack.extend(children.get(pid, []))
+    return total
+
+
+class _SlotBase:
+    """Recycling policy shared by the sync and async slots"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, max_uses: int = 50, max_rss_mb: float = 1024, proxy: Optional[Dict[str, str]] = None):
+        self.slot_id = next(self._ids)
+        self.max_uses = max_uses
+        self.max_rss_mb = max_rss_mb
+        self.proxy = proxy
+        self.uses = 0
+        self.browser_launches = 0
+        self._browser = None
+        self._context = None
+
+    @property
+    def marker(self) -> str:
+        """Command-line marker identifying this slot's current browser process"""
+        return f"{_SLOT_MARKER_ARG}={os.getpid()}-{self.slot_id}-{self.browser_launches}"
+
+    def rss_bytes(self) -> Optional[int]:
+        """Resident memory of this slot's Chromium process tree"""
+        if self._browser is None:
+            return None
+        return process_tree_rss(self.marker)
+
+    def _launch_options(self) -> Dict[str, Any]:
+        self.browser_launches += 1
+        options = {
+            "headless": True,
+            "args": BROWSER_LAUNCH_ARGS + [self.marker],
+            "timeout": 30000,
+        }
+        if self.proxy is not None:
+            options["proxy"] = self.proxy
+        return options
+
+    def _browser_gone(self) -> bool:
+        return self._browser is None or not self._browser.is_connected()
+
+    def _over_memory_limit(self) -> bool:
+        """Whether the process tree is past max_rss_mb (scans /proc)"""
+        if self.max_rss_mb <= 0:
+            return False
+        rss = self.rss_bytes()
+        return rss is not None and rss > self.max_rss_mb * 1024 * 1024
+
+    def _needs_relaunch(self) -> bool:
+        return self._browser_gone() or self._over_memory_limit()
+
+
+class BrowserSlot(_SlotBase):
+    """
+    One browser plus one reusable BrowserContext, pinned to its own thread.
+
+    The context is recycled after max_uses pages; the whole browser is
+    relaunched when its process tree grows past max_rss_mb or disconnects.
+    Cookies are cleared between uses so analyses don't see each other's
+    sessions.
+    """
+
+    # The page keeps running on its thread even if the caller goes away
+    cancellable = False
+
+    def __init__(self, max_uses: int = 50, max_rss_mb: float = 1024, proxy: Optional[Dict[str, str]] = None):
+        super().__init__(max_uses, max_rss_mb, proxy)
+        self._executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix=f"browser-slot-{self.slot_id}",
+        )
+        self._playwright = None
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """Run fn on this slot's thread"""
+        return self._executor.submit(fn, *args)
+
+    def start(self) -> Future:
+        """Launch the browser and context ahead of the first request"""
+        return self.submit(self._ensure_ready)
+
+    def run(self, fn: Callable, *args) -> asyncio.Future:
+        """Schedule fn(page, *args) on this slot's thread, in the caller's context"""
+        return asyncio.wrap_future(self.submit(contextvars.copy_context().run, self.run_page, fn, *args))
+
+    def run_page(self, fn: Callable, *args) -> Any:
+        """
+        Open a page in the warm context, call fn(page, *args) and recycle.
+        Must be called on this slot's thread (see submit()).
+        """
+        self._ensure_ready()
+        page = self._context.new_page()
+        try:
+            return fn(page, *args)
+        finally:
+            try:
+                if not page.is_closed():
+                    page.close()
+            except Exception:
+                pass  # Silently ignore close errors
+            self.uses += 1
+            self._recycle_if_needed()
+
+    def close(self) -> Future:
+        """Close the browser and stop this slot's thread"""
+        future = self.submit(self._close)
+        self._executor.shutdown(wait=False)
+        return future
+
+    def _ensure_ready(self):
+        """Health-check the browser and context, relaunching whatever is gone"""
+        if self._browser is None or not self._browser.is_connected():
+            self._close_browser()
+            if self._playwright is None:
+                self._playwright = sync_playwright().start()
+            self._browser = self._playwright.chromium.launch(**self._launch_options())
+
+        if self._context is None:
+            self._context = self._browser.new_context(viewport=VIEWPORT)
+            self.uses = 0
+
+    def _recycle_if_needed(self):
+        """Drop the context after max_uses, or the browser past max_rss_mb"""
+        if self._needs_relaunch():
+            self._close_browser()
+        elif self.uses >= self.max_uses:
+            self._close_context()
+        else:
+            try:
+                self._context.clear_cookies()
+            except Exception:
+                self._close_context()
+
+    def _close_context(self):
+        if self._context is not None:
+            try:
+                self._context.close()
+            except Exception:
+                pass
+            self._context = None
+
+    def _close_browser(self):
+        self._close_context()
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+
+    def _close(self):
+        self._close_browser()
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+
+class AsyncPlaywrightDriver:
+    """One async_playwright driver process shared by every async slot"""
+
+    def __init__(self):
+        self._playwright = None
+        self._users = 0
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            self._users += 1
+            return self._playwright
+
+    async def release(self):
+        async with self._lock:
+            self._users -= 1
+            if self._users <= 0 and self._playwright is not None:
+                try:
+                    await self._playwright.stop()
+                except Exception:
+                    pass
+                self._playwright = None
+                self._users = 0
+
+
+class AsyncBrowserSlot(_SlotBase):
+    """
+    Async counterpart of BrowserSlot: one browser and warm context driven
+    directly from the event loop, with no thread hop per page.
+    """
+
+    # Cancelling the caller cancels the page work too
+    cancellable = True
+
+    def __init__(
+        self,
+        driver: AsyncPlaywrightDriver,
+        max_uses: int = 50,
+        max_rss_mb: float = 1024,
+        proxy: Optional[Dict[str, str]] = None,
+    ):
+        super().__init__(max_uses, max_rss_mb, proxy)
+        self._driver = driver
+        self._playwright = None
+
+    def start(self) -> asyncio.Future:
+        """Launch the browser and context ahead of the first request"""
+        return asyncio.ensure_future(self._ensure_ready())
+
+    def run(self, fn: Callable, *args) -> asyncio.Future:
+        """Schedule the coroutine fn(page, *args) on the current loop"""
+        return asyncio.ensure_future(self.run_page(fn, *args))
+
+    async def run_page(self, fn: Callable, *args) -> Any:
+        """Open a page in the warm context, await fn(page, *args) and recycle"""
+        await self._ensure_ready()
+        page = await self._context.new_page()
+        try:
+            return await fn(page, *args)
+        finally:
+            try:
+                if not page.is_closed():
+                    await page.close()
+            except Exception:
+                pass  # Silently ignore close errors
+            self.uses += 1
+            await self._recycle_if_needed()
+
+    def close(self) -> asyncio.Future:
+        """Close the browser and give back the shared driver"""
+        return asyncio.ensure_future(self._close())
+
+    async def _ensure_ready(self):
+        if self._browser is None or not self._browser.is_connected():
+            await self._close_browser()
+            if self._playwright is None:
+                self._playwright = await self._driver.acquire()
+            self._browser = await self._playwright.chromium.launch(**self._launch_options())
+
+        if self._context is None:
+            self._context = await self._browser.new_context(viewport=VIEWPORT)
+            self.uses = 0
+
+    async def _recycle_if_needed(self):
+        # The /proc scan grows with the host's process count: keep it off the loop
+        relaunch = self._browser_gone() or (
+            self.max_rss_mb > 0 and await asyncio.to_thread(self._over_memory_limit)
+        )
+        if relaunch:
+            await self._close_browser()
+        elif self.uses >= self.max_uses:
+            await self._close_context()
+        else:
+            try:
+                await self._context.clear_cookies()
+            except Exception:
+                await self._close_context()
+
+    async def _close_context(self):
+        if self._context is not None:
+            try:
+                await self._context.close()
+            except Exception:
+                pass
+            self._context = None
+
+    async def _close_browser(self):
+        await self._close_context()
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+
+    async def _close(self):
+        await self._close_browser()
+        if self._playwright is not None:
+            self._playwright = None
+            await self._driver.release()
+
+
+class BrowserPool:
+    """
+    Bounded pool of BrowserSlots with fair (FIFO) checkout.
+
+    Slots are created on demand up to max_size; min_size slots are launched
+    up front by start(). A caller that can't get a slot within the checkout
+    timeout gets a PoolTimeoutError.
+    """
+
+    def __init__(
+        self,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        checkout_timeout: Optional[float] = None,
+        slot_factory: Optional[Callable[[], Any]] = None,
+    ):
+        self.max_size = max(1, max_size if max_size is not None else _env_int(
+            "BROWSER_POOL_MAX_SIZE", os.cpu_count() or 2
+        ))
+        self.min_size = min(self.max_size, max(0, min_size if min_size is not None else _env_int(
+            "BROWSER_POOL_MIN_SIZE", 1
+        )))
+        self.checkout_timeout = (
+            checkout_timeout if checkout_timeout is not None
+            else _env_float("BROWSER_POOL_CHECKOUT_TIMEOUT", 30.0)
+        )
+        self._slot_factory = slot_factory or (lambda: BrowserSlot(**slot_settings()))
+
+        self._lock = threading.Lock()
+        self._slots: List[Any] = []
+        self._idle: Deque[Any] = deque()
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._closed = False
+
+    async def start(self):
+        """Pre-launch min_size slots so the first requests find a warm browser"""
+        with self._lock:
+            missing = self.min_size - len(self._slots)
+            new_slots = [self._slot_factory() for _ in range(max(0, missing))]
+            self._slots.extend(new_slots)
+
+        results = await asyncio.gather(
+            *(asyncio.wrap_future(slot.start()) for slot in new_slots),
+            return_exceptions=True,
+        )
+        for slot, result in zip(new_slots, results):
+            if isinstance(result, BaseException):
+                print(f"Failed to pre-launch browser slot: {result}")
+                self._discard(slot)
+            else:
+                self.release(slot)
+
+    async def acquire(self, timeout: Optional[float] = None) -> Any:
+        """
+        Check out a slot, waiting in FIFO order when the pool is exhausted.
+
+        Raises:
+            PoolTimeoutError: If no slot frees up within the timeout
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        new_slot = None
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Browser pool is closed")
+            if self._idle:
+                return self._idle.popleft()
+            if len(self._slots) < self.max_size:
+                new_slot = self._slot_factory()
+                self._slots.append(new_slot)
+            else:
+                waiter = loop.create_future()
+                self._waiters.append(waiter)
+
+        if new_slot is not None:
+            return new_slot
+
+        try:
+            return await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            raise PoolTimeoutError(
+                f"No browser available within {timeout:.0f}s"
+            ) from None
+        finally:
+            with self._lock:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+
+    def release(self, slot: Any):
+        """Return a slot, handing it straight to the longest waiter if any"""
+        with self._lock:
+            if self._closed:
+                close_now = True
+            else:
+                close_now = False
+                while self._waiters:
+                    waiter = self._waiters.popleft()
+                    if not waiter.done():
+                        waiter.get_loop().call_soon_threadsafe(self._hand_off, waiter, slot)
+                        return
+                self._idle.append(slot)
+
+        if close_now:
+            self._discard(slot)
+
+    def _hand_off(self, waiter: asyncio.Future, slot: Any):
+        """Complete a waiter on its own loop; re-release if it already gave up"""
+        if waiter.done():
+            self.release(slot)
+        else:
+            waiter.set_result(slot)
+
+    def _discard(self, slot: Any):
+        with self._lock:
+            if slot in self._slots:
+                self._slots.remove(slot)
+        slot.close()
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """
+        Run fn(page, *args) on a fresh page from a pooled context.
+
+        The slot goes back to the pool only once fn has actually finished,
+        even if the caller is cancelled first.
+        """
+        with BROWSER_CHECKOUT.time(), get_tracer().span("browser.checkout"):
+            slot = await self.acquire()
+        try:
+            inner = slot.run(fn, *args)
+        except BaseException:
+            self.release(slot)
+            raise
+        inner.add_done_callback(lambda f: self._finished(slot, f))
+        try:
+            return await asyncio.shield(inner)
+        except asyncio.CancelledError:
+            if slot.cancellable:
+                inner.cancel()
+            raise
+
+    def _finished(self, slot: Any, future: asyncio.Future):
+        if not future.cancelled():
+            future.exception()  # Mark retrieved when the caller has gone
+        self.release(slot)
+
+    async def close(self):
+        """Close idle slots now; busy ones are closed as they come back"""
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            waiters = list(self._waiters)
+            self._waiters.clear()
+            for slot in idle:
+                self._slots.remove(slot)
+
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.get_loop().call_soon_threadsafe(
+                    self._fail_waiter, waiter, RuntimeError("Browser pool is closed")
+                )
+
+        await asyncio.gather(
+            *(asyncio.wrap_future(slot.close()) for slot in idle),
+            return_exceptions=True,
+        )
+
+    @staticmethod
+    def _fail_waiter(waiter: asyncio.Future, error: Exception):
+        if not waiter.done():
+            waiter.set_exception(error)
+
+    def rss_by_slot(self) -> Dict[int, int]:
+        """
+        Resident memory of each slot's running Chromium.
+
+        Reads /proc, so call it off the event loop.
+
+        Returns:
+            slot_id -> bytes, for slots with a live browser
+        """
+        with self._lock:
+            slots = list(self._slots)
+        usage = {}
+        for slot in slots:
+            rss = slot.rss_bytes() if hasattr(slot, "rss_bytes") else None
+            if rss is not None:
+                usage[slot.slot_id] = rss
+        return usage
+
+    def stats(self) -> Dict[str, int]:
+        """Current pool occupancy"""
+        with self._lock:
+            size = len(self._slots)
+            idle = len(self._idle)
+            return {
+                "size": size,
+                "idle": idle,
+                "inUse": size - idle,
+                "waiting": len(self._waiters),
+                "minSize": self.min_size,
+                "maxSize": self.max_size,
+            }
@@ -0,0 +1,164 @@
+"""
+Color Contrast Engine
+
+WCAG 2.x contrast ratios for every text element on a page, computed in one
+vectorized pass over the columnar data TEXT_CONTRAST_SCRIPT collects. Uses
+NumPy when it is installed and falls back to plain Python otherwise.
+"""
+
+from typing import Any, Dict, List, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Minimum contrast ratios (WCAG 1.4.3 AA and 1.4.6 AAA)
+AA_NORMAL = 4.5
+AA_LARGE = 3.0
+AAA_NORMAL = 7.0
+AAA_LARGE = 4.5
+
+# "Large" text: at least 18pt, or 14pt bold (in CSS pixels)
+LARGE_TEXT_PX = 24.0
+LARGE_BOLD_TEXT_PX = 18.66
+BOLD_WEIGHT = 700
+
+# sRGB -> luminance weights
+_LUMINANCE_WEIGHTS = (0.2126, 0.7152, 0.0722)
+
+
+def _channel(value: float) -> float:
+    c = value / 255.0
+    return c / 12.92 if c <= 0.03928 else ((c + 0.055) / 1.055) ** 2.4
+
+
+def relative_luminance(rgb: Sequence[float]) -> float:
+    """WCAG relative luminance of one sRGB color (0-255 channels)"""
+    return sum(weight * _channel(value) for weight, value in zip(_LUMINANCE_WEIGHTS, rgb))
+
+
+def contrast_ratio(foreground: Sequence[float], background: Sequence[float]) -> float:
+    """WCAG contrast ratio between two opaque sRGB colors (1.0 to 21.0)"""
+    lighter, darker = sorted((relative_luminance(foreground), relative_luminance(background)), reverse=True)
+    return (lighter + 0.05) / (darker + 0.05)
+
+
+def _is_large(size: float, weight: float) -> bool:
+    return size >= LARGE_TEXT_PX or (size >= LARGE_BOLD_TEXT_PX and weight >= BOLD_WEIGHT)
+
+
+def _measure_numpy(data: Dict[str, Any], count: int):
+    fg = np.asarray(data["fg"], dtype=np.float64).reshape(count, 4)
+    bg = np.asarray(data["bg"], dtype=np.float64).reshape(count, 3)
+    size = np.asarray(data["fontSize"], dtype=np.float64)
+    weight = np.asarray(data["fontWeight"], dtype=np.float64)
+
+    # Semi-transparent text is composited over its background
+    alpha = fg[:, 3:4]
+    fg_rgb = fg[:, :3] * alpha + bg * (1.0 - alpha)
+
+    def luminance(rgb):
+        c = rgb / 255.0
+        linear = np.where(c <= 0.03928, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+        return linear @ np.asarray(_LUMINANCE_WEIGHTS)
+
+    l_fg, l_bg = luminance(fg_rgb), luminance(bg)
+    ratio = (np.maximum(l_fg, l_bg) + 0.05) / (np.minimum(l_fg, l_bg) + 0.05)
+
+    large = (size >= LARGE_TEXT_PX) | ((size >= LARGE_BOLD_TEXT_PX) & (weight >= BOLD_WEIGHT))
+    aa_required = np.where(large, AA_LARGE, AA_NORMAL)
+    aaa_required = np.where(large, AAA_LARGE, AAA_NORMAL)
+
+    # Text over background images can't be judged from colors alone
+    measurable = ~np.asarray(data.get("bgImage") or [0] * count, dtype=bool)
+    fail_aa = measurable & (ratio < aa_required)
+    fail_aaa = measurable & (ratio < aaa_required)
+
+    # Worst offenders first, relative to the ratio they needed
+    failing = np.flatnonzero(fail_aa)
+    worst = failing[np.argsort(ratio[failing] / aa_required[failing], kind="stable")]
+    return (
+        int(measurable.sum()), int(fail_aa.sum()), int(fail_aaa.sum()),
+        [(int(i), float(ratio[i]), float(aa_required[i])) for i in worst],
+    )
+
+
+def _measure_python(data: Dict[str, Any], count: int):
+    fg, bg = data["fg"], data["bg"]
+    sizes, weights = data["fontSize"], data["fontWeight"]
+    bg_image = data.get("bgImage") or [0] * count
+
+    # Few distinct colors on a real page, so luminances are memoized
+    luminances: Dict[tuple, float] = {}
+
+    def luminance(rgb: tuple) -> float:
+        if rgb not in luminances:
+            luminances[rgb] = relative_luminance(rgb)
+        return luminances[rgb]
+
+    measurable = fail_aa = fail_aaa = 0
+    failing = []
+    for i in range(count):
+        if bg_image[i]:
+            continue
+        measurable += 1
+        r, g, b, a = fg[4 * i:4 * i + 4]
+        back = tuple(bg[3 * i:3 * i + 3])
+        front = (r * a + back[0] * (1 - a), g * a + back[1] * (1 - a), b * a + back[2] * (1 - a))
+        l_fg, l_bg = luminance(front), luminance(back)
+        ratio = (max(l_fg, l_bg) + 0.05) / (min(l_fg, l_bg) + 0.05)
+
+        large = _is_large(sizes[i], weights[i])
+        aa_required = AA_LARGE if large else AA_NORMAL
+        if ratio < aa_required:
+            fail_aa += 1
+            failing.append((i, ratio, aa_required))
+        if ratio < (AAA_LARGE if large else AAA_NORMAL):
+            fail_aaa += 1
+
+    failing.sort(key=lambda item: item[1] / item[2])
+    return measurable, fail_aa, fail_aaa, failing
+
+
+def analyze_contrast(data: Dict[str, Any], max_examples: int = 5) -> Dict[str, Any]:
+    """
+    Measure every collected text element against the WCAG thresholds.
+
+    Args:
+        data: Columnar textContrast page data: fg (flat RGBA), bg (flat
+            opaque RGB of the effective background), fontSize (px),
+            fontWeight, bgImage (1 where a background image is involved)
+            and text (snippets)
+        max_examples: Worst failures to return
+
+    Returns:
+        checked (measurable elements), failingAA, failingAAA, skipped
+        (elements over background images), truncated, and worst: the
+        lowest-contrast failures as {text, ratio, required}
+    """
+    count = int(data.get("count") or len(data.get("fontSize") or []))
+    if count == 0:
+        return {"checked": 0, "failingAA": 0, "failingAAA": 0, "skipped": 0,
+                "truncated": bool(data.get("truncated")), "worst": []}
+
+    measure = _measure_numpy if np is not None else _measure_python
+    measurable, fail_aa, fail_aaa, failing = measure(data, count)
+
+    texts: List[str] = data.get("text") or []
+    worst = [
+        {
+            "text": texts[i] if i < len(texts) else "",
+            "ratio": round(ratio, 2),
+            "required": required,
+        }
+        for i, ratio, required in failing[:max_examples]
+    ]
+    return {
+        "checked": measurable,
+        "failingAA": fail_aa,
+        "failingAAA": fail_aaa,
+        "skipped": count - measurable,
+        "truncated": bool(data.get("truncated")),
+        "worst": worst,
+    }
@@ -0,0 +1,231 @@
+"""
+DNS Resolver
+
+Non-blocking hostname resolution for URL validation. A and AAAA are
+queried in parallel with dns.asyncresolver, answers are cached for their
+record TTL (capped) in a size-bounded LRU, and names that don't exist are
+cached briefly too, so batch runs don't look up the same popular hosts
+over and over. Concurrent lookups of one name share a single query.
+"""
+
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import dns.resolver
+import dns.asyncresolver
+
+from app.utils.single_flight import SingleFlight
+
+# Answers that mean "this name has no such records", worth caching
+_NEGATIVE = (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_nameservers(value: str) -> Tuple[List[str], Optional[int]]:
+    """
+    Parse "host[:port],host[:port]" into nameserver addresses and a port.
+
+    dnspython uses one port for every nameserver, so the last one given
+    wins. IPv6 addresses go in brackets: "[::1]:5353".
+    """
+    servers: List[str] = []
+    port = None
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        if item.startswith("["):
+            host, _, rest = item[1:].partition("]")
+            if rest.startswith(":"):
+                port = int(rest[1:])
+        elif item.count(":") == 1:
+            host, port_text = item.split(":")
+            port = int(port_text)
+        else:
+            host = item
+        servers.append(host)
+    return servers, port
+
+
+class CachingResolver:
+    """
+    Async A/AAAA resolver with a TTL-respecting LRU cache.
+
+    Args:
+        nameservers: Servers to query (defaults to the system resolver)
+        port: Nameserver port (for a local stub server in tests)
+        timeout: Seconds allowed per lookup, both record types together
+        max_entries: Hostnames kept; least recently used ones are evicted
+        max_ttl: Upper bound on how long an answer is cached
+        negative_ttl: Seconds a name with no addresses stays cached
+        clock: Monotonic time source (for tests)
+    """
+
+    def __init__(
+        self,
+        nameservers: Optional[List[str]] = None,
+        port: Optional[int] = None,
+        timeout: float = 3.0,
+        max_entries: int = 4096,
+        max_ttl: float = 300,
+        negative_ttl: float = 30,
+        clock=time.monotonic,
+    ):
+        self.nameservers = nameservers or None
+        self.port = port
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._resolver: Optional[dns.asyncresolver.Resolver] = None
+        self._cache: "OrderedDict[str, Tuple[float, List[str]]]" = OrderedDict()
+        self._in_flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.errors = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "CachingResolver":
+        """Build the resolver from DNS_* environment variables"""
+        nameservers, port = parse_nameservers(os.getenv("DNS_NAMESERVERS", ""))
+        return cls(
+            nameservers=nameservers,
+            port=port,
+            timeout=float(os.getenv("DNS_TIMEOUT", 3.0)),
+            max_entries=_env_int("DNS_CACHE_MAX_ENTRIES", 4096),
+            max_ttl=float(os.getenv("DNS_CACHE_MAX_TTL", 300)),
+            negative_ttl=float(os.getenv("DNS_NEGATIVE_TTL", 30)),
+        )
+
+    def _get_resolver(self) -> dns.asyncresolver.Resolver:
+        # Built on first use: reading the system configuration touches disk
+        if self._resolver is None:
+            resolver = dns.asyncresolver.Resolver(configure=self.nameservers is None)
+            if self.nameservers is not None:
+                resolver.nameservers = self.nameservers
+            if self.port is not None:
+                resolver.port = self.port
+            resolver.lifetime = self.timeout
+            self._resolver = resolver
+        return self._resolver
+
+    def _lookup(self, hostname: str) -> Optional[List[str]]:
+        entry = self._cache.get(hostname)
+        if entry is None:
+            return None
+        expires_at, addresses = entry
+        if expires_at <= self._clock():
+            del self._cache[hostname]
+            return None
+        self._cache.move_to_end(hostname)
+        return addresses
+
+    def _store(self, hostname: str, addresses: List[str], ttl: float):
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        self._cache[hostname] = (self._clock() + ttl, addresses)
+        self._cache.move_to_end(hostname)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+            self.evictions += 1
+
+    async def _query(self, hostname: str) -> List[str]:
+        resolver = self._get_resolver()
+        answers = await asyncio.gather(
+            resolver.resolve(hostname, "A", lifetime=self.timeout),
+            resolver.resolve(hostname, "AAAA", lifetime=self.timeout),
+            return_exceptions=True,
+        )
+
+        addresses: List[str] = []
+        ttls: List[float] = []
+        failure: Optional[BaseException] = None
+        for answer in answers:
+            if isinstance(answer, _NEGATIVE):
+                continue
+            if isinstance(answer, BaseException):
+                failure = answer
+                continue
+            addresses.extend(str(rdata) for rdata in answer)
+            ttls.append(answer.rrset.ttl)
+
+        if addresses:
+            # A family that timed out doesn't invalidate the other's answer,
+            # but it isn't worth caching a possibly partial list for long
+            ttl = min(ttls + [self.max_ttl])
+            self._store(hostname, addresses, min(ttl, self.negative_ttl) if failure else ttl)
+        elif failure is None:
+            self._store(hostname, [], self.negative_ttl)
+        else:
+            self.errors += 1
+            raise failure
+        return addresses
+
+    async def resolve(self, hostname: str) -> List[str]:
+        """
+        Resolve a hostname to its IPv4 and IPv6 addresses.
+
+        Args:
+            hostname: Name to resolve
+
+        Returns:
+            Addresses from both families (empty if the name has none)
+
+        Raises:
+            dns.exception.DNSException: If every query failed without an
+                answer (timeouts, unreachable servers); not cached
+        """
+        hostname = hostname.lower().rstrip(".")
+        cached = self._lookup(hostname)
+        if cached is not None:
+            self.hits += 1
+            if not cached:
+                self.negative_hits += 1
+            return list(cached)
+
+        self.misses += 1
+        addresses, _shared = await self._in_flight.do(hostname, lambda: self._query(hostname))
+        return list(addresses)
+
+    def clear(self):
+        """Drop every cached answer"""
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and sizing"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "negativeHits": self.negative_hits,
+            "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "errors": self.errors,
+            "evictions": self.evictions,
+            "size": len(self._cache),
+            "maxEntries": self.max_entries,
+        }
+
+
+_dns_resolver: Optional[CachingResolver] = None
+
+
+def get_dns_resolver() -> CachingResolver:
+    """Get or create the shared resolver"""
+    global _dns_resolver
+
+    if _dns_resolver is None:
+        _dns_resolver = CachingResolver.from_env()
+
+    return _dns_resolver
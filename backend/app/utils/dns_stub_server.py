@@ -0,0 +1,125 @@
+"""
+DNS Stub Server
+
+A tiny authoritative UDP DNS server for tests and benchmarks. It answers A
+and AAAA queries from a fixed record table with a fixed TTL, NXDOMAIN for
+unknown names, and counts the queries it gets, so the resolver and its
+cache can be exercised without the network.
+
+Run standalone:
+    python -m app.utils.dns_stub_server --port 5353 --record example.com=93.184.216.34
+
+then point the backend at it with DNS_NAMESERVERS=127.0.0.1:5353. Set
+DNS_STUB_LATENCY_MS to delay every answer.
+"""
+
+import os
+import asyncio
+import ipaddress
+from typing import Dict, List, Optional, Set, Tuple
+
+import dns.flags
+import dns.message
+import dns.rcode
+import dns.rdatatype
+import dns.rrset
+
+
+class _StubProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server: "DnsStubServer"):
+        self.server = server
+        self.transport: Optional[asyncio.DatagramTransport] = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr):
+        task = asyncio.get_running_loop().create_task(self._answer(data, addr))
+        self.server._pending.add(task)
+        task.add_done_callback(self.server._pending.discard)
+
+    async def _answer(self, data: bytes, addr):
+        try:
+            query = dns.message.from_wire(data)
+        except Exception:
+            return
+        if self.server.latency > 0:
+            await asyncio.sleep(self.server.latency)
+        if self.transport is not None and not self.transport.is_closing():
+            self.transport.sendto(self.server.answer(query).to_wire(), addr)
+
+
+class DnsStubServer:
+    """
+    UDP DNS server answering from a record table.
+
+    Args:
+        records: hostname -> addresses (IPv4 and IPv6 mixed)
+        ttl: TTL on every answer
+        latency: Seconds to wait before answering
+    """
+
+    def __init__(self, records: Optional[Dict[str, List[str]]] = None, ttl: int = 60, latency: float = 0.0):
+        self.records = {name.lower().rstrip("."): list(addresses) for name, addresses in (records or {}).items()}
+        self.ttl = ttl
+        self.latency = latency
+        self.queries: List[Tuple[str, str]] = []
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._pending: Set[asyncio.Task] = set()
+
+    def answer(self, query: dns.message.Message) -> dns.message.Message:
+        """Build the response to a query"""
+        response = dns.message.make_response(query)
+        response.flags |= dns.flags.AA
+        for question in query.question:
+            name = question.name.to_text(omit_final_dot=True).lower()
+            rdtype = dns.rdatatype.to_text(question.rdtype)
+            self.queries.append((name, rdtype))
+            if name not in self.records:
+                response.set_rcode(dns.rcode.NXDOMAIN)
+                continue
+            version = 4 if rdtype == "A" else 6 if rdtype == "AAAA" else None
+            addresses = [address for address in self.records[name]
+                         if ipaddress.ip_address(address).version == version]
+            if addresses:
+                response.answer.append(dns.rrset.from_text_list(question.name, self.ttl, "IN", rdtype, addresses))
+        return response
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Start listening and return the bound port"""
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _StubProtocol(self), local_addr=(host, port)
+        )
+        return self._transport.get_extra_info("sockname")[1]
+
+    def close(self):
+        for task in list(self._pending):
+            task.cancel()
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="DNS stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5353)
+    parser.add_argument("--ttl", type=int, default=60)
+    parser.add_argument("--record", action="append", default=[], help="name=address[,address]")
+    args = parser.parse_args()
+
+    table: Dict[str, List[str]] = {}
+    for record in args.record:
+        name, _, addresses = record.partition("=")
+        table.setdefault(name, []).extend(address.strip() for address in addresses.split(",") if address.strip())
+
+    async def serve():
+        server = DnsStubServer(table, ttl=args.ttl, latency=float(os.getenv("DNS_STUB_LATENCY_MS", 0)) / 1000)
+        port = await server.start(args.host, args.port)
+        print(f"DNS stub listening on {args.host}:{port}")
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
@@ -0,0 +1,298 @@
+"""
+Egress Proxy
+
+A local forward proxy that is the pooled browsers' only way out. Chromium
+sends every connection (the page, its subrequests, redirects, WebSockets)
+through it as CONNECT or absolute-form HTTP, so Chromium never resolves
+hostnames itself. The proxy resolves each host through the same cached
+resolver validate_url used, refuses any address in BLOCKED_IP_RANGES, and
+connects to exactly the address it checked: the browser reuses the
+validated lookup, and DNS rebinding between validation and navigation has
+no window to exploit.
+"""
+
+import os
+import asyncio
+import ipaddress
+from urllib.parse import urlsplit
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.middleware.security import is_blocked_ip
+from app.utils.dns_resolver import CachingResolver, get_dns_resolver
+
+# Largest request head accepted from the browser
+MAX_HEAD_BYTES = 64 * 1024
+
+# Hop-by-hop headers dropped when forwarding plain HTTP
+_HOP_HEADERS = frozenset({"proxy-connection", "connection", "keep-alive", "proxy-authorization"})
+
+_CHUNK = 64 * 1024
+
+
+class EgressBlockedError(Exception):
+    """Raised when a destination resolves to a blocked or no address"""
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def pinning_enabled() -> bool:
+    """Whether browsers should go through the egress proxy (BROWSER_IP_PINNING)"""
+    return os.getenv("BROWSER_IP_PINNING", "true").strip().lower() not in ("false", "0", "no", "off")
+
+
+def parse_target(head: bytes) -> Tuple[str, str, int, bytes]:
+    """
+    Parse a proxy request head.
+
+    Args:
+        head: Request line and headers, up to and including the blank line
+
+    Returns:
+        (method, host, port, head to send upstream). CONNECT heads are not
+        forwarded (empty bytes); plain HTTP heads are rewritten to origin
+        form with "Connection: close"
+
+    Raises:
+        ValueError: If the head isn't a proxy request
+    """
+    lines = head.decode("latin-1").split("\r\n")
+    method, target, version = lines[0].split(" ", 2)
+
+    if method.upper() == "CONNECT":
+        host, _, port = target.rpartition(":")
+        return method.upper(), host.strip("[]"), int(port), b""
+
+    parts = urlsplit(target)
+    if parts.scheme != "http" or not parts.hostname:
+        raise ValueError("Absolute http:// URL required")
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+
+    headers = [line for line in lines[1:] if line and line.split(":", 1)[0].strip().lower() not in _HOP_HEADERS]
+    upstream = "\r\n".join([f"{method} {path} {version}", *headers, "Connection: close", "", ""])
+    return method.upper(), parts.hostname, parts.port or 80, upstream.encode("latin-1")
+
+
+class PinningProxy:
+    """
+    Forward proxy connecting only to validated, unblocked addresses.
+
+    One connection from the browser carries one CONNECT tunnel or one plain
+    HTTP request (upstream is asked to close after the response), so every
+    destination is checked.
+
+    Args:
+        resolver: Hostname resolver (the shared caching resolver by default)
+        is_blocked: Address policy (is_blocked_ip by default)
+        connect_timeout: Seconds allowed to open the upstream connection
+        idle_timeout: Seconds a connection may sit without traffic
+        host: Interface to listen on
+    """
+
+    def __init__(
+        self,
+        resolver: Optional[CachingResolver] = None,
+        is_blocked: Callable[[str], bool] = is_blocked_ip,
+        connect_timeout: float = 10.0,
+        idle_timeout: float = 120.0,
+        host: str = "127.0.0.1",
+    ):
+        self._resolver = resolver
+        self._is_blocked = is_blocked
+        self.connect_timeout = connect_timeout
+        self.idle_timeout = idle_timeout
+        self.host = host
+        self.port: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._connections: set = set()
+        self.connections = 0
+        self.blocked = 0
+        self.errors = 0
+
+    @classmethod
+    def from_env(cls) -> "PinningProxy":
+        """Build the proxy from EGRESS_* environment variables"""
+        return cls(
+            connect_timeout=_env_float("EGRESS_CONNECT_TIMEOUT", 10.0),
+            idle_timeout=_env_float("EGRESS_IDLE_TIMEOUT", 120.0),
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None and self._loop is not None and not self._loop.is_closed()
+
+    async def start(self) -> int:
+        """Start listening (once) and return the port"""
+        loop = asyncio.get_running_loop()
+        if self._server is not None and self._loop is loop:
+            return self.port
+        self._server = await asyncio.start_server(self._handle, self.host, 0, limit=MAX_HEAD_BYTES)
+        self._loop = loop
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    def browser_proxy(self) -> Dict[str, str]:
+        """Playwright launch proxy settings routing everything through here"""
+        # Chromium skips proxies for loopback unless told not to
+        return {"server": f"http://{self.host}:{self.port}", "bypass": "<-loopback>"}
+
+    async def pin(self, host: str) -> List[str]:
+        """
+        Addresses the proxy may connect to for a host.
+
+        Raises:
+            EgressBlockedError: If any address is blocked, or none resolve
+        """
+        try:
+            addresses = [str(ipaddress.ip_address(host))]
+        except ValueError:
+            resolver = self._resolver or get_dns_resolver()
+            try:
+                addresses = await resolver.resolve(host)
+            except Exception as error:
+                raise EgressBlockedError(f"{host} did not resolve ({error.__class__.__name__})")
+        if not addresses:
+            raise EgressBlockedError(f"{host} has no addresses")
+        # Like validate_url: one internal address taints the name
+        for address in addresses:
+            if self._is_blocked(address):
+                raise EgressBlockedError(f"{host} resolves to a blocked address")
+        return addresses
+
+    async def _open(self, host: str, port: int) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        addresses = await self.pin(host)
+        last_error: Optional[BaseException] = None
+        for address in addresses:
+            try:
+                return await asyncio.wait_for(asyncio.open_connection(address, port), self.connect_timeout)
+            except (OSError, asyncio.TimeoutError) as error:
+                last_error = error
+        raise last_error
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        self.connections += 1
+        upstream_writer = None
+        try:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.idle_timeout)
+                method, host, port, upstream_head = parse_target(head)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ValueError):
+                await self._reply(writer, 400, "Bad Request")
+                return
+
+            try:
+                upstream_reader, upstream_writer = await self._open(host, port)
+            except EgressBlockedError as error:
+                self.blocked += 1
+                print(f"Egress blocked: {error}")
+                await self._reply(writer, 403, "Forbidden")
+                return
+            except (OSError, asyncio.TimeoutError):
+                self.errors += 1
+                await self._reply(writer, 502, "Bad Gateway")
+                return
+
+            if method == "CONNECT":
+                writer.write(b"HTTP/1.1 200 Connection Established\r\n\r\n")
+            else:
+                upstream_writer.write(upstream_head)
+            await asyncio.gather(
+                self._pipe(reader, upstream_writer),
+                self._pipe(upstream_reader, writer),
+            )
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(task)
+            for stream in (upstream_writer, writer):
+                if stream is not None:
+                    stream.close()
+
+    async def _pipe(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                data = await asyncio.wait_for(reader.read(_CHUNK), self.idle_timeout)
+                if not data:
+                    break
+                writer.write(data)
+                await writer.drain()
+            if writer.can_write_eof():
+                writer.write_eof()
+        except (ConnectionError, OSError, asyncio.TimeoutError):
+            writer.close()
+
+    @staticmethod
+    async def _reply(writer: asyncio.StreamWriter, status: int, reason: str):
+        try:
+            writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Length: 0\r\nConnection: close\r\n\r\n".encode())
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def close(self):
+        """Stop listening and drop open connections"""
+        server, self._server = self._server, None
+        if server is not None:
+            server.close()
+            connections = list(self._connections)
+            for task in connections:
+                task.cancel()
+            await asyncio.gather(*connections, return_exceptions=True)
+            await server.wait_closed()
+
+    def stats(self) -> Dict[str, Any]:
+        """Connection counters"""
+        return {
+            "enabled": pinning_enabled(),
+            "port": self.port,
+            "connections": self.connections,
+            "open": len(self._connections),
+            "blocked": self.blocked,
+            "errors": self.errors,
+        }
+
+
+_egress_proxy: Optional[PinningProxy] = None
+
+
+def get_egress_proxy() -> PinningProxy:
+    """Get or create the shared egress proxy"""
+    global _egress_proxy
+
+    if _egress_proxy is None:
+        _egress_proxy = PinningProxy.from_env()
+
+    return _egress_proxy
+
+
+async def start_egress_proxy() -> Optional[Dict[str, str]]:
+    """
+    Start the shared proxy if pinning is enabled.
+
+    Returns:
+        Playwright proxy settings for browser launches, or None when
+        BROWSER_IP_PINNING is off
+    """
+    if not pinning_enabled():
+        return None
+    proxy = get_egress_proxy()
+    await proxy.start()
+    return proxy.browser_proxy()
+
+
+async def close_egress_proxy():
+    """Stop the shared proxy"""
+    global _egress_proxy
+
+    proxy, _egress_proxy = _egress_proxy, None
+    if proxy is not None:
+        await proxy.close()
@@ -0,0 +1,63 @@
+"""
+Event Listener Analysis
+
+Interprets CDP DOMDebugger.getEventListeners output for the pointer
+cancellation check (WCAG 2.5.2). A single depth -1 query on the document
+returns every listener in the page with the backend node it's attached
+to, so the whole page is inspected in one round trip and grouped here.
+"""
+
+from typing import Any, Dict, Iterable, Set
+
+# Events that start a pointer interaction
+DOWN_EVENTS = frozenset({"mousedown", "pointerdown", "touchstart"})
+
+# Events that complete (or let users abandon) one
+UP_EVENTS = frozenset({"mouseup", "pointerup", "touchend", "click"})
+
+
+def find_down_only_nodes(
+    listeners: Iterable[Dict[str, Any]],
+    exclude: Iterable[int] = (),
+) -> Dict[str, Any]:
+    """
+    Group listeners by node and find nodes acting on the down event alone.
+
+    Args:
+        listeners: CDP EventListener objects (type, backendNodeId, ...)
+        exclude: Backend node ids to ignore (the document itself)
+
+    Returns:
+        elements (nodes with any pointer listener) and downOnly (backend
+        node ids with a down listener but no up or click listener, in
+        document order)
+    """
+    skipped = set(exclude)
+    down: Dict[int, None] = {}  # Insertion-ordered set
+    up: Set[int] = set()
+    for listener in listeners:
+        node = listener.get("backendNodeId")
+        if node is None or node in skipped:
+            continue
+        if listener.get("type") in DOWN_EVENTS:
+            down[node] = None
+        elif listener.get("type") in UP_EVENTS:
+            up.add(node)
+
+    return {
+        "elements": len(up | set(down)),
+        "downOnly": [node for node in down if node not in up],
+    }
+
+
+def node_label(node: Dict[str, Any]) -> str:
+    """Short selector-like label (tag#id or tag.class) for a CDP DOM.Node"""
+    attributes = node.get("attributes") or []
+    named = dict(zip(attributes[::2], attributes[1::2]))
+    label = (node.get("localName") or node.get("nodeName", "")).lower()
+    if named.get("id"):
+        return f"{label}#{named['id']}"
+    classes = named.get("class", "").split()
+    if classes:
+        return f"{label}.{classes[0]}"
+    return label
@@ -0,0 +1,262 @@
+"""
+Flash Detector
+
+Streams low-resolution screenshots through the WCAG 2.3.1 general flash
+and red flash tests. Each frame is reduced to a grid of per-region mean
+luminance and red-saturation values (vectorized with NumPy when it is
+installed) and fed to a per-region transition tracker. Only the previous
+values and a fixed-size ring buffer of recent transition times are kept
+per region, so memory stays flat however long the capture runs.
+"""
+
+import zlib
+import struct
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# WCAG 2.3.1: no more than three flashes in any one-second period
+MAX_FLASHES_PER_SECOND = 3
+FLASH_WINDOW_SECONDS = 1.0
+
+# General flash: opposing luminance changes of 10% of the maximum, where
+# the darker state is below 0.80
+GENERAL_FLASH_DELTA = 0.1
+GENERAL_FLASH_DARK_LIMIT = 0.8
+
+# Red flash: saturated red (R / (R + G + B) >= 0.8) changing by more
+# than 20 in (R - G - B) * 320
+RED_SATURATION = 0.8
+RED_FLASH_DELTA = 20.0
+
+# Regions: a 6x6 grid makes each cell about a quarter of a 10-degree
+# visual field at typical viewing distance, the WCAG area threshold
+GRID_ROWS = 6
+GRID_COLS = 6
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# sRGB byte -> linear value
+_LINEAR = [
+    (c / 255) / 12.92 if c / 255 <= 0.03928 else ((c / 255 + 0.055) / 1.055) ** 2.4
+    for c in range(256)
+]
+
+
+def _paeth(a: int, b: int, c: int) -> int:
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+
+def decode_png(data: bytes) -> Tuple[int, int, int, bytes]:
+    """
+    Decode an 8-bit RGB or RGBA PNG (what Chromium's screenshots produce).
+
+    Returns:
+        (width, height, channels, pixels) with pixels as packed rows
+
+    Raises:
+        ValueError: For other PNG formats or corrupt data
+    """
+    if not data.startswith(_PNG_SIGNATURE):
+        raise ValueError("Not a PNG image")
+
+    offset = len(_PNG_SIGNATURE)
+    header = None
+    compressed = bytearray()
+    while offset < len(data):
+        length, kind = struct.unpack(">I4s", data[offset:offset + 8])
+        chunk = data[offset + 8:offset + 8 + length]
+        offset += 12 + length
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", chunk)
+        elif kind == b"IDAT":
+            compressed += chunk
+        elif kind == b"IEND":
+            break
+
+    if header is None:
+        raise ValueError("PNG has no header")
+    width, height, depth, color_type, _, _, interlace = header
+    if depth != 8 or color_type not in (2, 6) or interlace:
+        raise ValueError("Only 8-bit, non-interlaced RGB/RGBA PNGs are supported")
+
+    channels = 3 if color_type == 2 else 4
+    stride = width * channels
+    raw = zlib.decompress(bytes(compressed))
+    pixels = bytearray(height * stride)
+    previous = bytearray(stride)
+    for y in range(height):
+        start = y * (stride + 1)
+        kind = raw[start]
+        row = bytearray(raw[start + 1:start + 1 + stride])
+        if kind == 1:
+            for i in range(channels, stride):
+                row[i] = (row[i] + row[i - channels]) & 0xFF
+        elif kind == 2:
+            for i in range(stride):
+                row[i] = (row[i] + previous[i]) & 0xFF
+        elif kind == 3:
+            for i in range(stride):
+                left = row[i - channels] if i >= channels else 0
+                row[i] = (row[i] + ((left + previous[i]) >> 1)) & 0xFF
+        elif kind == 4:
+            for i in range(stride):
+                left = row[i - channels] if i >= channels else 0
+                upper_left = previous[i - channels] if i >= channels else 0
+                row[i] = (row[i] + _paeth(left, previous[i], upper_left)) & 0xFF
+        pixels[y * stride:(y + 1) * stride] = row
+        previous = row
+    return width, height, channels, bytes(pixels)
+
+
+def _edges(size: int, parts: int) -> List[int]:
+    return [round(i * size / parts) for i in range(parts + 1)]
+
+
+def _reduce_numpy(width: int, height: int, channels: int, pixels: bytes, rows: int, cols: int):
+    image = np.frombuffer(pixels, dtype=np.uint8).reshape(height, width, channels)[:, :, :3]
+    linear = np.asarray(_LINEAR)[image]
+    luminance = linear @ np.asarray((0.2126, 0.7152, 0.0722))
+
+    total = linear.sum(axis=2)
+    red_share = np.divide(linear[:, :, 0], total, out=np.zeros_like(total), where=total > 0)
+    red = np.where(
+        red_share >= RED_SATURATION,
+        np.maximum(linear[:, :, 0] - linear[:, :, 1] - linear[:, :, 2], 0.0) * 320,
+        0.0,
+    )
+
+    row_edges, col_edges = _edges(height, rows), _edges(width, cols)
+    counts = np.outer(np.diff(row_edges), np.diff(col_edges))
+
+    def cell_means(values):
+        sums = np.add.reduceat(np.add.reduceat(values, row_edges[:-1], axis=0), col_edges[:-1], axis=1)
+        return (sums / counts).ravel().tolist()
+
+    return cell_means(luminance), cell_means(red)
+
+
+def _reduce_python(width: int, height: int, channels: int, pixels: bytes, rows: int, cols: int):
+    row_edges, col_edges = _edges(height, rows), _edges(width, cols)
+    luminance, red = [], []
+    for r in range(rows):
+        for c in range(cols):
+            lum_sum = red_sum = 0.0
+            for y in range(row_edges[r], row_edges[r + 1]):
+                base = y * width * channels
+                for x in range(col_edges[c], col_edges[c + 1]):
+                    i = base + x * channels
+                    lr, lg, lb = _LINEAR[pixels[i]], _LINEAR[pixels[i + 1]], _LINEAR[pixels[i + 2]]
+                    lum_sum += 0.2126 * lr + 0.7152 * lg + 0.0722 * lb
+                    total = lr + lg + lb
+                    if total > 0 and lr / total >= RED_SATURATION:
+                        red_sum += max(lr - lg - lb, 0.0) * 320
+            count = (row_edges[r + 1] - row_edges[r]) * (col_edges[c + 1] - col_edges[c])
+            luminance.append(lum_sum / count)
+            red.append(red_sum / count)
+    return luminance, red
+
+
+class _TransitionTracker:
+    """
+    Counts opposing transitions per region.
+
+    A transition is a move of at least delta from the last extreme in the
+    opposite direction; two make a flash. Transition times go in a ring
+    buffer just large enough to spot one flash too many in the window.
+    """
+
+    def __init__(self, regions: int, delta: float, dark_limit: Optional[float] = None):
+        self.delta = delta
+        self.dark_limit = dark_limit
+        self._extreme: List[Optional[float]] = [None] * regions
+        self._direction = [0] * regions
+        self._times = [deque(maxlen=2 * (MAX_FLASHES_PER_SECOND + 1)) for _ in range(regions)]
+        self.flagged = set()
+        self.peak = 0
+
+    def update(self, values: Sequence[float], timestamp: float):
+        for region, value in enumerate(values):
+            extreme = self._extreme[region]
+            if extreme is None:
+                self._extreme[region] = value
+                continue
+
+            direction = self._direction[region]
+            if (direction > 0 and value > extreme) or (direction < 0 and value < extreme):
+                self._extreme[region] = value  # Still moving the same way
+                continue
+            if abs(value - extreme) < self.delta:
+                continue
+            if self.dark_limit is not None and min(value, extreme) >= self.dark_limit:
+                continue
+
+            self._direction[region] = 1 if value > extreme else -1
+            self._extreme[region] = value
+            times = self._times[region]
+            times.append(timestamp)
+
+            recent = sum(1 for t in times if timestamp - t <= FLASH_WINDOW_SECONDS)
+            self.peak = max(self.peak, recent // 2)
+            if recent // 2 > MAX_FLASHES_PER_SECOND:
+                self.flagged.add(region)
+
+
+class FlashDetector:
+    """
+    Streaming WCAG 2.3.1 flash detector.
+
+    Args:
+        rows: Region grid rows
+        cols: Region grid columns
+    """
+
+    def __init__(self, rows: int = GRID_ROWS, cols: int = GRID_COLS):
+        self.rows = rows
+        self.cols = cols
+        self.frames = 0
+        self._first: Optional[float] = None
+        self._last: Optional[float] = None
+        self._general = _TransitionTracker(rows * cols, GENERAL_FLASH_DELTA, GENERAL_FLASH_DARK_LIMIT)
+        self._red = _TransitionTracker(rows * cols, RED_FLASH_DELTA)
+
+    def add_frame(self, width: int, height: int, channels: int, pixels: bytes, timestamp: float):
+        """Feed one decoded frame captured at timestamp (seconds)"""
+        if width < self.cols or height < self.rows:
+            raise ValueError("Frame is smaller than the region grid")
+        reduce = _reduce_numpy if np is not None else _reduce_python
+        luminance, red = reduce(width, height, channels, pixels, self.rows, self.cols)
+        self._general.update(luminance, timestamp)
+        self._red.update(red, timestamp)
+
+        self.frames += 1
+        if self._first is None:
+            self._first = timestamp
+        self._last = timestamp
+
+    def add_png(self, data: bytes, timestamp: float):
+        """Decode a PNG screenshot and feed it"""
+        self.add_frame(*decode_png(data), timestamp=timestamp)
+
+    def _regions(self, flagged) -> List[Dict[str, int]]:
+        return [{"row": region // self.cols, "col": region % self.cols} for region in sorted(flagged)]
+
+    def summary(self) -> Dict[str, Any]:
+        """Capture statistics and the regions that failed either test"""
+        duration = (self._last - self._first) if self.frames > 1 else 0.0
+        return {
+            "frames": self.frames,
+            "durationMs": round(duration * 1000, 1),
+            "fps": round((self.frames - 1) / duration, 1) if duration > 0 else 0.0,
+            "maxFlashesPerSecond": max(self._general.peak, self._red.peak),
+            "generalFlashRegions": self._regions(self._general.flagged),
+            "redFlashRegions": self._regions(self._red.flagged),
+        }
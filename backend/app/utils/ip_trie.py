@@ -0,0 +1,84 @@
+"""
+IP Prefix Trie
+
+Containment lookup of an address against a set of networks, returning the
+shortest (widest) inserted network that covers it. Each IP version gets a
+binary trie over the address bits, so a lookup costs at most 32 (IPv4) or
+128 (IPv6) steps whatever the number of networks, instead of one
+containment test per network.
+"""
+
+import ipaddress
+from typing import Iterable, List, Optional, Union
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+class _Node:
+    __slots__ = ("children", "network")
+
+    def __init__(self):
+        self.children: List[Optional["_Node"]] = [None, None]
+        self.network: Optional[Network] = None
+
+
+class IPPrefixTrie:
+    """
+    Set of IPv4 and IPv6 networks with fast membership tests.
+
+    Args:
+        networks: Networks (or CIDR strings) to insert
+    """
+
+    def __init__(self, networks: Iterable[Union[str, Network]] = ()):
+        self._roots = {4: _Node(), 6: _Node()}
+        self._size = 0
+        for network in networks:
+            self.add(network)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, network: Union[str, Network]):
+        """Insert a network"""
+        network = ipaddress.ip_network(network)
+        node = self._roots[network.version]
+        value = int(network.network_address)
+        bits = network.max_prefixlen
+        for i in range(network.prefixlen):
+            bit = (value >> (bits - 1 - i)) & 1
+            if node.children[bit] is None:
+                node.children[bit] = _Node()
+            node = node.children[bit]
+        if node.network is None:
+            self._size += 1
+        node.network = network
+
+    def match(self, address: Union[str, ipaddress.IPv4Address, ipaddress.IPv6Address]) -> Optional[Network]:
+        """
+        Find the shortest inserted network containing an address.
+
+        Args:
+            address: IP address (string or ipaddress object)
+
+        Returns:
+            The matching network, or None
+
+        Raises:
+            ValueError: If address isn't an IP address
+        """
+        if isinstance(address, str):
+            address = ipaddress.ip_address(address)
+        node = self._roots[address.version]
+        value = int(address)
+        bits = address.max_prefixlen
+        for i in range(bits):
+            if node.network is not None:
+                return node.network
+            node = node.children[(value >> (bits - 1 - i)) & 1]
+            if node is None:
+                return None
+        return node.network
+
+    def __contains__(self, address) -> bool:
+        return self.match(address) is not None
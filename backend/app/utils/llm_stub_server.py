@@ -0,0 +1,79 @@
+"""
+LLM Stub Server
+
+A deterministic, OpenAI-compatible /v1/chat/completions endpoint for tests
+and benchmarks. The same prompt always gets the same answer, and batched
+recommendation prompts get a JSON object with one entry per numbered
+check, so the whole recommendation path can run without a real model.
+
+Run standalone:
+    python -m app.utils.llm_stub_server --port 8089
+
+then point the backend at it with LLM_PROVIDER=openai and
+OPENAI_BASE_URL=http://localhost:8089/v1. Set LLM_STUB_LATENCY_MS to add a
+fixed delay per call.
+"""
+
+import os
+import re
+import json
+import asyncio
+import hashlib
+from typing import Any, Dict
+
+from fastapi import FastAPI, Request
+
+app = FastAPI(title="LLM Stub")
+
+_NUMBERED_CHECK = re.compile(r"^(\d+)\. Check Name: (.+)$", re.MULTILINE)
+_SINGLE_CHECK = re.compile(r"^Check Name: (.+)$", re.MULTILINE)
+
+
+def stub_answer(prompt: str) -> str:
+    """Deterministic answer for a prompt"""
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+
+    numbered = _NUMBERED_CHECK.findall(prompt)
+    if numbered:
+        return json.dumps({
+            number: f"Stub recommendation {digest}-{number}: fix the '{name.strip()}' issue as described."
+            for number, name in numbered
+        })
+
+    single = _SINGLE_CHECK.search(prompt)
+    name = single.group(1).strip() if single else "this"
+    return f"Stub recommendation {digest}: fix the '{name}' issue as described."
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request) -> Dict[str, Any]:
+    body = await request.json()
+    prompt = "\n".join(
+        str(message.get("content", "")) for message in body.get("messages", [])
+    )
+
+    latency_ms = float(os.getenv("LLM_STUB_LATENCY_MS", 0))
+    if latency_ms > 0:
+        await asyncio.sleep(latency_ms / 1000)
+
+    return {
+        "id": "stub-" + hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12],
+        "object": "chat.completion",
+        "model": body.get("model", "stub"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": stub_answer(prompt)},
+            "finish_reason": "stop",
+        }],
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Deterministic OpenAI-compatible stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
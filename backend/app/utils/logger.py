@@ -12,6 +12,8 @@ from datetime import datetime
 from typing import Optional
 import json
 
+from app.utils.tracing import current_span
+
 
 class JSONFormatter(logging.Formatter):
     """JSON formatter for production logging."""
@@ -27,6 +29,12 @@ class JSONFormatter(logging.Formatter):
             "line": record.lineno,
         }
         
+        # Correlate with the request's trace (X-Trace-Id)
+        span = current_span()
+        if span is not None:
+            log_data["trace_id"] = span.trace_id
+            log_data["span_id"] = span.span_id
+        
         # Add exception info if present
         if record.exc_info:
             log_data["exception"] = self.formatException(record.exc_info)
@@ -0,0 +1,237 @@
+"""
+Metrics
+
+Minimal Prometheus-compatible metrics: labelled histograms and gauges kept
+in process and rendered in the text exposition format for /metrics. The
+histograms record where a check's time goes (DNS validation, browser
+checkout, page phases, each check, each model call, whole requests);
+gauges are filled from live state at scrape time.
+"""
+
+import math
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds; spans cache hits to the 60s check budget
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 45.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Histogram(_Metric):
+    """
+    Cumulative-bucket histogram, one series per label combination.
+
+    Safe to observe from the browser slot and check worker threads.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., sum, count]
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str):
+        """Record one value (seconds for latency histograms)"""
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of a with-block, even if it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self, **labels: str) -> Optional[Dict[str, float]]:
+        """Count and sum of one series (for tests and debugging)"""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return None if series is None else {"count": series[-1], "sum": series[-2]}
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', _format_value(bound)))} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', '+Inf'))} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(series[-1])}")
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Gauge(_Metric):
+    """Point-in-time values, usually set by a collector just before a scrape"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def get(self, **labels: str) -> Optional[float]:
+        with self._lock:
+            return self._values.get(self._key(labels))
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class MetricsRegistry:
+    """Named metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text format"""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        """Reset every series (for tests)"""
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+# Latency histograms, observed where the work happens
+DNS_VALIDATION = REGISTRY.histogram(
+    "wcc_dns_validation_seconds", "Hostname resolution during URL validation")
+BROWSER_CHECKOUT = REGISTRY.histogram(
+    "wcc_browser_checkout_seconds", "Wait for a pooled browser slot")
+PAGE_PHASE = REGISTRY.histogram(
+    "wcc_page_phase_seconds", "Browser analysis phases (navigation, settle, extraction and probes)", ["phase"])
+CHECK_DURATION = REGISTRY.histogram(
+    "wcc_check_seconds", "Evaluation time of each compliance check", ["check"])
+LLM_CALL = REGISTRY.histogram(
+    "wcc_llm_call_seconds", "Single LLM provider call attempts", ["provider", "outcome"])
+HTTP_REQUEST = REGISTRY.histogram(
+    "wcc_http_request_seconds", "Total HTTP request time", ["method", "route", "status"])
+
+# Gauges, filled from live state at scrape time
+BROWSER_SLOTS = REGISTRY.gauge(
+    "wcc_browser_pool_slots", "Browser pool slots by state", ["state"])
+CHROMIUM_RSS = REGISTRY.gauge(
+    "wcc_chromium_rss_bytes", "Resident memory of each pooled Chromium process tree", ["slot"])
+JOB_QUEUE_DEPTH = REGISTRY.gauge(
+    "wcc_job_queue_depth", "Jobs waiting for a worker")
+JOBS = REGISTRY.gauge(
+    "wcc_jobs", "Retained jobs by status", ["status"])
+CACHE_HIT_RATIO = REGISTRY.gauge(
+    "wcc_cache_hit_ratio", "Hit ratio since startup", ["cache"])
+CACHE_ENTRIES = REGISTRY.gauge(
+    "wcc_cache_entries", "Entries held in memory", ["cache"])
+
+# Page phase keys reported in analyze_webpage timings (milliseconds)
+PHASE_TIMINGS = {
+    "navigationMs": "navigation",
+    "settleMs": "settle",
+    "extractionMs": "extraction",
+    "contrastMs": "contrast",
+    "flashMs": "flash",
+    "pointerListenersMs": "pointer_listeners",
+    "keyboardMs": "keyboard",
+}
+
+
+def observe_page_timings(timings: Dict[str, Optional[float]]):
+    """Record analyze_webpage phase timings"""
+    for key, phase in PHASE_TIMINGS.items():
+        value = timings.get(key)
+        if isinstance(value, (int, float)):
+            PAGE_PHASE.observe(value / 1000, phase=phase)
+
@@ -2,269 +2,1006 @@
 Playwright Helper
 
 Handles browser automation using Playwright (Python equivalent of Puppeteer).
-Uses sync_playwright in a thread to avoid Windows asyncio subprocess issues.
+
+Two engines implement the same analyze_webpage(url) contract:
+- "async": async_playwright driven directly on the event loop (Linux default)
+- "sync": sync_playwright on pooled browser threads, the fallback for
+  Windows asyncio subprocess issues
+
+Both run the same analysis steps (see _analysis_steps), so results don't
+depend on the engine. Pick one with PLAYWRIGHT_ENGINE=auto|sync|async.
 """
 
-from playwright.sync_api import sync_playwright, Browser, Page, TimeoutError as PlaywrightTimeoutError
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
-from functools import partial
-
-_browser: Browser = None
-_playwright = None
-_executor = ThreadPoolExecutor(max_workers=2)
-
-def _get_browser_sync() -> Browser:
-    """Get or create a browser instance (synchronous)"""
-    global _browser, _playwright
-    
-    if _browser is None or not _browser.is_connected():
-        if _playwright is None:
-            _playwright = sync_playwright().start()
-        _browser = _playwright.chromium.launch(
-            headless=True,
-            args=[
-                '--no-sandbox',
-                '--disable-setuid-sandbox',
-                '--disable-dev-shm-usage',
-                '--disable-accelerated-2d-canvas',
-                '--disable-gpu',
-                '--disable-web-security',
-                '--disable-features=IsolateOrigins,site-per-process',
-                '--no-first-run',
-                '--no-zygote',
-                '--disable-blink-features=AutomationControlled',
-            ],
-            timeout=30000,
-        )
+import os
+import sys
+import time
+import base64
+from playwright.sync_api import Page, TimeoutError as PlaywrightTimeoutError
+from typing import Any, Callable, Dict, Generator, Iterable, Optional, Tuple
+
+from app.utils.request_policy import RequestPolicy
+from app.utils.egress_proxy import get_egress_proxy, pinning_enabled, start_egress_proxy
+from app.utils.flash_detector import FlashDetector
+from app.utils.metrics import observe_page_timings
+from app.utils.tracing import get_tracer
+from app.utils.event_listeners import find_down_only_nodes, node_label
+from app.utils.browser_pool import (
+    BrowserPool,
+    BrowserSlot,
+    AsyncBrowserSlot,
+    AsyncPlaywrightDriver,
+    slot_settings,
+)
+
+# A page operation: (dotted method path on the page, args, kwargs). The
+# method may also be (object, name) to call an object an earlier step
+# returned, such as a CDP session
+PageCall = Tuple[Any, tuple, dict]
+
+# Stands for the page itself in a step's arguments
+PAGE = object()
+
+# Called with a phase name ("navigating", "extracting"); may be invoked from
+# a browser slot's thread, so implementations must be thread-safe
+ProgressCallback = Callable[[str], None]
+
+# Fields PAGE_DATA_SCRIPT can put in pageData
+PAGE_DATA_FIELDS = frozenset({
+    "interactiveElements", "images", "headings", "formInputs", "links",
+    "colorInfo", "animations", "hasTimers", "hasAutoAdvance", "title",
+    "bodyText", "hasLandmarks",
+})
+
+# pageData fields gathered by their own page call rather than the extractor
+PROBE_FIELDS = frozenset({"textContrast", "flashAnalysis", "pointerListeners", "keyboardTraversal"})
+
+# Top-level analysis fields, each captured by its own (large) page call
+ANALYSIS_FIELDS = frozenset({"html", "accessibilityTree", "styles"})
+
+# Original extractor: one querySelectorAll per field. Kept for timing
+# comparisons against the single-pass walker (DOM_EXTRACTOR=legacy).
+LEGACY_PAGE_DATA_SCRIPT = """() => {
+    // Get all interactive elements
+    const interactiveElements = [];
+    const allElements = document.querySelectorAll('*');
+    
+    allElements.forEach(el => {
+        const tagName = el.tagName.toLowerCase();
+        const isInteractive = 
+            ['a', 'button', 'input', 'select', 'textarea', 'details', 'summary'].includes(tagName) ||
+            el.hasAttribute('onclick') ||
+            el.hasAttribute('role') ||
+            el.tabIndex >= 0;
+        
+        if (isInteractive) {
+            interactiveElements.push({
+                tag: tagName,
+                id: el.id || null,
+                className: el.className || null,
+                text: el.textContent?.trim().substring(0, 100) || null,
+                tabIndex: el.tabIndex,
+                ariaLabel: el.getAttribute('aria-label') || null,
+                ariaLabelledBy: el.getAttribute('aria-labelledby') || null,
+                role: el.getAttribute('role') || null,
+                type: el.getAttribute('type') || null,
+                disabled: el.disabled || false,
+                href: el.href || null,
+                hasOnclick: el.hasAttribute('onclick') || el.onclick !== null,
+            });
+        }
+    });
+    
+    // Get all images
+    const images = Array.from(document.images).map(img => ({
+        src: img.src,
+        alt: img.alt || null,
+        title: img.title || null,
+        hasAlt: !!img.alt,
+    }));
+    
+    // Get all headings
+    const headings = [];
+    for (let i = 1; i <= 6; i++) {
+        const hElements = Array.from(document.querySelectorAll(`h${i}`));
+        headings.push(...hElements.map(h => ({
+            level: i,
+            text: h.textContent?.trim().substring(0, 100) || '',
+            id: h.id || null,
+        })));
+    }
+    
+    // Get all form inputs
+    const formInputs = Array.from(document.querySelectorAll('input, select, textarea')).map(input => {
+        const label = input.labels && input.labels.length > 0 
+            ? input.labels[0].textContent?.trim() 
+            : (input.getAttribute('aria-label') || input.getAttribute('placeholder') || null);
+        
+        return {
+            type: input.type || input.tagName.toLowerCase(),
+            id: input.id || null,
+            name: input.name || null,
+            label: label,
+            ariaLabel: input.getAttribute('aria-label') || null,
+            ariaLabelledBy: input.getAttribute('aria-labelledby') || null,
+            required: input.required || false,
+        };
+    });
+    
+    // Get all links
+    const links = Array.from(document.querySelectorAll('a')).map(link => ({
+        href: link.href || '#',
+        text: link.textContent?.trim().substring(0, 100) || '',
+        ariaLabel: link.getAttribute('aria-label') || null,
+        isSkipLink: (link.href.includes('#') && /skip|main|content/i.test(link.textContent || '')) ||
+                    /skip.*content|skip.*main/i.test(link.getAttribute('aria-label') || ''),
+    }));
+    
+    // Check for ARIA landmarks
+    const hasLandmarks = Array.from(document.querySelectorAll('[role="main"], [role="navigation"], [role="banner"], [role="contentinfo"], main, nav')).length > 0;
+    
+    // Get computed styles for color analysis
+    const colorInfo = Array.from(document.querySelectorAll('*')).slice(0, 100).map(el => {
+        const style = window.getComputedStyle(el);
+        return {
+            color: style.color,
+            backgroundColor: style.backgroundColor,
+            text: el.textContent?.trim().substring(0, 50) || '',
+        };
+    }).filter(info => info.text.length > 0);
     
-    return _browser
+    // Check for animations
+    const animations = Array.from(document.querySelectorAll('*')).filter(el => {
+        const style = window.getComputedStyle(el);
+        return style.animation !== 'none' || style.transition !== 'all 0s ease 0s';
+    }).length;
+    
+    // Check for timers (setTimeout/setInterval - approximate detection)
+    const scripts = Array.from(document.querySelectorAll('script')).map(script => 
+        script.textContent || ''
+    ).join(' ');
+    
+    const hasTimers = /setTimeout|setInterval/i.test(scripts);
+    
+    // Check for auto-advance content
+    const hasAutoAdvance = /autoplay|auto.*play|carousel|slideshow/i.test(scripts);
+    
+    return {
+        interactiveElements,
+        images,
+        headings,
+        formInputs,
+        links,
+        colorInfo,
+        animations,
+        hasTimers,
+        hasAutoAdvance,
+        title: document.title,
+        bodyText: document.body.textContent?.substring(0, 5000) || '',
+        hasLandmarks,
+    };
+}"""
 
-def _close_browser_sync():
-    """Close browser and cleanup resources (synchronous)"""
-    global _browser, _playwright
+# Extracts the page data the compliance checks need in one TreeWalker pass.
+# Takes the list of pageData fields to collect (null for all) and returns
+# only those, in the same shape as LEGACY_PAGE_DATA_SCRIPT. Each element is
+# visited once; getComputedStyle only runs for the first 100 elements
+# (colorInfo), and running animations come from document.getAnimations()
+# rather than a computed-style lookup on every node.
+PAGE_DATA_SCRIPT = """(fields) => {
+    const want = name => !fields || fields.includes(name);
+    const wantInteractive = want('interactiveElements');
+    const wantImages = want('images');
+    const wantHeadings = want('headings');
+    const wantFormInputs = want('formInputs');
+    const wantLinks = want('links');
+    const wantColorInfo = want('colorInfo');
+    const wantLandmarks = want('hasLandmarks');
+    const wantScripts = want('hasTimers') || want('hasAutoAdvance');
+    const needWalk = wantInteractive || wantImages || wantHeadings || wantFormInputs ||
+                     wantLinks || wantColorInfo || wantLandmarks || wantScripts;
     
-    if _browser:
-        try:
-            _browser.close()
-        except:
-            pass
-        _browser = None
+    const INTERACTIVE_TAGS = new Set(['a', 'button', 'input', 'select', 'textarea', 'details', 'summary']);
+    const FORM_TAGS = new Set(['input', 'select', 'textarea']);
+    const HEADING_LEVELS = { h1: 1, h2: 2, h3: 3, h4: 4, h5: 5, h6: 6 };
+    const LANDMARK_ROLES = new Set(['main', 'navigation', 'banner', 'contentinfo']);
+    const COLOR_SAMPLE_SIZE = 100;
     
-    if _playwright:
-        try:
-            _playwright.stop()
-        except:
-            pass
-        _playwright = None
+    const interactiveElements = [];
+    const images = [];
+    const headings = [];
+    const formInputs = [];
+    const links = [];
+    const colorInfo = [];
+    const scriptTexts = [];
+    let hasLandmarks = false;
+    let visited = 0;
+    
+    // SVG elements expose href as an SVGAnimatedString
+    const hrefOf = el => typeof el.href === 'string' ? el.href : (el.getAttribute('href') || '');
+    
+    const walker = document.createTreeWalker(document.documentElement, NodeFilter.SHOW_ELEMENT);
+    for (let el = needWalk ? walker.currentNode : null; el; el = walker.nextNode()) {
+        const tagName = el.tagName.toLowerCase();
+        const role = el.getAttribute('role');
+        const ariaLabel = el.getAttribute('aria-label');
+        
+        // Computed styles for color analysis (first elements in document order)
+        if (wantColorInfo && visited < COLOR_SAMPLE_SIZE) {
+            const text = el.textContent?.trim().substring(0, 50) || '';
+            if (text.length > 0) {
+                const style = window.getComputedStyle(el);
+                colorInfo.push({
+                    color: style.color,
+                    backgroundColor: style.backgroundColor,
+                    text: text,
+                });
+            }
+        }
+        visited++;
+        
+        // Interactive elements
+        const hasOnclick = el.hasAttribute('onclick');
+        if (wantInteractive && (INTERACTIVE_TAGS.has(tagName) || hasOnclick || role !== null || el.tabIndex >= 0)) {
+            interactiveElements.push({
+                tag: tagName,
+                id: el.id || null,
+                className: el.className || null,
+                text: el.textContent?.trim().substring(0, 100) || null,
+                tabIndex: el.tabIndex,
+                ariaLabel: ariaLabel || null,
+                ariaLabelledBy: el.getAttribute('aria-labelledby') || null,
+                role: role || null,
+                type: el.getAttribute('type') || null,
+                disabled: el.disabled || false,
+                href: (typeof el.href === 'string' ? el.href : null) || null,
+                hasOnclick: hasOnclick || el.onclick !== null,
+            });
+        }
+        
+        if (tagName === 'img' && el instanceof HTMLImageElement) {
+            if (wantImages) {
+                images.push({
+                    src: el.src,
+                    alt: el.alt || null,
+                    title: el.title || null,
+                    hasAlt: !!el.alt,
+                });
+            }
+        } else if (tagName in HEADING_LEVELS) {
+            if (wantHeadings) {
+                headings.push({
+                    level: HEADING_LEVELS[tagName],
+                    text: el.textContent?.trim().substring(0, 100) || '',
+                    id: el.id || null,
+                });
+            }
+        } else if (FORM_TAGS.has(tagName)) {
+            if (wantFormInputs) {
+                const label = el.labels && el.labels.length > 0
+                    ? el.labels[0].textContent?.trim()
+                    : (ariaLabel || el.getAttribute('placeholder') || null);
+                
+                formInputs.push({
+                    type: el.type || tagName,
+                    id: el.id || null,
+                    name: el.name || null,
+                    label: label,
+                    ariaLabel: ariaLabel || null,
+                    ariaLabelledBy: el.getAttribute('aria-labelledby') || null,
+                    required: el.required || false,
+                });
+            }
+        } else if (tagName === 'a') {
+            if (wantLinks) {
+                const href = hrefOf(el);
+                const text = el.textContent || '';
+                links.push({
+                    href: href || '#',
+                    text: text.trim().substring(0, 100),
+                    ariaLabel: ariaLabel || null,
+                    isSkipLink: (href.includes('#') && /skip|main|content/i.test(text)) ||
+                                /skip.*content|skip.*main/i.test(ariaLabel || ''),
+                });
+            }
+        } else if (tagName === 'script') {
+            if (wantScripts) {
+                scriptTexts.push(el.textContent || '');
+            }
+        }
+        
+        // ARIA landmarks
+        if (!hasLandmarks && (tagName === 'main' || tagName === 'nav' || LANDMARK_ROLES.has(role))) {
+            hasLandmarks = true;
+        }
+    }
+    
+    // The legacy extractor listed all h1s, then all h2s, and so on;
+    // keep that order so heading checks see the same sequence
+    headings.sort((a, b) => a.level - b.level);
+    
+    // Check for timers (setTimeout/setInterval - approximate detection)
+    const scripts = scriptTexts.join(' ');
+    
+    const pageData = {};
+    if (wantInteractive) pageData.interactiveElements = interactiveElements;
+    if (wantImages) pageData.images = images;
+    if (wantHeadings) pageData.headings = headings;
+    if (wantFormInputs) pageData.formInputs = formInputs;
+    if (wantLinks) pageData.links = links;
+    if (wantColorInfo) pageData.colorInfo = colorInfo;
+    if (want('animations')) {
+        // Elements with running CSS animations/transitions or Web Animations
+        const animationTargets = new Set();
+        for (const animation of document.getAnimations()) {
+            if (animation.effect && animation.effect.target) {
+                animationTargets.add(animation.effect.target);
+            }
+        }
+        pageData.animations = animationTargets.size;
+    }
+    if (want('hasTimers')) pageData.hasTimers = /setTimeout|setInterval/i.test(scripts);
+    if (want('hasAutoAdvance')) pageData.hasAutoAdvance = /autoplay|auto.*play|carousel|slideshow/i.test(scripts);
+    if (want('title')) pageData.title = document.title;
+    if (want('bodyText')) pageData.bodyText = document.body?.textContent?.substring(0, 5000) || '';
+    if (wantLandmarks) pageData.hasLandmarks = hasLandmarks;
+    return pageData;
+}"""
+
+# Per-element text contrast inputs, gathered in their own pass over text
+# nodes (up to maxNodes elements with direct text). Returned columnar (flat
+# number arrays) so tens of thousands of elements serialize compactly. The
+# effective background composites each ancestor's background-color from
+# the root down, memoized per element, so every element's style is read
+# once. Layering from positioning is not modelled; backgrounds come from
+# DOM ancestry, and any background-image along the way sets bgImage.
+TEXT_CONTRAST_SCRIPT = """(maxNodes) => {
+    const COLOR = /^rgba?\\(\\s*([\\d.]+)[,\\s]+([\\d.]+)[,\\s]+([\\d.]+)(?:\\s*[,\\/]\\s*([\\d.]+)(%?))?\\s*\\)$/;
+    const SKIP_TAGS = new Set(['SCRIPT', 'STYLE', 'NOSCRIPT', 'TEMPLATE', 'OPTION']);
+    const canvas = document.createElement('canvas').getContext('2d');
+    const colors = new Map();
+    
+    // Computed colors are rgb()/rgba() except for newer color spaces,
+    // which the canvas converts
+    const parseColor = value => {
+        let rgba = colors.get(value);
+        if (rgba) return rgba;
+        let match = COLOR.exec(value);
+        if (!match && canvas) {
+            canvas.fillStyle = '#000';
+            canvas.fillStyle = value;
+            const normalized = canvas.fillStyle;
+            match = COLOR.exec(normalized);
+            if (!match && /^#[0-9a-f]{6}$/i.test(normalized)) {
+                const n = parseInt(normalized.slice(1), 16);
+                match = [null, n >> 16, (n >> 8) & 255, n & 255];
+            }
+        }
+        rgba = match
+            ? [+match[1], +match[2], +match[3], match[4] === undefined ? 1 : (match[5] ? match[4] / 100 : +match[4])]
+            : [0, 0, 0, 1];
+        colors.set(value, rgba);
+        return rgba;
+    };
+    
+    // [r, g, b, bgImage] of what is painted behind an element; the page
+    // canvas is white
+    const backgrounds = new Map();
+    const effectiveBackground = el => {
+        if (!el) return [255, 255, 255, 0];
+        let background = backgrounds.get(el);
+        if (background) return background;
+        const style = window.getComputedStyle(el);
+        const [r, g, b, a] = parseColor(style.backgroundColor);
+        const hasImage = style.backgroundImage !== 'none' ? 1 : 0;
+        if (a >= 1) {
+            background = [r, g, b, hasImage];
+        } else {
+            const below = effectiveBackground(el.parentElement);
+            background = [
+                r * a + below[0] * (1 - a),
+                g * a + below[1] * (1 - a),
+                b * a + below[2] * (1 - a),
+                hasImage || below[3],
+            ];
+        }
+        backgrounds.set(el, background);
+        return background;
+    };
+    
+    const fg = [], bg = [], fontSize = [], fontWeight = [], bgImage = [], text = [];
+    const seen = new Set();
+    let count = 0;
+    let truncated = false;
+    
+    const walker = document.createTreeWalker(document.body || document.documentElement, NodeFilter.SHOW_TEXT);
+    for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+        const el = node.parentElement;
+        if (!el || seen.has(el) || SKIP_TAGS.has(el.tagName)) continue;
+        const snippet = node.data.trim();
+        if (!snippet) continue;
+        seen.add(el);
+        if (el.checkVisibility && !el.checkVisibility({ visibilityProperty: true, opacityProperty: true })) continue;
+        if (count >= maxNodes) {
+            truncated = true;
+            break;
+        }
+        
+        const style = window.getComputedStyle(el);
+        const color = parseColor(style.color);
+        const background = effectiveBackground(el);
+        fg.push(color[0], color[1], color[2], color[3]);
+        bg.push(background[0], background[1], background[2]);
+        bgImage.push(background[3]);
+        fontSize.push(parseFloat(style.fontSize) || 16);
+        fontWeight.push(parseInt(style.fontWeight, 10) || 400);
+        text.push(snippet.substring(0, 40));
+        count++;
+    }
+    
+    return { count, truncated, fg, bg, fontSize, fontWeight, bgImage, text };
+}"""
+
+# Describes the focused element (descending into shadow roots) for the
+# keyboard traversal, or null when focus is on the document itself. Elements
+# get stable keys from a WeakMap so revisits can be recognized.
+FOCUSED_ELEMENT_SCRIPT = """() => {
+    let el = document.activeElement;
+    while (el && el.shadowRoot && el.shadowRoot.activeElement) el = el.shadowRoot.activeElement;
+    if (!el || el === document.body || el === document.documentElement) return null;
+    
+    const keys = window.__wccFocusKeys || (window.__wccFocusKeys = new WeakMap());
+    if (!keys.has(el)) {
+        window.__wccFocusCount = (window.__wccFocusCount || 0) + 1;
+        keys.set(el, window.__wccFocusCount);
+    }
+    const tag = el.tagName.toLowerCase();
+    const name = (el.getAttribute('aria-label') || el.textContent || el.getAttribute('name') || '').trim();
+    return {
+        key: keys.get(el),
+        label: tag + (el.id ? '#' + el.id : '') + (name ? ' "' + name.substring(0, 30) + '"' : ''),
+        frame: tag === 'iframe' || tag === 'frame',
+        inDialog: !!el.closest('dialog, [role="dialog"], [role="alertdialog"], [aria-modal="true"]'),
+    };
+}"""
+
+# Starts the keyboard traversal from the top of the document
+FOCUS_RESET_SCRIPT = """() => {
+    if (document.activeElement && document.activeElement !== document.body) document.activeElement.blur();
+    window.__wccFocusKeys = new WeakMap();
+    window.__wccFocusCount = 0;
+}"""
+
+# Anything on the page that could be flashing right now
+FLASH_CANDIDATES_SCRIPT = """() => {
+    const running = document.getAnimations
+        ? document.getAnimations().filter(a => a.playState === 'running').length
+        : 0;
+    const media = document.querySelectorAll('video, canvas, marquee, img[src*=".gif" i]').length;
+    return { running, media, viewport: [window.innerWidth, window.innerHeight] };
+}"""
+
+# Get CSS for color contrast analysis
+STYLES_SCRIPT = """() => {
+    const sheets = Array.from(document.styleSheets);
+    let cssText = '';
+    sheets.forEach(sheet => {
+        try {
+            const rules = Array.from(sheet.cssRules || []);
+            rules.forEach(rule => {
+                cssText += rule.cssText + '\\n';
+            });
+        } catch (e) {
+            // Cross-origin stylesheets may throw errors
+        }
+    });
+    return cssText;
+}"""
+
+# Resolves once the DOM has gone quietMs without mutations after the load
+# event, or after maxMs at the latest. Replaces waiting for network idle
+# plus a fixed sleep, which stalls on pages that never stop polling.
+DOM_STABLE_SCRIPT = """([quietMs, maxMs]) => new Promise(resolve => {
+    const started = performance.now();
+    let quietTimer = null;
+    let observer = null;
+    
+    const finish = stable => {
+        clearTimeout(quietTimer);
+        clearTimeout(maxTimer);
+        if (observer) observer.disconnect();
+        resolve({ stable, waitedMs: Math.round(performance.now() - started) });
+    };
+    const maxTimer = setTimeout(() => finish(false), maxMs);
+    const restartQuietTimer = () => {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(() => finish(true), quietMs);
+    };
+    const observe = () => {
+        observer = new MutationObserver(restartQuietTimer);
+        observer.observe(document, { childList: true, subtree: true, attributes: true, characterData: true });
+        restartQuietTimer();
+    };
+    
+    if (document.readyState === 'complete') {
+        observe();
+    } else {
+        window.addEventListener('load', observe, { once: true });
+    }
+})"""
+
+_pool: Optional[BrowserPool] = None
+
+def get_engine() -> str:
+    """Resolve the configured Playwright engine ("sync" or "async")"""
+    engine = os.getenv("PLAYWRIGHT_ENGINE", "auto").strip().lower()
+    if engine in ("sync", "async"):
+        return engine
+    # Windows event loops can't spawn the async driver reliably
+    return "sync" if sys.platform == "win32" else "async"
+
+def browser_proxy() -> Optional[Dict[str, str]]:
+    """
+    Launch proxy for new browsers: the egress proxy when IP pinning is on.
+    
+    Raises:
+        RuntimeError: If pinning is on but the proxy isn't running, rather
+            than launching a browser that resolves hosts itself
+    """
+    if not pinning_enabled():
+        return None
+    proxy = get_egress_proxy()
+    if not proxy.running:
+        raise RuntimeError("Egress proxy is not running")
+    return proxy.browser_proxy()
+
+def get_browser_pool() -> BrowserPool:
+    """Get or create the shared browser pool for the configured engine"""
+    global _pool
+    
+    if _pool is None:
+        if get_engine() == "async":
+            driver = AsyncPlaywrightDriver()
+            _pool = BrowserPool(slot_factory=lambda: AsyncBrowserSlot(driver, proxy=browser_proxy(), **slot_settings()))
+        else:
+            _pool = BrowserPool(slot_factory=lambda: BrowserSlot(proxy=browser_proxy(), **slot_settings()))
+    
+    return _pool
+
+async def start_browser_pool():
+    """Start the egress proxy and pre-launch the pool's minimum number of browsers"""
+    await start_egress_proxy()
+    await get_browser_pool().start()
 
 async def close_browser():
-    """Close browser and cleanup resources (async wrapper)"""
-    loop = asyncio.get_event_loop()
-    await loop.run_in_executor(_executor, _close_browser_sync)
+    """Close all pooled browsers and cleanup resources"""
+    global _pool
+    
+    pool, _pool = _pool, None
+    if pool is not None:
+        await pool.close()
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+def get_page_data_script() -> str:
+    """Pick the DOM extractor: the single-pass walker unless DOM_EXTRACTOR=legacy"""
+    if os.getenv("DOM_EXTRACTOR", "walker").strip().lower() == "legacy":
+        return LEGACY_PAGE_DATA_SCRIPT
+    return PAGE_DATA_SCRIPT
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
 
-def _analyze_webpage_sync(url: str):
+def _call(method: str, *args, **kwargs) -> PageCall:
+    """Describe a page operation for a driver to perform"""
+    return (method, args, kwargs)
+
+def _call_on(target: Any, method: str, *args, **kwargs) -> PageCall:
+    """Describe an operation on an object returned by an earlier step"""
+    return ((target, method), args, kwargs)
+
+def _resolve(page: Any, method: Any) -> Callable:
+    if isinstance(method, tuple):
+        target, name = method
+        return getattr(target, name)
+    target = page
+    for name in method.split("."):
+        target = getattr(target, name)
+    return target
+
+def _bind(page: Any, args: tuple) -> tuple:
+    return tuple(page if arg is PAGE else arg for arg in args)
+
+def _report(on_progress: Optional[ProgressCallback], phase: str):
+    if on_progress is not None:
+        try:
+            on_progress(phase)
+        except Exception:
+            pass  # Progress reporting must never break an analysis
+
+def _keyboard_traversal_steps(
+    max_steps: int,
+    budget_ms: int
+) -> Generator[PageCall, Any, Dict[str, Any]]:
     """
-    Analyze a webpage and extract accessibility data (synchronous).
+    Tab through the page's focus order looking for keyboard traps.
+    
+    Focus that wraps back to the first element, or leaves the document,
+    means the end of the page was reached. Revisiting any other element
+    (or the first one, while a dialog is involved) means focus is cycling;
+    the cycle is only a trap if neither Shift+Tab nor Escape (for dialogs)
+    moves focus out of it. Stops after max_steps
+    key presses or budget_ms, whichever comes first.
     
-    Args:
-        url: URL of the webpage to analyze
-        
     Returns:
-        Dictionary containing HTML, accessibility tree, page data, and styles
+        steps, reachedEnd, budgetExhausted, elapsedMs, and trap (None, or
+        {"cycle": element labels, "inDialog"})
     """
-    browser = _get_browser_sync()
-    page = browser.new_page()
+    started = time.perf_counter()
+    presses = 0
     
-    try:
-        # Set viewport
-        page.set_viewport_size({"width": 1280, "height": 720})
+    def over_budget() -> bool:
+        return presses >= max_steps or _elapsed_ms(started) >= budget_ms
+    
+    def press(key: str):
+        nonlocal presses
+        presses += 1
+        yield _call("keyboard.press", key)
+        return (yield _call("evaluate", FOCUSED_ELEMENT_SCRIPT))
+    
+    def leaves(cycle_keys: set, key: str, limit: int):
+        # Does pressing key at most limit times move focus out of the cycle?
+        for _ in range(limit):
+            if over_budget():
+                return False
+            focused = yield from press(key)
+            if focused is None or focused["key"] not in cycle_keys:
+                return True
+        return False
+    
+    yield _call("evaluate", FOCUS_RESET_SCRIPT)
+    sequence = []
+    trap = None
+    reached_end = False
+    
+    while not over_budget():
+        focused = yield from press("Tab")
+        if focused is None:
+            # Focus left the content: the end of the focus order (or, twice
+            # in a row from the start, a page with nothing focusable)
+            if sequence or presses > 1:
+                reached_end = True
+                break
+            continue
+        if sequence and focused["key"] == sequence[-1]["key"] and focused["frame"]:
+            continue  # Moving within a frame; its inner order isn't visible here
+        if sequence and focused["key"] == sequence[0]["key"] and not any(item["inDialog"] for item in sequence):
+            # Wrapped around; a modal open from the start is tested below
+            reached_end = True
+            break
         
-        # Set timeout for page load
-        page.set_default_timeout(30000)
+        seen_at = next((i for i, item in enumerate(sequence) if item["key"] == focused["key"]), None)
+        if seen_at is None:
+            sequence.append(focused)
+            continue
         
-        # Navigate to the page
+        cycle = sequence[seen_at:]
+        cycle_keys = {item["key"] for item in cycle}
+        in_dialog = any(item["inDialog"] for item in cycle)
+        escaped = yield from leaves(cycle_keys, "Shift+Tab", len(cycle) + 1)
+        if not escaped and in_dialog:
+            escaped = yield from leaves(cycle_keys, "Escape", 1)
+            if not escaped:
+                escaped = yield from leaves(cycle_keys, "Tab", len(cycle) + 1)
+        if not escaped:
+            trap = {"cycle": [item["label"] for item in cycle][:10], "inDialog": in_dialog}
+        break
+    
+    return {
+        "steps": presses,
+        "reachedEnd": reached_end,
+        "budgetExhausted": trap is None and not reached_end,
+        "elapsedMs": _elapsed_ms(started),
+        "trap": trap,
+    }
+
+def _flash_capture_steps(
+    mode: str,
+    capture_ms: int,
+    max_frames: int,
+    frame_width: int
+) -> Generator[PageCall, Any, Dict[str, Any]]:
+    """
+    Stream low-resolution screenshots through a FlashDetector.
+    
+    Frames come from CDP Page.captureScreenshot, scaled down to frame_width
+    pixels, and are analyzed as they arrive; none are kept. In "auto" mode
+    pages with no running animation, video, canvas or GIF are not captured.
+    
+    Returns:
+        The detector summary plus capturedMs, or {"skipped": reason}
+    """
+    candidates = yield _call("evaluate", FLASH_CANDIDATES_SCRIPT)
+    if mode == "auto" and not candidates["running"] and not candidates["media"]:
+        return {"skipped": "no animated content"}
+    
+    width, height = candidates["viewport"]
+    clip = {"x": 0, "y": 0, "width": width, "height": height, "scale": min(1.0, frame_width / max(width, 1))}
+    session = yield _call("context.new_cdp_session", PAGE)
+    detector = FlashDetector()
+    started = time.perf_counter()
+    while detector.frames < max_frames and _elapsed_ms(started) < capture_ms:
+        shot = yield _call_on(
+            session, "send", "Page.captureScreenshot",
+            {"format": "png", "clip": clip, "captureBeyondViewport": False, "optimizeForSpeed": True},
+        )
+        detector.add_png(base64.b64decode(shot["data"]), time.perf_counter() - started)
+    # On errors the session goes away with the page
+    yield _call_on(session, "detach")
+    
+    return {**detector.summary(), "capturedMs": _elapsed_ms(started)}
+
+def _pointer_listener_steps(max_examples: int) -> Generator[PageCall, Any, Dict[str, Any]]:
+    """
+    Find elements with pointer-down listeners but no up or click listener.
+    
+    One DOMDebugger.getEventListeners call with depth -1 and pierce covers
+    every element (frames and shadow roots included), so the number of CDP
+    round trips doesn't grow with the page; only the reported examples are
+    described individually.
+    
+    Returns:
+        elements, downOnly, examples (labels) and roundTrips
+    """
+    group = "pointer-listeners"
+    session = yield _call("context.new_cdp_session", PAGE)
+    document = yield _call_on(
+        session, "send", "Runtime.evaluate", {"expression": "document", "objectGroup": group}
+    )
+    object_id = document["result"]["objectId"]
+    root = yield _call_on(session, "send", "DOM.describeNode", {"objectId": object_id})
+    listeners = yield _call_on(
+        session, "send", "DOMDebugger.getEventListeners",
+        {"objectId": object_id, "depth": -1, "pierce": True},
+    )
+    round_trips = 3
+    
+    # Document-level listeners are usually delegation or outside-click
+    # handling, not an element acting on press
+    nodes = find_down_only_nodes(listeners["listeners"], exclude=[root["node"]["backendNodeId"]])
+    examples = []
+    for backend_node_id in nodes["downOnly"][:max_examples]:
+        described = yield _call_on(session, "send", "DOM.describeNode", {"backendNodeId": backend_node_id})
+        examples.append(node_label(described["node"]))
+        round_trips += 1
+    
+    yield _call_on(session, "send", "Runtime.releaseObjectGroup", {"objectGroup": group})
+    yield _call_on(session, "detach")
+    return {
+        "elements": nodes["elements"],
+        "downOnly": len(nodes["downOnly"]),
+        "examples": examples,
+        "roundTrips": round_trips,
+    }
+
+def _analysis_steps(
+    url: str,
+    fields: Optional[Iterable[str]] = None,
+    on_progress: Optional[ProgressCallback] = None,
+) -> Generator[PageCall, Any, Dict[str, Any]]:
+    """
+    Analysis logic written once for both engines.
+    
+    Yields page operations; the driver performs each one and sends back its
+    result (or throws its exception back in). Returns the analysis dict.
+    Only the requested fields are captured (all of them when fields is None);
+    skipped top-level fields are returned as None.
+    """
+    wanted = None if fields is None else set(fields)
+    
+    def want(field: str) -> bool:
+        return wanted is None or field in wanted
+    
+    timings = {}
+    
+    # Set timeout for page load
+    yield _call("set_default_timeout", 30000)
+    
+    # Skip images, media, fonts, beacons and trackers
+    policy = RequestPolicy.from_env()
+    if policy is not None and policy.is_active:
+        yield _call("route", "**/*", policy.handle)
+    
+    # Navigate to the page
+    _report(on_progress, "navigating")
+    legacy_wait = os.getenv("NAVIGATION_WAIT", "dom-stable").strip().lower() == "networkidle"
+    tracer = get_tracer()
+    started = time.perf_counter()
+    with tracer.span("page.goto", url=url):
         try:
-            page.goto(url, wait_until="networkidle", timeout=30000)
+            yield _call(
+                "goto", url,
+                wait_until="networkidle" if legacy_wait else "domcontentloaded",
+                timeout=30000,
+            )
         except PlaywrightTimeoutError:
             raise Exception("Page load timeout")
-        
-        # Wait for dynamic content
-        page.wait_for_timeout(1000)
-        
-        # Extract HTML content
-        html = page.content()
+    timings["navigationMs"] = _elapsed_ms(started)
+    
+    # Wait for dynamic content
+    started = time.perf_counter()
+    with tracer.span("page.settle"):
+        if legacy_wait:
+            yield _call("wait_for_timeout", 1000)
+        else:
+            yield _call(
+                "evaluate", DOM_STABLE_SCRIPT,
+                [_env_int("DOM_STABLE_QUIET_MS", 500), _env_int("DOM_STABLE_MAX_MS", 5000)],
+            )
+    timings["settleMs"] = _elapsed_ms(started)
+    
+    _report(on_progress, "extracting")
+    
+    # Extract HTML content
+    with tracer.span("page.content"):
+        html = (yield _call("content")) if want("html") else None
         
         # Get accessibility tree
-        accessibility_tree = page.accessibility.snapshot()
-        
-        # Extract all relevant data
-        page_data = page.evaluate("""() => {
-            // Get all interactive elements
-            const interactiveElements = [];
-            const allElements = document.querySelectorAll('*');
-            
-            allElements.forEach(el => {
-                const tagName = el.tagName.toLowerCase();
-                const isInteractive = 
-                    ['a', 'button', 'input', 'select', 'textarea', 'details', 'summary'].includes(tagName) ||
-                    el.hasAttribute('onclick') ||
-                    el.hasAttribute('role') ||
-                    el.tabIndex >= 0;
-                
-                if (isInteractive) {
-                    interactiveElements.push({
-                        tag: tagName,
-                        id: el.id || null,
-                        className: el.className || null,
-                        text: el.textContent?.trim().substring(0, 100) || null,
-                        tabIndex: el.tabIndex,
-                        ariaLabel: el.getAttribute('aria-label') || null,
-                        ariaLabelledBy: el.getAttribute('aria-labelledby') || null,
-                        role: el.getAttribute('role') || null,
-                        type: el.getAttribute('type') || null,
-                        disabled: el.disabled || false,
-                        href: el.href || null,
-                        hasOnclick: el.hasAttribute('onclick') || el.onclick !== null,
-                    });
-                }
-            });
-            
-            // Get all images
-            const images = Array.from(document.images).map(img => ({
-                src: img.src,
-                alt: img.alt || null,
-                title: img.title || null,
-                hasAlt: !!img.alt,
-            }));
-            
-            // Get all headings
-            const headings = [];
-            for (let i = 1; i <= 6; i++) {
-                const hElements = Array.from(document.querySelectorAll(`h${i}`));
-                headings.push(...hElements.map(h => ({
-                    level: i,
-                    text: h.textContent?.trim().substring(0, 100) || '',
-                    id: h.id || null,
-                })));
-            }
-            
-            // Get all form inputs
-            const formInputs = Array.from(document.querySelectorAll('input, select, textarea')).map(input => {
-                const label = input.labels && input.labels.length > 0 
-                    ? input.labels[0].textContent?.trim() 
-                    : (input.getAttribute('aria-label') || input.getAttribute('placeholder') || null);
-                
-                return {
-                    type: input.type || input.tagName.toLowerCase(),
-                    id: input.id || null,
-                    name: input.name || null,
-                    label: label,
-                    ariaLabel: input.getAttribute('aria-label') || null,
-                    ariaLabelledBy: input.getAttribute('aria-labelledby') || null,
-                    required: input.required || false,
-                };
-            });
-            
-            // Get all links
-            const links = Array.from(document.querySelectorAll('a')).map(link => ({
-                href: link.href || '#',
-                text: link.textContent?.trim().substring(0, 100) || '',
-                ariaLabel: link.getAttribute('aria-label') || null,
-                isSkipLink: (link.href.includes('#') && /skip|main|content/i.test(link.textContent || '')) ||
-                            /skip.*content|skip.*main/i.test(link.getAttribute('aria-label') || ''),
-            }));
-            
-            // Check for ARIA landmarks
-            const hasLandmarks = Array.from(document.querySelectorAll('[role="main"], [role="navigation"], [role="banner"], [role="contentinfo"], main, nav')).length > 0;
-            
-            // Get computed styles for color analysis
-            const colorInfo = Array.from(document.querySelectorAll('*')).slice(0, 100).map(el => {
-                const style = window.getComputedStyle(el);
-                return {
-                    color: style.color,
-                    backgroundColor: style.backgroundColor,
-                    text: el.textContent?.trim().substring(0, 50) || '',
-                };
-            }).filter(info => info.text.length > 0);
-            
-            // Check for animations
-            const animations = Array.from(document.querySelectorAll('*')).filter(el => {
-                const style = window.getComputedStyle(el);
-                return style.animation !== 'none' || style.transition !== 'all 0s ease 0s';
-            }).length;
-            
-            // Check for timers (setTimeout/setInterval - approximate detection)
-            const scripts = Array.from(document.querySelectorAll('script')).map(script => 
-                script.textContent || ''
-            ).join(' ');
-            
-            const hasTimers = /setTimeout|setInterval/i.test(scripts);
-            
-            // Check for auto-advance content
-            const hasAutoAdvance = /autoplay|auto.*play|carousel|slideshow/i.test(scripts);
-            
-            return {
-                interactiveElements,
-                images,
-                headings,
-                formInputs,
-                links,
-                colorInfo,
-                animations,
-                hasTimers,
-                hasAutoAdvance,
-                title: document.title,
-                bodyText: document.body.textContent?.substring(0, 5000) || '',
-                hasLandmarks,
-            };
-        }""")
-        
-        # Get CSS for color contrast analysis
-        styles = page.evaluate("""() => {
-            const sheets = Array.from(document.styleSheets);
-            let cssText = '';
-            sheets.forEach(sheet => {
-                try {
-                    const rules = Array.from(sheet.cssRules || []);
-                    rules.forEach(rule => {
-                        cssText += rule.cssText + '\\n';
-                    });
-                } catch (e) {
-                    // Cross-origin stylesheets may throw errors
-                }
-            });
-            return cssText;
-        }""")
-        
-        return {
-            "html": html,
-            "accessibilityTree": accessibility_tree,
-            "pageData": page_data,
-            "styles": styles,
-            "url": url,
-        }
+        accessibility_tree = (yield _call("accessibility.snapshot")) if want("accessibilityTree") else None
+    
+    # Extract all relevant data
+    page_data_fields = None if wanted is None else sorted(wanted & PAGE_DATA_FIELDS)
+    started = time.perf_counter()
+    with tracer.span("page.extract"):
+        page_data = yield _call("evaluate", get_page_data_script(), page_data_fields)
+    timings["extractionMs"] = _elapsed_ms(started)
+    
+    if want("textContrast"):
+        started = time.perf_counter()
+        with tracer.span("page.contrast"):
+            page_data["textContrast"] = yield _call(
+                "evaluate", TEXT_CONTRAST_SCRIPT, _env_int("CONTRAST_MAX_NODES", 50000)
+            )
+        timings["contrastMs"] = _elapsed_ms(started)
+    
+    styles = (yield _call("evaluate", STYLES_SCRIPT)) if want("styles") else None
+    
+    flash_mode = os.getenv("FLASH_DETECTION", "auto").strip().lower()
+    if want("flashAnalysis") and flash_mode != "off":
+        with tracer.span("page.flash"):
+            try:
+                page_data["flashAnalysis"] = yield from _flash_capture_steps(
+                    flash_mode,
+                    _env_int("FLASH_CAPTURE_MS", 1500),
+                    _env_int("FLASH_MAX_FRAMES", 60),
+                    _env_int("FLASH_FRAME_WIDTH", 64),
+                )
+            except Exception as error:
+                page_data["flashAnalysis"] = {"error": error.__class__.__name__}
+        timings["flashMs"] = page_data["flashAnalysis"].get("capturedMs")
+    
+    if want("pointerListeners"):
+        started = time.perf_counter()
+        with tracer.span("page.pointer_listeners"):
+            try:
+                page_data["pointerListeners"] = yield from _pointer_listener_steps(5)
+            except Exception as error:
+                page_data["pointerListeners"] = {"error": error.__class__.__name__}
+        timings["pointerListenersMs"] = _elapsed_ms(started)
+    
+    # Last: key presses can change the page
+    if want("keyboardTraversal"):
+        with tracer.span("page.keyboard"):
+            try:
+                page_data["keyboardTraversal"] = yield from _keyboard_traversal_steps(
+                    _env_int("KEYBOARD_TRAP_MAX_STEPS", 60),
+                    _env_int("KEYBOARD_TRAP_BUDGET_MS", 3000),
+                )
+            except Exception as error:
+                page_data["keyboardTraversal"] = {"error": error.__class__.__name__}
+        timings["keyboardMs"] = page_data["keyboardTraversal"].get("elapsedMs")
+    
+    return {
+        "html": html,
+        "accessibilityTree": accessibility_tree,
+        "pageData": page_data,
+        "styles": styles,
+        "url": url,
+        "timings": timings,
+    }
+
+def _drive_sync(page: Any, steps: Generator) -> Any:
+    """Run analysis steps against a sync Playwright page"""
+    result, error = None, None
+    while True:
+        try:
+            method, args, kwargs = steps.throw(error) if error is not None else steps.send(result)
+        except StopIteration as stop:
+            return stop.value
+        result, error = None, None
+        try:
+            result = _resolve(page, method)(*_bind(page, args), **kwargs)
+        except Exception as e:
+            error = e
+
+async def _drive_async(page: Any, steps: Generator) -> Any:
+    """Run analysis steps against an async Playwright page"""
+    result, error = None, None
+    while True:
+        try:
+            method, args, kwargs = steps.throw(error) if error is not None else steps.send(result)
+        except StopIteration as stop:
+            return stop.value
+        result, error = None, None
+        try:
+            result = await _resolve(page, method)(*_bind(page, args), **kwargs)
+        except Exception as e:
+            error = e
+
+def _analyze_webpage_sync(
+    page: Page,
+    url: str,
+    fields: Optional[Iterable[str]] = None,
+    on_progress: Optional[ProgressCallback] = None,
+):
+    """
+    Analyze a webpage and extract accessibility data (synchronous).
+    
+    Args:
+        page: Fresh page from a pooled browser context
+        url: URL of the webpage to analyze
+        fields: Page data / analysis fields to capture (None for all)
+        on_progress: Optional phase callback
         
+    Returns:
+        Dictionary containing HTML, accessibility tree, page data, and styles
+    """
+    try:
+        return _drive_sync(page, _analysis_steps(url, fields, on_progress))
+    except Exception as error:
+        raise Exception(f"Failed to analyze webpage: {str(error)}")
+
+async def _analyze_webpage_async(
+    page: Any,
+    url: str,
+    fields: Optional[Iterable[str]] = None,
+    on_progress: Optional[ProgressCallback] = None,
+):
+    """Analyze a webpage on the event loop (async engine)"""
+    try:
+        return await _drive_async(page, _analysis_steps(url, fields, on_progress))
     except Exception as error:
         raise Exception(f"Failed to analyze webpage: {str(error)}")
-    finally:
-        # Ensure page is always closed
-        try:
-            if not page.is_closed():
-                page.close()
-        except Exception as error:
-            pass  # Silently ignore close errors
 
-async def analyze_webpage(url: str):
+async def analyze_webpage(
+    url: str,
+    fields: Optional[Iterable[str]] = None,
+    on_progress: Optional[ProgressCallback] = None,
+):
     """
-    Analyze a webpage and extract accessibility data (async wrapper).
-    Runs the synchronous Playwright code in a thread pool to avoid Windows asyncio issues.
+    Analyze a webpage and extract accessibility data.
+    Runs on a pooled browser using the configured engine.
     
     Args:
         url: URL of the webpage to analyze
+        fields: Page data / analysis fields to capture (None for all).
+            Skipping html, accessibilityTree and styles avoids shipping
+            megabytes across the CDP connection.
+        on_progress: Optional callback receiving "navigating" and
+            "extracting" as the analysis advances
         
     Returns:
         Dictionary containing HTML, accessibility tree, page data, and styles
     """
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(_executor, _analyze_webpage_sync, url)
+    # Browsers only reach the network through the egress proxy
+    await start_egress_proxy()
+    with get_tracer().span("analyze_webpage", url=url, engine=get_engine()):
+        if get_engine() == "async":
+            analysis = await get_browser_pool().run(_analyze_webpage_async, url, fields, on_progress)
+        else:
+            analysis = await get_browser_pool().run(_analyze_webpage_sync, url, fields, on_progress)
+    observe_page_timings(analysis.get("timings", {}))
+    return analysis
@@ -0,0 +1,152 @@
+"""
+Request Policy
+
+Decides which subrequests a page may make during analysis. Images, media,
+fonts, beacons and known analytics/ad hosts are aborted or stubbed: the
+checks read attributes and the DOM, never pixels or tracker responses, so
+skipping those downloads doesn't change results.
+"""
+
+import os
+import base64
+from urllib.parse import urlsplit
+from typing import Any, FrozenSet, Iterable, Optional
+
+# Smallest valid transparent GIF, served in place of blocked images
+TRANSPARENT_GIF = base64.b64decode("R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7")
+
+DEFAULT_BLOCKED_TYPES = frozenset({"image", "media", "font", "ping"})
+
+# Analytics, tag managers, ad networks and session recorders
+DEFAULT_BLOCKED_HOSTS = frozenset({
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "doubleclick.net",
+    "adservice.google.com",
+    "connect.facebook.net",
+    "analytics.tiktok.com",
+    "bat.bing.com",
+    "clarity.ms",
+    "hotjar.com",
+    "fullstory.com",
+    "mixpanel.com",
+    "segment.com",
+    "segment.io",
+    "amplitude.com",
+    "heap.io",
+    "nr-data.net",
+    "scorecardresearch.com",
+    "quantserve.com",
+    "criteo.com",
+    "criteo.net",
+    "taboola.com",
+    "outbrain.com",
+    "adnxs.com",
+    "amazon-adsystem.com",
+})
+
+# Resource types that are answered with an empty success instead of a
+# network error, so page scripts don't take their error paths
+_STUBBED_TYPES = {
+    "image": {"status": 200, "content_type": "image/gif", "body": TRANSPARENT_GIF},
+    "ping": {"status": 204, "body": b""},
+}
+
+
+def _csv(value: Optional[str], default: FrozenSet[str]) -> FrozenSet[str]:
+    if value is None:
+        return default
+    return frozenset(item.strip().lower() for item in value.split(",") if item.strip())
+
+
+class RequestPolicy:
+    """
+    Per-request allow/abort/stub decisions for a page's subrequests.
+
+    Args:
+        blocked_types: Playwright resource types to block
+        blocked_hosts: Hosts (and their subdomains) to abort
+        stub: Answer blocked images and beacons with empty responses
+            rather than aborting them
+    """
+
+    def __init__(
+        self,
+        blocked_types: Iterable[str] = DEFAULT_BLOCKED_TYPES,
+        blocked_hosts: Iterable[str] = DEFAULT_BLOCKED_HOSTS,
+        stub: bool = True,
+    ):
+        self.blocked_types = frozenset(blocked_types)
+        self.blocked_hosts = frozenset(host.lower() for host in blocked_hosts)
+        self.stub = stub
+
+    @classmethod
+    def from_env(cls) -> Optional["RequestPolicy"]:
+        """Build the policy from the environment; None when it is disabled"""
+        mode = os.getenv("REQUEST_POLICY", "stub").strip().lower()
+        if mode in ("off", "none", "false", "0"):
+            return None
+
+        hosts = set()
+        if os.getenv("BLOCK_TRACKERS", "true").strip().lower() not in ("false", "0", "no"):
+            hosts |= DEFAULT_BLOCKED_HOSTS
+        hosts |= _csv(os.getenv("BLOCKED_HOSTS"), frozenset())
+
+        return cls(
+            blocked_types=_csv(os.getenv("BLOCK_RESOURCE_TYPES"), DEFAULT_BLOCKED_TYPES),
+            blocked_hosts=hosts,
+            stub=mode != "abort",
+        )
+
+    @property
+    def is_active(self) -> bool:
+        return bool(self.blocked_types or self.blocked_hosts)
+
+    def is_blocked_host(self, hostname: str) -> bool:
+        """Match hostname or any parent domain against the blocked hosts"""
+        labels = hostname.lower().rstrip(".").split(".")
+        return any(
+            ".".join(labels[i:]) in self.blocked_hosts
+            for i in range(len(labels) - 1)
+        )
+
+    def decide(self, resource_type: str, url: str) -> str:
+        """
+        Decide what to do with a request.
+
+        Returns:
+            "continue", "abort" or "stub"
+        """
+        # Never interfere with the page itself
+        if resource_type == "document":
+            return "continue"
+
+        hostname = urlsplit(url).hostname or ""
+        if hostname and self.is_blocked_host(hostname):
+            return "abort"
+
+        if resource_type in self.blocked_types:
+            if self.stub and resource_type in _STUBBED_TYPES:
+                return "stub"
+            return "abort"
+
+        return "continue"
+
+    def handle(self, route: Any) -> Any:
+        """
+        Playwright route handler.
+
+        Returns whatever the route call returns, so the same handler works
+        for the sync API and, by returning the coroutine to be awaited, for
+        the async API.
+        """
+        request = route.request
+        action = self.decide(request.resource_type, request.url)
+        if action == "abort":
+            return route.abort("blockedbyclient")
+        if action == "stub":
+            return route.fulfill(**_STUBBED_TYPES[request.resource_type])
+        return route.continue_()
+
@@ -0,0 +1,106 @@
+"""
+robots.txt Handling
+
+Fetches and interprets a site's robots.txt for the crawler, following
+RFC 9309: a missing file (4xx) allows everything, while a server error or
+an unreachable server disallows everything.
+"""
+
+from urllib.parse import urljoin
+from urllib.robotparser import RobotFileParser
+from typing import Optional
+
+import httpx
+
+from app.middleware.security import validate_url
+from app.utils.static_analyzer import pinned_fetch_client
+
+CRAWLER_USER_AGENT = "WebComplianceChecker"
+
+# RFC 9309: follow at least five consecutive redirects
+MAX_REDIRECTS = 5
+
+
+class RobotsRules:
+    """
+    Parsed robots.txt rules for one origin.
+
+    Args:
+        text: robots.txt body (None with allow_all/disallow_all)
+        allow_all: No usable rules; everything is allowed
+        disallow_all: The file could not be fetched; nothing is allowed
+        user_agent: Agent name matched against User-agent groups
+    """
+
+    def __init__(
+        self,
+        text: Optional[str] = None,
+        allow_all: bool = False,
+        disallow_all: bool = False,
+        user_agent: str = CRAWLER_USER_AGENT,
+    ):
+        self.user_agent = user_agent
+        self._parser = RobotFileParser()
+        if disallow_all:
+            self._parser.disallow_all = True
+        elif allow_all or text is None:
+            self._parser.allow_all = True
+        else:
+            self._parser.parse(text.splitlines())
+
+    def allowed(self, url: str) -> bool:
+        """Whether the crawler may fetch url"""
+        return self._parser.can_fetch(self.user_agent, url)
+
+    @property
+    def crawl_delay(self) -> Optional[float]:
+        """Crawl-delay for this agent, in seconds, if the site sets one"""
+        delay = self._parser.crawl_delay(self.user_agent)
+        return float(delay) if delay is not None else None
+
+
+async def fetch_robots(origin: str, timeout: float = 10.0, client: Optional[httpx.AsyncClient] = None) -> RobotsRules:
+    """
+    Fetch robots.txt for an origin such as "https://example.com".
+
+    Redirects are followed by hand, validating each target like a
+    submitted URL; a redirect to a blocked address disallows everything.
+
+    Args:
+        origin: Scheme, host and port of the site
+        timeout: Request timeout in seconds
+        client: HTTP client to use (the pinned page-fetch client by default)
+
+    Returns:
+        RobotsRules for the origin
+    """
+    url = f"{origin.rstrip('/')}/robots.txt"
+    client = client or await pinned_fetch_client()
+    try:
+        for _ in range(MAX_REDIRECTS + 1):
+            response = await client.get(
+                url,
+                headers={"User-Agent": CRAWLER_USER_AGENT},
+                timeout=timeout,
+                follow_redirects=False,
+            )
+            if not response.is_redirect:
+                break
+            target = urljoin(url, response.headers.get("location", ""))
+            validation = await validate_url(target)
+            if not validation["valid"]:
+                print(f"robots.txt redirect blocked for {origin}: {validation['error']}")
+                return RobotsRules(disallow_all=True)
+            url = target
+        else:
+            # Too many redirects: the file counts as unavailable
+            return RobotsRules(allow_all=True)
+    except httpx.HTTPError as error:
+        print(f"robots.txt unreachable for {origin}: {error.__class__.__name__}")
+        return RobotsRules(disallow_all=True)
+
+    if 400 <= response.status_code < 500:
+        return RobotsRules(allow_all=True)
+    if response.status_code >= 500:
+        return RobotsRules(disallow_all=True)
+    return RobotsRules(response.text)
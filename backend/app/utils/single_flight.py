@@ -0,0 +1,74 @@
+"""
+Single Flight
+
+Coalesces concurrent calls for the same key: the first caller (the leader)
+starts the work, later callers await the same task and share its result.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class _Flight:
+    __slots__ = ("task", "loop", "waiters")
+
+    def __init__(self, task: asyncio.Task, loop: asyncio.AbstractEventLoop):
+        self.task = task
+        self.loop = loop
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    In-flight request coalescing keyed by string.
+
+    - The work runs in its own task, so one caller timing out or being
+      cancelled doesn't cancel it for the others.
+    - When the last waiter gives up, the work is cancelled: nobody is left
+      to use the result.
+    - Errors are shared by every waiter; the key is forgotten as soon as the
+      work finishes, so the next call starts afresh.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run fn() once per key among concurrent callers.
+
+        Args:
+            key: Identity of the work
+            fn: Zero-argument coroutine function doing the work
+
+        Returns:
+            (result, shared) where shared is True for followers
+        """
+        loop = asyncio.get_running_loop()
+        flight = self._flights.get(key)
+        shared = flight is not None and flight.loop is loop and not flight.task.done()
+
+        if not shared:
+            flight = _Flight(loop.create_task(fn()), loop)
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _t, k=key, f=flight: self._forget(k, f))
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task), shared
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+                # Don't let a new caller join work that is being torn down
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+
+    def _forget(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.task.cancelled():
+            flight.task.exception()  # Mark retrieved if every waiter left
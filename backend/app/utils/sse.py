@@ -0,0 +1,20 @@
+"""
+Server-Sent Events Helpers
+
+Encoding shared by every text/event-stream endpoint.
+"""
+
+import json
+from typing import Any, Dict
+
+# Headers for SSE responses: no caching, and no proxy buffering (nginx
+# would otherwise hold events back until its buffer fills)
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+
+def format_sse(record: Dict[str, Any]) -> str:
+    """Encode an event record ({"id", "event", "data"}) as an SSE message"""
+    return f"id: {record['id']}\nevent: {record['event']}\ndata: {json.dumps(record['data'])}\n\n"
@@ -0,0 +1,583 @@
+"""
+Static Analyzer
+
+Browser-free analysis engine: fetches a page's HTML over a pooled HTTP
+client (or takes uploaded markup), parses it and produces the same
+pageData structure PAGE_DATA_SCRIPT extracts in Chromium, for the fields
+that can be read from markup alone. Parses with lxml when it is installed
+and falls back to the standard library's html.parser otherwise.
+
+Checks that need rendering (computed colors, focus, screenshots, event
+listeners) still need the browser; see STATIC_FIELDS.
+"""
+
+import os
+import re
+import time
+import asyncio
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import httpx
+
+from app.middleware.security import validate_url
+from app.utils.egress_proxy import get_egress_proxy, pinning_enabled, start_egress_proxy
+from app.utils.tracing import traced
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+# pageData fields static markup can answer
+STATIC_FIELDS = frozenset({
+    "interactiveElements", "images", "headings", "formInputs", "links",
+    "hasTimers", "hasAutoAdvance", "title", "bodyText", "hasLandmarks",
+})
+
+# Same element classes as PAGE_DATA_SCRIPT
+INTERACTIVE_TAGS = frozenset({"a", "button", "input", "select", "textarea", "details", "summary"})
+FORM_TAGS = frozenset({"input", "select", "textarea"})
+_DISABLEABLE_TAGS = FORM_TAGS | {"button"}
+HEADING_LEVELS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+LANDMARK_ROLES = frozenset({"main", "navigation", "banner", "contentinfo"})
+
+# Elements focusable by default (tabIndex 0 without a tabindex attribute)
+_FOCUSABLE_TAGS = frozenset({"button", "input", "select", "textarea", "summary", "iframe"})
+
+# Mount points single-page apps render into
+_APP_ROOT_IDS = frozenset({"root", "app", "__next", "___gatsby", "svelte"})
+
+_NON_CONTENT_TAGS = frozenset({"script", "style", "noscript", "template"})
+_VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+    "meta", "param", "source", "track", "wbr",
+})
+
+_SKIP_TEXT = re.compile(r"skip|main|content", re.IGNORECASE)
+_SKIP_LABEL = re.compile(r"skip.*content|skip.*main", re.IGNORECASE)
+_TIMERS = re.compile(r"setTimeout|setInterval", re.IGNORECASE)
+_AUTO_ADVANCE = re.compile(r"autoplay|auto.*play|carousel|slideshow", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+# Redirects followed when fetching, each one re-validated
+MAX_REDIRECTS = 5
+
+
+class StaticAnalysisError(Exception):
+    """The page could not be fetched or parsed without a browser"""
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class _Node:
+    """Element for the html.parser fallback, with the lxml calls used here"""
+
+    def __init__(self, tag: str, attrib: Dict[str, str], parent: Optional["_Node"]):
+        self.tag = tag
+        self.attrib = attrib
+        self.children: List[Any] = []
+        self._parent = parent
+
+    def get(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        return self.attrib.get(name, default)
+
+    def getparent(self) -> Optional["_Node"]:
+        return self._parent
+
+    def iter(self) -> Iterator["_Node"]:
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed([child for child in node.children if isinstance(child, _Node)]))
+
+    def text_content(self) -> str:
+        parts = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                parts.append(node)
+            else:
+                stack.extend(reversed(node.children))
+        return "".join(parts)
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = _Node("html", {}, None)
+        self._stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "html" and len(self._stack) == 1:
+            self.root.attrib.update({name: value or "" for name, value in attrs})
+            return
+        node = _Node(tag, {name: value or "" for name, value in attrs}, self._stack[-1])
+        self._stack[-1].children.append(node)
+        if tag not in _VOID_TAGS:
+            self._stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in _VOID_TAGS and self._stack[-1].tag == tag:
+            self._stack.pop()
+
+    def handle_endtag(self, tag):
+        # Close up to the matching open element; stray end tags are ignored
+        for depth in range(len(self._stack) - 1, 0, -1):
+            if self._stack[depth].tag == tag:
+                del self._stack[depth:]
+                return
+
+    def handle_data(self, data):
+        self._stack[-1].children.append(data)
+
+
+def parse_html(html: str) -> Any:
+    """
+    Parse a document into an element tree (lxml's when available).
+
+    Raises:
+        StaticAnalysisError: If the markup can't be parsed
+    """
+    if lxml is not None:
+        try:
+            return lxml.html.document_fromstring(html)
+        except (ValueError, lxml.etree.ParserError) as error:
+            raise StaticAnalysisError(f"Unparseable HTML: {error}")
+
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def _elements(root: Any) -> Iterator[Any]:
+    # lxml also yields comments and processing instructions
+    for element in root.iter():
+        if isinstance(element.tag, str):
+            yield element
+
+
+def _text(element: Any) -> str:
+    return element.text_content() or ""
+
+
+def _tab_index(element: Any, tag: str) -> int:
+    try:
+        return int(element.get("tabindex"))
+    except (TypeError, ValueError):
+        pass
+    if tag in _FOCUSABLE_TAGS or (tag in ("a", "area") and element.get("href") is not None):
+        return 0
+    return -1
+
+
+def _input_type(element: Any, tag: str) -> str:
+    if tag == "select":
+        return "select-multiple" if element.get("multiple") is not None else "select-one"
+    if tag == "textarea":
+        return "textarea"
+    return (element.get("type") or "text").strip().lower()
+
+
+def client_rendering_reason(root: Any, min_text: int = 200) -> Optional[str]:
+    """
+    Why a page looks rendered on the client, or None if its markup is
+    enough to analyze.
+
+    Args:
+        root: Parsed document
+        min_text: Visible characters below which a page with scripts is
+            assumed to build its content in JavaScript
+    """
+    has_scripts = False
+    for element in _elements(root):
+        tag = element.tag.lower()
+        if tag == "script":
+            has_scripts = True
+        if element.get("id") in _APP_ROOT_IDS and not _WHITESPACE.sub("", _text(element)):
+            return f"empty app root #{element.get('id')}"
+
+    body = next((element for element in _elements(root) if element.tag.lower() == "body"), root)
+    hidden = sum(
+        len(_WHITESPACE.sub("", _text(element)))
+        for element in _elements(body)
+        if element.tag.lower() in _NON_CONTENT_TAGS
+    )
+    text_length = len(_WHITESPACE.sub("", _text(body))) - hidden
+
+    if has_scripts and text_length < min_text:
+        return "little server-rendered text"
+    return None
+
+
+def extract_page_data(
+    root: Any,
+    base_url: str,
+    fields: Optional[Iterable[str]] = None
+) -> Dict[str, Any]:
+    """
+    Build pageData from parsed markup, in PAGE_DATA_SCRIPT's shape.
+
+    Args:
+        root: Parsed document (see parse_html)
+        base_url: URL relative links and image sources resolve against
+        fields: pageData fields to produce (every STATIC_FIELDS one when None)
+
+    Returns:
+        pageData with the requested static fields
+    """
+    wanted = set(STATIC_FIELDS if fields is None else fields) & STATIC_FIELDS
+
+    interactive_elements = []
+    images = []
+    headings = []
+    form_inputs = []
+    links = []
+    script_texts = []
+    has_landmarks = False
+
+    # <label for=...> targets, for el.labels
+    labels_for: Dict[str, str] = {}
+    if "formInputs" in wanted:
+        for element in _elements(root):
+            if element.tag.lower() == "label" and element.get("for") and element.get("for") not in labels_for:
+                labels_for[element.get("for")] = _text(element).strip()
+
+    for element in _elements(root):
+        tag = element.tag.lower()
+        role = element.get("role")
+        aria_label = element.get("aria-label")
+
+        has_onclick = element.get("onclick") is not None
+        tab_index = _tab_index(element, tag)
+        if "interactiveElements" in wanted and (
+            tag in INTERACTIVE_TAGS or has_onclick or role is not None or tab_index >= 0
+        ):
+            href = element.get("href")
+            interactive_elements.append({
+                "tag": tag,
+                "id": element.get("id") or None,
+                "className": element.get("class") or None,
+                "text": _text(element).strip()[:100] or None,
+                "tabIndex": tab_index,
+                "ariaLabel": aria_label or None,
+                "ariaLabelledBy": element.get("aria-labelledby") or None,
+                "role": role or None,
+                "type": element.get("type") or None,
+                "disabled": tag in _DISABLEABLE_TAGS and element.get("disabled") is not None,
+                "href": urljoin(base_url, href) if tag in ("a", "area") and href is not None else None,
+                "hasOnclick": has_onclick,
+            })
+
+        if tag == "img":
+            if "images" in wanted:
+                alt = element.get("alt")
+                src = element.get("src")
+                images.append({
+                    "src": urljoin(base_url, src) if src else "",
+                    "alt": alt or None,
+                    "title": element.get("title") or None,
+                    "hasAlt": bool(alt),
+                })
+        elif tag in HEADING_LEVELS:
+            if "headings" in wanted:
+                headings.append({
+                    "level": HEADING_LEVELS[tag],
+                    "text": _text(element).strip()[:100],
+                    "id": element.get("id") or None,
+                })
+        elif tag in FORM_TAGS:
+            if "formInputs" in wanted:
+                label = labels_for.get(element.get("id") or "")
+                if label is None:
+                    ancestor = element.getparent()
+                    while ancestor is not None and ancestor.tag.lower() != "label":
+                        ancestor = ancestor.getparent()
+                    if ancestor is not None:
+                        label = _text(ancestor).strip()
+                if label is None:
+                    label = aria_label or element.get("placeholder") or None
+                form_inputs.append({
+                    "type": _input_type(element, tag),
+                    "id": element.get("id") or None,
+                    "name": element.get("name") or None,
+                    "label": label,
+                    "ariaLabel": aria_label or None,
+                    "ariaLabelledBy": element.get("aria-labelledby") or None,
+                    "required": element.get("required") is not None,
+                })
+        elif tag == "a":
+            if "links" in wanted:
+                raw_href = element.get("href")
+                href = urljoin(base_url, raw_href) if raw_href is not None else ""
+                text = _text(element)
+                links.append({
+                    "href": href or "#",
+                    "text": text.strip()[:100],
+                    "ariaLabel": aria_label or None,
+                    "isSkipLink": ("#" in href and bool(_SKIP_TEXT.search(text)))
+                                  or bool(_SKIP_LABEL.search(aria_label or "")),
+                })
+        elif tag == "script":
+            script_texts.append(_text(element))
+
+        if not has_landmarks and (tag in ("main", "nav") or role in LANDMARK_ROLES):
+            has_landmarks = True
+
+    # Same heading order as the browser extractors
+    headings.sort(key=lambda heading: heading["level"])
+    scripts = " ".join(script_texts)
+
+    page_data: Dict[str, Any] = {}
+    if "interactiveElements" in wanted:
+        page_data["interactiveElements"] = interactive_elements
+    if "images" in wanted:
+        page_data["images"] = images
+    if "headings" in wanted:
+        page_data["headings"] = headings
+    if "formInputs" in wanted:
+        page_data["formInputs"] = form_inputs
+    if "links" in wanted:
+        page_data["links"] = links
+    if "hasTimers" in wanted:
+        page_data["hasTimers"] = bool(_TIMERS.search(scripts))
+    if "hasAutoAdvance" in wanted:
+        page_data["hasAutoAdvance"] = bool(_AUTO_ADVANCE.search(scripts))
+    if "title" in wanted:
+        title = next((element for element in _elements(root) if element.tag.lower() == "title"), None)
+        page_data["title"] = _WHITESPACE.sub(" ", _text(title)).strip() if title is not None else ""
+    if "bodyText" in wanted:
+        body = next((element for element in _elements(root) if element.tag.lower() == "body"), None)
+        page_data["bodyText"] = _text(body)[:5000] if body is not None else ""
+    if "hasLandmarks" in wanted:
+        page_data["hasLandmarks"] = has_landmarks
+    return page_data
+
+
+_fetch_client: Optional[httpx.AsyncClient] = None
+_fetch_client_proxy: Optional[str] = None
+
+
+def fetch_proxy() -> Optional[str]:
+    """
+    Proxy for page fetches: the egress proxy when IP pinning is on, so
+    fetches connect only to the addresses the proxy validated (no second
+    lookup for a rebinding hostname to answer differently).
+
+    Raises:
+        RuntimeError: If pinning is on but the proxy isn't running
+    """
+    if not pinning_enabled():
+        return None
+    proxy = get_egress_proxy()
+    if not proxy.running:
+        raise RuntimeError("Egress proxy is not running")
+    return proxy.browser_proxy()["server"]
+
+
+def get_fetch_client() -> httpx.AsyncClient:
+    """Get or create the shared, pooled HTTP client for page fetches"""
+    global _fetch_client, _fetch_client_proxy
+
+    proxy = fetch_proxy()
+    if _fetch_client is None or _fetch_client.is_closed or proxy != _fetch_client_proxy:
+        _fetch_client_proxy = proxy
+        _fetch_client = httpx.AsyncClient(
+            proxies=proxy,
+            limits=httpx.Limits(
+                max_connections=_env_int("STATIC_MAX_CONNECTIONS", 100),
+                max_keepalive_connections=_env_int("STATIC_MAX_KEEPALIVE", 20),
+                keepalive_expiry=30.0,
+            ),
+            timeout=httpx.Timeout(15.0, connect=5.0),
+            headers={"User-Agent": "WebComplianceChecker", "Accept": "text/html,application/xhtml+xml"},
+        )
+
+    return _fetch_client
+
+
+async def close_fetch_client():
+    """Close the shared page-fetch client and its pooled connections"""
+    global _fetch_client
+
+    client, _fetch_client = _fetch_client, None
+    if client is not None:
+        await client.aclose()
+
+
+async def pinned_fetch_client() -> httpx.AsyncClient:
+    """The shared fetch client, starting the egress proxy it goes through"""
+    await start_egress_proxy()
+    return get_fetch_client()
+
+
+async def fetch_html(url: str, client: Optional[httpx.AsyncClient] = None) -> Tuple[str, str]:
+    """
+    Fetch a page's HTML, validating every redirect target like the
+    submitted URL.
+
+    Args:
+        url: Validated URL to fetch
+        client: HTTP client (the shared client, pinned through the egress
+            proxy, by default)
+
+    Returns:
+        (final URL, HTML)
+
+    Raises:
+        StaticAnalysisError: On network errors, error statuses, blocked
+            redirects, non-HTML responses or pages over STATIC_MAX_BYTES
+    """
+    client = client or await pinned_fetch_client()
+    max_bytes = _env_int("STATIC_MAX_BYTES", 5 * 1024 * 1024)
+
+    for _ in range(MAX_REDIRECTS + 1):
+        try:
+            async with client.stream("GET", url, follow_redirects=False) as response:
+                if response.is_redirect:
+                    target = urljoin(url, response.headers.get("location", ""))
+                    validation = await validate_url(target)
+                    if not validation["valid"]:
+                        raise StaticAnalysisError(f"Redirect blocked: {validation['error']}")
+                    url = target
+                    continue
+                if response.status_code >= 400:
+                    raise StaticAnalysisError(f"HTTP {response.status_code}")
+                content_type = response.headers.get("content-type", "text/html").lower()
+                if "html" not in content_type:
+                    raise StaticAnalysisError(f"Not an HTML page ({content_type.split(';')[0]})")
+
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body += chunk
+                    if len(body) > max_bytes:
+                        raise StaticAnalysisError("Page is too large for static analysis")
+                return url, bytes(body).decode(response.encoding or "utf-8", errors="replace")
+        except httpx.HTTPError as error:
+            raise StaticAnalysisError(f"Fetch failed: {error.__class__.__name__}")
+
+    raise StaticAnalysisError("Too many redirects")
+
+
+async def fetch_validators(
+    url: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    client: Optional[httpx.AsyncClient] = None,
+) -> Dict[str, Any]:
+    """
+    Conditional GET for a page's validators; the body is never read.
+
+    Redirects aren't followed: a redirecting URL reports its 3xx status
+    and no validators, which callers treat as changed.
+
+    Args:
+        url: Validated URL to fetch
+        etag: Stored ETag, sent as If-None-Match
+        last_modified: Stored Last-Modified, sent as If-Modified-Since
+        client: HTTP client (the shared client, pinned through the egress
+            proxy, by default)
+
+    Returns:
+        {"status", "notModified", "etag", "lastModified"}
+
+    Raises:
+        StaticAnalysisError: On network errors
+    """
+    client = client or await pinned_fetch_client()
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    try:
+        async with client.stream("GET", url, headers=headers, follow_redirects=False) as response:
+            if response.status_code == 304:
+                # A 304 may omit validators it didn't change
+                return {
+                    "status": 304,
+                    "notModified": True,
+                    "etag": response.headers.get("etag") or etag,
+                    "lastModified": response.headers.get("last-modified") or last_modified,
+                }
+            if response.is_redirect or response.status_code >= 300:
+                return {"status": response.status_code, "notModified": False, "etag": None, "lastModified": None}
+            return {
+                "status": response.status_code,
+                "notModified": False,
+                "etag": response.headers.get("etag"),
+                "lastModified": response.headers.get("last-modified"),
+            }
+    except httpx.HTTPError as error:
+        raise StaticAnalysisError(f"Fetch failed: {error.__class__.__name__}")
+
+
+@traced("analyze_static")
+async def analyze_static(
+    url: str,
+    fields: Optional[Iterable[str]] = None,
+    html: Optional[str] = None,
+    auto: bool = False,
+    client: Optional[httpx.AsyncClient] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Analyze a page from its markup, in analyze_webpage's result shape.
+
+    Args:
+        url: Page URL (the base for relative links when html is given)
+        fields: pageData fields to produce
+        html: Markup to analyze instead of fetching url
+        auto: Return None instead of a result when the page looks rendered
+            on the client, so the caller can use the browser
+        client: HTTP client for the fetch
+
+    Returns:
+        Analysis dict with engine "static", or None (auto mode only)
+
+    Raises:
+        StaticAnalysisError: If the page can't be fetched or parsed
+    """
+    timings = {}
+    started = time.perf_counter()
+    if html is None:
+        url, html = await fetch_html(url, client=client)
+        timings["fetchMs"] = round((time.perf_counter() - started) * 1000, 1)
+
+    # Parsing is CPU-bound; keep it off the event loop
+    started = time.perf_counter()
+    min_text = _env_int("STATIC_MIN_TEXT_CHARS", 200)
+
+    def parse_and_extract():
+        root = parse_html(html)
+        if auto:
+            reason = client_rendering_reason(root, min_text)
+            if reason is not None:
+                return reason, None
+        return None, extract_page_data(root, url, fields)
+
+    reason, page_data = await asyncio.to_thread(parse_and_extract)
+    if page_data is None:
+        print(f"Static analysis skipped ({reason}); using the browser")
+        return None
+    timings["extractionMs"] = round((time.perf_counter() - started) * 1000, 1)
+
+    return {
+        "html": html if fields is None or "html" in fields else None,
+        "accessibilityTree": None,
+        "pageData": page_data,
+        "styles": None,
+        "url": url,
+        "timings": timings,
+        "engine": "static",
+    }
@@ -0,0 +1,444 @@
+"""
+Tracing
+
+Lightweight per-request tracing. Every HTTP request gets a root span whose
+trace id is returned in X-Trace-Id and written to JSON logs; child spans
+(URL validation, browser checkout, each page phase, each check, each model
+call) show which step ate a slow request's time.
+
+Spans use OpenTelemetry's data model (W3C trace and span ids, nanosecond
+timestamps, typed attributes, status) and export as OTLP/HTTP JSON, so any
+OpenTelemetry collector or tracing backend can receive them. With no
+exporter configured (TRACING_EXPORTER=none, the default) child spans are a
+shared no-op object and cost one attribute check.
+
+Exporters (TRACING_EXPORTER):
+    none: Trace ids only, nothing recorded
+    console: Print each finished span as one JSON line
+    otlp: Batch spans to OTEL_EXPORTER_OTLP_ENDPOINT (/v1/traces)
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+import secrets
+import threading
+import functools
+import contextvars
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import httpx
+
+# OTLP span kinds and status codes
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("wcc_span", default=None)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[tuple]:
+    """
+    Read a W3C traceparent header.
+
+    Returns:
+        (trace_id, parent_span_id), or None if absent or malformed
+    """
+    match = _TRACEPARENT.match((header or "").strip().lower())
+    if match is None or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2)
+
+
+def _attribute_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    """
+    One timed operation. Use as a context manager: it becomes the current
+    span (the parent of spans started inside it) until the block exits.
+    """
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        trace_id: str,
+        parent_span_id: Optional[str] = None,
+        kind: int = KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = STATUS_UNSET
+        self.status_message = ""
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any):
+        if value is not None:
+            self.attributes[key] = value
+
+    def record_error(self, error: BaseException):
+        self.status = STATUS_ERROR
+        self.status_message = f"{error.__class__.__name__}: {error}"[:500]
+
+    def end(self):
+        """Finish the span and hand it to the exporter (once)"""
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        self.tracer._finished(self)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        # Cancellation is how budgets end, not a failure of this step
+        if exc is not None and not isinstance(exc, (asyncio.CancelledError, GeneratorExit)):
+            self.record_error(exc)
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Exited from another context (e.g. a generator closed by GC)
+            pass
+        self.end()
+        return False
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """The span as an OTLP/JSON span object"""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [{"key": key, "value": _attribute_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": self.status, **({"message": self.status_message} if self.status_message else {})},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+class _NoopSpan:
+    """Stands in for a span when nothing is exported"""
+
+    trace_id = None
+    span_id = None
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def record_error(self, error: BaseException):
+        pass
+
+    def end(self):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class InMemorySpanExporter:
+    """Keeps finished spans in a list (for tests)"""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]):
+        with self._lock:
+            self.spans.extend(spans)
+
+    def get_finished_spans(self) -> List[Span]:
+        with self._lock:
+            return list(self.spans)
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+    def shutdown(self):
+        pass
+
+
+class ConsoleSpanExporter:
+    """Prints each finished span as one JSON line"""
+
+    def export(self, spans: List[Span]):
+        for span in spans:
+            print(json.dumps({
+                "trace_id": span.trace_id,
+                "span_id": span.span_id,
+                "parent_span_id": span.parent_span_id,
+                "name": span.name,
+                "duration_ms": round(span.duration_ms or 0.0, 3),
+                "status": "error" if span.status == STATUS_ERROR else "ok",
+                "attributes": span.attributes,
+            }, default=str))
+
+    def shutdown(self):
+        pass
+
+
+class OTLPHttpExporter:
+    """
+    Batches spans and POSTs them as OTLP/HTTP JSON from a background thread.
+
+    Args:
+        endpoint: Collector base URL; spans go to {endpoint}/v1/traces
+        service_name: service.name resource attribute
+        headers: Extra request headers (e.g. an API key)
+        interval: Seconds between flushes
+        max_queue: Spans held before the oldest are dropped
+        max_batch: Spans per request
+        client: HTTP client to send with (created on first flush by default)
+    """
+
+    def __init__(
+        self,
+        endpoint: str = "http://localhost:4318",
+        service_name: str = "wcc-backend",
+        headers: Optional[Dict[str, str]] = None,
+        interval: float = 5.0,
+        max_queue: int = 2048,
+        max_batch: int = 512,
+        client: Optional[httpx.Client] = None,
+    ):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self.headers = headers or {}
+        self.interval = interval
+        self.max_batch = max_batch
+        self._queue: Deque[Span] = deque(maxlen=max_queue)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self._client = client
+        self.exported = 0
+        self.dropped = 0
+        self.errors = 0
+
+    @classmethod
+    def from_env(cls) -> "OTLPHttpExporter":
+        """Build the exporter from the standard OTEL_* environment variables"""
+        headers = {}
+        for pair in os.getenv("OTEL_EXPORTER_OTLP_HEADERS", "").split(","):
+            key, _, value = pair.partition("=")
+            if key.strip() and value.strip():
+                headers[key.strip()] = value.strip()
+        return cls(
+            endpoint=os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318"),
+            service_name=os.getenv("OTEL_SERVICE_NAME", "wcc-backend"),
+            headers=headers,
+            interval=_env_float("OTEL_BSP_SCHEDULE_DELAY", 5000) / 1000,
+        )
+
+    def export(self, spans: List[Span]):
+        with self._lock:
+            overflow = len(self._queue) + len(spans) - self._queue.maxlen
+            if overflow > 0:
+                self.dropped += overflow
+            self._queue.extend(spans)
+            if self._thread is None and not self._stopped:
+                self._thread = threading.Thread(target=self._run, name="otlp-exporter", daemon=True)
+                self._thread.start()
+
+    def payload(self, spans: List[Span]) -> Dict[str, Any]:
+        """OTLP ExportTraceServiceRequest body"""
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{"scope": {"name": "wcc"}, "spans": [span.to_otlp() for span in spans]}],
+        }]}
+
+    def flush(self):
+        """Send everything queued (on the calling thread)"""
+        while True:
+            with self._lock:
+                batch = [self._queue.popleft() for _ in range(min(self.max_batch, len(self._queue)))]
+            if not batch:
+                return
+            if self._client is None:
+                self._client = httpx.Client(timeout=10.0)
+            try:
+                response = self._client.post(self.url, json=self.payload(batch), headers=self.headers)
+                response.raise_for_status()
+                self.exported += len(batch)
+            except httpx.HTTPError as error:
+                self.errors += 1
+                print(f"Trace export failed ({len(batch)} spans): {error.__class__.__name__}")
+                return
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def shutdown(self):
+        """Flush remaining spans and stop the background thread"""
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 10)
+        self.flush()
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+class Tracer:
+    """
+    Starts spans and passes finished ones to the exporter.
+
+    Args:
+        exporter: Where finished spans go (None records nothing)
+    """
+
+    def __init__(self, exporter: Optional[Any] = None):
+        self.exporter = exporter
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        """Build the tracer from TRACING_EXPORTER"""
+        kind = os.getenv("TRACING_EXPORTER", "none").strip().lower()
+        if kind == "console":
+            return cls(ConsoleSpanExporter())
+        if kind == "otlp":
+            return cls(OTLPHttpExporter.from_env())
+        if kind not in ("", "none", "off", "false"):
+            print(f"Unknown TRACING_EXPORTER '{kind}'; tracing disabled")
+        return cls()
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def span(self, name: str, **attributes: Any):
+        """
+        Start a child of the current span (a new trace if there is none).
+
+        Returns the no-op span when tracing is disabled.
+        """
+        if self.exporter is None:
+            return NOOP_SPAN
+        parent = _current_span.get()
+        if parent is None:
+            return Span(self, name, secrets.token_hex(16), attributes=attributes)
+        return Span(self, name, parent.trace_id, parent.span_id, attributes=attributes)
+
+    def request_span(self, name: str, traceparent: Optional[str] = None, **attributes: Any) -> Span:
+        """
+        Start a request's root span, joining the caller's trace when a valid
+        traceparent header is given. Always a real span, so requests have a
+        trace id for headers and logs even when nothing is exported.
+        """
+        parent = parse_traceparent(traceparent)
+        trace_id, parent_span_id = parent if parent else (secrets.token_hex(16), None)
+        return Span(self, name, trace_id, parent_span_id, kind=KIND_SERVER, attributes=attributes)
+
+    def _finished(self, span: Span):
+        exporter = self.exporter
+        if exporter is not None:
+            try:
+                exporter.export([span])
+            except Exception as error:
+                print(f"Span export failed: {error}")
+
+    def shutdown(self):
+        if self.exporter is not None:
+            self.exporter.shutdown()
+
+
+def current_span() -> Optional[Span]:
+    """The innermost active span, if any"""
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    """Trace id of the active request or span, if any"""
+    span = _current_span.get()
+    return span.trace_id if span is not None else None
+
+
+def traced(name: str) -> Callable:
+    """Decorator running a function (sync or async) inside a span"""
+    def decorator(fn: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with get_tracer().span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with get_tracer().span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    """Get or create the shared tracer"""
+    global _tracer
+
+    if _tracer is None:
+        _tracer = Tracer.from_env()
+
+    return _tracer
+
+
+def close_tracer():
+    """Flush and stop the shared tracer's exporter"""
+    global _tracer
+
+    tracer, _tracer = _tracer, None
+    if tracer is not None:
+        tracer.shutdown()
@@ -0,0 +1,41 @@
+"""
+URL Utilities
+
+Canonical URL forms used for cache keys and crawl deduplication.
+"""
+
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL so equivalent spellings compare equal.
+
+    Lowercases the scheme and host, drops default ports and the fragment,
+    sorts query parameters and uses "/" for an empty path. The path itself
+    is left as-is since servers may treat it case-sensitively.
+
+    Args:
+        url: Absolute http(s) URL
+
+    Returns:
+        Normalized URL string
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    hostname = (parts.hostname or "").lower().rstrip(".")
+
+    netloc = hostname
+    if ":" in hostname:
+        netloc = f"[{hostname}]"  # IPv6 literal
+    if parts.port is not None and parts.port != _DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{parts.port}"
+    if parts.username:
+        userinfo = parts.username + (f":{parts.password}" if parts.password else "")
+        netloc = f"{userinfo}@{netloc}"
+
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
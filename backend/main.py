@@ -7,6 +7,7 @@ It replaces the Node.js Express server with FastAPI.
 
 import os
 import sys
+import time
 import asyncio
 
 # Fix Windows asyncio subprocess support for Playwright
@@ -26,8 +27,17 @@ from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 import uvicorn
 
-from app.routes import compliance
-from app.utils.playwright_helper import close_browser
+from app.routes import compliance, crawls, jobs, metrics
+from app.services.compliance_checks import close_check_executor
+from app.services.crawler import close_crawl_manager
+from app.services.job_queue import get_job_manager
+from app.services.llm_providers import close_http_client, close_llm_provider
+from app.utils.playwright_helper import close_browser, start_browser_pool
+from app.utils.static_analyzer import close_fetch_client
+from app.utils.egress_proxy import close_egress_proxy
+from app.utils.logger import log_request
+from app.utils.metrics import HTTP_REQUEST
+from app.utils.tracing import close_tracer, get_tracer
 
 # Load environment variables
 load_dotenv()
@@ -40,10 +50,19 @@ async def lifespan(app: FastAPI):
     """Lifecycle manager for startup and shutdown"""
     # Startup
     print("Starting Web Compliance Checker Backend (Python/FastAPI)...")
+    await start_browser_pool()
     yield
     # Shutdown
     print("Shutting down...")
+    await get_job_manager().close()
+    await close_crawl_manager()
+    await close_llm_provider()
+    await close_http_client()
+    await close_fetch_client()
     await close_browser()
+    await close_egress_proxy()
+    close_check_executor()
+    close_tracer()
 
 # Create FastAPI app
 app = FastAPI(
@@ -69,6 +88,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "OPTIONS"],
     allow_headers=["Content-Type", "Authorization"],
+    expose_headers=["X-Trace-Id"],
 )
 
 # Security headers middleware (FastAPI doesn't need Helmet, but we add headers manually)
@@ -82,8 +102,37 @@ async def add_security_headers(request: Request, call_next):
     response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
     return response
 
+# Request timing and tracing (registered last, so it runs outermost)
+@app.middleware("http")
+async def record_request(request: Request, call_next):
+    """Time and trace each request, returning its trace id in X-Trace-Id"""
+    started = time.perf_counter()
+    status = 500
+    with get_tracer().request_span(
+        f"{request.method} {request.url.path}",
+        traceparent=request.headers.get("traceparent"),
+        method=request.method,
+    ) as span:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            response.headers["X-Trace-Id"] = span.trace_id
+            return response
+        finally:
+            elapsed = time.perf_counter() - started
+            # Label by route template so /api/jobs/{job_id} stays one series
+            route = getattr(request.scope.get("route"), "path", "unmatched")
+            span.name = f"{request.method} {route}"
+            span.set_attribute("route", route)
+            span.set_attribute("status", status)
+            HTTP_REQUEST.observe(elapsed, method=request.method, route=route, status=str(status))
+            log_request(request.method, request.url.path, status, elapsed * 1000)
+
 # Include routers
 app.include_router(compliance.router, prefix="/api", tags=["compliance"])
+app.include_router(jobs.router, prefix="/api", tags=["jobs"])
+app.include_router(crawls.router, prefix="/api", tags=["crawls"])
+app.include_router(metrics.router, tags=["metrics"])
 
 # Health check endpoint
 @app.get("/health")
@@ -0,0 +1,233 @@
+"""
+AI Recommender Tests for Web Compliance Checker
+
+The model call is replaced by a fake, so no API token is needed.
+Run with: pytest tests/test_ai_recommender.py -v
+"""
+
+import pytest
+import asyncio
+import json
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import ai_recommender
+from app.services.recommendation_cache import RecommendationCache, check_fingerprint
+from app.services.ai_recommender import (
+    build_batch_prompt,
+    generate_recommendations,
+    generate_template_recommendation,
+    iter_recommendations,
+    parse_batch_response,
+)
+from tests.test_llm_providers import flaky_app, provider_for
+
+CHECKS = [
+    {"name": "Meaningful Reading Sequence", "passed": False, "details": "No h1 heading found."},
+    {"name": "Color Usage", "passed": False, "details": "Color-only links found."},
+    {"name": "Keyboard Accessibility", "passed": False, "details": "Negative tabindex found."},
+]
+
+
+class FakeProvider:
+    name = "fake"
+    model = "fake-1"
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    """Enable the AI path with a fake model; tracks calls and concurrency."""
+    state = {"calls": 0, "active": 0, "peak": 0, "delay": 0.01, "reply": None}
+
+    async def call_model(prompt, max_tokens=200, timeout=30.0):
+        state["calls"] += 1
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        try:
+            delay = state["delay"](prompt) if callable(state["delay"]) else state["delay"]
+            await asyncio.sleep(delay)
+            if state["reply"] is not None:
+                return state["reply"]
+            return f"AI advice for this issue: {prompt.splitlines()[4][:60]}"
+        finally:
+            state["active"] -= 1
+
+    monkeypatch.setattr(ai_recommender, "get_llm_provider", lambda: FakeProvider())
+    monkeypatch.setattr(ai_recommender, "_call_model", call_model)
+    monkeypatch.setattr(ai_recommender, "RECOMMENDATION_MODE", "parallel")
+    monkeypatch.setattr(ai_recommender, "RECOMMENDATION_CONCURRENCY", 2)
+    state["cache"] = RecommendationCache(":memory:")
+    monkeypatch.setattr(ai_recommender, "get_recommendation_cache", lambda: state["cache"])
+    return state
+
+
+class TestParallelRecommendations:
+    """Tests for concurrent per-check model calls."""
+
+    @pytest.mark.asyncio
+    async def test_calls_run_concurrently_in_order(self, fake_model):
+        """Test calls overlap up to the limit and results keep check order."""
+        recommendations = await generate_recommendations(CHECKS, "https://example.com")
+        assert fake_model["calls"] == 3
+        assert fake_model["peak"] == 2
+        assert [r["checkName"] for r in recommendations] == [c["name"] for c in CHECKS]
+        assert all(r["recommendation"].startswith("AI advice") for r in recommendations)
+
+    @pytest.mark.asyncio
+    async def test_budget_keeps_finished_answers(self, fake_model):
+        """Test slow calls fall back to templates without losing fast ones."""
+        fake_model["delay"] = lambda prompt: 1.0 if "Color Usage" in prompt else 0.0
+        recommendations = await generate_recommendations(CHECKS, "https://example.com", timeout=0.1)
+        by_name = {r["checkName"]: r["recommendation"] for r in recommendations}
+        assert by_name["Meaningful Reading Sequence"].startswith("AI advice")
+        assert by_name["Color Usage"] == generate_template_recommendation(CHECKS[1])
+
+    @pytest.mark.asyncio
+    async def test_streamed_in_completion_order(self, fake_model):
+        """Test answers are yielded as calls finish, not in check order."""
+        fake_model["delay"] = lambda prompt: 0.2 if "Reading Sequence" in prompt else 0.0
+        names = [r["checkName"] async for r in iter_recommendations(CHECKS, "https://example.com")]
+        assert names[-1] == "Meaningful Reading Sequence"
+        assert sorted(names) == sorted(c["name"] for c in CHECKS)
+
+    @pytest.mark.asyncio
+    async def test_closing_stream_cancels_calls(self, fake_model):
+        """Test a consumer that stops early leaves no model calls running."""
+        fake_model["delay"] = lambda prompt: 0.0 if "Color Usage" in prompt else 5.0
+        stream = iter_recommendations(CHECKS, "https://example.com")
+        first = await stream.__anext__()
+        assert first["checkName"] == "Color Usage"
+        await stream.aclose()
+        await asyncio.sleep(0)
+        assert fake_model["active"] == 0
+
+    @pytest.mark.asyncio
+    async def test_templates_without_token(self, monkeypatch):
+        """Test template recommendations when no API token is configured."""
+        monkeypatch.setattr(ai_recommender, "get_llm_provider", lambda: None)
+        recommendations = await generate_recommendations(CHECKS, "https://example.com")
+        assert recommendations[0]["recommendation"] == generate_template_recommendation(CHECKS[0])
+
+
+class TestBatchedRecommendations:
+    """Tests for the single batched prompt."""
+
+    def test_prompt_lists_every_check(self):
+        """Test the batched prompt numbers each check and asks for JSON."""
+        prompt = build_batch_prompt(CHECKS, "https://example.com/<script>")
+        assert "1. Check Name: Meaningful Reading Sequence" in prompt
+        assert "3. Check Name: Keyboard Accessibility" in prompt
+        assert "JSON" in prompt and "<script>" not in prompt
+
+    def test_parse_response(self):
+        """Test JSON is found inside chatter and bad entries are dropped."""
+        text = 'Sure! {"1": "Add a single h1 for the page title.", "3": "ok"} Hope this helps.'
+        answers = parse_batch_response(text, CHECKS)
+        assert answers == ["Add a single h1 for the page title.", None, None]
+        assert parse_batch_response("not json", CHECKS) == [None, None, None]
+
+    @pytest.mark.asyncio
+    async def test_one_call_for_all_checks(self, fake_model, monkeypatch):
+        """Test batched mode makes one call and fills gaps with templates."""
+        monkeypatch.setattr(ai_recommender, "RECOMMENDATION_MODE", "batched")
+        fake_model["reply"] = json.dumps({
+            "1": "Add a single h1 that names the page.",
+            "2": "Underline links so they don't rely on color alone.",
+        })
+        recommendations = await generate_recommendations(CHECKS, "https://example.com")
+        assert fake_model["calls"] == 1
+        assert recommendations[1]["recommendation"].startswith("Underline links")
+        assert recommendations[2]["recommendation"] == generate_template_recommendation(CHECKS[2])
+
+
+class TestRecommendationCache:
+    """Tests for the persistent recommendation cache."""
+
+    def test_fingerprint_ignores_counts(self):
+        """Test failures differing only in counts share a fingerprint."""
+        a = {"name": "Color Usage", "details": "Found 3 image(s) without alt text."}
+        b = {"name": "Color Usage", "details": "Found  12 image(s) without alt text."}
+        assert check_fingerprint(a) == check_fingerprint(b)
+
+    def test_keys(self):
+        """Test URLs are only part of the key when configured."""
+        shared = RecommendationCache(":memory:")
+        per_url = RecommendationCache(":memory:", include_url=True)
+        check = CHECKS[0]
+        assert shared.make_key(check, "https://a.example", "1") == shared.make_key(check, "https://b.example", "1")
+        assert shared.make_key(check, "https://a.example", "1") != shared.make_key(check, "https://a.example", "2")
+        assert per_url.make_key(check, "https://A.example/", "1") == per_url.make_key(check, "https://a.example", "1")
+        assert per_url.make_key(check, "https://a.example", "1") != per_url.make_key(check, "https://b.example", "1")
+
+    def test_ttl_and_eviction(self, tmp_path):
+        """Test entries expire, persist across instances and evict LRU-first."""
+        now = [1000.0]
+        path = str(tmp_path / "recs.db")
+        cache = RecommendationCache(path, ttl=60, max_entries=2, clock=lambda: now[0])
+
+        def entry(name):
+            return {"checkName": name, "recommendation": f"Fix {name} properly."}
+
+        cache.set_many({"a": entry("a"), "b": entry("b")})
+        now[0] += 1
+        assert cache.get_many(["a"]) == {"a": "Fix a properly."}  # a is now most recent
+        now[0] += 1
+        cache.set_many({"c": entry("c")})
+        assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
+        assert cache.evictions == 1
+        cache.close()
+
+        reopened = RecommendationCache(path, ttl=60, max_entries=2, clock=lambda: now[0])
+        assert reopened.get_many(["c"]) == {"c": "Fix c properly."}
+        now[0] += 61
+        assert reopened.get_many(["c"]) == {}
+        stats = reopened.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        reopened.close()
+
+    @pytest.mark.asyncio
+    async def test_repeat_failures_skip_the_model(self, fake_model):
+        """Test a second request for the same failures makes no model calls."""
+        first = await generate_recommendations(CHECKS, "https://a.example")
+        assert fake_model["calls"] == 3
+        second = await generate_recommendations(CHECKS, "https://b.example")
+        assert fake_model["calls"] == 3
+        assert second == first
+
+    @pytest.mark.asyncio
+    async def test_templates_not_cached(self, fake_model):
+        """Test fallback templates are not stored as AI answers."""
+        fake_model["reply"] = "too short"
+        await generate_recommendations(CHECKS, "https://a.example")
+        await generate_recommendations(CHECKS, "https://a.example")
+        assert fake_model["calls"] == 6
+
+
+class TestProviderHealth:
+    """Tests for how abandoned recommendation calls reach the provider."""
+
+    @pytest.mark.asyncio
+    async def test_closing_early_keeps_circuit_closed(self, monkeypatch):
+        """Test consumers giving up on calls don't count as provider failures."""
+        provider = provider_for(flaky_app([200], delay=1.0))
+        monkeypatch.setattr(ai_recommender, "get_llm_provider", lambda: provider)
+        monkeypatch.setattr(ai_recommender, "get_recommendation_cache", lambda: RecommendationCache(":memory:"))
+        monkeypatch.setattr(ai_recommender, "RECOMMENDATION_MODE", "parallel")
+        monkeypatch.setattr(ai_recommender, "RECOMMENDATION_CONCURRENCY", 3)
+        for _ in range(3):
+            recommendations = iter_recommendations(CHECKS, "https://example.com")
+            task = asyncio.ensure_future(recommendations.__anext__())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await recommendations.aclose()
+        assert provider.calls >= 3
+        assert provider.breaker.state == "closed"
+        assert provider.breaker.failures == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
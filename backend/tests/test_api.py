@@ -55,6 +55,20 @@ class TestComplianceEndpoint:
         response = client.post("/api/check", json={"url": "not-a-url"})
         assert response.status_code == 400
     
+    def test_unknown_check_id_rejected(self, client):
+        """Test selecting a check that is not registered is rejected."""
+        response = client.post("/api/check", json={"url": "https://example.com", "checks": ["no-such-check"]})
+        assert response.status_code == 400
+        assert "no-such-check" in response.json()["detail"]
+    
+    def test_list_checks(self, client):
+        """Test the registry is published with WCAG criteria."""
+        response = client.get("/api/checks")
+        assert response.status_code == 200
+        checks = response.json()["checks"]
+        assert len(checks) == 10
+        assert {"id": "bypass-blocks", "wcag": "2.4.1"}.items() <= checks[-1].items()
+    
     def test_check_localhost_blocked(self, client):
         """Test localhost URLs are blocked."""
         response = client.post("/api/check", json={"url": "http://localhost"})
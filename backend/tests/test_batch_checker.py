@@ -0,0 +1,174 @@
+"""
+Batch Check Tests for Web Compliance Checker
+
+Run with: pytest tests/test_batch_checker.py -v
+"""
+
+import pytest
+import asyncio
+import json
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from main import app
+from app.routes import compliance
+from app.services.batch_checker import HostLimiter, parse_url_list, run_batch
+
+
+def make_check(delay=0.01, fail=()):
+    """Fake per-URL check tracking overall and per-host concurrency."""
+    state = {"active": 0, "peak": 0, "hosts": {}, "hostPeak": {}, "calls": []}
+
+    async def check(url, recommendations):
+        host = url.split("/")[2]
+        state["calls"].append(url)
+        state["active"] += 1
+        state["hosts"][host] = state["hosts"].get(host, 0) + 1
+        state["peak"] = max(state["peak"], state["active"])
+        state["hostPeak"][host] = max(state["hostPeak"].get(host, 0), state["hosts"][host])
+        await asyncio.sleep(delay)
+        state["active"] -= 1
+        state["hosts"][host] -= 1
+        if url in fail:
+            return {"ok": False, "error": "boom"}
+        return {"ok": True, "report": {"url": url}}
+
+    return check, state
+
+
+async def collect(lines):
+    return [line async for line in lines]
+
+
+class TestRunBatch:
+    """Tests for concurrent batch checking."""
+
+    @pytest.mark.asyncio
+    async def test_results_then_summary(self):
+        """Test every URL yields one result line followed by a summary."""
+        check, _ = make_check(fail={"https://b.example/"})
+        urls = ["https://a.example/", "https://b.example/", "https://c.example/"]
+        lines = await collect(run_batch(urls, concurrency=3, host_limiter=HostLimiter(2, 0), check=check))
+
+        results, summary = lines[:-1], lines[-1]
+        assert sorted(line["index"] for line in results) == [0, 1, 2]
+        assert summary["type"] == "summary"
+        assert summary["succeeded"] == 2 and summary["failed"] == 1
+        assert summary["urlsPerSecond"] > 0
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limits(self):
+        """Test global and per-host limits are both enforced."""
+        check, state = make_check()
+        urls = [f"https://a.example/{i}" for i in range(6)] + [f"https://b{i}.example/" for i in range(6)]
+        await collect(run_batch(urls, concurrency=4, host_limiter=HostLimiter(1, 0), check=check))
+
+        assert state["peak"] <= 4
+        assert state["hostPeak"]["a.example"] == 1
+        assert len(state["calls"]) == 12
+
+    @pytest.mark.asyncio
+    async def test_duplicates_checked_once(self):
+        """Test URLs equal after normalization are checked once."""
+        check, state = make_check(delay=0)
+        urls = ["https://Example.com", "https://example.com/", "https://example.com:443/#top"]
+        lines = await collect(run_batch(urls, host_limiter=HostLimiter(2, 0), check=check))
+        assert len(state["calls"]) == 1
+        assert lines[-1]["duplicates"] == 2
+
+    @pytest.mark.asyncio
+    async def test_host_interval_spaces_requests(self):
+        """Test request starts to one host are spaced by the interval."""
+        starts = []
+
+        async def check(url, recommendations):
+            starts.append(asyncio.get_running_loop().time())
+            return {"ok": True, "report": {}}
+
+        urls = [f"https://a.example/{i}" for i in range(3)]
+        await collect(run_batch(urls, concurrency=3, host_limiter=HostLimiter(3, 0.05), check=check))
+        gaps = [b - a for a, b in zip(starts, starts[1:])]
+        assert all(gap >= 0.04 for gap in gaps)
+
+    @pytest.mark.asyncio
+    async def test_host_interval_survives_global_queue(self):
+        """Test same-host URLs queued behind the global limit still start spaced."""
+        starts = []
+
+        async def check(url, recommendations):
+            if "a.example" in url:
+                starts.append(asyncio.get_running_loop().time())
+            else:
+                await asyncio.sleep(0.15)  # hold both global slots
+            return {"ok": True, "report": {}}
+
+        urls = ["https://b.example/", "https://c.example/"] + [f"https://a.example/{i}" for i in range(3)]
+        await collect(run_batch(urls, concurrency=2, host_limiter=HostLimiter(3, 0.05), check=check))
+        gaps = [b - a for a, b in zip(starts, starts[1:])]
+        assert len(starts) == 3
+        assert all(gap >= 0.04 for gap in gaps)
+
+    @pytest.mark.asyncio
+    async def test_consumer_leaving_cancels_work(self):
+        """Test closing the stream early cancels the remaining checks."""
+        check, state = make_check(delay=0.05)
+        urls = [f"https://{i}.example/" for i in range(10)]
+        lines = run_batch(urls, concurrency=2, host_limiter=HostLimiter(2, 0), check=check)
+        await lines.__anext__()
+        await lines.aclose()
+        await asyncio.sleep(0.1)
+        assert len(state["calls"]) < 10
+
+
+class TestUrlList:
+    """Tests for uploaded URL list parsing."""
+
+    def test_lines_and_csv(self):
+        """Test plain lists, CSV first columns, headers and comments."""
+        text = 'url,owner\n# nightly\nhttps://a.example/,team-a\n\n"https://b.example/",team-b\n'
+        assert parse_url_list(text) == ["https://a.example/", "https://b.example/"]
+
+
+class TestBatchEndpoint:
+    """Tests for /api/check/batch."""
+
+    def test_streams_ndjson(self, monkeypatch):
+        """Test JSON and file uploads stream one line per URL plus a summary."""
+        async def fake_check(url, recommendations):
+            return {"ok": True, "report": {"url": url}}
+
+        def fake_run_batch(urls, **kwargs):
+            return run_batch(urls, concurrency=2, host_limiter=HostLimiter(2, 0), check=fake_check)
+
+        monkeypatch.setattr(compliance, "run_batch", fake_run_batch)
+        client = TestClient(app)
+
+        response = client.post("/api/check/batch", json={"urls": ["https://a.example/", "https://b.example/"]})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["type"] for line in lines] == ["result", "result", "summary"]
+
+        response = client.post(
+            "/api/check/batch",
+            files={"file": ("urls.txt", b"https://a.example/\nhttps://b.example/\n", "text/plain")},
+        )
+        assert response.status_code == 200
+        assert json.loads(response.text.splitlines()[-1])["checked"] == 2
+
+    def test_rejects_bad_batches(self, monkeypatch):
+        """Test empty, oversized and malformed batches are refused up front."""
+        monkeypatch.setenv("BATCH_MAX_URLS", "2")
+        client = TestClient(app)
+        assert client.post("/api/check/batch", json={"urls": []}).status_code == 400
+        assert client.post("/api/check/batch", json={"urls": ["https://a.example/"] * 3}).status_code == 413
+        assert client.post("/api/check/batch", content=b"not json").status_code == 400
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
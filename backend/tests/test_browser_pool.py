@@ -0,0 +1,268 @@
+"""
+Browser Pool Tests for Web Compliance Checker
+
+Uses fake slots so no Chromium is needed.
+Run with: pytest tests/test_browser_pool.py -v
+"""
+
+import pytest
+import asyncio
+import threading
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.browser_pool import AsyncBrowserSlot, BrowserPool, PoolTimeoutError, process_tree_rss
+
+
+class FakeSlot:
+    """Stands in for BrowserSlot: a single worker thread and no browser."""
+
+    cancellable = False
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self.started = False
+        self.closed = False
+        self.uses = 0
+
+    def submit(self, fn, *args):
+        return self._executor.submit(fn, *args)
+
+    def start(self):
+        return self.submit(lambda: setattr(self, "started", True))
+
+    def run(self, fn, *args):
+        return asyncio.wrap_future(self.submit(self.run_page, fn, *args))
+
+    def run_page(self, fn, *args):
+        self.uses += 1
+        return fn("page", *args)
+
+    def close(self):
+        self.closed = True
+        future = self.submit(lambda: None)
+        self._executor.shutdown(wait=False)
+        return future
+
+
+class TestBrowserPool:
+    """Tests for slot checkout and sizing."""
+
+    @pytest.mark.asyncio
+    async def test_start_prelaunches_min_size(self):
+        """Test start() warms min_size slots."""
+        pool = BrowserPool(min_size=2, max_size=4, slot_factory=FakeSlot)
+        await pool.start()
+        stats = pool.stats()
+        assert stats["size"] == 2
+        assert stats["idle"] == 2
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_grows_up_to_max_size(self):
+        """Test the pool creates slots on demand but never beyond max_size."""
+        pool = BrowserPool(min_size=0, max_size=2, checkout_timeout=0.05, slot_factory=FakeSlot)
+        first = await pool.acquire()
+        second = await pool.acquire()
+        assert first is not second
+        with pytest.raises(PoolTimeoutError):
+            await pool.acquire()
+        assert pool.stats()["waiting"] == 0
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_release_hands_off_in_fifo_order(self):
+        """Test waiters are served in arrival order."""
+        pool = BrowserPool(min_size=0, max_size=1, checkout_timeout=1, slot_factory=FakeSlot)
+        slot = await pool.acquire()
+        order = []
+
+        async def waiter(name):
+            got = await pool.acquire()
+            order.append(name)
+            pool.release(got)
+
+        tasks = [asyncio.create_task(waiter(i)) for i in range(3)]
+        await asyncio.sleep(0.01)
+        assert pool.stats()["waiting"] == 3
+        pool.release(slot)
+        await asyncio.gather(*tasks)
+        assert order == [0, 1, 2]
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_run_executes_on_slot_thread(self):
+        """Test run() passes a page and returns the slot afterwards."""
+        pool = BrowserPool(min_size=0, max_size=1, slot_factory=FakeSlot)
+        caller = threading.get_ident()
+        result = await pool.run(lambda page, x: (page, x, threading.get_ident()), 7)
+        assert result[:2] == ("page", 7)
+        assert result[2] != caller
+        assert pool.stats()["idle"] == 1
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_concurrency_scales_with_pool_size(self):
+        """Test max_size analyses run at the same time."""
+        pool = BrowserPool(min_size=0, max_size=4, slot_factory=FakeSlot)
+        barrier = threading.Barrier(4, timeout=2)
+
+        def work(page):
+            barrier.wait()
+            return True
+
+        results = await asyncio.gather(*(pool.run(work) for _ in range(4)))
+        assert all(results)
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_run_releases_after_work_finishes(self):
+        """Test a cancelled caller doesn't hand out a still-busy slot."""
+        pool = BrowserPool(min_size=0, max_size=1, slot_factory=FakeSlot)
+        gate = threading.Event()
+        task = asyncio.create_task(pool.run(lambda page: gate.wait(2)))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.sleep(0.01)
+        assert pool.stats()["inUse"] == 1
+        gate.set()
+        slot = await pool.acquire(timeout=1)
+        assert slot is not None
+        pool.release(slot)
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_close_discards_busy_slots_on_release(self):
+        """Test slots returned after close() are shut down."""
+        pool = BrowserPool(min_size=0, max_size=1, slot_factory=FakeSlot)
+        slot = await pool.acquire()
+        await pool.close()
+        pool.release(slot)
+        assert slot.closed
+        assert pool.stats()["size"] == 0
+        with pytest.raises(RuntimeError):
+            await pool.acquire()
+
+
+class FakeAsyncSlot:
+    """Stands in for AsyncBrowserSlot: coroutines on the loop."""
+
+    cancellable = True
+
+    def __init__(self):
+        self.closed = False
+
+    def start(self):
+        return asyncio.ensure_future(asyncio.sleep(0))
+
+    def run(self, fn, *args):
+        return asyncio.ensure_future(fn("page", *args))
+
+    def close(self):
+        self.closed = True
+        return asyncio.ensure_future(asyncio.sleep(0))
+
+
+class TestAsyncSlots:
+    """Tests for pools of event-loop slots."""
+
+    @pytest.mark.asyncio
+    async def test_many_pages_share_one_loop(self):
+        """Test async slots run analyses concurrently without threads."""
+        pool = BrowserPool(min_size=0, max_size=8, slot_factory=FakeAsyncSlot)
+        running = 0
+        peak = 0
+
+        async def work(page):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return threading.get_ident()
+
+        idents = await asyncio.gather(*(pool.run(work) for _ in range(8)))
+        assert peak == 8
+        assert set(idents) == {threading.get_ident()}
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_cancel_propagates_to_page_work(self):
+        """Test cancelling the caller cancels async page work and frees the slot."""
+        pool = BrowserPool(min_size=0, max_size=1, slot_factory=FakeAsyncSlot)
+        cancelled = asyncio.Event()
+
+        async def work(page):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        task = asyncio.create_task(pool.run(work))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        slot = await pool.acquire(timeout=1)
+        pool.release(slot)
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_rss_sampled_off_the_loop(self):
+        """Test recycling reads /proc on a worker thread and relaunches past the limit."""
+        class FakeBrowser:
+            closed = False
+
+            def is_connected(self):
+                return True
+
+            async def close(self):
+                self.closed = True
+
+        class FakeContext:
+            async def clear_cookies(self):
+                pass
+
+            async def close(self):
+                pass
+
+        slot = AsyncBrowserSlot(driver=None, max_rss_mb=1)
+        browser = slot._browser = FakeBrowser()
+        slot._context = FakeContext()
+        sampled_on = []
+
+        def rss_bytes():
+            sampled_on.append(threading.get_ident())
+            return 2 * 1024 * 1024
+
+        slot.rss_bytes = rss_bytes
+        await slot._recycle_if_needed()
+        assert sampled_on and threading.get_ident() not in sampled_on
+        assert browser.closed and slot._browser is None
+
+
+class TestProcessTreeRSS:
+    """Tests for Chromium memory accounting."""
+
+    def test_sums_marked_process_and_descendants(self):
+        """Test RSS is summed over the marked process tree only."""
+        table = {
+            1: {"ppid": 0, "rss": 100, "cmdline": "python"},
+            10: {"ppid": 1, "rss": 1000, "cmdline": "chrome --wcc-browser-slot=1-1-1"},
+            11: {"ppid": 10, "rss": 200, "cmdline": "chrome --type=renderer"},
+            12: {"ppid": 11, "rss": 30, "cmdline": "chrome --type=utility"},
+            20: {"ppid": 1, "rss": 5000, "cmdline": "chrome --wcc-browser-slot=1-2-1"},
+        }
+        assert process_tree_rss("--wcc-browser-slot=1-1-1", table) == 1230
+
+    def test_missing_process(self):
+        """Test an unknown marker yields None."""
+        assert process_tree_rss("--wcc-browser-slot=nope", {}) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
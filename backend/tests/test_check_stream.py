@@ -0,0 +1,122 @@
+"""
+Streamed Check Tests for Web Compliance Checker
+
+The browser analysis and the model are replaced by fakes.
+Run with: pytest tests/test_check_stream.py -v
+"""
+
+import pytest
+import asyncio
+import json
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import check_pipeline
+from app.services.check_pipeline import stream_check
+from app.services.result_cache import ResultCache
+from app.routes import compliance
+from app.routes.compliance import check_event_stream
+
+
+RESULTS = {
+    "checks": [
+        {"name": "Meaningful Reading Sequence", "passed": True, "details": "Headings are in order."},
+        {"name": "Color Usage", "passed": False, "details": "Color-only links found."},
+        {"name": "Keyboard Accessibility", "passed": False, "details": "Negative tabindex found."},
+    ],
+    "score": "1/3",
+    "passedCount": 1,
+    "totalCount": 3,
+}
+
+
+@pytest.fixture
+def fake_pipeline(monkeypatch):
+    """Fake analysis and recommender; recommendations wait on a gate."""
+    state = {"analyses": 0, "gate": asyncio.Event()}
+
+    async def run_compliance_checks(url, checks=None, on_progress=None, engine=None, incremental=False):
+        state["analyses"] += 1
+        return RESULTS
+
+    async def iter_recommendations(failed_checks, page_url, timeout=None):
+        for check in reversed(failed_checks):
+            await state["gate"].wait()
+            yield {"checkName": check["name"], "recommendation": f"Fix {check['name']} now, please."}
+
+    monkeypatch.setattr(check_pipeline, "run_compliance_checks", run_compliance_checks)
+    monkeypatch.setattr(check_pipeline, "iter_recommendations", iter_recommendations)
+    return state
+
+
+def parse_sse(body):
+    """Split an SSE body into (event, data) pairs."""
+    events = []
+    for message in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in message.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+class TestStreamCheck:
+    """Tests for the staged check pipeline."""
+
+    @pytest.mark.asyncio
+    async def test_checks_sent_before_recommendations(self, fake_pipeline):
+        """Test the score is available while recommendations are pending."""
+        stream = stream_check("https://example.com/", cache=ResultCache(ttl=60))
+        event, report = await stream.__anext__()
+        assert event == "checks"
+        assert report["score"] == "1/3"
+        assert all(check["recommendation"] is None for check in report["checks"])
+
+        fake_pipeline["gate"].set()
+        rest = [item async for item in stream]
+        assert [event for event, _ in rest] == ["recommendation", "recommendation", "done"]
+        assert rest[0][1]["checkName"] == "Keyboard Accessibility"
+        done = rest[-1][1]
+        assert done["checks"][1]["recommendation"] == "Fix Color Usage now, please."
+        assert done["checks"][0]["recommendation"] is None
+
+    @pytest.mark.asyncio
+    async def test_finished_report_cached(self, fake_pipeline):
+        """Test a repeat stream is served whole from the cache."""
+        fake_pipeline["gate"].set()
+        cache = ResultCache(ttl=60)
+        first = [item async for item in stream_check("https://example.com/", cache=cache)]
+        second = [item async for item in stream_check("https://EXAMPLE.com", cache=cache)]
+        assert fake_pipeline["analyses"] == 1
+        assert [event for event, _ in second] == ["checks", "done"]
+        assert second[0][1]["checks"] == first[-1][1]["checks"]
+        assert second[0][1]["url"] == "https://EXAMPLE.com"
+
+
+class TestCheckEventStream:
+    """Tests for the SSE encoding of a streamed check."""
+
+    @pytest.mark.asyncio
+    async def test_events_numbered(self, fake_pipeline, monkeypatch):
+        """Test every stage becomes a numbered SSE event."""
+        monkeypatch.setattr(check_pipeline, "get_result_cache", lambda: ResultCache(ttl=60))
+        fake_pipeline["gate"].set()
+        body = "".join([chunk async for chunk in check_event_stream("https://example.com/")])
+        assert [event for event, _ in parse_sse(body)] == ["checks", "recommendation", "recommendation", "done"]
+        assert body.startswith("id: 1\n")
+
+    @pytest.mark.asyncio
+    async def test_timeout_becomes_error_event(self, monkeypatch):
+        """Test an analysis failure ends the stream with an error event."""
+        async def stream_check(url_string, read_cache=True, write_cache=True, checks=None, engine=None, incremental=False):
+            raise asyncio.TimeoutError()
+            yield
+
+        monkeypatch.setattr(compliance, "stream_check", stream_check)
+        body = "".join([chunk async for chunk in check_event_stream("https://example.com/")])
+        assert parse_sse(body) == [("error", {"error": "Request timeout - analysis took too long"})]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,380 @@
+"""
+Compliance Check Tests for Web Compliance Checker
+
+Runs the checks against canned page data, so no browser is needed.
+Run with: pytest tests/test_compliance_checks.py -v
+"""
+
+import pytest
+import time
+import sys
+import os
+import zlib
+import struct
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import compliance_checks
+from app.utils import contrast, flash_detector
+from app.utils.contrast import analyze_contrast, contrast_ratio
+from app.utils.flash_detector import FlashDetector, decode_png
+from app.services.compliance_checks import (
+    COMPLIANCE_CHECKS,
+    COST_CPU,
+    check_color_usage,
+    check_keyboard_traps,
+    check_pointer_cancellation,
+    check_reading_sequence,
+    check_seizure_triggering_content,
+    check_skip_links,
+    evaluate_checks,
+    required_fields,
+    ruleset_version,
+    run_compliance_checks,
+    select_checks,
+)
+
+PAGE_DATA = {
+    "headings": [{"level": 1, "text": "Title", "id": None}, {"level": 2, "text": "Section", "id": None}],
+    "interactiveElements": [],
+    "images": [{"src": "a.png", "alt": "A", "title": None, "hasAlt": True}],
+    "formInputs": [],
+    "links": [{"href": "#main", "text": "Skip to content", "ariaLabel": None, "isSkipLink": True}],
+    "hasLandmarks": True,
+    "hasTimers": False,
+    "hasAutoAdvance": False,
+    "animations": 0,
+}
+
+
+@pytest.fixture
+def fake_analyzer(monkeypatch):
+    """Replace the browser with canned page data and record requested fields."""
+    requested = {}
+    monkeypatch.setenv("ANALYSIS_ENGINE", "browser")
+
+    async def analyze(url, fields=None, on_progress=None):
+        requested["fields"] = set(fields) if fields is not None else None
+        return {"pageData": PAGE_DATA, "url": url}
+
+    monkeypatch.setattr(compliance_checks, "analyze_webpage", analyze)
+    return requested
+
+
+class TestFieldDeclarations:
+    """Tests for demand-driven page data collection."""
+
+    def test_every_check_declares_fields(self):
+        """Test each registered check states what it reads."""
+        for check in COMPLIANCE_CHECKS:
+            assert hasattr(check, "page_data_fields"), check.__name__
+
+    def test_heavy_fields_never_requested(self):
+        """Test no check pulls the HTML, accessibility tree or CSS dump."""
+        fields = required_fields(COMPLIANCE_CHECKS)
+        assert not fields & {"html", "accessibilityTree", "styles", "bodyText"}
+
+    @pytest.mark.asyncio
+    async def test_only_enabled_fields_extracted(self, fake_analyzer):
+        """Test the extractor is asked for the enabled checks' fields only."""
+        await run_compliance_checks("https://example.com", checks=[check_reading_sequence, check_skip_links])
+        assert fake_analyzer["fields"] == {"headings", "links", "hasLandmarks"}
+
+
+class TestCheckRegistry:
+    """Tests for check registration and selection."""
+
+    def test_checks_carry_metadata(self):
+        """Test every check has an id, WCAG criterion, cost and version."""
+        ids = [check.check_id for check in COMPLIANCE_CHECKS]
+        assert len(set(ids)) == len(ids) == 10
+        for check in COMPLIANCE_CHECKS:
+            assert check.wcag and check.cost and check.version, check.check_id
+
+    def test_select_keeps_report_order(self):
+        """Test selected checks come back in registry order."""
+        assert select_checks(["bypass-blocks", "reading-sequence"]) == [check_reading_sequence, check_skip_links]
+        with pytest.raises(ValueError):
+            select_checks(["reading-sequence", "made-up"])
+        with pytest.raises(ValueError):
+            select_checks([])
+
+    def test_ruleset_version_tracks_selection(self):
+        """Test cached results are keyed by which checks ran."""
+        assert ruleset_version() == ruleset_version(COMPLIANCE_CHECKS)
+        assert ruleset_version() != ruleset_version([check_reading_sequence])
+
+
+class TestRunComplianceChecks:
+    """Tests for the check runner."""
+
+    @pytest.mark.asyncio
+    async def test_all_checks_run(self, fake_analyzer):
+        """Test the default run covers all 10 checks."""
+        results = await run_compliance_checks("https://example.com")
+        assert results["totalCount"] == 10
+        assert results["passedCount"] == 10
+        assert results["score"] == "10/10"
+
+    @pytest.mark.asyncio
+    async def test_score_follows_selected_checks(self, fake_analyzer):
+        """Test the score is computed over the checks that ran."""
+        results = await run_compliance_checks("https://example.com", checks=[check_reading_sequence])
+        assert results["score"] == "1/1"
+        assert results["totalCount"] == 1
+
+    @pytest.mark.asyncio
+    async def test_results_timed_and_tagged(self, fake_analyzer):
+        """Test each result records its id, criterion and run time."""
+        results = await run_compliance_checks("https://example.com", checks=[check_skip_links])
+        check = results["checks"][0]
+        assert check["id"] == "bypass-blocks"
+        assert check["wcag"] == "2.4.1"
+        assert check["durationMs"] >= 0
+
+    @pytest.mark.asyncio
+    async def test_cpu_checks_run_concurrently(self, monkeypatch):
+        """Test CPU-heavy checks share the thread pool and keep their order."""
+        monkeypatch.setattr(compliance_checks, "CHECK_WORKERS", 2)
+        monkeypatch.setattr(compliance_checks, "_check_executor", None)
+
+        def slow(page_data):
+            time.sleep(0.2)
+            return {"name": "Slow", "passed": True, "details": ""}
+
+        slow.cost = COST_CPU
+        started = time.perf_counter()
+        results = await evaluate_checks(PAGE_DATA, [slow, check_reading_sequence, slow])
+        assert time.perf_counter() - started < 0.35
+        assert [c["name"] for c in results["checks"]] == ["Slow", "Meaningful Reading Sequence", "Slow"]
+        assert results["checks"][0]["durationMs"] >= 200
+        compliance_checks.close_check_executor()
+
+
+
+class TestKeyboardTrapCheck:
+    """Tests for interpreting the keyboard traversal."""
+
+    def test_trap_fails(self):
+        """Test a detected cycle fails the check and names its elements."""
+        traversal = {"steps": 9, "reachedEnd": False, "budgetExhausted": False,
+                     "trap": {"cycle": ["button#next", "button#prev"], "inDialog": True}}
+        result = check_keyboard_traps({"keyboardTraversal": traversal})
+        assert not result["passed"]
+        assert "button#next" in result["details"] and "Escape" in result["details"]
+
+    def test_budget_reported(self):
+        """Test a traversal cut short by its budget passes but says so."""
+        traversal = {"steps": 60, "reachedEnd": False, "budgetExhausted": True, "trap": None}
+        result = check_keyboard_traps({"keyboardTraversal": traversal})
+        assert result["passed"]
+        assert "first 60 Tab stops" in result["details"]
+
+
+class TestPointerCancellationCheck:
+    """Tests for interpreting the pointer listener inspection."""
+
+    def test_down_only_handlers_fail(self):
+        """Test down-only handlers fail the check and are named."""
+        listeners = {"elements": 4, "downOnly": 2, "examples": ["div.slider", "button#buy"], "roundTrips": 5}
+        result = check_pointer_cancellation({"pointerListeners": listeners})
+        assert not result["passed"]
+        assert "div.slider, button#buy" in result["details"]
+
+    def test_matched_handlers_pass(self):
+        """Test matched handlers pass and a failed inspection passes with a note."""
+        listeners = {"elements": 4, "downOnly": 0, "examples": [], "roundTrips": 3}
+        assert check_pointer_cancellation({"pointerListeners": listeners})["passed"]
+        result = check_pointer_cancellation({"pointerListeners": {"error": "Error"}})
+        assert result["passed"] and "could not be inspected" in result["details"]
+
+
+def text_nodes(*nodes):
+    """Columnar textContrast data from (fg_rgba, bg_rgb, size, weight, text) tuples."""
+    data = {"count": len(nodes), "truncated": False, "fg": [], "bg": [],
+            "fontSize": [], "fontWeight": [], "bgImage": [], "text": []}
+    for fg, bg, size, weight, text, *image in nodes:
+        data["fg"].extend(fg)
+        data["bg"].extend(bg)
+        data["fontSize"].append(size)
+        data["fontWeight"].append(weight)
+        data["bgImage"].append(1 if image else 0)
+        data["text"].append(text)
+    return data
+
+
+BLACK, WHITE, GREY = (0, 0, 0, 1), (255, 255, 255), (119, 119, 119, 1)
+
+
+class TestColorContrast:
+    """Tests for the WCAG contrast engine and the Color Usage check."""
+
+    def test_known_ratios(self):
+        """Test reference ratios from the WCAG definition."""
+        assert round(contrast_ratio((0, 0, 0), (255, 255, 255)), 2) == 21.0
+        assert round(contrast_ratio((119, 119, 119), (255, 255, 255)), 2) == 4.48
+        assert contrast_ratio((10, 20, 30), (10, 20, 30)) == 1.0
+
+    def test_large_text_threshold(self):
+        """Test #777 on white fails for body text but passes at 24px or 19px bold."""
+        summary = analyze_contrast(text_nodes(
+            (GREY, WHITE, 16, 400, "body"),
+            (GREY, WHITE, 24, 400, "heading"),
+            (GREY, WHITE, 19, 700, "bold"),
+        ))
+        assert summary["checked"] == 3
+        assert summary["failingAA"] == 1
+        assert summary["failingAAA"] == 3
+        assert summary["worst"] == [{"text": "body", "ratio": 4.48, "required": 4.5}]
+
+    def test_transparent_text_composited(self):
+        """Test semi-transparent black text is blended with its background."""
+        summary = analyze_contrast(text_nodes(((0, 0, 0, 0.3), WHITE, 16, 400, "faint")))
+        assert summary["failingAA"] == 1
+
+    def test_background_images_skipped(self):
+        """Test text over background images is not judged from colors."""
+        summary = analyze_contrast(text_nodes((WHITE + (1,), WHITE, 16, 400, "hero", True)))
+        assert summary["checked"] == 0 and summary["skipped"] == 1
+
+    def test_python_fallback_matches(self, monkeypatch):
+        """Test the pure-Python path agrees with the vectorized one."""
+        data = text_nodes(*[((i, i, i, 1), WHITE, 12 + i % 20, 400 + i % 2 * 300, str(i)) for i in range(0, 255, 3)])
+        expected = analyze_contrast(data)
+        monkeypatch.setattr(contrast, "np", None)
+        assert analyze_contrast(data) == expected
+
+    def test_many_nodes(self):
+        """Test a page-sized input is handled in one pass."""
+        data = text_nodes(*[(BLACK, WHITE, 16, 400, "ok")] * 20000, (GREY, WHITE, 16, 400, "low"))
+        summary = analyze_contrast(data)
+        assert summary["checked"] == 20001
+        assert summary["worst"][0]["text"] == "low"
+
+    def test_check_reports_worst_offender(self):
+        """Test the check fails on AA violations and names the lowest ratio."""
+        result = check_color_usage({"textContrast": text_nodes(
+            (BLACK, WHITE, 16, 400, "fine"),
+            ((200, 200, 200, 1), WHITE, 16, 400, "Light footer text"),
+        )})
+        assert not result["passed"]
+        assert "Light footer text" in result["details"]
+        assert check_color_usage({"textContrast": text_nodes((BLACK, WHITE, 16, 400, "fine"))})["passed"]
+
+
+def png(width, height, pixels, channels=3, filter_type=0):
+    """Encode packed 8-bit pixels as a PNG, every row using filter_type."""
+    stride = width * channels
+    raw, previous = bytearray(), bytes(stride)
+    for y in range(height):
+        row = pixels[y * stride:(y + 1) * stride]
+        out = bytearray()
+        for i in range(stride):
+            left = row[i - channels] if i >= channels else 0
+            upper_left = previous[i - channels] if i >= channels else 0
+            predictor = (0, left, previous[i], (left + previous[i]) >> 1,
+                         flash_detector._paeth(left, previous[i], upper_left))[filter_type]
+            out.append((row[i] - predictor) & 0xFF)
+        raw += bytes([filter_type]) + out
+        previous = row
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2 if channels == 3 else 6, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(bytes(raw))) + chunk(b"IEND", b""))
+
+
+def solid(color, width=24, height=12, patch=None):
+    """RGB frame of one color, optionally with patch=(color, row, col) filling one 6x6 grid cell."""
+    pixels = bytearray(bytes(color) * width * height)
+    if patch:
+        patch_color, row, col = patch
+        cell_w, cell_h = width // 6, height // 6
+        for y in range(row * cell_h, (row + 1) * cell_h):
+            for x in range(col * cell_w, (col + 1) * cell_w):
+                pixels[(y * width + x) * 3:(y * width + x) * 3 + 3] = bytes(patch_color)
+    return bytes(pixels)
+
+
+def play(frames, fps):
+    """Feed frames to a detector at a fixed frame rate and summarize."""
+    detector = FlashDetector()
+    for i, frame in enumerate(frames):
+        detector.add_frame(24, 12, 3, frame, i / fps)
+    return detector.summary()
+
+
+DARK, LIGHT, RED = (0, 0, 0), (255, 255, 255), (255, 0, 0)
+
+
+class TestFlashDetection:
+    """Tests for the streaming flash detector and the Three Flashes check."""
+
+    def test_png_filters_decoded(self):
+        """Test every PNG row filter round-trips."""
+        pixels = bytes((x * 7 + y * 13) % 256 for y in range(5) for x in range(4 * 4))
+        for filter_type in range(5):
+            assert decode_png(png(4, 5, pixels, 4, filter_type)) == (4, 5, 4, pixels)
+
+    def test_fast_flashing_flagged(self):
+        """Test 5 flashes per second over the whole viewport fail."""
+        summary = play([solid(DARK if i % 2 else LIGHT) for i in range(20)], fps=10)
+        assert len(summary["generalFlashRegions"]) == 36
+        assert summary["maxFlashesPerSecond"] >= 4
+        assert summary["frames"] == 20 and summary["fps"] == 10.0
+
+    def test_slow_flashing_allowed(self):
+        """Test 2 flashes per second stay under the limit."""
+        frames = [solid(DARK if (i // 2) % 2 else LIGHT) for i in range(16)]
+        summary = play(frames, fps=8)
+        assert summary["generalFlashRegions"] == [] and summary["redFlashRegions"] == []
+
+    def test_bright_changes_ignored(self):
+        """Test changes between two light states are not general flashes."""
+        summary = play([solid((240, 240, 240) if i % 2 else LIGHT) for i in range(20)], fps=10)
+        assert summary["generalFlashRegions"] == []
+
+    def test_red_flash_located(self):
+        """Test a saturated red patch flashing in one cell is reported there only."""
+        frames = [solid(DARK, patch=(RED, 2, 3) if i % 2 else None) for i in range(20)]
+        summary = play(frames, fps=10)
+        assert summary["redFlashRegions"] == [{"row": 2, "col": 3}]
+
+    def test_memory_flat(self):
+        """Test a long capture keeps only the fixed-size ring per region."""
+        detector = FlashDetector()
+        for i in range(2000):
+            detector.add_frame(24, 12, 3, solid(DARK if i % 2 else LIGHT), i / 30)
+        assert all(len(times) <= 8 for times in detector._general._times)
+        assert detector.summary()["frames"] == 2000
+
+    def test_python_fallback_matches(self, monkeypatch):
+        """Test the pure-Python reduction agrees with the vectorized one."""
+        frames = [solid((i * 40 % 256, 0, i * 15 % 256), patch=(RED, 1, 1)) for i in range(12)]
+        expected = play(frames, fps=12)
+        monkeypatch.setattr(flash_detector, "np", None)
+        assert play(frames, fps=12) == expected
+
+    def test_check_fails_on_flashes(self):
+        """Test the check fails when the capture found flashing regions."""
+        analysis = {"frames": 20, "durationMs": 1900.0, "fps": 10.0, "maxFlashesPerSecond": 5,
+                    "generalFlashRegions": [{"row": 0, "col": 0}], "redFlashRegions": []}
+        result = check_seizure_triggering_content({"animations": 3, "flashAnalysis": analysis})
+        assert not result["passed"]
+        assert "5 times per second" in result["details"] and "general" in result["details"]
+
+    def test_check_passes_with_caveats(self):
+        """Test clean captures pass, noting a low frame rate, and unmeasured pages say so."""
+        analysis = {"frames": 6, "durationMs": 1500.0, "fps": 3.3, "maxFlashesPerSecond": 0,
+                    "generalFlashRegions": [], "redFlashRegions": []}
+        result = check_seizure_triggering_content({"flashAnalysis": analysis})
+        assert result["passed"] and "may be missed" in result["details"]
+        result = check_seizure_triggering_content({"animations": 4, "flashAnalysis": {"error": "Error"}})
+        assert result["passed"] and "could not be measured" in result["details"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,213 @@
+"""
+Crawler Tests for Web Compliance Checker
+
+Crawls a fake site (a dict of pages and their links), so no browser is needed.
+Run with: pytest tests/test_crawler.py -v
+"""
+
+import pytest
+import asyncio
+import sys
+import os
+
+import httpx
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.crawler import Crawler, CrawlFrontier, same_origin_links, origin_of
+from app.utils.bloom_filter import BloomFilter, VisitedSet
+from app.utils.robots import RobotsRules, fetch_robots
+
+ORIGIN = "https://site.example"
+
+# path -> linked paths
+SITE = {
+    "/": ["/about", "/blog", "https://other.example/", "/files/report.pdf", "mailto:a@b.c"],
+    "/about": ["/", "/team", "/about#contact"],
+    "/blog": ["/blog/1", "/blog/2", "/private/admin"],
+    "/team": [],
+    "/blog/1": ["/blog/2"],
+    "/blog/2": ["/blog/1"],
+    "/private/admin": [],
+}
+
+
+def fake_site(delay=0.0, gate=None):
+    """Page analyzer serving SITE; pageData has headings and links."""
+    visits = []
+
+    async def analyze(url):
+        path = url[len(ORIGIN):] or "/"
+        visits.append(path)
+        if gate is not None:
+            await gate.wait()
+        await asyncio.sleep(delay)
+        if path not in SITE:
+            raise Exception("404")
+        return {
+            "headings": [{"level": 1, "text": path}] if path != "/team" else [],
+            "links": [{"href": ORIGIN + href if href.startswith("/") else href} for href in SITE[path]],
+        }
+
+    analyze.visits = visits
+    return analyze
+
+
+@pytest.fixture
+def frontier(tmp_path):
+    store = CrawlFrontier(str(tmp_path / "crawls.db"))
+    yield store
+    store.close()
+
+
+class TestBloomFilter:
+    """Tests for the visited-set structures."""
+
+    def test_no_false_negatives_and_low_false_positives(self):
+        """Test added items are always found and strangers rarely are."""
+        bloom = BloomFilter(capacity=5000, error_rate=0.01)
+        for i in range(5000):
+            bloom.add(f"https://site.example/{i}")
+        assert all(f"https://site.example/{i}" in bloom for i in range(5000))
+        false_positives = sum(f"https://other.example/{i}" in bloom for i in range(5000))
+        assert false_positives < 5000 * 0.03
+
+    def test_visited_set_spills_to_bloom(self):
+        """Test the exact set is bounded and later URLs still dedupe."""
+        visited = VisitedSet(exact_limit=10, capacity=1000)
+        assert all(visited.add(f"u{i}") for i in range(100))
+        assert not visited.add("u5") and not visited.add("u50")
+        assert len(visited._exact) == 10
+
+
+class TestLinks:
+    """Tests for link discovery."""
+
+    def test_same_origin_links(self):
+        """Test only same-origin pages are kept, normalized and deduped."""
+        links = [{"href": h} for h in (
+            "https://site.example/a#x", "/a", "HTTPS://SITE.EXAMPLE:443/b?z=1&y=2",
+            "https://other.example/", "javascript:void(0)", "#", "/doc.PDF",
+        )]
+        assert same_origin_links(links, "https://site.example/", ORIGIN) == [
+            "https://site.example/a",
+            "https://site.example/b?y=2&z=1",
+        ]
+
+    def test_origin_of(self):
+        """Test origins drop default ports, paths and credentials."""
+        assert origin_of("https://Site.Example:443/x?y") == ORIGIN
+        assert origin_of("http://user@site.example:8080/") == "http://site.example:8080"
+
+
+class TestRobots:
+    """Tests for robots.txt rules."""
+
+    def test_rules(self):
+        """Test disallowed paths, crawl delay and the RFC fallbacks."""
+        rules = RobotsRules("User-agent: *\nDisallow: /private\nCrawl-delay: 2\n")
+        assert rules.allowed(f"{ORIGIN}/blog")
+        assert not rules.allowed(f"{ORIGIN}/private/admin")
+        assert rules.crawl_delay == 2.0
+        assert RobotsRules(allow_all=True).allowed(f"{ORIGIN}/private")
+        assert not RobotsRules(disallow_all=True).allowed(f"{ORIGIN}/")
+
+    @staticmethod
+    def redirecting_client(location):
+        """Client whose /robots.txt redirects to location; records requested URLs."""
+        requested = []
+
+        def handler(request):
+            requested.append(str(request.url))
+            if request.url.path == "/robots.txt" and request.url.host == "93.184.216.34":
+                return httpx.Response(302, headers={"Location": location})
+            return httpx.Response(200, text="User-agent: *\nDisallow: /private\n")
+
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler)), requested
+
+    @pytest.mark.asyncio
+    async def test_redirect_to_private_address_blocked(self):
+        """Test a robots.txt redirect to an internal address is never followed."""
+        client, requested = self.redirecting_client("http://169.254.169.254/latest/meta-data")
+        async with client:
+            rules = await fetch_robots("https://93.184.216.34", client=client)
+        assert requested == ["https://93.184.216.34/robots.txt"]
+        assert not rules.allowed("https://93.184.216.34/")
+
+    @pytest.mark.asyncio
+    async def test_redirect_to_public_address_followed(self):
+        """Test validated redirects are followed to the rules."""
+        client, requested = self.redirecting_client("https://93.184.216.35/robots.txt")
+        async with client:
+            rules = await fetch_robots("https://93.184.216.34", client=client)
+        assert requested[-1] == "https://93.184.216.35/robots.txt"
+        assert not rules.allowed("https://93.184.216.34/private/x")
+        assert rules.allowed("https://93.184.216.34/blog")
+
+
+class TestCrawler:
+    """Tests for crawling, limits and resuming."""
+
+    @pytest.mark.asyncio
+    async def test_crawls_site(self, frontier):
+        """Test every reachable same-origin page is checked once."""
+        crawl_id = frontier.create_crawl(ORIGIN + "/", max_depth=5, max_pages=100)
+        analyze = fake_site()
+        robots = RobotsRules("User-agent: *\nDisallow: /private\n")
+        summary = await Crawler(frontier, crawl_id, concurrency=3, interval=0, analyze=analyze, robots=robots).run()
+
+        assert sorted(analyze.visits) == sorted(["/", "/about", "/blog", "/team", "/blog/1", "/blog/2"])
+        assert summary["pages"]["checked"] == 6
+        assert summary["pages"]["skipped"] == 1  # robots.txt
+        assert {"name": "Meaningful Reading Sequence", "pages": 1} in summary["checkFailures"]
+        assert summary["worstPages"][0]["url"] == ORIGIN + "/team"
+        assert frontier.get_crawl(crawl_id)["status"] == "done"
+
+    @pytest.mark.asyncio
+    async def test_depth_and_page_limits(self, frontier):
+        """Test max_depth and max_pages bound the crawl."""
+        crawl_id = frontier.create_crawl(ORIGIN, max_depth=1, max_pages=100)
+        analyze = fake_site()
+        await Crawler(frontier, crawl_id, interval=0, analyze=analyze, robots=RobotsRules(allow_all=True)).run()
+        assert sorted(analyze.visits) == ["/", "/about", "/blog"]
+
+        crawl_id = frontier.create_crawl(ORIGIN, max_depth=5, max_pages=2)
+        analyze = fake_site()
+        await Crawler(frontier, crawl_id, interval=0, analyze=analyze, robots=RobotsRules(allow_all=True)).run()
+        assert len(analyze.visits) == 2
+
+    @pytest.mark.asyncio
+    async def test_resume_after_interruption(self, frontier):
+        """Test a cancelled crawl resumes without rechecking finished pages."""
+        crawl_id = frontier.create_crawl(ORIGIN, max_depth=5, max_pages=100)
+        robots = RobotsRules(allow_all=True)
+
+        gate = asyncio.Event()
+        first = fake_site(gate=gate)
+        task = asyncio.create_task(Crawler(frontier, crawl_id, concurrency=1, interval=0, analyze=first, robots=robots).run())
+        gate.set()
+        while frontier.summary(crawl_id)["pages"]["checked"] < 2:
+            await asyncio.sleep(0.001)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert frontier.get_crawl(crawl_id)["status"] == "paused"
+
+        second = fake_site()
+        summary = await Crawler(frontier, crawl_id, concurrency=2, interval=0, analyze=second, robots=robots).run()
+        assert "/" not in second.visits
+        assert summary["pages"]["checked"] + summary["pages"]["failed"] == 7
+        assert len(set(first.visits[:2]) & set(second.visits)) == 0
+
+    @pytest.mark.asyncio
+    async def test_page_errors_recorded(self, frontier):
+        """Test a failing page is recorded and the crawl carries on."""
+        crawl_id = frontier.create_crawl(ORIGIN + "/missing", max_depth=1, max_pages=10)
+        await Crawler(frontier, crawl_id, interval=0, analyze=fake_site(), robots=RobotsRules(allow_all=True)).run()
+        pages = frontier.pages(crawl_id)
+        assert pages[0]["status"] == "failed" and "404" in pages[0]["error"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
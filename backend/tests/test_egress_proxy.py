@@ -0,0 +1,215 @@
+"""
+Egress Proxy Tests for Web Compliance Checker
+
+Drives the pinning proxy with raw sockets against local upstream servers;
+hostnames resolve through the DNS stub server.
+Run with: pytest tests/test_egress_proxy.py -v
+"""
+
+import pytest
+import pytest_asyncio
+import asyncio
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.middleware.security import is_blocked_ip
+from app.utils import egress_proxy, playwright_helper, static_analyzer
+from app.utils.browser_pool import BrowserSlot
+from app.utils.dns_resolver import CachingResolver
+from app.utils.dns_stub_server import DnsStubServer
+from app.utils.egress_proxy import PinningProxy, parse_target
+from app.utils.static_analyzer import StaticAnalysisError, fetch_html, fetch_validators
+
+
+def allow_loopback(ip):
+    """Blocking policy for tests: the local upstream is reachable"""
+    return ip != "127.0.0.1" and is_blocked_ip(ip)
+
+
+class Upstream:
+    """Local TCP server recording what it receives and answering HTTP."""
+
+    def __init__(self):
+        self.received = []
+
+    async def handle(self, reader, writer):
+        data = await reader.readuntil(b"\r\n\r\n")
+        self.received.append(data)
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\nok")
+        await writer.drain()
+        writer.close()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+
+@pytest_asyncio.fixture
+async def proxy():
+    """Proxy resolving site.test to loopback and evil.test to a private IP."""
+    dns = DnsStubServer({"site.test": ["127.0.0.1"], "evil.test": ["127.0.0.1", "10.0.0.7"]})
+    dns_port = await dns.start()
+    upstream = Upstream()
+    port = await upstream.start()
+
+    proxy = PinningProxy(
+        resolver=CachingResolver(nameservers=["127.0.0.1"], port=dns_port),
+        is_blocked=allow_loopback,
+    )
+    await proxy.start()
+    proxy.dns, proxy.upstream, proxy.upstream_port = dns, upstream, port
+    yield proxy
+    await proxy.close()
+    upstream.server.close()
+    dns.close()
+
+
+async def send(proxy, request: bytes) -> bytes:
+    reader, writer = await asyncio.open_connection("127.0.0.1", proxy.port)
+    writer.write(request)
+    await writer.drain()
+    response = await asyncio.wait_for(reader.read(), 5)
+    writer.close()
+    return response
+
+
+class TestParseTarget:
+    """Tests for reading proxy request heads."""
+
+    def test_connect(self):
+        """Test CONNECT targets, including bracketed IPv6."""
+        assert parse_target(b"CONNECT example.com:443 HTTP/1.1\r\nHost: example.com\r\n\r\n") == (
+            "CONNECT", "example.com", 443, b"")
+        assert parse_target(b"CONNECT [2001:db8::1]:8443 HTTP/1.1\r\n\r\n")[1:3] == ("2001:db8::1", 8443)
+
+    def test_absolute_form_rewritten(self):
+        """Test plain HTTP goes upstream in origin form without proxy headers."""
+        head = (b"GET http://example.com:8080/a?b=1 HTTP/1.1\r\nHost: example.com:8080\r\n"
+                b"Proxy-Connection: keep-alive\r\nAccept: */*\r\n\r\n")
+        method, host, port, upstream = parse_target(head)
+        assert (method, host, port) == ("GET", "example.com", 8080)
+        assert upstream == (b"GET /a?b=1 HTTP/1.1\r\nHost: example.com:8080\r\nAccept: */*\r\n"
+                            b"Connection: close\r\n\r\n")
+
+    def test_rejects_origin_form(self):
+        """Test requests that aren't proxy requests are refused."""
+        with pytest.raises(ValueError):
+            parse_target(b"GET / HTTP/1.1\r\nHost: example.com\r\n\r\n")
+
+
+class TestPinningProxy:
+    """Tests for resolution, blocking and forwarding."""
+
+    @pytest.mark.asyncio
+    async def test_connect_tunnel(self, proxy):
+        """Test CONNECT to an allowed host tunnels bytes both ways."""
+        response = await send(proxy, (
+            f"CONNECT site.test:{proxy.upstream_port} HTTP/1.1\r\n\r\n"
+            "GET /tunneled HTTP/1.1\r\nHost: site.test\r\n\r\n"
+        ).encode())
+        assert response.startswith(b"HTTP/1.1 200 Connection Established\r\n\r\nHTTP/1.1 200 OK")
+        assert proxy.upstream.received[0].startswith(b"GET /tunneled")
+
+    @pytest.mark.asyncio
+    async def test_plain_http_forwarded(self, proxy):
+        """Test absolute-form requests reach the pinned address in origin form."""
+        response = await send(proxy, (
+            f"GET http://site.test:{proxy.upstream_port}/page?x=1 HTTP/1.1\r\n"
+            f"Host: site.test\r\nProxy-Connection: keep-alive\r\n\r\n"
+        ).encode())
+        assert response.endswith(b"ok")
+        received = proxy.upstream.received[0]
+        assert received.startswith(b"GET /page?x=1 HTTP/1.1") and b"Connection: close" in received
+        assert b"Proxy-Connection" not in received
+
+    @pytest.mark.asyncio
+    async def test_blocked_addresses_refused(self, proxy):
+        """Test names with an internal address and internal literals get 403."""
+        for target in (f"evil.test:{proxy.upstream_port}", "10.0.0.1:443", "missing.test:443"):
+            response = await send(proxy, f"CONNECT {target} HTTP/1.1\r\n\r\n".encode())
+            assert response.startswith(b"HTTP/1.1 403"), target
+        assert proxy.stats()["blocked"] == 3 and not proxy.upstream.received
+
+    @pytest.mark.asyncio
+    async def test_one_lookup_per_host(self, proxy):
+        """Test repeated connections reuse the validated resolution."""
+        for _ in range(3):
+            await send(proxy, f"CONNECT site.test:{proxy.upstream_port} HTTP/1.1\r\n\r\nGET / HTTP/1.1\r\n\r\n".encode())
+        assert sorted(proxy.dns.queries) == [("site.test", "A"), ("site.test", "AAAA")]
+
+    @pytest.mark.asyncio
+    async def test_malformed_request(self, proxy):
+        """Test garbage gets a 400."""
+        assert (await send(proxy, b"hello\r\n\r\n")).startswith(b"HTTP/1.1 400")
+
+
+class TestBrowserLaunch:
+    """Tests for routing pooled browsers through the proxy."""
+
+    def test_launch_options_carry_proxy(self):
+        """Test slots pass their proxy to the Chromium launch."""
+        settings = {"server": "http://127.0.0.1:9", "bypass": "<-loopback>"}
+        assert BrowserSlot(proxy=settings)._launch_options()["proxy"] == settings
+        assert "proxy" not in BrowserSlot()._launch_options()
+
+    @pytest.mark.asyncio
+    async def test_browser_proxy_fails_closed(self, monkeypatch):
+        """Test no browser launches without the proxy while pinning is on."""
+        monkeypatch.setattr(egress_proxy, "_egress_proxy", None)
+        monkeypatch.delenv("BROWSER_IP_PINNING", raising=False)
+        with pytest.raises(RuntimeError):
+            playwright_helper.browser_proxy()
+        settings = await egress_proxy.start_egress_proxy()
+        try:
+            assert playwright_helper.browser_proxy() == settings
+            assert settings["server"].startswith("http://127.0.0.1:")
+        finally:
+            await egress_proxy.close_egress_proxy()
+        monkeypatch.setenv("BROWSER_IP_PINNING", "false")
+        assert playwright_helper.browser_proxy() is None
+        assert await egress_proxy.start_egress_proxy() is None
+
+
+class TestStaticFetch:
+    """Tests for routing the static engine's fetches through the proxy."""
+
+    @pytest_asyncio.fixture
+    async def pinned(self, proxy, monkeypatch):
+        """The shared fetch client, going through the test proxy."""
+        monkeypatch.delenv("BROWSER_IP_PINNING", raising=False)
+        monkeypatch.setattr(egress_proxy, "_egress_proxy", proxy)
+        monkeypatch.setattr(static_analyzer, "_fetch_client", None)
+        yield proxy
+        await static_analyzer.close_fetch_client()
+
+    @pytest.mark.asyncio
+    async def test_fetch_goes_through_proxy(self, pinned):
+        """Test the default client connects via the proxy's pinned address."""
+        url, html = await fetch_html(f"http://site.test:{pinned.upstream_port}/page")
+        assert html == "ok"
+        assert pinned.upstream.received[0].startswith(b"GET /page HTTP/1.1")
+        assert pinned.stats()["connections"] == 1
+
+    @pytest.mark.asyncio
+    async def test_rebinding_host_refused(self, pinned):
+        """Test a host resolving to an internal address at fetch time is refused."""
+        with pytest.raises(StaticAnalysisError):
+            await fetch_html(f"http://evil.test:{pinned.upstream_port}/")
+        assert pinned.stats()["blocked"] == 1 and not pinned.upstream.received
+
+    @pytest.mark.asyncio
+    async def test_conditional_fetch_pinned(self, pinned):
+        """Test incremental re-checks' conditional GETs go through the proxy too."""
+        result = await fetch_validators(f"http://site.test:{pinned.upstream_port}/", etag='"v1"')
+        assert result["status"] == 200
+        assert b'If-None-Match: "v1"' in pinned.upstream.received[0]
+        refused = await fetch_validators(f"http://evil.test:{pinned.upstream_port}/", etag='"v1"')
+        assert refused["status"] == 403 and not refused["notModified"]
+        assert pinned.stats()["blocked"] == 1 and len(pinned.upstream.received) == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
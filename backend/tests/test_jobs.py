@@ -0,0 +1,193 @@
+"""
+Job Queue Tests for Web Compliance Checker
+
+Run with: pytest tests/test_jobs.py -v
+"""
+
+import pytest
+import asyncio
+import threading
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from main import app
+from app.routes.jobs import job_event_stream, format_sse
+from app.services.job_queue import Job, JobManager, JobQueueFullError, PHASES
+from app.utils.browser_pool import PoolTimeoutError
+
+
+REPORT = {"url": "https://example.com", "checks": [], "score": "0/0"}
+
+
+def make_runner(gate=None, error=None, from_thread=False):
+    """Fake run_check reporting every phase, optionally from another thread."""
+    calls = []
+
+    async def runner(url, read_cache=True, write_cache=True, on_progress=None, checks=None, engine=None, incremental=False):
+        calls.append(url)
+        if from_thread:
+            thread = threading.Thread(target=lambda: [on_progress(p) for p in PHASES])
+            thread.start()
+            thread.join()
+        else:
+            for phase in PHASES:
+                on_progress(phase)
+        if gate is not None:
+            await gate.wait()
+        if error is not None:
+            raise error
+        return REPORT, "MISS"
+
+    runner.calls = calls
+    return runner
+
+
+async def wait_finished(job):
+    async for _ in job.follow():
+        pass
+    assert job.finished
+
+
+class TestJobManager:
+    """Tests for the bounded job queue."""
+
+    @pytest.mark.asyncio
+    async def test_job_runs_to_completion(self):
+        """Test a job reports every phase and keeps the report."""
+        manager = JobManager(workers=1, runner=make_runner(from_thread=True))
+        job = await manager.submit("https://example.com")
+        assert job.status == "queued"
+        await asyncio.wait_for(wait_finished(job), 1)
+
+        assert job.status == "done"
+        assert job.result == REPORT and job.cache_status == "MISS"
+        assert [e["data"]["phase"] for e in job.events if e["event"] == "phase"] == list(PHASES)
+        assert manager.get(job.id).to_dict()["result"] == REPORT
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_full_queue_refuses_submissions(self):
+        """Test backpressure once max_queue jobs are waiting."""
+        gate = asyncio.Event()
+        manager = JobManager(max_queue=1, workers=1, runner=make_runner(gate=gate))
+        await manager.submit("https://a.example")
+        await asyncio.sleep(0)  # Worker picks up the first job
+        await manager.submit("https://b.example")
+        with pytest.raises(JobQueueFullError):
+            await manager.submit("https://c.example")
+        assert manager.stats()["queued"] == 1
+
+        gate.set()
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_workers_bound_concurrency(self):
+        """Test no more than `workers` jobs run at once."""
+        gate = asyncio.Event()
+        runner = make_runner(gate=gate)
+        manager = JobManager(workers=2, runner=runner)
+        jobs = [await manager.submit(f"https://{i}.example") for i in range(5)]
+        await asyncio.sleep(0.01)
+        assert len(runner.calls) == 2
+        assert sum(job.status == "running" for job in jobs) == 2
+
+        gate.set()
+        for job in jobs:
+            await asyncio.wait_for(wait_finished(job), 1)
+        assert len(runner.calls) == 5
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_failures_are_recorded(self):
+        """Test runner errors become failed jobs with a readable error."""
+        manager = JobManager(workers=1, runner=make_runner(error=PoolTimeoutError("busy")))
+        job = await manager.submit("https://example.com")
+        await asyncio.wait_for(wait_finished(job), 1)
+        assert job.status == "failed"
+        assert "busy" in job.error.lower()
+        assert job.events[-1]["event"] == "failed"
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_finished_jobs_expire(self):
+        """Test finished jobs are pruned after the retention period."""
+        now = [1000.0]
+        manager = JobManager(workers=1, retention=60, runner=make_runner(), clock=lambda: now[0])
+        job = await manager.submit("https://example.com")
+        await asyncio.wait_for(wait_finished(job), 1)
+        assert manager.get(job.id) is job
+        now[0] += 61
+        assert manager.get(job.id) is None
+        await manager.close()
+
+
+class TestJobEvents:
+    """Tests for the SSE progress stream."""
+
+    def test_sse_format(self):
+        """Test event records encode as SSE messages."""
+        record = {"id": 3, "event": "phase", "data": {"phase": "checking"}}
+        assert format_sse(record) == 'id: 3\nevent: phase\ndata: {"phase": "checking"}\n\n'
+
+    @pytest.mark.asyncio
+    async def test_stream_replays_then_follows(self):
+        """Test a subscriber sees past and live events, then the stream ends."""
+        job = Job("https://example.com")
+        job.mark_running()
+        messages = []
+
+        async def consume():
+            async for message in job_event_stream(job):
+                messages.append(message)
+
+        consumer = asyncio.create_task(consume())
+        await asyncio.sleep(0)
+        job.set_phase("navigating")
+        job.mark_done(REPORT, "MISS")
+        await asyncio.wait_for(consumer, 1)
+
+        events = [m.split("\n")[1] for m in messages]
+        assert events == ["event: status", "event: status", "event: phase", "event: done"]
+
+    @pytest.mark.asyncio
+    async def test_stream_resumes_after_last_event_id(self):
+        """Test Last-Event-ID skips events the client already has."""
+        job = Job("https://example.com")
+        job.mark_running()
+        job.mark_failed("boom")
+        messages = [m async for m in job_event_stream(job, last_event_id=2)]
+        assert len(messages) == 1 and messages[0].startswith("id: 3\nevent: failed")
+
+    @pytest.mark.asyncio
+    async def test_heartbeat_while_idle(self):
+        """Test keep-alive comments are sent while nothing happens."""
+        job = Job("https://example.com")
+        stream = job_event_stream(job, heartbeat=0.01)
+        assert (await stream.__anext__()).startswith("id: 1")
+        assert await stream.__anext__() == ": keep-alive\n\n"
+        await stream.aclose()
+
+
+class TestJobEndpoints:
+    """Tests for /api/jobs validation."""
+
+    def test_unknown_job_is_404(self):
+        """Test polling an unknown job id."""
+        client = TestClient(app)
+        assert client.get("/api/jobs/does-not-exist").status_code == 404
+        assert client.get("/api/jobs/does-not-exist/events").status_code == 404
+
+    def test_submit_rejects_blocked_url(self):
+        """Test submissions go through the same SSRF validation as /api/check."""
+        client = TestClient(app)
+        response = client.post("/api/jobs", json={"url": "http://localhost"})
+        assert response.status_code == 400
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,252 @@
+"""
+LLM Provider Tests for Web Compliance Checker
+
+Providers talk to in-process ASGI apps, so no network or API key is needed.
+Run with: pytest tests/test_llm_providers.py -v
+"""
+
+import pytest
+import asyncio
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from app.services.ai_recommender import build_batch_prompt, parse_batch_response
+from app.services.llm_providers import (
+    CircuitBreaker,
+    CircuitOpenError,
+    LLMError,
+    OpenAICompatibleProvider,
+    ReplicateProvider,
+    StubProvider,
+    close_llm_provider,
+    get_llm_provider,
+    provider_from_env,
+)
+from app.utils.llm_stub_server import stub_answer
+
+
+def flaky_app(statuses, delay=0.0):
+    """OpenAI-compatible app answering with the given statuses in turn."""
+    app = FastAPI()
+    app.state.calls = 0
+    app.state.active = 0
+    app.state.peak = 0
+
+    @app.post("/v1/chat/completions")
+    async def complete(request: Request):
+        index = app.state.calls
+        app.state.calls += 1
+        app.state.active += 1
+        app.state.peak = max(app.state.peak, app.state.active)
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            app.state.active -= 1
+        status = statuses[min(index, len(statuses) - 1)]
+        if status != 200:
+            return JSONResponse({"error": "nope"}, status_code=status, headers={"Retry-After": "0"})
+        return {"choices": [{"message": {"content": f"answer {index}"}}]}
+
+    return app
+
+
+def provider_for(app, **kwargs):
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    kwargs.setdefault("backoff", 0)
+    return OpenAICompatibleProvider("http://llm.test/v1", client=client, **kwargs)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+    """Tests for the circuit breaker states."""
+
+    def test_opens_then_half_opens(self):
+        """Test consecutive failures open it and a trial call closes it."""
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == "open" and not breaker.allow()
+
+        clock.now = 10
+        assert breaker.allow()          # One trial call
+        assert not breaker.allow()      # ...and only one
+        breaker.record_failure()
+        assert breaker.state == "open"
+
+        clock.now = 20
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == "closed"
+
+
+class TestProviders:
+    """Tests for retries, limits and response parsing."""
+
+    @pytest.mark.asyncio
+    async def test_retries_transient_errors(self):
+        """Test 429/5xx are retried and the eventual answer returned."""
+        app = flaky_app([503, 429, 200])
+        provider = provider_for(app, max_retries=2)
+        assert await provider.complete("hi") == "answer 2"
+        assert provider.retries == 2 and provider.stats()["circuit"] == "closed"
+
+    @pytest.mark.asyncio
+    async def test_client_errors_not_retried(self):
+        """Test a 4xx fails immediately."""
+        app = flaky_app([400, 200])
+        provider = provider_for(app, max_retries=2)
+        with pytest.raises(LLMError):
+            await provider.complete("hi")
+        assert app.state.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_circuit_fails_fast(self):
+        """Test an open circuit rejects calls without reaching the provider."""
+        app = flaky_app([500])
+        provider = provider_for(app, max_retries=0, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+        for _ in range(2):
+            with pytest.raises(LLMError):
+                await provider.complete("hi")
+        with pytest.raises(CircuitOpenError):
+            await provider.complete("hi")
+        assert app.state.calls == 2 and provider.rejected == 1
+
+    @pytest.mark.asyncio
+    async def test_retries_count_as_one_failure(self):
+        """Test a call that fails every attempt is one failure, not one per attempt."""
+        app = flaky_app([503])
+        provider = provider_for(app, max_retries=2, breaker=CircuitBreaker(failure_threshold=2))
+        with pytest.raises(LLMError):
+            await provider.complete("hi")
+        assert app.state.calls == 3
+        assert provider.breaker.failures == 1 and provider.breaker.state == "closed"
+
+    @pytest.mark.asyncio
+    async def test_half_open_trial_keeps_its_retries(self):
+        """Test the trial call may retry and its eventual answer closes the circuit."""
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        clock.now = 10
+        provider = provider_for(flaky_app([503, 200]), max_retries=1, breaker=breaker)
+        assert await provider.complete("trial") == "answer 1"
+        assert breaker.state == "closed"
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self):
+        """Test calls in flight never exceed the provider's limit."""
+        app = flaky_app([200], delay=0.02)
+        provider = provider_for(app, concurrency=2)
+        await asyncio.gather(*(provider.complete(f"p{i}") for i in range(6)))
+        assert app.state.peak == 2
+
+    @pytest.mark.asyncio
+    async def test_timeout_budget(self):
+        """Test the overall budget bounds a slow provider."""
+        provider = provider_for(flaky_app([200], delay=1.0))
+        with pytest.raises(asyncio.TimeoutError):
+            await provider.complete("hi", timeout=0.05)
+        assert provider.breaker.failures == 1
+
+    @pytest.mark.asyncio
+    async def test_caller_cancellation_not_a_failure(self):
+        """Test a caller abandoning calls (not the budget) leaves the breaker alone."""
+        provider = provider_for(flaky_app([200], delay=1.0), breaker=CircuitBreaker(failure_threshold=2))
+        tasks = [asyncio.create_task(provider.complete(f"p{i}")) for i in range(4)]
+        await asyncio.sleep(0.05)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        assert provider.breaker.state == "closed" and provider.breaker.failures == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_trial_frees_half_open(self):
+        """Test a cancelled half-open trial lets the next call try again."""
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        clock.now = 10
+        provider = provider_for(flaky_app([200], delay=0.2), breaker=breaker)
+        task = asyncio.create_task(provider.complete("trial"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert await provider.complete("next") == "answer 1"
+        assert breaker.state == "closed"
+
+    @pytest.mark.asyncio
+    async def test_replicate_prediction(self):
+        """Test the Replicate provider sends a prediction and joins its output."""
+        app = FastAPI()
+        seen = {}
+
+        @app.post("/v1/models/openai/gpt-5/predictions")
+        async def predict(request: Request):
+            seen["auth"] = request.headers["authorization"]
+            seen["input"] = (await request.json())["input"]
+            return {"status": "succeeded", "output": ["Use ", "headings."]}
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+        provider = ReplicateProvider("r8_test", base_url="http://replicate.test/v1", client=client)
+        assert await provider.complete("prompt", max_tokens=50) == "Use headings."
+        assert seen["auth"] == "Bearer r8_test" and seen["input"]["max_tokens"] == 50
+
+
+class TestStub:
+    """Tests for the deterministic stub provider."""
+
+    @pytest.mark.asyncio
+    async def test_stub_is_deterministic_and_batch_aware(self):
+        """Test the stub answers consistently and fills batched prompts."""
+        provider = StubProvider(backoff=0)
+        checks = [{"name": "Color Usage", "details": "x"}, {"name": "No Keyboard Trap", "details": "y"}]
+        prompt = build_batch_prompt(checks, "https://example.com")
+        first = await provider.complete(prompt)
+        assert first == await provider.complete(prompt) == stub_answer(prompt)
+        answers = parse_batch_response(first, checks)
+        assert all(answer and "Stub recommendation" in answer for answer in answers)
+
+    @pytest.mark.asyncio
+    async def test_stub_client_closed_at_shutdown(self, monkeypatch):
+        """Test closing the configured stub closes the client it opened."""
+        monkeypatch.setenv("LLM_PROVIDER", "stub")
+        await close_llm_provider()
+        provider = get_llm_provider()
+        client = provider.client
+        await provider.complete("hi", timeout=5)
+        await close_llm_provider()
+        assert client.is_closed
+        assert get_llm_provider() is not provider
+        await close_llm_provider()
+
+    def test_provider_selection(self, monkeypatch):
+        """Test LLM_PROVIDER and token defaults."""
+        monkeypatch.delenv("LLM_PROVIDER", raising=False)
+        monkeypatch.delenv("REPLICATE_API_TOKEN", raising=False)
+        assert provider_from_env() is None
+        monkeypatch.setenv("REPLICATE_API_TOKEN", "r8_real")
+        assert provider_from_env().name == "replicate"
+        monkeypatch.setenv("LLM_PROVIDER", "openai")
+        assert provider_from_env().name == "openai"
+        monkeypatch.setenv("LLM_PROVIDER", "stub")
+        assert provider_from_env().name == "stub"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
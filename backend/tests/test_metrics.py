@@ -0,0 +1,138 @@
+"""
+Metrics Tests for Web Compliance Checker
+
+Run with: pytest tests/test_metrics.py -v
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from app.services import compliance_checks
+from app.utils import metrics, playwright_helper
+from app.utils.browser_pool import BrowserPool
+from app.utils.metrics import MetricsRegistry
+from main import app
+from tests.test_browser_pool import FakeSlot
+from tests.test_llm_providers import flaky_app, provider_for
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    """Start every test from empty series."""
+    metrics.REGISTRY.clear()
+    yield
+    metrics.REGISTRY.clear()
+
+
+@pytest.fixture
+def client():
+    """Create test client."""
+    return TestClient(app)
+
+
+class TestExposition:
+    """Tests for the Prometheus text format."""
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test bucket counts accumulate and +Inf, _sum and _count agree."""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("demo_seconds", "Demo", ["kind"], buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value, kind="a")
+        lines = registry.render().splitlines()
+        assert lines[:2] == ["# HELP demo_seconds Demo", "# TYPE demo_seconds histogram"]
+        assert 'demo_seconds_bucket{kind="a",le="0.1"} 1' in lines
+        assert 'demo_seconds_bucket{kind="a",le="1"} 2' in lines
+        assert 'demo_seconds_bucket{kind="a",le="+Inf"} 3' in lines
+        assert 'demo_seconds_sum{kind="a"} 5.55' in lines
+        assert 'demo_seconds_count{kind="a"} 3' in lines
+
+    def test_gauge_and_label_escaping(self):
+        """Test gauges render per label set with escaped values."""
+        registry = MetricsRegistry()
+        gauge = registry.gauge("demo_value", "Demo", ["name"])
+        gauge.set(2, name='say "hi"\n')
+        assert 'demo_value{name="say \\"hi\\"\\n"} 2' in registry.render()
+
+    def test_wrong_labels_rejected(self):
+        """Test observing with missing or extra labels fails loudly."""
+        histogram = MetricsRegistry().histogram("demo_seconds", "Demo", ["kind"])
+        with pytest.raises(ValueError):
+            histogram.observe(1.0)
+        with pytest.raises(ValueError):
+            histogram.observe(1.0, kind="a", other="b")
+
+    def test_page_timings(self):
+        """Test analyze_webpage timings land in phase series, skipping probes not run."""
+        metrics.observe_page_timings({"navigationMs": 1200, "extractionMs": 80, "contrastMs": None})
+        assert metrics.PAGE_PHASE.snapshot(phase="navigation") == {"count": 1, "sum": 1.2}
+        assert metrics.PAGE_PHASE.snapshot(phase="extraction")["count"] == 1
+        assert metrics.PAGE_PHASE.snapshot(phase="contrast") is None
+
+
+class TestInstrumentation:
+    """Tests for the histograms recorded where the work happens."""
+
+    @pytest.mark.asyncio
+    async def test_checks_timed_by_id(self):
+        """Test each evaluated check observes its own series."""
+        checks = compliance_checks.select_checks(["reading-sequence"])
+        await compliance_checks.evaluate_checks({"headings": []}, checks)
+        assert metrics.CHECK_DURATION.snapshot(check="reading-sequence")["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_llm_attempts_by_outcome(self):
+        """Test every provider attempt is observed with its outcome."""
+        provider = provider_for(flaky_app([503, 200]))
+        await provider.complete("prompt", 50, timeout=5)
+        assert metrics.LLM_CALL.snapshot(provider=provider.name, outcome="retryable")["count"] == 1
+        assert metrics.LLM_CALL.snapshot(provider=provider.name, outcome="ok")["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_browser_checkout(self):
+        """Test pool checkouts are timed."""
+        pool = BrowserPool(min_size=0, max_size=1, slot_factory=FakeSlot)
+        await pool.run(lambda page: page)
+        await pool.close()
+        assert metrics.BROWSER_CHECKOUT.snapshot()["count"] == 1
+
+
+class TestMetricsEndpoint:
+    """Tests for GET /metrics."""
+
+    def test_scrape(self, client, monkeypatch):
+        """Test the endpoint serves histograms and live gauges as text."""
+        pool = BrowserPool(min_size=0, max_size=3, slot_factory=FakeSlot)
+        monkeypatch.setattr(playwright_helper, "_pool", pool)
+        client.get("/health")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        body = response.text
+        assert 'wcc_http_request_seconds_count{method="GET",route="/health",status="200"} 1' in body
+        assert 'wcc_browser_pool_slots{state="max"} 3' in body
+        assert "wcc_job_queue_depth 0" in body
+        assert 'wcc_cache_hit_ratio{cache="dns"}' in body
+
+    def test_routes_labelled_by_template(self, client):
+        """Test path parameters don't create a series per id and misses stay bounded."""
+        client.get("/api/jobs/abc")
+        client.get("/api/jobs/def")
+        client.get("/no/such/path")
+        assert metrics.HTTP_REQUEST.snapshot(method="GET", route="/api/jobs/{job_id}", status="404")["count"] == 2
+        assert metrics.HTTP_REQUEST.snapshot(method="GET", route="unmatched", status="404")["count"] == 1
+
+    def test_disabled(self, client, monkeypatch):
+        """Test METRICS_ENABLED=false hides the endpoint."""
+        monkeypatch.setenv("METRICS_ENABLED", "false")
+        assert client.get("/metrics").status_code == 404
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
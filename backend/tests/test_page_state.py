@@ -0,0 +1,237 @@
+"""
+Incremental Re-check Tests for Web Compliance Checker
+
+Stores validators and pageData fingerprints per URL; conditional fetches
+go through httpx mock transports and the page analysis is faked.
+Run with: pytest tests/test_page_state.py -v
+"""
+
+import pytest
+import httpx
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import compliance_checks
+from app.services.compliance_checks import (
+    check_reading_sequence,
+    check_skip_links,
+    run_compliance_checks,
+)
+from app.services.page_state import PageStateStore, fingerprint_fields, validator_tag
+from app.utils.static_analyzer import fetch_validators
+
+URL = "https://93.184.216.34/page"
+
+CHECKS = [check_reading_sequence, check_skip_links]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestFingerprints:
+    """Tests for the structural pageData fingerprint."""
+
+    def test_one_hash_per_field(self):
+        """Test each field hashes on its own and only changed fields differ."""
+        before = fingerprint_fields({"headings": [{"level": 1, "text": "A"}], "links": []})
+        after = fingerprint_fields({"headings": [{"level": 1, "text": "B"}], "links": []})
+        assert set(before) == {"headings", "links"}
+        assert before["links"] == after["links"] and before["headings"] != after["headings"]
+
+    def test_timings_ignored(self):
+        """Test measurement bookkeeping doesn't count as a change."""
+        first = fingerprint_fields({"keyboardTraversal": {"steps": 12, "elapsedMs": 840}})
+        second = fingerprint_fields({"keyboardTraversal": {"steps": 12, "elapsedMs": 911}})
+        assert first == second
+
+    def test_missing_fields_hashed(self):
+        """Test requested fields absent from the data still get a hash."""
+        assert set(fingerprint_fields({}, ["headings"])) == {"headings"}
+
+    def test_validator_tag(self):
+        """Test validators combine, and their absence yields None."""
+        assert validator_tag('"v1"', None) == '"v1"|'
+        assert validator_tag(None, None) is None
+
+
+class TestPageStateStore:
+    """Tests for the SQLite page state store."""
+
+    def test_put_merges_check_entries(self):
+        """Test later puts keep entries for checks they didn't run."""
+        store = PageStateStore(path=":memory:")
+        store.put("https://example.com/", '"a"', None, {"keyboard": {"version": "1"}})
+        store.put("https://EXAMPLE.com", '"b"', "Mon", {"label-in-name": {"version": "1"}})
+        state = store.get("https://example.com")
+        assert state["etag"] == '"b"' and state["lastModified"] == "Mon"
+        assert set(state["checks"]) == {"keyboard", "label-in-name"}
+
+    def test_ttl_forces_full_check(self):
+        """Test entries older than the TTL are ignored."""
+        clock = Clock()
+        store = PageStateStore(path=":memory:", ttl=60, clock=clock)
+        store.put(URL, '"a"', None, {})
+        clock.now += 61
+        assert store.get(URL) is None
+
+    def test_lru_eviction(self):
+        """Test the least recently updated URLs are evicted."""
+        clock = Clock()
+        store = PageStateStore(path=":memory:", max_entries=2, clock=clock)
+        for path in ("a", "b", "c"):
+            clock.now += 1
+            store.put(f"https://example.com/{path}", None, None, {})
+        assert store.get("https://example.com/a") is None
+        assert store.size() == 2 and store.stats()["evictions"] == 1
+
+    def test_disabled(self):
+        """Test a zero TTL stores nothing."""
+        store = PageStateStore(path=":memory:", ttl=0)
+        store.put(URL, '"a"', None, {})
+        assert store.get(URL) is None and not store.stats()["enabled"]
+
+
+class Site:
+    """Mock origin honoring If-None-Match for one page."""
+
+    def __init__(self, etag='"v1"'):
+        self.etag = etag
+        self.requests = []
+
+    def handler(self, request):
+        self.requests.append(request)
+        if request.headers.get("if-none-match") == self.etag:
+            return httpx.Response(304, headers={"etag": self.etag})
+        return httpx.Response(200, html="<html></html>", headers={"etag": self.etag})
+
+    def client(self):
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+
+class TestFetchValidators:
+    """Tests for the conditional GET."""
+
+    @pytest.mark.asyncio
+    async def test_conditional_headers_and_304(self):
+        """Test stored validators are sent and a 304 is reported."""
+        site = Site()
+        async with site.client() as client:
+            fresh = await fetch_validators(URL, client=client)
+            assert fresh == {"status": 200, "notModified": False, "etag": '"v1"', "lastModified": None}
+            result = await fetch_validators(URL, etag='"v1"', last_modified="Mon", client=client)
+        assert result["notModified"] and result["lastModified"] == "Mon"
+        assert site.requests[1].headers["if-modified-since"] == "Mon"
+
+    @pytest.mark.asyncio
+    async def test_redirect_has_no_validators(self):
+        """Test redirects aren't followed and count as changed."""
+        transport = httpx.MockTransport(lambda request: httpx.Response(301, headers={"location": "/new", "etag": '"x"'}))
+        async with httpx.AsyncClient(transport=transport) as client:
+            result = await fetch_validators(URL, etag='"x"', client=client)
+        assert result == {"status": 301, "notModified": False, "etag": None, "lastModified": None}
+
+
+@pytest.fixture
+def page(monkeypatch):
+    """Fake browser analysis serving mutable pageData, counting loads."""
+    state = {
+        "loads": 0,
+        "data": {
+            "headings": [{"level": 1, "text": "Welcome", "id": None}],
+            "links": [{"href": "#main", "text": "Skip to main content", "ariaLabel": None, "isSkipLink": True}],
+            "hasLandmarks": True,
+        },
+    }
+
+    async def analyze(url, fields=None, on_progress=None):
+        state["loads"] += 1
+        return {"pageData": {field: state["data"].get(field) for field in fields}, "url": url}
+
+    monkeypatch.setattr(compliance_checks, "analyze_webpage", analyze)
+    return state
+
+
+def run(store, client):
+    return compliance_checks.run_incremental_checks(URL, CHECKS, engine="browser", store=store, client=client)
+
+
+class TestIncrementalChecks:
+    """Tests for skipping unchanged pages and unchanged checks."""
+
+    @pytest.mark.asyncio
+    async def test_unchanged_page_skips_browser(self, page):
+        """Test a 304 is answered from stored results without loading the page."""
+        store, site = PageStateStore(path=":memory:"), Site()
+        async with site.client() as client:
+            first = await run(store, client)
+            second = await run(store, client)
+        assert first["analysis"] == "full" and not any(c["reused"] for c in first["checks"])
+        assert second["analysis"] == "unchanged" and page["loads"] == 1
+        assert [c["reused"] for c in second["checks"]] == [True, True]
+        assert second["score"] == first["score"] and second["engine"] == "browser"
+        assert store.stats()["unchanged"] == 1
+
+    @pytest.mark.asyncio
+    async def test_changed_page_reevaluates_affected_checks(self, page):
+        """Test only checks reading changed fields are evaluated again."""
+        store, site = PageStateStore(path=":memory:"), Site()
+        async with site.client() as client:
+            await run(store, client)
+            site.etag = '"v2"'
+            page["data"]["headings"] = [{"level": 2, "text": "Intro", "id": None}]
+            results = await run(store, client)
+        assert page["loads"] == 2 and results["analysis"] == "incremental"
+        reused = {c["id"]: c["reused"] for c in results["checks"]}
+        assert reused == {"reading-sequence": False, "bypass-blocks": True}
+        assert store.get(URL)["etag"] == '"v2"'
+
+    @pytest.mark.asyncio
+    async def test_no_validators_still_diffs_fields(self, page):
+        """Test pages without validators are loaded but unchanged checks reused."""
+        store = PageStateStore(path=":memory:")
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, html="<html></html>"))
+        async with httpx.AsyncClient(transport=transport) as client:
+            await run(store, client)
+            results = await run(store, client)
+        assert page["loads"] == 2 and results["analysis"] == "incremental"
+        assert all(c["reused"] for c in results["checks"])
+
+    @pytest.mark.asyncio
+    async def test_version_bump_reevaluates(self, page, monkeypatch):
+        """Test a check whose logic changed isn't served from the store."""
+        store, site = PageStateStore(path=":memory:"), Site()
+        async with site.client() as client:
+            await run(store, client)
+            monkeypatch.setattr(check_skip_links, "version", "99")
+            results = await run(store, client)
+        assert results["analysis"] == "incremental" and page["loads"] == 2
+        assert {c["id"]: c["reused"] for c in results["checks"]}["bypass-blocks"] is False
+
+    @pytest.mark.asyncio
+    async def test_fetch_failure_falls_back_to_full(self, page):
+        """Test an unreachable origin still gets a full check."""
+        def handler(request):
+            raise httpx.ConnectError("refused")
+
+        store = PageStateStore(path=":memory:")
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            results = await run(store, client)
+        assert results["analysis"] == "full" and results["passedCount"] == 2
+
+    @pytest.mark.asyncio
+    async def test_run_compliance_checks_reports_full(self, page):
+        """Test the default path labels its results as a full analysis."""
+        results = await run_compliance_checks(URL, checks=CHECKS, engine="browser")
+        assert results["analysis"] == "full" and "reused" not in results["checks"][0]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,437 @@
+"""
+Playwright Helper Tests for Web Compliance Checker
+
+Drives the shared analysis steps against fake pages, so no browser is needed.
+Run with: pytest tests/test_playwright_helper.py -v
+"""
+
+import pytest
+import sys
+import os
+import base64
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+from app.utils import playwright_helper
+from tests.test_compliance_checks import png, solid
+from app.utils.playwright_helper import (
+    _analyze_webpage_sync,
+    _analyze_webpage_async,
+    _drive_sync,
+    _flash_capture_steps,
+    _keyboard_traversal_steps,
+    _pointer_listener_steps,
+    get_engine,
+    get_page_data_script,
+)
+
+PAGE_DATA = {"headings": [{"level": 1, "text": "Hello", "id": None}], "title": "Test"}
+
+
+class FakeAccessibility:
+    def __init__(self, page):
+        self._page = page
+
+    def snapshot(self):
+        return self._page.record("accessibility.snapshot", {"role": "WebArea"})
+
+
+class FakePage:
+    """Sync page double that records the calls it receives."""
+
+    def __init__(self, fail_goto=False):
+        self.calls = []
+        self.page_data_args = []
+        self.routes = []
+        self.fail_goto = fail_goto
+        self.accessibility = FakeAccessibility(self)
+
+    def record(self, name, result=None):
+        self.calls.append(name)
+        return result
+
+    def set_default_timeout(self, timeout):
+        return self.record("set_default_timeout")
+
+    def goto(self, url, **kwargs):
+        if self.fail_goto:
+            raise PlaywrightTimeoutError("Timeout 30000ms exceeded")
+        return self.record("goto")
+
+    def wait_for_timeout(self, timeout):
+        return self.record("wait_for_timeout")
+
+    def content(self):
+        return self.record("content", "<html></html>")
+
+    def route(self, pattern, handler):
+        self.routes.append(handler)
+        return self.record("route")
+
+    def evaluate(self, script, *args):
+        if script == playwright_helper.DOM_STABLE_SCRIPT:
+            return self.record("wait_for_dom_stable", {"stable": True, "waitedMs": 500})
+        if script == playwright_helper.STYLES_SCRIPT:
+            return self.record("evaluate", "body { color: red; }")
+        if script == playwright_helper.TEXT_CONTRAST_SCRIPT:
+            return self.record("text_contrast", {"count": 0, "truncated": False})
+        if script == playwright_helper.FLASH_CANDIDATES_SCRIPT:
+            return self.record("flash_candidates", {"running": 0, "media": 0, "viewport": [1280, 720]})
+        self.page_data_args.append(args[0] if args else None)
+        return self.record("evaluate", PAGE_DATA)
+
+
+class FakeAsyncAccessibility(FakeAccessibility):
+    async def snapshot(self):
+        return super().snapshot()
+
+
+class FakeAsyncPage(FakePage):
+    """Async page double: same behaviour, awaitable methods."""
+
+    def __init__(self, fail_goto=False):
+        super().__init__(fail_goto)
+        self.accessibility = FakeAsyncAccessibility(self)
+
+    async def set_default_timeout(self, timeout):
+        return super().set_default_timeout(timeout)
+
+    async def goto(self, url, **kwargs):
+        return super().goto(url, **kwargs)
+
+    async def wait_for_timeout(self, timeout):
+        return super().wait_for_timeout(timeout)
+
+    async def content(self):
+        return super().content()
+
+    async def route(self, pattern, handler):
+        return super().route(pattern, handler)
+
+    async def evaluate(self, script, *args):
+        return super().evaluate(script, *args)
+
+
+class TestEngines:
+    """Tests that both engines produce the same analysis."""
+
+    @pytest.mark.asyncio
+    async def test_sync_and_async_match(self):
+        """Test the sync and async drivers return identical results."""
+        sync_page = FakePage()
+        async_page = FakeAsyncPage()
+        sync_result = _analyze_webpage_sync(sync_page, "https://example.com")
+        async_result = await _analyze_webpage_async(async_page, "https://example.com")
+        sync_result.pop("timings")
+        async_result.pop("timings")
+        assert sync_result == async_result
+        assert sync_result["pageData"] == PAGE_DATA
+        assert sync_result["url"] == "https://example.com"
+        assert sync_page.calls == async_page.calls
+
+    @pytest.mark.asyncio
+    async def test_timeout_reported_by_both_engines(self):
+        """Test navigation timeouts surface the same error in both engines."""
+        with pytest.raises(Exception, match="Page load timeout"):
+            _analyze_webpage_sync(FakePage(fail_goto=True), "https://example.com")
+        with pytest.raises(Exception, match="Page load timeout"):
+            await _analyze_webpage_async(FakeAsyncPage(fail_goto=True), "https://example.com")
+
+    def test_timings_reported(self):
+        """Test navigation and extraction timings are recorded."""
+        result = _analyze_webpage_sync(FakePage(), "https://example.com")
+        assert set(result["timings"]) >= {"navigationMs", "settleMs", "extractionMs"}
+
+    def test_dom_stable_wait_replaces_fixed_sleep(self, monkeypatch):
+        """Test the adaptive wait is the default and networkidle is opt-in."""
+        monkeypatch.delenv("NAVIGATION_WAIT", raising=False)
+        page = FakePage()
+        _analyze_webpage_sync(page, "https://example.com")
+        assert "wait_for_dom_stable" in page.calls
+        assert "wait_for_timeout" not in page.calls
+
+        monkeypatch.setenv("NAVIGATION_WAIT", "networkidle")
+        page = FakePage()
+        _analyze_webpage_sync(page, "https://example.com")
+        assert "wait_for_timeout" in page.calls
+
+    def test_request_policy_installed(self, monkeypatch):
+        """Test the blocking route is installed before navigation unless disabled."""
+        monkeypatch.delenv("REQUEST_POLICY", raising=False)
+        page = FakePage()
+        _analyze_webpage_sync(page, "https://example.com")
+        assert page.calls.index("route") < page.calls.index("goto")
+
+        monkeypatch.setenv("REQUEST_POLICY", "off")
+        page = FakePage()
+        _analyze_webpage_sync(page, "https://example.com")
+        assert "route" not in page.calls
+
+    def test_skips_unrequested_captures(self):
+        """Test html, accessibility tree and CSS are only captured on demand."""
+        page = FakePage()
+        result = _analyze_webpage_sync(page, "https://example.com", ["headings"])
+        assert "content" not in page.calls
+        assert "accessibility.snapshot" not in page.calls
+        assert page.calls.count("evaluate") == 1
+        assert result["html"] is None and result["styles"] is None
+        assert page.page_data_args == [["headings"]]
+
+    def test_contrast_probe_on_demand(self):
+        """Test text contrast is gathered by its own call, only when requested."""
+        page = FakePage()
+        result = _analyze_webpage_sync(page, "https://example.com", ["headings", "textContrast"])
+        assert page.calls.count("text_contrast") == 1
+        assert result["pageData"]["textContrast"]["count"] == 0
+        assert page.page_data_args == [["headings"]]
+        assert "contrastMs" in result["timings"]
+
+    def test_progress_phases_reported(self):
+        """Test navigation and extraction phases reach the progress callback."""
+        phases = []
+        _analyze_webpage_sync(FakePage(), "https://example.com", on_progress=phases.append)
+        assert phases == ["navigating", "extracting"]
+
+    def test_extractor_selection(self, monkeypatch):
+        """Test the single-pass walker is the default and legacy is selectable."""
+        monkeypatch.delenv("DOM_EXTRACTOR", raising=False)
+        assert get_page_data_script() == playwright_helper.PAGE_DATA_SCRIPT
+        assert "createTreeWalker" in get_page_data_script()
+        monkeypatch.setenv("DOM_EXTRACTOR", "legacy")
+        assert get_page_data_script() == playwright_helper.LEGACY_PAGE_DATA_SCRIPT
+
+    def test_engine_selection(self, monkeypatch):
+        """Test explicit engine config wins and auto picks by platform."""
+        monkeypatch.setenv("PLAYWRIGHT_ENGINE", "sync")
+        assert get_engine() == "sync"
+        monkeypatch.setenv("PLAYWRIGHT_ENGINE", "async")
+        assert get_engine() == "async"
+        monkeypatch.setenv("PLAYWRIGHT_ENGINE", "auto")
+        monkeypatch.setattr(playwright_helper.sys, "platform", "win32")
+        assert get_engine() == "sync"
+        monkeypatch.setattr(playwright_helper.sys, "platform", "linux")
+        assert get_engine() == "async"
+
+
+
+class FocusPage:
+    """
+    Page double with a scripted focus order.
+
+    moves maps (key, focused element) to the next focused element, where
+    elements are names and None is the document.
+    """
+
+    def __init__(self, moves, dialogs=()):
+        self.moves = moves
+        self.dialogs = set(dialogs)
+        self.focused = None
+        self.presses = []
+        self.keyboard = self
+
+    def press(self, key):
+        self.presses.append(key)
+        self.focused = self.moves.get((key, self.focused), self.focused)
+
+    def evaluate(self, script, *args):
+        if script != playwright_helper.FOCUSED_ELEMENT_SCRIPT or self.focused is None:
+            return None
+        return {"key": self.focused, "label": self.focused, "frame": False, "inDialog": self.focused in self.dialogs}
+
+
+def linear_moves(names):
+    """Tab/Shift+Tab through names in order, wrapping via the document."""
+    moves = {}
+    order = [None] + list(names)
+    for current, following in zip(order, order[1:] + [None]):
+        moves[("Tab", current)] = following
+        moves[("Shift+Tab", following)] = current
+    return moves
+
+
+def traverse(page, max_steps=60, budget_ms=3000):
+    return _drive_sync(page, _keyboard_traversal_steps(max_steps, budget_ms))
+
+
+class TestKeyboardTraversal:
+    """Tests for the scripted Tab traversal behind the keyboard-trap check."""
+
+    def test_page_end_reached(self):
+        """Test a plain focus order runs to the end without a trap."""
+        result = traverse(FocusPage(linear_moves(["a", "b", "c"])))
+        assert result["reachedEnd"] and result["trap"] is None
+        assert result["steps"] == 4
+
+    def test_cycle_without_exit_is_a_trap(self):
+        """Test focus stuck cycling b -> c -> b is reported with its elements."""
+        moves = linear_moves(["a", "b", "c"])
+        moves[("Tab", "c")] = "b"
+        moves[("Shift+Tab", "b")] = "c"
+        page = FocusPage(moves)
+        result = traverse(page)
+        assert result["trap"] == {"cycle": ["b", "c"], "inDialog": False}
+        assert "Shift+Tab" in page.presses
+
+    def test_dialog_closed_with_escape(self):
+        """Test a modal that wraps focus is fine when Escape releases it."""
+        moves = {("Tab", None): "d1", ("Tab", "d1"): "d2", ("Tab", "d2"): "d1",
+                 ("Shift+Tab", "d1"): "d2", ("Shift+Tab", "d2"): "d1",
+                 ("Escape", "d1"): "a", ("Escape", "d2"): "a", ("Tab", "a"): None}
+        page = FocusPage(moves, dialogs={"d1", "d2"})
+        result = traverse(page)
+        assert result["trap"] is None
+        assert "Escape" in page.presses
+
+    def test_step_budget(self):
+        """Test traversal stops at the step budget on long pages."""
+        page = FocusPage(linear_moves([f"link{i}" for i in range(500)]))
+        result = traverse(page, max_steps=20)
+        assert result["budgetExhausted"]
+        assert len(page.presses) == 20
+
+    def test_nothing_focusable(self):
+        """Test a page without focusable elements ends quickly."""
+        page = FocusPage({})
+        result = traverse(page)
+        assert result["reachedEnd"] and len(page.presses) == 2
+
+
+class FakeCDPSession:
+    """CDP session double serving alternating light and dark screenshots."""
+
+    def __init__(self, page):
+        self.page = page
+        self.shots = 0
+
+    def send(self, method, params):
+        assert method == "Page.captureScreenshot"
+        self.page.clips.append(params["clip"])
+        self.shots += 1
+        color = (0, 0, 0) if self.shots % 2 else (255, 255, 255)
+        return {"data": base64.b64encode(png(24, 12, solid(color))).decode()}
+
+    def detach(self):
+        self.page.detached = True
+
+
+class FlashPage:
+    """Page double with a CDP session and configurable flash candidates."""
+
+    def __init__(self, running=1):
+        self.running = running
+        self.clips = []
+        self.detached = False
+        self.context = self
+        self.session_pages = []
+
+    def new_cdp_session(self, page):
+        self.session_pages.append(page)
+        return FakeCDPSession(self)
+
+    def evaluate(self, script, *args):
+        assert script == playwright_helper.FLASH_CANDIDATES_SCRIPT
+        return {"running": self.running, "media": 0, "viewport": [1280, 720]}
+
+
+class TestFlashCapture:
+    """Tests for the screenshot burst behind the Three Flashes check."""
+
+    def test_frames_streamed_through_detector(self):
+        """Test frames are captured scaled down and analyzed as they arrive."""
+        page = FlashPage()
+        result = _drive_sync(page, _flash_capture_steps("auto", 10000, 12, 64))
+        assert result["frames"] == 12
+        assert len(result["generalFlashRegions"]) == 36
+        assert page.session_pages == [page] and page.detached
+        assert page.clips[0]["scale"] == 0.05
+
+    def test_static_pages_skipped(self):
+        """Test auto mode skips pages with nothing animated, always mode doesn't."""
+        page = FlashPage(running=0)
+        assert _drive_sync(page, _flash_capture_steps("auto", 10000, 4, 64)) == {"skipped": "no animated content"}
+        assert page.session_pages == []
+        assert _drive_sync(page, _flash_capture_steps("always", 10000, 4, 64))["frames"] == 4
+
+    def test_probe_on_demand(self):
+        """Test the capture only runs when flashAnalysis is requested."""
+        page = FakePage()
+        _analyze_webpage_sync(page, "https://example.com", ["headings"])
+        assert "flash_candidates" not in page.calls
+        result = _analyze_webpage_sync(page, "https://example.com", ["flashAnalysis"])
+        assert result["pageData"]["flashAnalysis"] == {"skipped": "no animated content"}
+
+
+class ListenerSession:
+    """CDP session double answering the listener inspection protocol."""
+
+    def __init__(self, listeners, nodes):
+        self.listeners = listeners
+        self.nodes = nodes
+        self.sent = []
+        self.detached = False
+
+    def send(self, method, params):
+        self.sent.append(method)
+        if method == "Runtime.evaluate":
+            return {"result": {"objectId": "doc-1"}}
+        if method == "DOM.describeNode":
+            if "objectId" in params:
+                return {"node": {"backendNodeId": 1, "nodeName": "#document"}}
+            return {"node": self.nodes[params["backendNodeId"]]}
+        if method == "DOMDebugger.getEventListeners":
+            assert params == {"objectId": "doc-1", "depth": -1, "pierce": True}
+            return {"listeners": self.listeners}
+        return {}
+
+    def detach(self):
+        self.detached = True
+
+
+class ListenerPage:
+    def __init__(self, session):
+        self.session = session
+        self.context = self
+
+    def new_cdp_session(self, page):
+        return self.session
+
+
+def listener(kind, node):
+    return {"type": kind, "useCapture": False, "passive": False, "once": False,
+            "scriptId": "1", "lineNumber": 0, "columnNumber": 0, "backendNodeId": node}
+
+
+class TestPointerListeners:
+    """Tests for the CDP listener inspection behind the Pointer Cancellation check."""
+
+    def test_down_only_elements_found(self):
+        """Test elements with down but no up/click listeners are reported and labelled."""
+        listeners = [
+            listener("mousedown", 1),  # The document itself
+            listener("pointerdown", 5), listener("click", 5),
+            listener("mousedown", 7),
+            listener("touchstart", 9), listener("keydown", 9),
+        ]
+        nodes = {7: {"localName": "div", "attributes": ["class", "slider handle"]},
+                 9: {"localName": "button", "attributes": ["id", "buy"]}}
+        session = ListenerSession(listeners, nodes)
+        result = _drive_sync(ListenerPage(session), _pointer_listener_steps(5))
+        assert result == {"elements": 3, "downOnly": 2, "examples": ["div.slider", "button#buy"], "roundTrips": 5}
+        assert session.detached
+
+    def test_round_trips_do_not_grow_with_page(self):
+        """Test thousands of listeners cost one listener query and capped lookups."""
+        listeners = [listener("pointerdown", node) for node in range(2, 5002)]
+        nodes = {node: {"localName": "span", "attributes": []} for node in range(2, 5002)}
+        session = ListenerSession(listeners, nodes)
+        result = _drive_sync(ListenerPage(session), _pointer_listener_steps(5))
+        assert result["downOnly"] == 5000 and len(result["examples"]) == 5
+        assert session.sent.count("DOMDebugger.getEventListeners") == 1
+        assert len(session.sent) == 9
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,100 @@
+"""
+Request Policy Tests for Web Compliance Checker
+
+Run with: pytest tests/test_request_policy.py -v
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.request_policy import RequestPolicy
+
+
+class FakeRequest:
+    def __init__(self, resource_type, url):
+        self.resource_type = resource_type
+        self.url = url
+
+
+class FakeRoute:
+    """Records which route action the handler picked."""
+
+    def __init__(self, resource_type, url):
+        self.request = FakeRequest(resource_type, url)
+        self.action = None
+
+    def abort(self, error_code=None):
+        self.action = "abort"
+
+    def fulfill(self, **kwargs):
+        self.action = ("fulfill", kwargs["status"])
+
+    def continue_(self):
+        self.action = "continue"
+
+
+class TestRequestPolicy:
+    """Tests for subrequest blocking decisions."""
+
+    def test_documents_always_allowed(self):
+        """Test the page itself is never blocked, even on a blocked host."""
+        policy = RequestPolicy(blocked_hosts={"example.com"})
+        assert policy.decide("document", "https://example.com/") == "continue"
+
+    def test_heavy_resources_blocked(self):
+        """Test images are stubbed while media and fonts are aborted."""
+        policy = RequestPolicy()
+        assert policy.decide("image", "https://example.com/a.png") == "stub"
+        assert policy.decide("ping", "https://example.com/beacon") == "stub"
+        assert policy.decide("media", "https://example.com/v.mp4") == "abort"
+        assert policy.decide("font", "https://example.com/f.woff2") == "abort"
+
+    def test_page_resources_allowed(self):
+        """Test scripts, stylesheets and XHR still load."""
+        policy = RequestPolicy()
+        for resource_type in ("script", "stylesheet", "xhr", "fetch"):
+            assert policy.decide(resource_type, "https://example.com/x") == "continue"
+
+    def test_tracker_subdomains_blocked(self):
+        """Test analytics hosts and their subdomains are aborted."""
+        policy = RequestPolicy()
+        assert policy.decide("script", "https://www.google-analytics.com/analytics.js") == "abort"
+        assert policy.decide("script", "https://static.hotjar.com/c/hotjar.js") == "abort"
+        assert policy.decide("script", "https://notgoogle-analytics.com/x.js") == "continue"
+
+    def test_abort_mode(self):
+        """Test stub=False aborts everything that is blocked."""
+        policy = RequestPolicy(stub=False)
+        assert policy.decide("image", "https://example.com/a.png") == "abort"
+
+    def test_handler_applies_decision(self):
+        """Test the route handler performs the chosen action."""
+        policy = RequestPolicy()
+        route = FakeRoute("image", "https://example.com/a.png")
+        policy.handle(route)
+        assert route.action == ("fulfill", 200)
+        route = FakeRoute("script", "https://example.com/app.js")
+        policy.handle(route)
+        assert route.action == "continue"
+
+    def test_from_env(self, monkeypatch):
+        """Test environment configuration."""
+        monkeypatch.setenv("REQUEST_POLICY", "off")
+        assert RequestPolicy.from_env() is None
+
+        monkeypatch.setenv("REQUEST_POLICY", "abort")
+        monkeypatch.setenv("BLOCK_RESOURCE_TYPES", "media")
+        monkeypatch.setenv("BLOCK_TRACKERS", "false")
+        monkeypatch.setenv("BLOCKED_HOSTS", "ads.example.net")
+        policy = RequestPolicy.from_env()
+        assert policy.blocked_types == {"media"}
+        assert policy.blocked_hosts == {"ads.example.net"}
+        assert not policy.stub
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
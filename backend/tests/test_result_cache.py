@@ -0,0 +1,184 @@
+"""
+Result Cache Tests for Web Compliance Checker
+
+Run with: pytest tests/test_result_cache.py -v
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import check_pipeline
+from app.services.check_pipeline import parse_cache_control, run_check
+from app.services.result_cache import ResultCache, RedisCacheBackend
+from app.utils.urls import normalize_url
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedis:
+    """Minimal stand-in for a Redis-protocol client (GET / SET EX)."""
+
+    def __init__(self):
+        self.store = {}
+        self.fail = False
+
+    async def get(self, key):
+        if self.fail:
+            raise ConnectionError("connection refused")
+        value = self.store.get(key)
+        return value.encode("utf-8") if value is not None else None
+
+    async def set(self, key, value, ex=None):
+        if self.fail:
+            raise ConnectionError("connection refused")
+        self.store[key] = value
+
+
+class TestNormalizeURL:
+    """Tests for URL normalization."""
+
+    def test_equivalent_spellings(self):
+        """Test case, default port, fragment and query order are normalized."""
+        assert normalize_url("HTTPS://Example.COM:443/a?b=2&a=1#top") == "https://example.com/a?a=1&b=2"
+        assert normalize_url("http://example.com") == "http://example.com/"
+
+    def test_significant_parts_kept(self):
+        """Test path case and non-default ports survive."""
+        assert normalize_url("http://example.com:8080/Path") == "http://example.com:8080/Path"
+
+
+class TestResultCache:
+    """Tests for the LRU/TTL cache."""
+
+    @pytest.mark.asyncio
+    async def test_hit_and_miss_counters(self):
+        """Test lookups are counted."""
+        cache = ResultCache(ttl=60)
+        assert await cache.get("k") is None
+        await cache.set("k", {"score": "1/1"})
+        assert await cache.get("k") == {"score": "1/1"}
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+        assert stats["hitRatio"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiry(self):
+        """Test entries expire after the TTL."""
+        clock = FakeClock()
+        cache = ResultCache(ttl=60, clock=clock)
+        await cache.set("k", {"v": 1})
+        clock.now += 61
+        assert await cache.get("k") is None
+        assert cache.stats()["size"] == 0
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        """Test the least recently used entry is evicted first."""
+        cache = ResultCache(ttl=60, max_entries=2)
+        await cache.set("a", {"v": "a"})
+        await cache.set("b", {"v": "b"})
+        await cache.get("a")
+        await cache.set("c", {"v": "c"})
+        assert await cache.get("b") is None
+        assert await cache.get("a") == {"v": "a"}
+
+    def test_key_uses_normalized_url_and_ruleset(self):
+        """Test equivalent URLs share a key and rulesets don't."""
+        key = ResultCache.make_key("https://Example.com/#x", "1")
+        assert key == ResultCache.make_key("https://example.com/", "1")
+        assert key != ResultCache.make_key("https://example.com/", "2")
+
+    @pytest.mark.asyncio
+    async def test_shared_backend(self):
+        """Test another worker's cache is served from the shared tier."""
+        redis = FakeRedis()
+        writer = ResultCache(ttl=60, backend=RedisCacheBackend(client=redis))
+        reader = ResultCache(ttl=60, backend=RedisCacheBackend(client=redis))
+        await writer.set("k", {"v": 1})
+        assert await reader.get("k") == {"v": 1}
+        assert reader.stats()["backendHits"] == 1
+        assert reader.stats()["backend"] == "redis"
+
+    @pytest.mark.asyncio
+    async def test_backend_outage_is_a_miss(self):
+        """Test backend errors don't fail lookups or writes."""
+        redis = FakeRedis()
+        redis.fail = True
+        cache = ResultCache(ttl=60, max_entries=0, backend=RedisCacheBackend(client=redis))
+        await cache.set("k", {"v": 1})
+        assert await cache.get("k") is None
+        assert cache.stats()["backendErrors"] == 2
+
+    @pytest.mark.asyncio
+    async def test_unreadable_backend_entry_is_a_miss(self):
+        """Test corrupt or old-format shared entries don't fail lookups."""
+        redis = FakeRedis()
+        cache = ResultCache(ttl=60, max_entries=0, backend=RedisCacheBackend(client=redis))
+        for key, raw in (("bad-json", "{not json"), ("old-format", '{"value": {}}'), ("wrong-type", "[1, 2]")):
+            redis.store[key] = raw
+            assert await cache.get(key) is None
+        assert cache.stats()["backendErrors"] == 3
+        assert cache.stats()["misses"] == 3
+
+    @pytest.mark.asyncio
+    async def test_disabled_with_zero_ttl(self):
+        """Test RESULT_CACHE_TTL=0 turns caching off."""
+        cache = ResultCache(ttl=0)
+        await cache.set("k", {"v": 1})
+        assert await cache.get("k") is None
+
+
+class TestRunCheckCaching:
+    """Tests for cache use in the check pipeline."""
+
+    @pytest.fixture
+    def fake_analysis(self, monkeypatch):
+        calls = []
+
+        async def analyze(url_string, on_progress=None, checks=None, engine=None, incremental=False):
+            calls.append(url_string)
+            return {"url": url_string, "checks": [], "score": "0/0"}
+
+        monkeypatch.setattr(check_pipeline, "analyze_url", analyze)
+        return calls
+
+    def test_cache_control_parsing(self):
+        """Test request Cache-Control directives."""
+        assert parse_cache_control(None) == (True, True)
+        assert parse_cache_control("no-cache") == (False, True)
+        assert parse_cache_control("max-age=0") == (False, True)
+        assert parse_cache_control("No-Store") == (False, False)
+
+    @pytest.mark.asyncio
+    async def test_second_check_served_from_cache(self, fake_analysis):
+        """Test a repeat check skips the analysis."""
+        cache = ResultCache(ttl=60)
+        _, status = await run_check("https://example.com/", cache=cache)
+        assert status == "MISS"
+        report, status = await run_check("https://EXAMPLE.com", cache=cache)
+        assert status == "HIT"
+        assert report["url"] == "https://EXAMPLE.com"
+        assert len(fake_analysis) == 1
+
+    @pytest.mark.asyncio
+    async def test_forced_refresh(self, fake_analysis):
+        """Test no-cache re-analyzes and refreshes the entry."""
+        cache = ResultCache(ttl=60)
+        await run_check("https://example.com/", cache=cache)
+        _, status = await run_check("https://example.com/", read_cache=False, cache=cache)
+        assert status == "MISS"
+        assert len(fake_analysis) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
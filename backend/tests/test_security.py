@@ -6,18 +6,26 @@ Run with: pytest tests/test_security.py -v
 """
 
 import pytest
+import asyncio
 import sys
 import os
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import dns.exception
+import pytest_asyncio
+
 from app.middleware.security import (
     validate_url,
     is_blocked_ip,
     sanitize_input,
     sanitize_url,
 )
+from app.utils import dns_resolver
+from app.utils.dns_resolver import CachingResolver, parse_nameservers
+from app.utils.dns_stub_server import DnsStubServer
+from app.utils.ip_trie import IPPrefixTrie
 
 
 class TestSSRFProtection:
@@ -119,6 +127,164 @@ class TestIPBlocking:
         assert not is_blocked_ip("8.8.8.8")
         assert not is_blocked_ip("1.1.1.1")
         assert not is_blocked_ip("93.184.216.34")  # example.com
+    
+    def test_ipv6_ranges(self):
+        """Test IPv6 loopback, private, link-local and mapped addresses."""
+        assert is_blocked_ip("::1")
+        assert is_blocked_ip("fd00::1")
+        assert is_blocked_ip("fe80::1")
+        assert is_blocked_ip("::ffff:10.0.0.1")
+        assert not is_blocked_ip("2606:2800:220:1:248:1893:25c8:1946")
+    
+    def test_unspecified_addresses(self):
+        """Test 0.0.0.0/8 and :: (which reach the local host) are blocked."""
+        assert is_blocked_ip("0.0.0.0")
+        assert is_blocked_ip("::")
+
+
+class TestPrefixTrie:
+    """Tests for the blocked-range prefix trie."""
+    
+    def test_matches_containing_network(self):
+        """Test lookups return the network holding the address."""
+        trie = IPPrefixTrie(["10.0.0.0/8", "192.168.1.0/24", "fc00::/7"])
+        assert str(trie.match("10.20.30.40")) == "10.0.0.0/8"
+        assert str(trie.match("fd12::1")) == "fc00::/7"
+        assert trie.match("192.168.2.1") is None
+        assert "192.168.1.255" in trie and "11.0.0.1" not in trie
+    
+    def test_shortest_prefix_wins(self):
+        """Test nested networks report the enclosing one."""
+        trie = IPPrefixTrie(["10.1.0.0/16", "10.0.0.0/8"])
+        assert str(trie.match("10.1.2.3")) == "10.0.0.0/8" and len(trie) == 2
+    
+    def test_host_and_default_routes(self):
+        """Test /32 and /0 prefixes."""
+        assert "1.2.3.4" in IPPrefixTrie(["1.2.3.4/32"])
+        assert "1.2.3.5" not in IPPrefixTrie(["1.2.3.4/32"])
+        assert "8.8.8.8" in IPPrefixTrie(["0.0.0.0/0"])
+    
+    def test_families_kept_apart(self):
+        """Test IPv4 networks never match IPv6 addresses."""
+        assert "::a00:1" not in IPPrefixTrie(["10.0.0.0/8"])
+    
+    def test_invalid_address(self):
+        """Test non-addresses raise ValueError."""
+        with pytest.raises(ValueError):
+            IPPrefixTrie().match("not-an-ip")
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+RECORDS = {
+    "example.test": ["93.184.216.34", "2606:2800:220:1:248:1893:25c8:1946"],
+    "v4only.test": ["1.1.1.1"],
+    "internal.test": ["93.184.216.35", "fd00::5"],
+}
+
+
+@pytest_asyncio.fixture
+async def stub():
+    """Local DNS server answering RECORDS with a 60s TTL."""
+    server = DnsStubServer(RECORDS, ttl=60)
+    server.port = await server.start()
+    yield server
+    server.close()
+
+
+def resolver_for(server, **kwargs):
+    return CachingResolver(nameservers=["127.0.0.1"], port=server.port, **kwargs)
+
+
+class TestDNSResolution:
+    """Tests for the async caching resolver against a stub DNS server."""
+    
+    @pytest.mark.asyncio
+    async def test_both_families_in_parallel(self, stub):
+        """Test A and AAAA answers are both returned."""
+        addresses = await resolver_for(stub).resolve("Example.TEST.")
+        assert sorted(addresses) == sorted(RECORDS["example.test"])
+        assert sorted(stub.queries) == [("example.test", "A"), ("example.test", "AAAA")]
+    
+    @pytest.mark.asyncio
+    async def test_cached_for_record_ttl(self, stub):
+        """Test answers are served from cache until the TTL runs out."""
+        clock = Clock()
+        resolver = resolver_for(stub, clock=clock)
+        await resolver.resolve("v4only.test")
+        clock.now += 59
+        assert await resolver.resolve("v4only.test") == ["1.1.1.1"]
+        assert len(stub.queries) == 2 and resolver.stats()["hits"] == 1
+        clock.now += 2
+        await resolver.resolve("v4only.test")
+        assert len(stub.queries) == 4
+    
+    @pytest.mark.asyncio
+    async def test_ttl_capped(self, stub):
+        """Test max_ttl bounds how long an answer is trusted."""
+        clock = Clock()
+        resolver = resolver_for(stub, max_ttl=10, clock=clock)
+        await resolver.resolve("v4only.test")
+        clock.now += 11
+        await resolver.resolve("v4only.test")
+        assert len(stub.queries) == 4
+    
+    @pytest.mark.asyncio
+    async def test_negative_caching(self, stub):
+        """Test names that don't exist are cached for negative_ttl."""
+        clock = Clock()
+        resolver = resolver_for(stub, negative_ttl=5, clock=clock)
+        assert await resolver.resolve("missing.test") == []
+        assert await resolver.resolve("missing.test") == []
+        assert len(stub.queries) == 2 and resolver.stats()["negativeHits"] == 1
+        clock.now += 6
+        await resolver.resolve("missing.test")
+        assert len(stub.queries) == 4
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_lookups_share_query(self, stub):
+        """Test simultaneous lookups of one name send one query per family."""
+        resolver = resolver_for(stub)
+        results = await asyncio.gather(*(resolver.resolve("example.test") for _ in range(5)))
+        assert all(sorted(r) == sorted(RECORDS["example.test"]) for r in results)
+        assert len(stub.queries) == 2
+    
+    @pytest.mark.asyncio
+    async def test_lru_bound(self, stub):
+        """Test the cache keeps at most max_entries names."""
+        resolver = resolver_for(stub, max_entries=1)
+        await resolver.resolve("example.test")
+        await resolver.resolve("v4only.test")
+        assert resolver.stats()["size"] == 1 and resolver.stats()["evictions"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_timeouts_not_cached(self, stub):
+        """Test failed lookups raise and are retried next time."""
+        stub.latency = 0.5
+        resolver = resolver_for(stub, timeout=0.1)
+        with pytest.raises(dns.exception.Timeout):
+            await resolver.resolve("example.test")
+        assert resolver.stats()["size"] == 0 and resolver.stats()["errors"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_validate_url_checks_ipv6(self, stub, monkeypatch):
+        """Test a private AAAA record blocks the URL."""
+        monkeypatch.setattr(dns_resolver, "_dns_resolver", resolver_for(stub))
+        assert (await validate_url("https://example.test/"))["valid"]
+        result = await validate_url("https://internal.test/")
+        assert not result["valid"] and "private" in result["error"]
+    
+    def test_parse_nameservers(self):
+        """Test DNS_NAMESERVERS parsing with ports and IPv6."""
+        assert parse_nameservers("127.0.0.1:5353") == (["127.0.0.1"], 5353)
+        assert parse_nameservers("8.8.8.8, [::1]:53") == (["8.8.8.8", "::1"], 53)
+        assert parse_nameservers("") == ([], None)
 
 
 class TestInputSanitization:
@@ -0,0 +1,167 @@
+"""
+Single-Flight Tests for Web Compliance Checker
+
+Run with: pytest tests/test_single_flight.py -v
+"""
+
+import pytest
+import asyncio
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import check_pipeline
+from app.services.check_pipeline import run_check
+from app.services.result_cache import ResultCache
+from app.utils.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """Tests for in-flight request coalescing."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        """Test ten concurrent callers trigger one run."""
+        flight = SingleFlight()
+        runs = 0
+
+        async def work():
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.02)
+            return "report"
+
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(10)))
+        assert runs == 1
+        assert [r for r, _ in results] == ["report"] * 10
+        assert sum(1 for _, shared in results if not shared) == 1
+        assert len(flight) == 0
+
+    @pytest.mark.asyncio
+    async def test_errors_shared_then_forgotten(self):
+        """Test a failure reaches every waiter and the next call retries."""
+        flight = SingleFlight()
+        runs = 0
+
+        async def failing():
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            *(flight.do("k", failing) for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(r, ValueError) for r in results)
+        assert runs == 1
+        with pytest.raises(ValueError):
+            await flight.do("k", failing)
+        assert runs == 2
+
+    @pytest.mark.asyncio
+    async def test_follower_timeout_does_not_cancel_leader(self):
+        """Test one caller timing out leaves the work running for others."""
+        flight = SingleFlight()
+
+        async def slow():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        leader = asyncio.create_task(flight.do("k", slow))
+        await asyncio.sleep(0)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(flight.do("k", slow), timeout=0.01)
+        assert await leader == ("done", False)
+
+    @pytest.mark.asyncio
+    async def test_last_waiter_leaving_cancels_work(self):
+        """Test work is cancelled once nobody is waiting for it."""
+        flight = SingleFlight()
+        cancelled = asyncio.Event()
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        task = asyncio.create_task(flight.do("k", slow))
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        assert len(flight) == 0
+
+    @pytest.mark.asyncio
+    async def test_pipeline_coalesces_same_url(self, monkeypatch):
+        """Test concurrent checks of one URL run a single analysis."""
+        calls = []
+
+        async def analyze(url_string, on_progress=None, checks=None, engine=None, incremental=False):
+            calls.append(url_string)
+            await asyncio.sleep(0.02)
+            return {"url": url_string, "checks": [], "score": "0/0"}
+
+        monkeypatch.setattr(check_pipeline, "analyze_url", analyze)
+        cache = ResultCache(ttl=60)
+        results = await asyncio.gather(
+            *(run_check("https://coalesce.example.com/", cache=cache) for _ in range(10))
+        )
+        assert len(calls) == 1
+        statuses = sorted(status for _, status in results)
+        assert statuses == ["COALESCED"] * 9 + ["MISS"]
+
+    @pytest.mark.asyncio
+    async def test_pipeline_keeps_cache_and_incremental_options_apart(self, monkeypatch):
+        """Test a storing or incremental check never joins one that differs."""
+        calls = []
+
+        async def analyze(url_string, on_progress=None, checks=None, engine=None, incremental=False):
+            calls.append(incremental)
+            await asyncio.sleep(0.02)
+            return {"url": url_string, "checks": [], "score": "0/0"}
+
+        monkeypatch.setattr(check_pipeline, "analyze_url", analyze)
+        cache = ResultCache(ttl=60)
+        url = "https://options.example.com/"
+        results = await asyncio.gather(
+            run_check(url, cache=cache, write_cache=False),
+            run_check(url, cache=cache, read_cache=False),
+            run_check(url, cache=cache, read_cache=False, incremental=True),
+        )
+        assert sorted(calls) == [False, False, True]
+        assert [status for _, status in results] == ["MISS"] * 3
+        assert await cache.get(ResultCache.make_key(url, check_pipeline._cache_version(None, None))) is not None
+
+    @pytest.mark.asyncio
+    async def test_pipeline_followers_see_progress(self, monkeypatch):
+        """Test a coalesced caller gets the phases of the analysis it joined."""
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def analyze(url_string, on_progress=None, checks=None, engine=None, incremental=False):
+            on_progress("navigating")
+            started.set()
+            await release.wait()
+            on_progress("checking")
+            return {"url": url_string, "checks": [], "score": "0/0"}
+
+        monkeypatch.setattr(check_pipeline, "analyze_url", analyze)
+        cache = ResultCache(ttl=60)
+        url = "https://progress.example.com/"
+        leader_phases, follower_phases = [], []
+        leader = asyncio.create_task(run_check(url, cache=cache, on_progress=leader_phases.append))
+        await started.wait()
+        follower = asyncio.create_task(run_check(url, cache=cache, on_progress=follower_phases.append))
+        await asyncio.sleep(0)
+        release.set()
+        (_, leader_status), (_, follower_status) = await asyncio.gather(leader, follower)
+        assert (leader_status, follower_status) == ("MISS", "COALESCED")
+        assert leader_phases == follower_phases == ["navigating", "checking"]
+        assert check_pipeline._progress == {}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,255 @@
+"""
+Static Analysis Engine Tests for Web Compliance Checker
+
+Parses markup without a browser; fetches go through httpx mock transports.
+Run with: pytest tests/test_static_analyzer.py -v
+"""
+
+import pytest
+import httpx
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from main import app
+from app.services import check_pipeline, compliance_checks
+from app.services.compliance_checks import (
+    check_reading_sequence,
+    check_skip_links,
+    run_compliance_checks,
+    select_engine_checks,
+)
+from app.utils import static_analyzer
+from app.utils.static_analyzer import (
+    StaticAnalysisError,
+    analyze_static,
+    client_rendering_reason,
+    extract_page_data,
+    fetch_html,
+    parse_html,
+)
+
+PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head><title>  Static
+  Page </title></head>
+<body>
+  <a href="#main">Skip to main content</a>
+  <nav><a href="/about">About</a></nav>
+  <h2 id="intro">Intro</h2>
+  <h1>Welcome</h1>
+  <img src="/logo.png" alt="Logo"><img src="hero.jpg">
+  <form>
+    <label for="email">Email</label><input id="email" type="EMAIL" required>
+    <label>Name <input name="name"></label>
+    <input placeholder="Search">
+    <select multiple id="tags"><option>a</option></select>
+    <button disabled>Send</button>
+  </form>
+  <div tabindex="-1" onclick="go()">Card</div>
+  <script>setInterval(rotate, 5000); // carousel</script>
+</body>
+</html>"""
+
+SPA = """<html><head><script src="/bundle.js"></script></head>
+<body><div id="root"></div></body></html>"""
+
+
+def page_data(html=PAGE, fields=None):
+    return extract_page_data(parse_html(html), "https://example.com/docs/", fields)
+
+
+class TestExtraction:
+    """Tests that markup yields the browser extractor's pageData shape."""
+
+    def test_headings_in_level_order(self):
+        """Test headings come out sorted by level like the browser extractors."""
+        assert [h["text"] for h in page_data()["headings"]] == ["Welcome", "Intro"]
+        assert page_data()["headings"][1] == {"level": 2, "text": "Intro", "id": "intro"}
+
+    def test_images_and_links_resolved(self):
+        """Test sources and hrefs are absolute and skip links are recognized."""
+        data = page_data()
+        assert data["images"] == [
+            {"src": "https://example.com/logo.png", "alt": "Logo", "title": None, "hasAlt": True},
+            {"src": "https://example.com/docs/hero.jpg", "alt": None, "title": None, "hasAlt": False},
+        ]
+        skip, about = data["links"]
+        assert skip["isSkipLink"] and skip["href"] == "https://example.com/docs/#main"
+        assert about == {"href": "https://example.com/about", "text": "About", "ariaLabel": None, "isSkipLink": False}
+
+    def test_form_labels(self):
+        """Test for=, wrapping labels and placeholder fallbacks."""
+        inputs = page_data()["formInputs"]
+        assert [(i["type"], i["label"]) for i in inputs] == [
+            ("email", "Email"), ("text", "Name"), ("text", "Search"), ("select-multiple", None),
+        ]
+        assert inputs[0]["required"] and not inputs[1]["required"]
+
+    def test_interactive_elements(self):
+        """Test focusability, onclick and disabled state."""
+        elements = page_data()["interactiveElements"]
+        by_tag = {e["tag"]: e for e in elements}
+        assert by_tag["button"]["disabled"] and by_tag["button"]["tabIndex"] == 0
+        assert by_tag["div"]["tabIndex"] == -1 and by_tag["div"]["hasOnclick"]
+        assert elements[0]["href"] == "https://example.com/docs/#main"
+
+    def test_document_flags(self):
+        """Test title, landmarks and script heuristics."""
+        data = page_data()
+        assert data["title"] == "Static Page"
+        assert data["hasLandmarks"] and data["hasTimers"] and data["hasAutoAdvance"]
+
+    def test_only_requested_fields(self):
+        """Test unrequested and browser-only fields are left out."""
+        assert set(page_data(fields=["headings", "textContrast"])) == {"headings"}
+
+    def test_fallback_parser_matches(self, monkeypatch):
+        """Test the html.parser fallback produces the same pageData."""
+        expected = page_data()
+        monkeypatch.setattr(static_analyzer, "lxml", None)
+        assert page_data() == expected
+
+
+class TestClientRendering:
+    """Tests for spotting pages that need the browser."""
+
+    def test_server_rendered_page(self):
+        """Test a page with real markup is fine without a browser."""
+        html = PAGE.replace("Welcome", "Welcome " + "text " * 60)
+        assert client_rendering_reason(parse_html(html)) is None
+
+    def test_empty_app_root(self):
+        """Test an empty SPA mount point is detected."""
+        assert client_rendering_reason(parse_html(SPA)) == "empty app root #root"
+
+    def test_little_text_with_scripts(self):
+        """Test a script-driven page with almost no text needs the browser."""
+        assert client_rendering_reason(parse_html(PAGE)) == "little server-rendered text"
+        assert client_rendering_reason(parse_html(PAGE.replace("<script>", "<noscript>").replace("</script>", "</noscript>"))) is None
+
+
+def mock_client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+class TestFetch:
+    """Tests for the pooled page fetch."""
+
+    @pytest.mark.asyncio
+    async def test_redirects_followed_and_validated(self):
+        """Test redirects are followed, but not into private addresses."""
+        def handler(request):
+            if request.url.path == "/old":
+                return httpx.Response(301, headers={"location": "/new"})
+            if request.url.path == "/new":
+                return httpx.Response(200, html=PAGE)
+            return httpx.Response(302, headers={"location": "http://10.0.0.1/admin"})
+
+        async with mock_client(handler) as client:
+            url, html = await fetch_html("https://93.184.216.34/old", client=client)
+            assert url == "https://93.184.216.34/new" and "<h1>" in html
+            with pytest.raises(StaticAnalysisError, match="Redirect blocked"):
+                await fetch_html("https://93.184.216.34/internal", client=client)
+
+    @pytest.mark.asyncio
+    async def test_non_html_and_oversized_rejected(self, monkeypatch):
+        """Test non-HTML responses and pages over STATIC_MAX_BYTES fail."""
+        def handler(request):
+            if request.url.path == "/data":
+                return httpx.Response(200, json={"a": 1})
+            return httpx.Response(200, html="<p>" + "x" * 5000 + "</p>")
+
+        monkeypatch.setenv("STATIC_MAX_BYTES", "1000")
+        async with mock_client(handler) as client:
+            with pytest.raises(StaticAnalysisError, match="Not an HTML page"):
+                await fetch_html("https://93.184.216.34/data", client=client)
+            with pytest.raises(StaticAnalysisError, match="too large"):
+                await fetch_html("https://93.184.216.34/big", client=client)
+
+    @pytest.mark.asyncio
+    async def test_auto_mode_declines_client_rendered(self):
+        """Test auto mode hands SPA shells back to the caller."""
+        async with mock_client(lambda request: httpx.Response(200, html=SPA)) as client:
+            assert await analyze_static("https://93.184.216.34/", ["headings"], auto=True, client=client) is None
+            result = await analyze_static("https://93.184.216.34/", ["headings"], client=client)
+            assert result["engine"] == "static" and result["pageData"] == {"headings": []}
+
+
+@pytest.fixture
+def engines(monkeypatch):
+    """Record which engine run_compliance_checks uses."""
+    used = []
+
+    async def static(url, fields=None, html=None, auto=False, client=None):
+        used.append("static")
+        if auto and "root" in (html or url):
+            return None
+        return {"pageData": extract_page_data(parse_html(html or PAGE), url, fields), "engine": "static"}
+
+    async def browser(url, fields=None, on_progress=None):
+        used.append("browser")
+        return {"pageData": page_data(fields=fields), "url": url}
+
+    monkeypatch.delenv("ANALYSIS_ENGINE", raising=False)
+    monkeypatch.setattr(compliance_checks, "analyze_static", static)
+    monkeypatch.setattr(compliance_checks, "analyze_webpage", browser)
+    return used
+
+
+class TestEngineSelection:
+    """Tests for picking the static or browser engine."""
+
+    @pytest.mark.asyncio
+    async def test_auto_uses_static_for_markup_checks(self, engines):
+        """Test auto mode skips the browser when every check reads markup."""
+        results = await run_compliance_checks("https://example.com", checks=[check_reading_sequence, check_skip_links])
+        assert engines == ["static"] and results["engine"] == "static"
+        assert results["passedCount"] == 2
+
+    @pytest.mark.asyncio
+    async def test_auto_falls_back_to_browser(self, engines):
+        """Test browser-only checks and client-rendered pages use the browser."""
+        results = await run_compliance_checks("https://example.com")
+        assert engines == ["browser"] and results["engine"] == "browser"
+        engines.clear()
+        await run_compliance_checks("https://example.com/root", checks=[check_skip_links])
+        assert engines == ["static", "browser"]
+
+    @pytest.mark.asyncio
+    async def test_uploaded_html_never_loads_browser(self, engines):
+        """Test supplied markup is analyzed statically."""
+        results = await run_compliance_checks("", checks=[check_skip_links], engine="browser", html=PAGE)
+        assert engines == ["static"] and results["checks"][0]["passed"]
+
+    def test_static_engine_check_selection(self):
+        """Test the static engine defaults to markup checks and rejects others."""
+        ids = [check.check_id for check in select_engine_checks(None, "static")]
+        assert ids == ["reading-sequence", "sensory-characteristics", "keyboard",
+                       "label-in-name", "timing-adjustable", "bypass-blocks"]
+        with pytest.raises(ValueError, match="use-of-color"):
+            select_engine_checks(["use-of-color"], "static")
+        with pytest.raises(ValueError, match="Unknown engine"):
+            select_engine_checks(None, "quantum")
+
+    def test_html_endpoint(self, monkeypatch):
+        """Test uploaded markup is checked without a fetch or browser."""
+        async def recommend(failed_checks, page_url, timeout=None):
+            return []
+
+        monkeypatch.setattr(check_pipeline, "generate_recommendations", recommend)
+        client = TestClient(app)
+        response = client.post("/api/check/html", json={"html": PAGE, "url": "https://example.com/"})
+        assert response.status_code == 200
+        report = response.json()
+        assert report["engine"] == "static" and report["totalCount"] == 6
+        response = client.post("/api/check/html", json={"html": PAGE, "checks": ["no-keyboard-trap"]})
+        assert response.status_code == 400
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,200 @@
+"""
+Tracing Tests for Web Compliance Checker
+
+Spans are collected with the in-memory exporter.
+Run with: pytest tests/test_tracing.py -v
+"""
+
+import pytest
+import json
+import logging
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.services import ai_recommender, compliance_checks
+from app.utils import tracing
+from app.utils.logger import JSONFormatter
+from app.utils.playwright_helper import _analyze_webpage_sync
+from app.utils.tracing import (
+    NOOP_SPAN,
+    STATUS_ERROR,
+    InMemorySpanExporter,
+    OTLPHttpExporter,
+    Tracer,
+    parse_traceparent,
+)
+from main import app
+from tests.test_playwright_helper import FakePage
+
+TRACEPARENT = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    """Route the shared tracer's spans to memory."""
+    exporter = InMemorySpanExporter()
+    monkeypatch.setattr(tracing, "_tracer", Tracer(exporter))
+    return exporter
+
+
+@pytest.fixture
+def client():
+    """Create test client."""
+    return TestClient(app)
+
+
+def by_name(exporter):
+    return {span.name: span for span in exporter.get_finished_spans()}
+
+
+class TestTracer:
+    """Tests for spans, nesting and the no-op default."""
+
+    def test_noop_by_default(self, monkeypatch):
+        """Test an unconfigured tracer hands out the shared no-op span."""
+        monkeypatch.delenv("TRACING_EXPORTER", raising=False)
+        tracer = Tracer.from_env()
+        assert not tracer.enabled
+        with tracer.span("anything", key="value") as span:
+            assert span is NOOP_SPAN
+            assert tracing.current_span() is None
+
+    def test_nesting_and_errors(self):
+        """Test children share the trace, point at their parent and record failures."""
+        exporter = InMemorySpanExporter()
+        tracer = Tracer(exporter)
+        with tracer.span("outer") as outer:
+            with pytest.raises(RuntimeError):
+                with tracer.span("inner", attempt=1):
+                    raise RuntimeError("boom")
+        inner, finished_outer = exporter.get_finished_spans()
+        assert finished_outer is outer and outer.parent_span_id is None
+        assert inner.trace_id == outer.trace_id and inner.parent_span_id == outer.span_id
+        assert inner.status == STATUS_ERROR and outer.status != STATUS_ERROR
+        assert tracing.current_span() is None
+
+    def test_otlp_shape(self):
+        """Test spans serialize to OTLP/JSON with typed attributes."""
+        exporter = InMemorySpanExporter()
+        with Tracer(exporter).span("check", id="alt", count=3, ratio=0.5, ok=True):
+            pass
+        otlp = exporter.get_finished_spans()[0].to_otlp()
+        assert len(otlp["traceId"]) == 32 and len(otlp["spanId"]) == 16
+        assert int(otlp["endTimeUnixNano"]) >= int(otlp["startTimeUnixNano"])
+        assert {item["key"]: item["value"] for item in otlp["attributes"]} == {
+            "id": {"stringValue": "alt"},
+            "count": {"intValue": "3"},
+            "ratio": {"doubleValue": 0.5},
+            "ok": {"boolValue": True},
+        }
+
+    def test_parse_traceparent(self):
+        """Test W3C traceparent headers are read and bad ones ignored."""
+        assert parse_traceparent(TRACEPARENT) == ("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7")
+        for header in (None, "", "garbage", "00-" + "0" * 32 + "-00f067aa0ba902b7-01"):
+            assert parse_traceparent(header) is None
+
+    def test_otlp_exporter_posts_batches(self):
+        """Test queued spans are sent to /v1/traces as one resourceSpans body."""
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json={})
+
+        otlp = OTLPHttpExporter(
+            endpoint="http://collector.test:4318/",
+            service_name="wcc-test",
+            client=httpx.Client(transport=httpx.MockTransport(handler)),
+        )
+        tracer = Tracer(otlp)
+        with tracer.span("a"):
+            with tracer.span("b"):
+                pass
+        otlp.shutdown()
+        assert [str(request.url) for request in requests] == ["http://collector.test:4318/v1/traces"]
+        body = json.loads(requests[0].content)
+        resource = body["resourceSpans"][0]
+        assert resource["resource"]["attributes"][0]["value"]["stringValue"] == "wcc-test"
+        assert [span["name"] for span in resource["scopeSpans"][0]["spans"]] == ["b", "a"]
+        assert otlp.exported == 2
+
+
+class TestRequestTracing:
+    """Tests for request spans, the response header and log correlation."""
+
+    def test_trace_id_header_without_exporter(self, client, monkeypatch):
+        """Test every response carries a trace id even when nothing is exported."""
+        monkeypatch.setattr(tracing, "_tracer", Tracer())
+        first = client.get("/health").headers["X-Trace-Id"]
+        second = client.get("/health").headers["X-Trace-Id"]
+        assert len(first) == 32 and first != second
+
+    def test_validate_url_span_joins_request(self, client, exporter):
+        """Test URL validation is a child of the request span, in the caller's trace."""
+        response = client.post("/api/check", json={"url": "http://127.0.0.1/"}, headers={"traceparent": TRACEPARENT})
+        assert response.status_code == 400
+        assert response.headers["X-Trace-Id"] == "4bf92f3577b34da6a3ce929d0e0e4736"
+        spans = by_name(exporter)
+        request = spans["POST /api/check"]
+        assert request.parent_span_id == "00f067aa0ba902b7"
+        assert request.attributes["status"] == 400
+        assert spans["validate_url"].parent_span_id == request.span_id
+
+    def test_json_logs_carry_trace_id(self, exporter):
+        """Test JSONFormatter writes the active trace and span ids."""
+        record = logging.LogRecord("wcc", logging.INFO, __file__, 1, "hello", None, None)
+        assert "trace_id" not in json.loads(JSONFormatter().format(record))
+        with tracing.get_tracer().span("work") as span:
+            logged = json.loads(JSONFormatter().format(record))
+        assert (logged["trace_id"], logged["span_id"]) == (span.trace_id, span.span_id)
+
+
+class TestInstrumentedSpans:
+    """Tests for spans around page phases, checks and recommendations."""
+
+    def test_page_phases(self, exporter):
+        """Test each browser phase gets a span under the caller's span."""
+        with tracing.get_tracer().span("analyze") as parent:
+            _analyze_webpage_sync(FakePage(), "https://example.com", ["headings", "textContrast"])
+        spans = by_name(exporter)
+        for name in ("page.goto", "page.settle", "page.content", "page.extract", "page.contrast"):
+            assert spans[name].parent_span_id == parent.span_id, name
+        assert spans["page.goto"].attributes["url"] == "https://example.com"
+
+    def test_failed_navigation_marked(self, exporter):
+        """Test a navigation timeout shows up as the failing span."""
+        with pytest.raises(Exception):
+            _analyze_webpage_sync(FakePage(fail_goto=True), "https://example.com", ["headings"])
+        spans = by_name(exporter)
+        assert spans["page.goto"].status == STATUS_ERROR
+        assert "page.settle" not in spans
+
+    @pytest.mark.asyncio
+    async def test_checks_on_worker_threads(self, exporter):
+        """Test CPU checks run on the pool still join the current trace."""
+        checks = compliance_checks.select_checks(["reading-sequence", "use-of-color"])
+        with tracing.get_tracer().span("evaluate") as parent:
+            await compliance_checks.evaluate_checks({"headings": [], "textContrast": {"elements": []}}, checks)
+        spans = by_name(exporter)
+        for name in ("check reading-sequence", "check use-of-color"):
+            assert spans[name].trace_id == parent.trace_id
+            assert spans[name].parent_span_id == parent.span_id
+
+    @pytest.mark.asyncio
+    async def test_generate_recommendations(self, exporter, monkeypatch):
+        """Test the recommendation pass and its model calls are traced."""
+        monkeypatch.setattr(ai_recommender, "get_llm_provider", lambda: None)
+        failed = [{"name": "Images Alt Text", "passed": False, "details": "Missing alt"}]
+        await ai_recommender.generate_recommendations(failed, "https://example.com")
+        assert by_name(exporter)["generate_recommendations"].attributes["failed_checks"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
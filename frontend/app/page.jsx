@@ -87,6 +87,49 @@ function HomePage() {
     }
   };
 
+  // Read a text/event-stream body, calling onEvent(event, data) per message
+  const readEventStream = async (response, onEvent) => {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const message = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+
+        let event = 'message';
+        let data = '';
+        for (const line of message.split('\n')) {
+          if (line.startsWith('event: ')) event = line.slice(7);
+          else if (line.startsWith('data: ')) data += line.slice(6);
+        }
+        if (data) onEvent(event, JSON.parse(data));
+      }
+    }
+  };
+
+  const saveToHistory = (data) => {
+    try {
+      localStorage.setItem('lastCheckResult', JSON.stringify(data));
+      const history = JSON.parse(localStorage.getItem('checkHistory') || '[]');
+      const newHistoryItem = { 
+        ...data, 
+        timestamp: new Date().toISOString(), 
+        id: `${Date.now()}-${Math.random().toString(36).substr(2, 9)}` 
+      };
+      history.unshift(newHistoryItem);
+      localStorage.setItem('checkHistory', JSON.stringify(history.slice(0, 20)));
+    } catch (e) {
+      console.error('Failed to save to history:', e);
+    }
+  };
+
   const handleCheck = async (urlToCheck) => {
     setLoading(true);
     setError(null);
@@ -98,7 +141,9 @@ function HomePage() {
     toast.loading('Starting compliance check...', { id: 'check-status' });
 
     try {
-      const response = await fetch('/api/check', {
+      // Stream the report: check results render as soon as the browser
+      // analysis finishes, recommendations fill in as they are generated
+      const response = await fetch('/api/check/stream', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -108,7 +153,7 @@ function HomePage() {
 
       if (!response.ok) {
         const errorData = await safeParseJson(response);
-        const errorMessage = errorData?.error || errorData?.message || 'Failed to check URL';
+        const errorMessage = errorData?.error || errorData?.detail || errorData?.message || 'Failed to check URL';
         const type = determineErrorType(errorMessage);
         setErrorType(type);
         setError(errorMessage);
@@ -119,49 +164,46 @@ function HomePage() {
         return;
       }
 
-      const data = await safeParseJson(response);
-      if (!data || typeof data !== 'object') {
-        throw new Error('Invalid response from server');
-      }
-
-      setProgress(100);
-      setProgressStage('Complete!');
-      
-      setTimeout(() => {
-        setResults(data);
-        setUrl(urlToCheck);
-        
-        // Save to localStorage
-        try {
-          localStorage.setItem('lastCheckResult', JSON.stringify(data));
-          const history = JSON.parse(localStorage.getItem('checkHistory') || '[]');
-          const newHistoryItem = { 
-            ...data, 
-            timestamp: new Date().toISOString(), 
-            id: `${Date.now()}-${Math.random().toString(36).substr(2, 9)}` 
-          };
-          history.unshift(newHistoryItem);
-          localStorage.setItem('checkHistory', JSON.stringify(history.slice(0, 20)));
-        } catch (e) {
-          console.error('Failed to save to history:', e);
-        }
-
-        toast.success(`Compliance check completed! Score: ${data.score}`, { 
-          id: 'check-status',
-          duration: 4000,
-        });
-
-        // Clear progress once results are shown
-        setTimeout(() => {
+      let finished = false;
+      await readEventStream(response, (event, data) => {
+        if (event === 'checks') {
           setProgress(0);
           setProgressStage('');
+          setResults(data);
+          setUrl(urlToCheck);
           setLoading(false);
-          resultsRef.current?.scrollIntoView({ behavior: 'smooth', block: 'start' });
-        }, 600);
-      }, 500);
+          toast.loading(`Score: ${data.score} - generating recommendations...`, { id: 'check-status' });
+          setTimeout(() => {
+            resultsRef.current?.scrollIntoView({ behavior: 'smooth', block: 'start' });
+          }, 100);
+        } else if (event === 'recommendation') {
+          setResults((current) => current && {
+            ...current,
+            checks: current.checks.map((check) => (
+              check.name === data.checkName
+                ? { ...check, recommendation: data.recommendation }
+                : check
+            )),
+          });
+        } else if (event === 'done') {
+          finished = true;
+          setResults(data);
+          saveToHistory(data);
+          toast.success(`Compliance check completed! Score: ${data.score}`, { 
+            id: 'check-status',
+            duration: 4000,
+          });
+        } else if (event === 'error') {
+          throw new Error(data.error || 'Failed to analyze webpage');
+        }
+      });
+
+      if (!finished) {
+        throw new Error('Connection closed before the check finished');
+      }
 
     } catch (err) {
-      const type = err.message?.toLowerCase().includes('fetch') ? 'network' : 'generic';
+      const type = err.message?.toLowerCase().includes('fetch') ? 'network' : determineErrorType(err.message || '');
       setErrorType(type);
       const errorMessage = err.message || 'An error occurred. Please ensure the Python backend server is running on port 3001.';
       setError(errorMessage);